@@ -51,6 +51,7 @@ from pyknyx.core.functionalBlock import FunctionalBlock, FB
 from pyknyx.core.datapoint import DP
 from pyknyx.core.groupObject import GO
 from pyknyx.core.ets import ETS
+from pyknyx.core.asyncEts import AsyncETS
 
 from pyknyx.services.scheduler import Scheduler
 from pyknyx.services.notifier import Notifier
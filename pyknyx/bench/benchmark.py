@@ -0,0 +1,319 @@
+# -*- coding: utf-8 -*-
+
+""" Python KNX framework
+
+License
+=======
+
+ - B{PyKNyX} (U{https://github.com/knxd/pyknyx}) is Copyright:
+  - © 2016-2017 Matthias Urlichs
+  - PyKNyX is a fork of pKNyX
+   - © 2013-2015 Frédéric Mantegazza
+
+This program is free software; you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation; either version 2 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program; if not, write to the Free Software
+Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA  02111-1307  USA
+or see:
+
+ - U{http://www.gnu.org/licenses/gpl.html}
+
+Module purpose
+==============
+
+Benchmarks framework
+
+Implements
+==========
+
+ - B{BenchmarkValueError}
+ - B{Benchmark}
+ - B{BenchmarkRunner}
+ - B{register}
+ - B{benchmarks}
+ - B{saveReport}
+ - B{loadReport}
+ - B{compare}
+
+Documentation
+=============
+
+A benchmark is a L{Benchmark} sub-class: setup() builds what is needed (out of the measurement), run(loops)
+repeats the measured operation loops times, teardown() cleans up. Benchmarks are registered by name, with
+L{register}; names are dotted, so that a set of benchmarks can be selected with shell-style patterns
+("cemi.*").
+
+The runner first runs each benchmark once (warm-up), calibrates the number of loops so that a run lasts at least
+minTime, then times several runs.
+Results are given per operation: best and median times, in s, and operations per second (from the best time).
+
+Reports are plain dicts, saved as JSON: results per benchmark name, and the environment they were measured in.
+A report saved as baseline can be compared to a new one: benchmarks whose best time grew more than the tolerance
+are reported as regressions. Only compare reports measured on the same machine.
+
+Usage
+=====
+
+>>> class Noop(Benchmark):
+...     name = "noop"
+...     def run(self, loops):
+...         for i in range(loops):
+...             pass
+>>> register(Noop())
+>>> report = BenchmarkRunner().run(benchmarks("noop"))
+>>> saveReport(report, "bench.json")
+>>> compare(report, loadReport("baseline.json"))
+[]
+
+@author: Frédéric Mantegazza
+@copyright: (C) 2013-2015 Frédéric Mantegazza
+@license: GPL
+"""
+
+
+import collections
+import fnmatch
+import json
+import platform
+import statistics
+import time
+
+from pyknyx.common import config
+from pyknyx.common.exception import PyKNyXValueError
+from pyknyx.services.logger import logging; logger = logging.getLogger(__name__)
+
+REPORT_VERSION = 1
+
+_benchmarks = collections.OrderedDict()
+
+
+class BenchmarkValueError(PyKNyXValueError):
+    """
+    """
+
+
+class Benchmark(object):
+    """ Benchmark class
+
+    Sub-classes must set name, and implement run().
+
+    @ivar name: benchmark name (dotted)
+    @type name: str
+
+    @ivar unit: what is measured by one loop
+    @type unit: str
+    """
+    name = None
+    unit = "op"
+
+    def setup(self):
+        """ Build what is needed by run() (not measured)
+        """
+        pass
+
+    def run(self, loops):
+        """ Repeat the measured operation
+
+        @param loops: number of operations
+        @type loops: int
+        """
+        raise NotImplementedError
+
+    def teardown(self):
+        """ Clean up what setup() built
+        """
+        pass
+
+
+def register(benchmark):
+    """ Register a benchmark
+
+    @param benchmark: benchmark to register
+    @type benchmark: L{Benchmark}
+
+    raise BenchmarkValueError:
+    """
+    if not benchmark.name:
+        raise BenchmarkValueError("benchmark without name (%r)" % benchmark)
+    if benchmark.name in _benchmarks:
+        raise BenchmarkValueError("benchmark already registered (%s)" % benchmark.name)
+    _benchmarks[benchmark.name] = benchmark
+
+
+def benchmarks(*patterns):
+    """ Registered benchmarks
+
+    @param patterns: shell-style patterns of the names to select (none: all)
+    @type patterns: str
+
+    @rtype: list of L{Benchmark}
+    """
+    if not patterns:
+        return list(_benchmarks.values())
+    return [benchmark for name, benchmark in _benchmarks.items()
+            if any(fnmatch.fnmatchcase(name, pattern) for pattern in patterns)]
+
+
+class BenchmarkRunner(object):
+    """ BenchmarkRunner class
+
+    @ivar _minTime: min. duration of a timed run, in s
+    @type _minTime: float
+
+    @ivar _repeat: number of timed runs
+    @type _repeat: int
+    """
+    # Max. number of loops of a run
+    MAX_LOOPS = 10000000
+
+    def __init__(self, minTime=0.2, repeat=5, clock=time.perf_counter):
+        """
+
+        @param minTime: min. duration of a timed run, in s
+        @type minTime: float
+
+        @param repeat: number of timed runs
+        @type repeat: int
+
+        @param clock: time source, in s
+        @type clock: callable
+
+        raise BenchmarkValueError:
+        """
+        super(BenchmarkRunner, self).__init__()
+
+        if minTime <= 0:
+            raise BenchmarkValueError("invalid min. time (%r)" % minTime)
+        if repeat < 1:
+            raise BenchmarkValueError("invalid repeat (%r)" % repeat)
+
+        self._minTime = minTime
+        self._repeat = repeat
+        self._clock = clock
+
+    def _time(self, benchmark, loops):
+        """ Time a run
+
+        @return: duration of the run, in s
+        @rtype: float
+        """
+        start = self._clock()
+        benchmark.run(loops)
+        return self._clock() - start
+
+    def _calibrate(self, benchmark):
+        """ Find the number of loops for a run to last at least minTime
+
+        @rtype: int
+        """
+        loops = 1
+        while True:
+            duration = self._time(benchmark, loops)
+            if duration >= self._minTime or loops >= BenchmarkRunner.MAX_LOOPS:
+                return loops
+            if duration <= 0:
+                loops *= 10
+            else:
+                loops = int(loops * self._minTime / duration * 1.1) + 1
+            loops = min(loops, BenchmarkRunner.MAX_LOOPS)
+
+    def runOne(self, benchmark):
+        """ Measure a benchmark
+
+        @return: number of loops per run, best and median times per operation (s), operations per second
+        @rtype: dict
+        """
+        logger.debug("BenchmarkRunner.runOne(): %s" % benchmark.name)
+
+        benchmark.setup()
+        try:
+            benchmark.run(1)  # warm-up (caches, threads start-up)
+            loops = self._calibrate(benchmark)
+            times = [self._time(benchmark, loops) / loops for i in range(self._repeat)]
+        finally:
+            benchmark.teardown()
+
+        best = min(times)
+        return dict(unit=benchmark.unit, loops=loops, best=best, median=statistics.median(times),
+                    opsPerSec=1. / best if best > 0 else None)
+
+    def run(self, benchmarks_):
+        """ Measure several benchmarks
+
+        @param benchmarks_: benchmarks to run
+        @type benchmarks_: iterable of L{Benchmark}
+
+        @return: report
+        @rtype: dict
+        """
+        results = collections.OrderedDict()
+        for benchmark in benchmarks_:
+            results[benchmark.name] = self.runOne(benchmark)
+
+        return dict(version=REPORT_VERSION,
+                    time=time.time(),
+                    pyknyx=config.APP_VERSION,
+                    python=platform.python_version(),
+                    implementation=platform.python_implementation(),
+                    machine=platform.machine(),
+                    node=platform.node(),
+                    minTime=self._minTime,
+                    repeat=self._repeat,
+                    results=results)
+
+
+def saveReport(report, path):
+    """ Save a report as JSON
+    """
+    with open(path, "w") as file_:
+        json.dump(report, file_, indent=2, sort_keys=True)
+        file_.write("\n")
+
+
+def loadReport(path):
+    """ Load a report saved as JSON
+
+    raise BenchmarkValueError:
+    """
+    with open(path) as file_:
+        report = json.load(file_)
+    if report.get("version") != REPORT_VERSION or "results" not in report:
+        raise BenchmarkValueError("unsupported report (%s)" % path)
+    return report
+
+
+def compare(report, baseline, tolerance=0.2):
+    """ Find the regressions of a report against a baseline
+
+    Benchmarks missing from one of the reports are ignored.
+
+    @param report: new report
+    @type report: dict
+
+    @param baseline: reference report
+    @type baseline: dict
+
+    @param tolerance: allowed growth of the best time (0.2: 20%)
+    @type tolerance: float
+
+    @return: name, baseline best time, new best time and ratio of each regression
+    @rtype: list of tuple
+    """
+    regressions = []
+    for name, result in report["results"].items():
+        reference = baseline["results"].get(name)
+        if reference is None or not reference["best"]:
+            continue
+        ratio = result["best"] / reference["best"]
+        if ratio > 1. + tolerance:
+            regressions.append((name, reference["best"], result["best"], ratio))
+    return regressions
@@ -0,0 +1,358 @@
+# -*- coding: utf-8 -*-
+
+""" Python KNX framework
+
+License
+=======
+
+ - B{PyKNyX} (U{https://github.com/knxd/pyknyx}) is Copyright:
+  - © 2016-2017 Matthias Urlichs
+  - PyKNyX is a fork of pKNyX
+   - © 2013-2015 Frédéric Mantegazza
+
+This program is free software; you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation; either version 2 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program; if not, write to the Free Software
+Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA  02111-1307  USA
+or see:
+
+ - U{http://www.gnu.org/licenses/gpl.html}
+
+Module purpose
+==============
+
+PyKNyX stack benchmarks
+
+Implements
+==========
+
+ - B{CEMIParseBenchmark}
+ - B{CEMIEncodeBenchmark}
+ - B{DPTXlatorBenchmark}
+ - B{ProcessFrameBenchmark}
+ - B{NotifierBenchmark}
+ - B{RoundTripBenchmark}
+ - B{LoopbackBenchmark}
+
+Documentation
+=============
+
+Benchmarks registered on import (see L{benchmark<pyknyx.bench.benchmark>}):
+
+ - cemi.parse, cemi.encode: cEMI L_Data frames decoding/encoding;
+ - dpt.<main type>.encode, dpt.<main type>.decode: value <-> frame conversion, for each DPTXlator;
+ - ets.processFrame.<N>x<M>: dispatch of group frames by L{ETSBase.processFrame<pyknyx.core.ets>}, with N
+   devices subscribing M group addresses each;
+ - notifier.fanout.<K>: datapoint change notified to K methods of a functional block;
+ - ets.roundtrip: latency of a group write between 2 devices, through the ETS thread;
+ - ets.loopback: same, with the devices on 2 ETS connected by a L{loopback bus<pyknyx.stack.transceiver.loopbackTransceiver>}.
+
+Usage
+=====
+
+>>> from pyknyx.bench import stackBenchmarks
+>>> report = BenchmarkRunner().run(benchmarks("cemi.*"))
+
+@author: Frédéric Mantegazza
+@copyright: (C) 2013-2015 Frédéric Mantegazza
+@license: GPL
+"""
+
+
+import threading
+
+from pyknyx.services.logger import logging; logger = logging.getLogger(__name__)
+from pyknyx.services.notifier import Notifier
+from pyknyx.bench.benchmark import Benchmark, register
+from pyknyx.core.device import Device
+from pyknyx.core.functionalBlock import FunctionalBlock, FB
+from pyknyx.core.datapoint import DP
+from pyknyx.core.groupObject import GO
+from pyknyx.core.groupListener import GroupListener
+from pyknyx.core.ets import ETS
+from pyknyx.core.dptXlator.dptXlatorFactory import DPTXlatorFactory
+from pyknyx.stack.stack import Stack
+from pyknyx.stack.groupAddress import GroupAddress
+from pyknyx.stack.individualAddress import IndividualAddress
+from pyknyx.stack.priority import Priority
+from pyknyx.stack.cemi.cemiLData import CEMILData
+from pyknyx.stack.transceiver.loopbackTransceiver import LoopbackBus, LoopbackTransceiver
+
+_PRIORITY = Priority("low")
+_SRC = IndividualAddress("1.1.250")
+
+
+def _groupFrame(gad, value=1):
+    return CEMILData.groupData(gad, _PRIORITY, 6, bytearray((0x00, 0x80 | value)), _SRC)
+
+
+class CEMIParseBenchmark(Benchmark):
+    """ Decode a cEMI frame (addresses and NPDU)
+    """
+    name = "cemi.parse"
+
+    def setup(self):
+        self._raw = bytes(_groupFrame(GroupAddress("1/1/1")).frame.raw)
+
+    def run(self, loops):
+        raw = self._raw
+        for i in range(loops):
+            cEMI = CEMILData(raw)
+            cEMI.sourceAddress
+            cEMI.destinationAddress
+            cEMI.npdu
+
+
+class CEMIEncodeBenchmark(Benchmark):
+    """ Encode a group value cEMI frame
+    """
+    name = "cemi.encode"
+
+    def setup(self):
+        self._gad = GroupAddress("1/1/1")
+        self._tPDU = bytearray((0x00, 0x81))
+
+    def run(self, loops):
+        gad = self._gad
+        tPDU = self._tPDU
+        for i in range(loops):
+            CEMILData.groupData(gad, _PRIORITY, 6, tPDU, _SRC).frame.raw
+
+
+class DPTXlatorBenchmark(Benchmark):
+    """ Convert a value to a frame (encode), or a frame to a value (decode)
+
+    The sample value is the one of a null frame, valid for all DPTs.
+    """
+    def __init__(self, dptId, decode):
+        """
+
+        @param dptId: generic Datapoint Type ID of the DPTXlator
+        @type dptId: L{DPTID<pyknyx.core.dptXlator.dptId>}
+
+        @param decode: measure decoding (else, encoding)
+        @type decode: bool
+        """
+        super(DPTXlatorBenchmark, self).__init__()
+
+        self._dptId = dptId
+        self._decode = decode
+        self.name = "dpt.%s.%s" % (dptId.main, "decode" if decode else "encode")
+
+    def setup(self):
+        self._dptXlator = DPTXlatorFactory().create(self._dptId)
+        self._frame = bytearray(max(1, self._dptXlator.typeSize))
+        self._value = self._dptXlator.dataToValue(self._dptXlator.frameToData(self._frame))
+
+    def run(self, loops):
+        dptXlator = self._dptXlator
+        if self._decode:
+            frame = self._frame
+            for i in range(loops):
+                dptXlator.dataToValue(dptXlator.frameToData(frame))
+        else:
+            value = self._value
+            for i in range(loops):
+                dptXlator.dataToFrame(dptXlator.valueToData(value))
+
+
+class _NullListener(GroupListener):
+    """ Group listener doing nothing
+    """
+    def onWrite(self, src, data):
+        pass
+
+    def onRead(self, src):
+        pass
+
+    def onResponse(self, src, data):
+        pass
+
+
+class ProcessFrameBenchmark(Benchmark):
+    """ Dispatch group frames to N devices, subscribing M group addresses each
+    """
+    def __init__(self, devices, groupObjects):
+        super(ProcessFrameBenchmark, self).__init__()
+
+        self._devices = devices
+        self._groupObjects = groupObjects
+        self.name = "ets.processFrame.%dx%d" % (devices, groupObjects)
+        self.unit = "frame"
+
+    def setup(self):
+        self._ets = ETS("1.1.0", addrRange=self._devices + 1, transCls=None)
+        self._sender = Stack(self._ets, self._ets.allocAddress())
+        listener = _NullListener()
+        for device in range(self._devices):
+            stack = Stack(self._ets, self._ets.allocAddress())
+            for groupObject in range(self._groupObjects):
+                stack.agds.subscribe(GroupAddress((device // 8 + 1, device % 8, groupObject)), listener)
+        self._frames = [_groupFrame(GroupAddress((device // 8 + 1, device % 8, groupObject)))
+                        for groupObject in range(self._groupObjects) for device in range(self._devices)]
+
+    def run(self, loops):
+        processFrame = self._ets.processFrame
+        l2 = self._sender._lds
+        frames = self._frames
+        count = len(frames)
+        for i in range(loops):
+            processFrame(l2, frames[i % count])
+
+    def teardown(self):
+        self._ets = self._sender = self._frames = None
+
+
+class NotifierBenchmark(Benchmark):
+    """ Change a datapoint value, notified to K methods of its functional block
+    """
+    def __init__(self, methods):
+        super(NotifierBenchmark, self).__init__()
+
+        self._methods = methods
+        self.name = "notifier.fanout.%d" % methods
+        self.unit = "change"
+
+    def _makeDevice(self):
+        """ Build a device class whose functional block has K notified methods
+        """
+        def makeMethod(index):
+            def method(self, event):
+                self.count += 1
+            method.__name__ = "notified_%d_%d" % (self._methods, index)
+            return method
+
+        attrs = dict(value=DP(dptId="5.010", default=0, access="input"), DESC="NotifierBenchmarkFB", count=0)
+        for index in range(self._methods):
+            method = makeMethod(index)
+            attrs[method.__name__] = Notifier().datapoint(dp="value", condition="change")(method)
+        fbCls = type("NotifierBenchmarkFB%d" % self._methods, (FunctionalBlock,), attrs)
+        return type("NotifierBenchmarkDevice%d" % self._methods, (Device,),
+                    dict(fb_=FB(fbCls, desc="notifier benchmark"), DESC="NotifierBenchmarkDevice"))
+
+    def setup(self):
+        self._ets = ETS("1.1.0", addrRange=1, transCls=None)
+        self._device = self._makeDevice()(self._ets, "1.1.1")
+        self._dp = self._device.fb["fb_"].dp["value"]
+        self._value = 0
+
+    def run(self, loops):
+        dp = self._dp
+        value = self._value
+        for i in range(loops):
+            value = (value + 1) & 0xff
+            dp.value = value
+        self._value = value
+
+    def teardown(self):
+        self._ets = self._device = self._dp = None
+
+
+class _RoundTripSenderFB(FunctionalBlock):
+    value = DP(dptId="5.010", default=0, access="output")
+    GO_01 = GO(dp=value, flags="CT", priority="low")
+    DESC = "RoundTripSenderFB"
+
+
+class _RoundTripReceiverFB(FunctionalBlock):
+    value = DP(dptId="5.010", default=0, access="input")
+    GO_01 = GO(dp=value, flags="CW", priority="low")
+    DESC = "RoundTripReceiverFB"
+
+    received = None
+
+    @Notifier().datapoint(dp="value", condition="always")
+    def valueReceived(self, event):
+        if self.received is not None:
+            self.received.set()
+
+
+class _RoundTripSender(Device):
+    sender_fb = FB(_RoundTripSenderFB, desc="round trip sender")
+    DESC = "RoundTripSender"
+
+
+class _RoundTripReceiver(Device):
+    receiver_fb = FB(_RoundTripReceiverFB, desc="round trip receiver")
+    DESC = "RoundTripReceiver"
+
+
+class RoundTripBenchmark(Benchmark):
+    """ Group write from a device to another, through the ETS thread
+    """
+    name = "ets.roundtrip"
+    unit = "write"
+
+    # Max. time to wait for a write, in s
+    TIMEOUT = 1.
+
+    def _makeETS(self):
+        """ Build the ETS the devices are connected to
+
+        @return: ETS of the sender, ETS of the receiver
+        @rtype: tuple of L{ETS<pyknyx.core.ets>}
+        """
+        ets = ETS("1.1.0", addrRange=2, transCls=None)
+        return ets, ets
+
+    def setup(self):
+        senderETS, receiverETS = self._makeETS()
+        self._ets = [senderETS] if receiverETS is senderETS else [receiverETS, senderETS]
+        gad = GroupAddress("1/1/1")
+        sender = _RoundTripSender(senderETS, "1.1.1")
+        receiver = _RoundTripReceiver(receiverETS, "1.1.2")
+        for device, fb in ((sender, "sender_fb"), (receiver, "receiver_fb")):
+            groupObject = device.fb[fb].go["value"]
+            groupObject.group = device.stack.agds.subscribe(gad, groupObject)
+        self._fb = receiver.fb["receiver_fb"]
+        self._fb.received = threading.Event()
+        self._dp = sender.fb["sender_fb"].dp["value"]
+        for ets in self._ets:
+            ets.start()
+
+    def run(self, loops):
+        dp = self._dp
+        received = self._fb.received
+        for i in range(loops):
+            received.clear()
+            dp.value = (dp.value + 1) & 0xff
+            if not received.wait(RoundTripBenchmark.TIMEOUT):
+                logger.warning("RoundTripBenchmark.run(): write lost")
+
+    def teardown(self):
+        for ets in self._ets:
+            ets.stop()
+        self._ets = self._fb = self._dp = None
+
+
+class LoopbackBenchmark(RoundTripBenchmark):
+    """ Group write from a device to another one, on another ETS, through a loopback bus
+    """
+    name = "ets.loopback"
+
+    def _makeETS(self):
+        bus = LoopbackBus()
+        return (ETS("1.1.0", transCls=LoopbackTransceiver, transParams=dict(bus=bus)),
+                ETS("1.2.0", transCls=LoopbackTransceiver, transParams=dict(bus=bus)))
+
+
+register(CEMIParseBenchmark())
+register(CEMIEncodeBenchmark())
+for dptId in sorted(DPTXlatorFactory()._handledMainDPTMappers):
+    register(DPTXlatorBenchmark(dptId, decode=False))
+    register(DPTXlatorBenchmark(dptId, decode=True))
+register(ProcessFrameBenchmark(10, 10))
+register(ProcessFrameBenchmark(100, 10))
+register(NotifierBenchmark(1))
+register(NotifierBenchmark(10))
+register(RoundTripBenchmark())
+register(LoopbackBenchmark())
@@ -52,3 +52,21 @@ LOGGER_LEVEL = "INFO"
 LOGGER_DIR = "/tmp"
 LOGGER_MAX_BYTES = 4096 * 1024
 LOGGER_BACKUP_COUNT = 4  # set to 0 to disable logging on file
+LOGGER_ASYNC = False  # write logs from a background thread (see pyknyx.services.logger)
+LOGGER_QUEUE_SIZE = 10000  # max. number of messages waiting to be written, when asynchronous
+LOGGER_RATE_BURST = 10  # max. number of messages per call site and interval, when asynchronous (None: unlimited)
+LOGGER_RATE_INTERVAL = 10.  # rate limiting interval, in s
+
+# Metrics
+METRICS_PORT = None  # port of the local metrics HTTP endpoint; None to disable metrics
+
+# Group values cache
+VALUE_CACHE_PATH = None  # file the group values are saved to, and restored from at start; None to disable
+VALUE_CACHE_PERIOD = 300.  # snapshot period, in s
+VALUE_CACHE_MAX_AGE = None  # cached values older than this are read from the bus at start, in s; None for any age
+
+# Initial state reads
+INIT_READ_RATE = 10.  # max. number of reads per second
+INIT_READ_IN_FLIGHT = 4  # max. number of reads waiting for a response
+INIT_READ_TIMEOUT = 2.  # time to wait for a response, in s
+INIT_READ_RETRIES = 2  # number of reads sent again to a group address which did not answer
@@ -0,0 +1,322 @@
+# -*- coding: utf-8 -*-
+
+""" Python KNX framework
+
+License
+=======
+
+ - B{PyKNyX} (U{https://github.com/knxd/pyknyx}) is Copyright:
+  - © 2016-2017 Matthias Urlichs
+  - PyKNyX is a fork of pKNyX
+   - © 2013-2015 Frédéric Mantegazza
+
+This program is free software; you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation; either version 2 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program; if not, write to the Free Software
+Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA  02111-1307  USA
+or see:
+
+ - U{http://www.gnu.org/licenses/gpl.html}
+
+Module purpose
+==============
+
+ETS management, asyncio engine
+
+Implements
+==========
+
+ - B{AsyncETS}
+
+Documentation
+=============
+
+Frame dispatch, transceiver I/O, initial group reads and scheduled jobs all run on a single asyncio event loop.
+Transports may implement start()/stop() as coroutines; plain methods are called as is.
+
+putFrame() may still be called from any thread (e.g. by a job running in an executor); the event loop is woken up
+accordingly.
+
+Usage
+=====
+
+>>> async def main():
+...     ets = AsyncETS("1.2.0")
+...     MyDevice(ets, "1.2.3")
+...     await ets.start()
+...     await ets.waitReady(timeout=60)
+...     ...
+...     await ets.stop()
+
+@author: Frédéric Mantegazza
+@copyright: (C) 2013-2015 Frédéric Mantegazza
+@license: GPL
+"""
+
+import asyncio
+import threading
+import time
+
+from apscheduler.schedulers.asyncio import AsyncIOScheduler
+
+from pyknyx.services.logger import logging; logger = logging.getLogger(__name__)
+from pyknyx.services.tracer import tracer; trace = tracer("ets")
+from pyknyx.services.metrics import metrics
+from pyknyx.core.ets import ETSBase, ETSValueError
+from pyknyx.stack.priorityQueue import PriorityQueue
+from pyknyx.stack.transceiver.asyncUdpTransceiver import AsyncUDPTransceiver
+
+
+class AsyncETS(ETSBase):
+    """ AsyncETS class
+
+    @ivar _queue: frames waiting to be dispatched
+    @type _queue: L{PriorityQueue<pyknyx.stack.priorityQueue>}
+
+    @ivar _loop: event loop the engine runs on
+    @type _loop: L{AbstractEventLoop<asyncio>}
+
+    @ivar _wakeup: set when frames have been queued
+    @type _wakeup: L{Event<asyncio>}
+
+    @ivar _tasks: running tasks (dispatcher, initial state reads)
+    @type _tasks: set of L{Task<asyncio>}
+
+    @ivar _initTask: runs the initial state reads
+    @type _initTask: L{Task<asyncio>}
+
+    @ivar _initWakeup: wakes the initial state reads task up
+    @type _initWakeup: L{Event<asyncio>}
+    """
+    # Number of frames dispatched before yielding to the event loop
+    BATCH_SIZE = 64
+
+    def __init__(self, *args, **kwargs):
+        """
+        Set up the ETS stack.
+
+        See L{ETSBase<pyknyx.core.ets>} for parameters; transCls defaults to
+        L{AsyncUDPTransceiver<pyknyx.stack.transceiver.asyncUdpTransceiver>}. As putFrame() is called from the
+        event loop, the queue can't use the BLOCK policy.
+
+        raise ETSValueError:
+        """
+        if kwargs.get("queuePolicy") == PriorityQueue.BLOCK:
+            raise ETSValueError("blocking queue policy not supported by the asyncio engine")
+        if len(args) < 3:
+            kwargs.setdefault("transCls", AsyncUDPTransceiver)
+        super(AsyncETS, self).__init__(*args, **kwargs)
+
+        self._loop = None
+        self._loopThread = None
+        self._wakeup = None
+        self._initWakeup = None
+        self._initTask = None
+        self._tasks = set()
+
+    async def _call(self, func):
+        """ Call a start/stop method, which may or may not be a coroutine
+        """
+        result = func()
+        if asyncio.iscoroutine(result):
+            result = await result
+        return result
+
+    def _spawn(self, coro):
+        task = self._loop.create_task(coro)
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        return task
+
+    def _startLayer2(self, layer2):
+        result = layer2.start()
+        if asyncio.iscoroutine(result):
+            self._spawn(result)
+
+    def _startInitReads(self):
+        if self._initTask is None:
+            self._initTask = self._spawn(self._runInitReads())
+        else:
+            self._initWakeup.set()
+
+    def _wakeInitReads(self):
+        """ Called by the init reader when a response arrives (from any thread)
+        """
+        loop = self._loop
+        if loop is None:
+            return
+        if threading.current_thread().ident == self._loopThread:
+            self._initWakeup.set()
+        else:
+            loop.call_soon_threadsafe(self._initWakeup.set)
+
+    async def _runInitReads(self):
+        """ Run the initial state reads
+
+        Asynchronous version of L{ETS._runInitReads<pyknyx.core.ets>}.
+        """
+        logger.trace("AsyncETS._runInitReads(): starting")
+        try:
+            while self._running:
+                delay = self._initReader.step()
+                try:
+                    await asyncio.wait_for(self._initWakeup.wait(), delay)  # None: until more reads are planned
+                except asyncio.TimeoutError:
+                    pass
+                self._initWakeup.clear()
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            logger.exception("AsyncETS._runInitReads()")
+        finally:
+            logger.trace("AsyncETS._runInitReads(): exit")
+
+    async def waitReady(self, timeout=None):
+        """ Wait until the initial state of the devices has been read
+
+        See L{ETSBase.ready<pyknyx.core.ets>}.
+
+        @param timeout: max. time to wait, in s (None: no limit)
+        @type timeout: float
+
+        @return: group addresses which never answered
+        @rtype: list of L{GroupAddress<pyknyx.stack.groupAddress>}
+
+        raise asyncio.TimeoutError: not ready in time
+        """
+        return await asyncio.wait_for(asyncio.shield(asyncio.wrap_future(self.ready)), timeout)
+
+    def _wake(self):
+        if self._wakeup is not None:
+            self._wakeup.set()
+
+    def putFrame(self, l2, cEMI):
+        """
+        Add a frame to be processed.
+
+        May be called from any thread.
+
+        @param cEMI:
+        @type cEMI:
+        """
+        if trace.enabled:
+            trace("AsyncETS.putFrame(): cEMI=%s", cEMI)
+
+        if metrics.enabled:
+            cEMI.rxTime = time.time()
+
+        if self._recorder is not None:
+            self._recorder.record(l2, cEMI)
+
+        self._queue.add((l2, cEMI), cEMI.priority)
+
+        loop = self._loop
+        if loop is None:
+            return  # will be processed once started
+        if threading.current_thread().ident == self._loopThread:
+            self._wake()
+        else:
+            loop.call_soon_threadsafe(self._wake)
+
+    async def putFrameAsync(self, l2, cEMI):
+        """
+        Add a frame to be processed, and give the dispatcher a chance to run.
+        """
+        self.putFrame(l2, cEMI)
+        await asyncio.sleep(0)
+
+    async def _dispatchLoop(self):
+        logger.debug("AsyncETS._dispatchLoop(): starting")
+        try:
+            while self._running:
+                # Clear the event before draining the queue, so that a frame
+                # added meanwhile will wake us up again.
+                self._wakeup.clear()
+                n = 0
+                while self._running:
+                    try:
+                        l2, cEMI = self._queue.removeNowait()
+                    except IndexError:
+                        break
+                    try:
+                        self.processFrame(l2, cEMI)
+                    except Exception:
+                        logger.exception("AsyncETS._dispatchLoop()")
+                    n += 1
+                    if n >= self.BATCH_SIZE:
+                        n = 0
+                        await asyncio.sleep(0)
+                else:
+                    break
+                await self._wakeup.wait()
+        finally:
+            logger.trace("AsyncETS._dispatchLoop(): exit")
+
+    async def start(self):
+        """ Start the engine on the running event loop
+        """
+        if self._running:
+            return
+        self._loop = asyncio.get_event_loop()
+        self._loopThread = threading.current_thread().ident
+        self._wakeup = asyncio.Event()
+        self._initWakeup = asyncio.Event()
+        self._initReader.wakeup = self._wakeInitReads
+        self._running = True
+
+        # Metrics are unregistered on stop
+        self._registerMetrics()
+        for layer2 in list(self._layer2):
+            layer2.registerMetrics()
+            await self._call(layer2.start)
+        self._scheduler.start(type_=AsyncIOScheduler)
+        self._spawn(self._dispatchLoop())
+        self._startValueCache()
+        for device in list(self._devices):
+            self._startDevice(device)
+        self._planInitReads(list(self._devices))
+
+    async def stop(self):
+        """ Stop the engine
+        """
+        if not self._running:
+            return
+        self._running = False
+        self._wake()
+        self._initReader.stop()
+
+        tasks = list(self._tasks)
+        for task in tasks:
+            task.cancel()
+        if tasks:
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+        self._scheduler.stop()
+        for device in self._devices:
+            device.stop()
+        for layer2 in self._layer2:
+            await self._call(layer2.stop)
+        self._groupValueCache.stop()
+        self._unregisterMetrics()
+
+        self._queue = self._newQueue()
+        self._loop = self._loopThread = self._wakeup = self._initWakeup = self._initTask = None
+
+    async def mainLoop(self):
+        """ Run until cancelled
+        """
+        await self.start()
+        try:
+            while True:
+                await asyncio.sleep(9999)
+        finally:
+            await self.stop()
@@ -0,0 +1,267 @@
+# -*- coding: utf-8 -*-
+
+""" Python KNX framework
+
+License
+=======
+
+ - B{PyKNyX} (U{https://github.com/knxd/pyknyx}) is Copyright:
+  - © 2016-2017 Matthias Urlichs
+  - PyKNyX is a fork of pKNyX
+   - © 2013-2015 Frédéric Mantegazza
+
+This program is free software; you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation; either version 2 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program; if not, write to the Free Software
+Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA  02111-1307  USA
+or see:
+
+ - U{http://www.gnu.org/licenses/gpl.html}
+
+Module purpose
+==============
+
+Multi-process devices hosting
+
+Implements
+==========
+
+ - B{DeviceSupervisorValueError}
+ - B{DeviceSupervisor}
+
+Documentation
+=============
+
+Hosts devices in several worker processes, sharing the transceivers of a single front process, so that the
+devices of a large installation can use several CPUs, and a crashing worker doesn't stop the bus connection.
+
+The front process runs the usual L{ETS<pyknyx.core.ets>}, with the real transceivers. Each worker runs its own ETS,
+with a L{ShmTransceiver<pyknyx.stack.transceiver.shmTransceiver>} as only transceiver, and hosts a subset of the
+devices (assigned round-robin, unless a worker is given). Telegrams are passed between the front ETS and the
+workers through shared memory rings, as raw cEMI frames; workers announce the group addresses their devices use,
+so that they only get those frames.
+
+Workers are forked (Unix only), so devices classes don't have to be importable by name. The supervisor must be
+started before the front ETS, while the process has no other thread running.
+
+Devices hosted by workers must have an individual address: workers can't allocate one.
+
+Usage
+=====
+
+>>> ets = ETS("1.1.0", transCls=UDPTransceiver)
+>>> supervisor = DeviceSupervisor(ets, workers=2)
+>>> supervisor.addDevice(Timer, "1.1.1")
+0
+>>> supervisor.addDevice(Heating, "1.1.2")
+1
+>>> supervisor.start()
+>>> ets.start()
+...
+>>> supervisor.stop()
+>>> ets.stop()
+
+@author: Frédéric Mantegazza
+@copyright: (C) 2013-2015 Frédéric Mantegazza
+@license: GPL
+"""
+
+
+import multiprocessing
+import os
+import socket
+
+from pyknyx.common.exception import PyKNyXValueError
+from pyknyx.services.logger import logging; logger = logging.getLogger(__name__)
+from pyknyx.core.ets import ETS
+from pyknyx.stack.individualAddress import IndividualAddress
+from pyknyx.stack.shmRing import ShmRing
+from pyknyx.stack.transceiver.shmTransceiver import ShmTransceiver, ShmWorkerLink
+
+
+class DeviceSupervisorValueError(PyKNyXValueError):
+    """
+    """
+
+
+class DeviceSupervisor(object):
+    """ DeviceSupervisor class
+
+    @ivar _ets: front ETS
+    @type _ets: L{ETS<pyknyx.core.ets>}
+
+    @ivar _devices: devices to create, per worker
+    @type _devices: list of list of tuple (device class, individual address, kwargs)
+
+    @ivar _links: front side of the workers connections
+    @type _links: list of L{ShmWorkerLink<pyknyx.stack.transceiver.shmTransceiver>}
+
+    @ivar _processes: worker processes
+    @type _processes: list of L{Process<multiprocessing>}
+    """
+    # Time given to workers to stop, in s
+    STOP_TIMEOUT = 5.
+
+    def __init__(self, ets, workers=2, ringSize=ShmRing.DEFAULT_SIZE):
+        """
+
+        @param ets: front ETS
+        @type ets: L{ETS<pyknyx.core.ets>}
+
+        @param workers: number of worker processes
+        @type workers: int
+
+        @param ringSize: size of each shared memory ring, in bytes
+        @type ringSize: int
+
+        raise DeviceSupervisorValueError:
+        """
+        super(DeviceSupervisor, self).__init__()
+
+        if workers < 1:
+            raise DeviceSupervisorValueError("invalid number of workers (%r)" % workers)
+
+        self._ets = ets
+        self._ringSize = ringSize
+        self._devices = [[] for i in range(workers)]
+        self._next = 0
+
+        self._links = []
+        self._processes = []
+        self._rings = []
+        self._sockets = []
+
+    @property
+    def workers(self):
+        return len(self._devices)
+
+    @property
+    def links(self):
+        return tuple(self._links)
+
+    @property
+    def processes(self):
+        return tuple(self._processes)
+
+    def addDevice(self, deviceCls, individualAddress, worker=None, **kwargs):
+        """ Add a device to create in a worker
+
+        @param deviceCls: device class (or any callable taking the worker ETS and the address)
+        @type deviceCls: class
+
+        @param individualAddress: device individual address
+        @type individualAddress: L{IndividualAddress} or str
+
+        @param worker: index of the worker hosting the device (None: next one)
+        @type worker: int
+
+        @param kwargs: additional device parameters
+
+        @return: index of the worker hosting the device
+        @rtype: int
+
+        raise DeviceSupervisorValueError:
+        """
+        if self._processes:
+            raise DeviceSupervisorValueError("supervisor already started")
+        if worker is None:
+            worker = self._next
+            self._next = (self._next + 1) % len(self._devices)
+        elif not 0 <= worker < len(self._devices):
+            raise DeviceSupervisorValueError("invalid worker (%r)" % worker)
+        individualAddress = IndividualAddress(individualAddress)
+        if individualAddress.isNull:
+            raise DeviceSupervisorValueError("devices hosted by workers need an individual address")
+        self._devices[worker].append((deviceCls, individualAddress, kwargs))
+
+        return worker
+
+    def _workerMain(self, index, inRing, outRing, inBell, outBell):
+        """ Worker process main function
+        """
+        status = 0
+        try:
+            for sock in self._sockets:
+                if sock is not inBell and sock is not outBell:
+                    sock.close()
+            logger.info("DeviceSupervisor: worker %d started (pid %d)" % (index, os.getpid()))
+
+            ets = ETS(self._ets.addr, addrRange=0, transCls=None, dedupWindow=None, addrAging=None)
+            transceiver = ShmTransceiver(ets, inRing, outRing, inBell, outBell)
+            for deviceCls, individualAddress, kwargs in self._devices[index]:
+                deviceCls(ets, individualAddress, **kwargs)
+            transceiver.announce()
+
+            ets.start()
+            transceiver.wait()
+            ets.stop()
+            logger.info("DeviceSupervisor: worker %d stopped" % index)
+        except Exception:
+            logger.exception("DeviceSupervisor._workerMain()")
+            status = 1
+        finally:
+            os._exit(status)
+
+    def start(self):
+        """ Fork the workers
+
+        Must be called before starting the front ETS.
+        """
+        logger.trace("DeviceSupervisor.start()")
+
+        if self._processes:
+            return
+        context = multiprocessing.get_context("fork")
+        for index in range(len(self._devices)):
+            down = ShmRing(self._ringSize)
+            up = ShmRing(self._ringSize)
+            self._rings.extend((down, up))
+            downBells = socket.socketpair()
+            upBells = socket.socketpair()
+            for sock in downBells + upBells:
+                sock.setblocking(False)
+            self._sockets.extend((downBells[1], upBells[0], downBells[0], upBells[1]))
+
+            self._links.append(ShmWorkerLink(self._ets, up, down, upBells[0], downBells[1]))
+            process = context.Process(target=self._workerMain, args=(index, down, up, downBells[0], upBells[1]),
+                                      name="device worker %d" % index)
+            process.daemon = True
+            process.start()
+            self._processes.append(process)
+
+            # Worker ends are only used by the worker
+            for sock in (downBells[0], upBells[1]):
+                sock.close()
+                self._sockets.remove(sock)
+
+    def stop(self):
+        """ Stop the workers
+
+        Workers stop when their doorbell is closed; they are killed if they don't stop in time.
+        """
+        logger.trace("DeviceSupervisor.stop()")
+
+        for sock in self._sockets:
+            sock.close()
+        self._sockets = []
+        for index, process in enumerate(self._processes):
+            process.join(DeviceSupervisor.STOP_TIMEOUT)
+            if process.is_alive():
+                logger.warning("DeviceSupervisor.stop(): worker %d doesn't stop, killed" % index)
+                process.kill()
+                process.join()
+        self._processes = []
+        for link in self._links:
+            link.stop()
+        for ring in self._rings:
+            ring.close()
+        self._rings = []
@@ -35,6 +35,7 @@ ETS management
 Implements
 ==========
 
+ - B{ETSBase}
  - B{ETS}
 
 Documentation
@@ -50,11 +51,13 @@ Usage
 
 import six
 import threading
+import time
 from itertools import chain
 
 from pyknyx.common.exception import PyKNyXValueError
 from pyknyx.common.singleton import Singleton
 from pyknyx.services.logger import logging; logger = logging.getLogger(__name__)
+from pyknyx.services.tracer import tracer; trace = tracer("ets")
 from pyknyx.stack.flags import Flags
 from pyknyx.stack.priority import Priority
 from pyknyx.stack.individualAddress import IndividualAddress
@@ -62,17 +65,29 @@ from pyknyx.stack.groupAddress import GroupAddress
 from pyknyx.services.scheduler import Scheduler
 from pyknyx.services.notifier import Notifier
 from pyknyx.services.groupAddressTableMapper import GroupAddressTableMapper
+from pyknyx.services.metrics import metrics
 from pyknyx.stack.priorityQueue import PriorityQueue
+from pyknyx.stack.duplicateFilter import DuplicateFilter
+from pyknyx.stack.individualAddressTable import IndividualAddressTable
+from pyknyx.stack.groupValueCache import GroupValueCache
+from pyknyx.stack.layer7.apci import APCI
+from pyknyx.stack.layer7.apdu import APDU
+from pyknyx.core.initReader import InitReader
 from pyknyx.stack.layer2.l_dataService import PRIORITY_DISTRIBUTION
 from pyknyx.stack.transceiver.udpTransceiver import UDPTransceiver
+from pyknyx.core.shardedDispatcher import ShardedDispatcher
 
 
 class ETSValueError(PyKNyXValueError):
     """
     """
 
-class ETS(threading.Thread):
-    """ ETS class
+class ETSBase(object):
+    """ ETS common code
+
+    Holds the devices and transports, and routes frames between them. It
+    does not run anything by itself; see L{ETS} for the threaded engine and
+    L{AsyncETS<pyknyx.core.asyncEts>} for the asyncio one.
 
     @ivar _devices: registered devices
     @type _devices: list of L{Device<pyknyx.core.device>}
@@ -83,28 +98,119 @@ class ETS(threading.Thread):
     @ivar _running: flag whether ETS has been started
     @type _devices: bool
 
+    @ivar _groupSubscribers: layer2 subscribed to each group address
+    @type _groupSubscribers: dict of raw GAD -> tuple of L{L_DataServiceBase<pyknyx.stack.layer2.l_dataServiceBase>}
+
+    @ivar _groupAll: layer2 which get all group frames (broadcast media, group monitors)
+    @type _groupAll: tuple of L{L_DataServiceBase<pyknyx.stack.layer2.l_dataServiceBase>}
+
+    @ivar _duplicateFilter: suppresses duplicate frames received from broadcast media (None: disabled)
+    @type _duplicateFilter: L{DuplicateFilter<pyknyx.stack.duplicateFilter>}
+
+    @ivar _addressTable: broadcast medium on which individual addresses were last seen (None: disabled)
+    @type _addressTable: L{IndividualAddressTable<pyknyx.stack.individualAddressTable>}
+
+    @ivar _localAddrs: raw individual addresses of the local (non broadcast) layer2
+    @type _localAddrs: set of int
+
+    @ivar _recorder: records the frames put to ETS (None: no recording)
+    @type _recorder: L{BusCaptureWriter<pyknyx.stack.busCapture>}
+
+    @ivar _groupValueCache: last value seen on each group address
+    @type _groupValueCache: L{GroupValueCache<pyknyx.stack.groupValueCache>}
+
+    @ivar _initReader: reads the initial state of the devices groups
+    @type _initReader: L{InitReader<pyknyx.core.initReader>}
+
+    @ivar _unroutable: number of frames no layer2 wanted (see L{Metrics<pyknyx.services.metrics>})
+    @type _unroutable: L{Counter<pyknyx.services.metrics>}
+
     raise ETSValueError:
     """
     _running = False
 
     def __init__(self, addr, addrRange=-1,
                  transCls=UDPTransceiver,
-                 transParams=dict(mcastAddr="224.0.23.12", mcastPort=3671)):
+                 transParams=dict(mcastAddr="224.0.23.12", mcastPort=3671),
+                 queueCapacity=None, queuePolicy=PriorityQueue.DROP_OLDEST,
+                 dedupWindow=DuplicateFilter.WINDOW, dedupSize=DuplicateFilter.MAX_ENTRIES,
+                 addrAging=IndividualAddressTable.AGING,
+                 valueCachePath=None, valueCachePeriod=GroupValueCache.PERIOD, valueCacheMaxAge=None,
+                 initReadRate=InitReader.RATE, initReadInFlight=InitReader.IN_FLIGHT,
+                 initReadTimeout=InitReader.TIMEOUT, initReadRetries=InitReader.RETRIES):
         """
         Set up the ETS stack.
 
         @param addr: the physical address of this stack (and possibly its sole device)
+
+        @param queueCapacity: max. number of frames waiting for dispatch, per priority (None: unbounded)
+        @type queueCapacity: int or list of int
+
+        @param queuePolicy: what to do with frames when the queue is full
+        @type queuePolicy: str, see L{PriorityQueue<pyknyx.stack.priorityQueue>}
+
+        @param dedupWindow: time during which duplicates of a frame received from a broadcast medium are
+                            suppressed, in s (None or 0: no suppression)
+        @type dedupWindow: float
+
+        @param dedupSize: max. number of frames remembered for duplicates suppression
+        @type dedupSize: int
+
+        @param addrAging: time after which an individual address not seen again on a broadcast medium is
+                          forgotten, in s (None or 0: no learning, individual frames are always flooded)
+        @type addrAging: float
+
+        @param valueCachePath: file the group values cache is restored from at start, and saved to periodically
+                               and at stop (None: cache not persistent)
+        @type valueCachePath: str
+
+        @param valueCachePeriod: group values cache snapshot period, in s
+        @type valueCachePeriod: float
+
+        @param valueCacheMaxAge: cached values older than this are read from the bus at start, in s (None: any age)
+        @type valueCacheMaxAge: float
+
+        @param initReadRate: max. number of initial state reads per second
+        @type initReadRate: float
+
+        @param initReadInFlight: max. number of initial state reads waiting for a response
+        @type initReadInFlight: int
+
+        @param initReadTimeout: time to wait for the response to an initial state read, in s
+        @type initReadTimeout: float
+
+        @param initReadRetries: number of initial state reads sent again to a group address which did not answer
+        @type initReadRetries: int
         """
-        super(ETS, self).__init__()
+        super(ETSBase, self).__init__()
+        self._queueCapacity = queueCapacity
+        self._queuePolicy = queuePolicy
+        self._queue = self._newQueue()
         self._devices = set()
         self._layer2 = set()
+        self._groupSubscribers = {}
+        self._groupAll = ()
+        if dedupWindow:
+            self._duplicateFilter = DuplicateFilter(dedupWindow, dedupSize)
+        else:
+            self._duplicateFilter = None
+        if addrAging:
+            self._addressTable = IndividualAddressTable(addrAging)
+        else:
+            self._addressTable = None
+        self._localAddrs = set()
+        self._recorder = None
+        self._groupValueCache = GroupValueCache(valueCacheMaxAge)
+        self._valueCachePath = valueCachePath
+        self._valueCachePeriod = valueCachePeriod
+        self._initReader = InitReader(initReadRate, initReadInFlight, initReadTimeout, initReadRetries)
         self._addr = IndividualAddress(addr)
         self._addrNum = addrRange
         self._addrAlloc = self._addr
-        self._queue = PriorityQueue(PRIORITY_DISTRIBUTION)
+
+        self._registerMetrics()
 
         self._scheduler = Scheduler()
-        self.setDaemon(True)
         if transCls is None:
             self._tc = None
         else:
@@ -112,6 +218,113 @@ class ETS(threading.Thread):
         #self.addLayer2(self._tc)
 
 
+    def _newQueue(self):
+        return PriorityQueue(PRIORITY_DISTRIBUTION, self._queueCapacity, self._queuePolicy)
+
+    def _registerMetrics(self):
+        """ Register the metrics of the engine
+        """
+        label = self.metricsLabel
+        metrics.queue(label, lambda: self._queue)
+        metrics.counter("pyknyx_ets_duplicate_frames_total", "duplicate frames suppressed",
+                        lambda: self._duplicateFilter.suppressed if self._duplicateFilter is not None else 0,
+                        ets=label)
+        self._unroutable = metrics.counter("pyknyx_ets_unroutable_frames_total",
+                                           "frames not forwarded to any layer2 (no subscriber...)", ets=label)
+
+    def _unregisterMetrics(self):
+        """ Unregister the metrics of the engine (on stop)
+        """
+        label = self.metricsLabel
+        metrics.unregister(queue=label)
+        metrics.unregister(ets=label)
+
+    @property
+    def metricsLabel(self):
+        """ Name of the engine in metrics
+        """
+        return "ETS %s" % self._addr
+
+    @property
+    def queue(self):
+        """ Frames waiting for dispatch
+        """
+        return self._queue
+
+    @property
+    def duplicateFilter(self):
+        """ Duplicate frames suppression (None if disabled)
+        """
+        return self._duplicateFilter
+
+    @property
+    def addressTable(self):
+        """ Learned individual addresses location (None if disabled)
+        """
+        return self._addressTable
+
+    @property
+    def groupValueCache(self):
+        """ Last value seen on each group address (see L{GroupValueCache<pyknyx.stack.groupValueCache>})
+        """
+        return self._groupValueCache
+
+    def _startValueCache(self):
+        """ Restore the group values cache, and start its snapshots (if persistent)
+        """
+        if self._valueCachePath is not None:
+            self._groupValueCache.start(self._valueCachePath, self._valueCachePeriod)
+
+    @property
+    def initReader(self):
+        """ Reads the initial state of the devices groups (see L{InitReader<pyknyx.core.initReader>})
+        """
+        return self._initReader
+
+    @property
+    def ready(self):
+        """ Resolved once the initial state of the devices has been read
+
+        See L{InitReader.ready<pyknyx.core.initReader>}.
+
+        @rtype: L{Future<concurrent.futures>}
+        """
+        return self._initReader.ready
+
+    def _planInitReads(self, devices):
+        """ Read the initial state of some devices
+
+        Groups with an 'init' group object are initialised from the group values cache if possible, read from the
+        bus otherwise; group addresses shared by several devices are read only once.
+        """
+        reader = self._initReader
+        for device in devices:
+            stack = device.stack
+            for group in stack.initGroups():
+                if not stack.initFromCache(group):
+                    reader.add(group)
+        logger.debug("ETS._planInitReads(): %d group addresses to read" % reader.pending)
+        self._startInitReads()
+
+    def _startInitReads(self):
+        """ Run the initial state reads (engine specific)
+        """
+        raise NotImplementedError
+
+    @property
+    def recorder(self):
+        """ Records the frames put to ETS, with the layer2 they come from (None: no recording)
+
+        Any object with a record(l2, cEMI) method can be used, usually a
+        L{BusCaptureWriter<pyknyx.stack.busCapture>}. It is called from the
+        threads of the transports, and must be thread-safe.
+        """
+        return self._recorder
+
+    @recorder.setter
+    def recorder(self, recorder):
+        self._recorder = recorder
+
     def allocAddress(self):
         """
         Return a new physical address for a device.
@@ -141,8 +354,85 @@ class ETS(threading.Thread):
 
     def addLayer2(self, layer2):
         self._layer2.add(layer2)
+        if not layer2.hop and isinstance(layer2.physAddr, IndividualAddress):
+            self._localAddrs.add(layer2.physAddr.raw)
+        if not layer2.groupIndexed and layer2 not in self._groupAll:
+            self._groupAll += (layer2,)
         if self._running:
-            layer2.start()
+            self._startLayer2(layer2)
+
+    def _startLayer2(self, layer2):
+        """ Start a transport (engine specific)
+        """
+        layer2.start()
+
+    def _startDevice(self, device):
+        """ Start a device (engine specific)
+        """
+        device.start()
+
+    def subscribeGroup(self, layer2, gad):
+        """ Route frames sent to a group address to a layer2
+
+        Only relevant for layer2 whose group frames are routed by index (see
+        L{L_DataServiceBase.groupIndexed<pyknyx.stack.layer2.l_dataServiceBase>}); other ones get all group frames.
+
+        @param layer2: subscribing layer2
+        @type layer2: L{L_DataServiceBase<pyknyx.stack.layer2.l_dataServiceBase>}
+
+        @param gad: group address. The null address subscribes to all group frames (group monitor).
+        @type gad: L{GroupAddress}
+        """
+        if layer2 in self._groupAll:
+            return
+        if gad.isNull:
+            self._groupAll += (layer2,)
+            for raw, subscribers in list(self._groupSubscribers.items()):
+                if layer2 in subscribers:
+                    self._groupSubscribers[raw] = tuple(l2 for l2 in subscribers if l2 is not layer2)
+        else:
+            subscribers = self._groupSubscribers.get(gad.raw, ())
+            if layer2 not in subscribers:
+                self._groupSubscribers[gad.raw] = subscribers + (layer2,)
+
+    @property
+    def subscribedGroups(self):
+        """ Group addresses subscribed by local devices
+
+        Can be used to fill the group filter table of a transport (see
+        L{L_DataServiceBroadcast.filterGroups<pyknyx.stack.layer2.l_dataServiceBase>}).
+
+        @rtype: list of L{GroupAddress}
+        """
+        return [GroupAddress.fromRaw(raw) for raw, subscribers in self._groupSubscribers.items() if subscribers]
+
+    @property
+    def groupMonitors(self):
+        """ Layer2 which get all group frames
+
+        @rtype: tuple of L{L_DataServiceBase<pyknyx.stack.layer2.l_dataServiceBase>}
+        """
+        return self._groupAll
+
+    @property
+    def localAddresses(self):
+        """ Raw individual addresses of the local devices
+
+        @rtype: frozenset of int
+        """
+        return frozenset(self._localAddrs)
+
+    def addLocalAddress(self, addr):
+        """ Declare the individual address of a device reached through a non broadcast layer2
+
+        Such addresses are never learned from broadcast media (see L{IndividualAddressTable<pyknyx.stack.individualAddressTable>}).
+
+        @param addr: individual address
+        @type addr: L{IndividualAddress} or raw int
+        """
+        if isinstance(addr, IndividualAddress):
+            addr = addr.raw
+        self._localAddrs.add(addr)
 
     def register(self, device, buildingMap='root', links=()):
         """
@@ -177,7 +467,8 @@ class ETS(threading.Thread):
                 groupObject.group = group
 
         if self._running:
-            device.start()
+            self._startDevice(device)
+            self._planInitReads((device,))
 
     def putFrame(self, l2, cEMI):
         """
@@ -186,51 +477,22 @@ class ETS(threading.Thread):
         @param cEMI:
         @type cEMI:
         """
-        logger.debug("ETS.putFrame(): cEMI=%s" % cEMI)
-
-        # Get priority from cEMI
-        priority = cEMI.priority
+        raise NotImplementedError
 
-        # Add to inQueue and notify inQueue handler
-        self._queue.add((l2,cEMI), priority)
+    def _cacheGroupValue(self, cEMI):
+        """ Remember the value written, or sent in response to a read, by a group frame
 
-    def start(self):
-        if self._running:
+        Values sent by the local devices are remembered when sent (see
+        L{A_GroupDataService<pyknyx.stack.layer7.a_groupDataService>}).
+        """
+        npdu = cEMI.npdu
+        if len(npdu) < 3 or npdu[1] & 0xc0:  # too short or not a group value
             return
-        self._queue = PriorityQueue(PRIORITY_DISTRIBUTION) # clean start
-        super(ETS,self).start()
-
-    def run(self):
-        self._running = True
-        logger.debug("ETS.run(): starting")
-        try:
-            for dev in self._layer2:
-                dev.start()
-            for dev in self._devices:
-                dev.start()
-            self._scheduler.start()
-            while self._running:
-                logger.trace("ETS.run(): looping")
-                msg = self._queue.remove()
-                if msg is None:
-                    logger.trace("ETS.run(): exit: None")
-                    return
-                l2,cEMI = msg
-                self.processFrame(l2,cEMI)
-            logger.trace("ETS.run(): exit: !_running")
-        except Exception:
-            logger.exception("ETS main loop")
-        finally:
-            self._running = False
-
-    def stop(self):
-        self._running = False
-        self._scheduler.stop()
-        self._queue.add(None,Priority('system'))
-        for dev in self._devices:
-            dev.stop()
-        for dev in self._layer2:
-            dev.stop()
+        apci = (npdu[1] << 8 | npdu[2]) & APCI._4
+        if apci == APCI.GROUPVALUE_WRITE or apci == APCI.GROUPVALUE_RES:
+            src = cEMI.frame.sa
+            if src not in self._localAddrs:
+                self._groupValueCache.update(cEMI.frame.da, src, APDU.getGroupValue(npdu[1:]))
 
     def processFrame(self, l2, cEMI):
         """
@@ -238,7 +500,18 @@ class ETS(threading.Thread):
         other eligible interfaces.
         """
 
-        logger.trace("recv: get %s from %s", cEMI, l2)
+        if trace.enabled:
+            trace("recv: get %s from %s", cEMI, l2)
+        if metrics.enabled:
+            l2.rxFrames.inc()
+        if l2.hop and self._duplicateFilter is not None and self._duplicateFilter.isDuplicate(cEMI, l2):
+            if trace.enabled:
+                trace("recv: duplicate: %s", cEMI)
+            return
+        if l2.hop and self._addressTable is not None:
+            srcRaw = cEMI.frame.sa
+            if srcRaw and srcRaw not in self._localAddrs:
+                self._addressTable.learn(srcRaw, l2)
         destAddr = cEMI.destinationAddress
 
         hopCount = cEMI.hopCount
@@ -261,42 +534,77 @@ class ETS(threading.Thread):
         if isinstance(destAddr, GroupAddress):
             r = 'wantsGroupFrame'
             may_force = False
+            if l2.learnGroups:
+                l2.groupFilter.add(destAddr.raw)
+            self._cacheGroupValue(cEMI)
+            targets = self._groupAll + self._groupSubscribers.get(destAddr.raw, ())
         elif isinstance(destAddr, IndividualAddress):
             r = 'wantsIndividualFrame'
             may_force = True
+            targets = self._layer2
+            if self._addressTable is not None and destAddr.raw not in self._localAddrs:
+                known = self._addressTable.lookup(destAddr.raw)
+                if known is l2:
+                    if trace.enabled:
+                        trace("recv: destination on source medium: %s", l2)
+                    return
+                elif known is not None:
+                    # Switch-like: only forward to the medium the destination was last seen on
+                    cEMI_x = cEMI_b if known.hop else cEMI
+                    if cEMI_x and known.wantsIndividualFrame(cEMI_x, force=True):
+                        if trace.enabled:
+                            trace("recv: sent (learned): %s", known)
+                        if metrics.enabled:
+                            known.txFrames.inc()
+                        known.dataInd(cEMI_x)
+                    return
         else:
             logger.warning("recv %s: unsupported destination address type (%s)", l2, repr(destAddr))
             return
         done = skipped = False
-        for dev in self._layer2:
+        for dev in targets:
             if l2 == dev:
-                logger.trace("recv: same: %s", l2)
+                if trace.enabled:
+                    trace("recv: same: %s", l2)
                 continue
             cEMI_x = cEMI_b if dev.hop else cEMI
             if not cEMI_x:
-                logger.trace("recv: skip: %s", l2)
+                if trace.enabled:
+                    trace("recv: skip: %s", l2)
                 skipped = True
-            elif getattr(dev,r)(cEMI):
-                logger.trace("recv: sent: %s", l2)
-                dev.dataInd(cEMI)
+            elif getattr(dev,r)(cEMI_x):
+                if trace.enabled:
+                    trace("recv: sent: %s", l2)
+                if metrics.enabled:
+                    dev.txFrames.inc()
+                dev.dataInd(cEMI_x)
                 done = True
             else:
-                logger.trace("recv: notsent: %s", l2)
+                if trace.enabled:
+                    trace("recv: notsent: %s", l2)
         if may_force and not done:
             # We never saw this address. Send to every broadcast device.
-            logger.trace("recv: repeat")
+            if trace.enabled:
+                trace("recv: repeat")
             for dev in self._layer2:
                 if l2 == dev:
                     continue
                 cEMI_x = cEMI_b if dev.hop else cEMI
-                if cEMI_x and getattr(dev,r)(cEMI, force=True):
+                if cEMI_x and getattr(dev,r)(cEMI_x, force=True):
+                    if metrics.enabled:
+                        dev.txFrames.inc()
+                    dev.dataInd(cEMI_x)
                     done = True
             if not done:
-                logger.debug("recv %s: unknown destination address (%s)", repr(destAddr))
-        if skipped:
-            logger.debug("recv %s: not forwarded (hopcount zero): %s from %s", l2, cEMI)
-        elif not done:
-            logger.debug("recv %s: not sendable: %s from %s", l2, cEMI)
+                if trace.enabled:
+                    trace("recv %s: unknown destination address (%r)", l2, destAddr)
+        if not done and metrics.enabled:
+            self._unroutable.inc()
+        if trace.enabled:
+            if skipped:
+                trace("recv %s: not forwarded (hopcount zero): %s", l2, cEMI)
+            elif not done:
+                trace("recv %s: not sendable: %s", l2, cEMI)
 
 
     def getGrOAT(self, device=None, by="gad", outFormatLevel=3):
@@ -345,9 +653,9 @@ class ETS(threading.Thread):
                 i = 0
                 for dev in devices:
                     groups = dev.stack.agds.groups
-                    if gad.address not in groups:
+                    if gad.raw not in groups:
                         continue
-                    for go in groups[gad.address].listeners:
+                    for go in groups[gad.raw].listeners:
                         dp = go.datapoint
                         fb = dp.owner
                         if i:
@@ -374,9 +682,9 @@ class ETS(threading.Thread):
                         gads_ = set()
                         groups = dev.stack.agds.groups
                         for gad in gads:
-                            if gad.address not in groups:
+                            if gad.raw not in groups:
                                 continue
-                            if go in groups[gad.address].listeners:
+                            if go in groups[gad.raw].listeners:
                                 gads_.add(gad.address)
                         output +=  "%-30s %-10s %-30s %-10s %-10s\n" % (go.name, dp.dptId, ", ".join(gads_), go.flags, go.priority)
 
@@ -387,7 +695,170 @@ class ETS(threading.Thread):
 
     def printGroat(self, *a,**k):
         print(self.getGrOAT(*a,**k))
-        
+
+
+class ETS(ETSBase, threading.Thread):
+    """ ETS class
+
+    Threaded engine: the ETS thread dispatches frames, transports run their
+    own threads. Dispatch can be spread over several worker threads, by
+    destination address (see L{ShardedDispatcher<pyknyx.core.shardedDispatcher>}).
+
+    @ivar _queue: frames waiting to be dispatched
+    @type _queue: L{PriorityQueue<pyknyx.stack.priorityQueue>}
+
+    @ivar _dispatcher: dispatch workers (None: frames are dispatched by the ETS thread)
+    @type _dispatcher: L{ShardedDispatcher<pyknyx.core.shardedDispatcher>}
+
+    @ivar _started: set once the ETS thread has started transports, devices and scheduler
+    @type _started: L{Event<threading>}
+
+    @ivar _initThread: runs the initial state reads
+    @type _initThread: L{Thread<threading>}
+
+    @ivar _initWakeup: wakes the initial state reads thread up
+    @type _initWakeup: L{Event<threading>}
+    """
+    # Max. number of frames taken from the queue at once
+    BATCH_SIZE = 16
+
+    def __init__(self, *args, **kwargs):
+        """
+        Set up the ETS stack.
+
+        See L{ETSBase} for parameters.
+
+        @param workers: number of dispatch worker threads (0: dispatch in the ETS thread)
+        @type workers: int
+        """
+        workers = kwargs.pop("workers", 0)
+        super(ETS, self).__init__(*args, **kwargs)
+        self.setDaemon(True)
+        self._started = threading.Event()
+        self._initThread = None
+        self._initWakeup = threading.Event()
+        self._initReader.wakeup = self._initWakeup.set
+        if workers:
+            self._dispatcher = ShardedDispatcher(self.processFrame, workers, self._queueCapacity, self._queuePolicy)
+            for shard in self._dispatcher.shards:
+                metrics.queue(self._shardLabel(shard), lambda shard=shard: shard.queue)
+        else:
+            self._dispatcher = None
+
+    def _shardLabel(self, shard):
+        return "%s shard %d" % (self.metricsLabel, shard.index)
+
+    def _unregisterMetrics(self):
+        super(ETS, self)._unregisterMetrics()
+        if self._dispatcher is not None:
+            for shard in self._dispatcher.shards:
+                metrics.unregister(queue=self._shardLabel(shard))
+
+    @property
+    def dispatcher(self):
+        """ Dispatch workers (None if frames are dispatched by the ETS thread)
+        """
+        return self._dispatcher
+
+    def putFrame(self, l2, cEMI):
+        """
+        Add a frame to be processed.
+
+        @param cEMI:
+        @type cEMI:
+        """
+        if trace.enabled:
+            trace("ETS.putFrame(): cEMI=%s", cEMI)
+
+        if metrics.enabled:
+            cEMI.rxTime = time.time()
+
+        if self._recorder is not None:
+            self._recorder.record(l2, cEMI)
+
+        if self._dispatcher is not None:
+            self._dispatcher.put(l2, cEMI)
+            return
+
+        # Get priority from cEMI
+        priority = cEMI.priority
+
+        # Add to inQueue and notify inQueue handler
+        self._queue.add((l2,cEMI), priority)
+
+    def start(self):
+        if self._running:
+            return
+        self._queue = self._newQueue() # clean start
+        self._started.clear()
+        super(ETS,self).start()
+
+    def run(self):
+        self._running = True
+        logger.debug("ETS.run(): starting")
+        try:
+            if self._dispatcher is not None:
+                self._dispatcher.start()
+            for dev in self._layer2:
+                self._startLayer2(dev)
+            self._startValueCache()
+            for dev in self._devices:
+                self._startDevice(dev)
+            self._planInitReads(self._devices)
+            self._scheduler.start()
+            self._started.set()
+            while self._running:
+                if trace.enabled:
+                    trace("ETS.run(): looping")
+                msgs = self._queue.removeMany(self.BATCH_SIZE)
+                if not msgs:
+                    logger.trace("ETS.run(): exit: closed")
+                    return
+                for l2,cEMI in msgs:
+                    self.processFrame(l2,cEMI)
+            logger.trace("ETS.run(): exit: !_running")
+        except Exception:
+            logger.exception("ETS main loop")
+        finally:
+            self._running = False
+            self._started.set()
+
+    def _startInitReads(self):
+        if self._initThread is not None and self._initThread.is_alive():
+            self._initWakeup.set()
+            return
+        self._initThread = threading.Thread(target=self._runInitReads, name="ETS init reads")
+        self._initThread.daemon = True
+        self._initThread.start()
+
+    def _runInitReads(self):
+        logger.trace("ETS._runInitReads(): starting")
+        try:
+            while self._running:
+                delay = self._initReader.step()
+                self._initWakeup.wait(delay)  # None: until more reads are planned
+                self._initWakeup.clear()
+        except Exception:
+            logger.exception("ETS._runInitReads()")
+        logger.trace("ETS._runInitReads(): exit")
+
+    def stop(self):
+        if self.is_alive() and threading.current_thread() is not self:
+            self._started.wait()  # don't stop what is being started
+        self._running = False
+        self._initReader.stop()
+        self._initWakeup.set()
+        self._scheduler.stop()
+        self._queue.close()
+        if self._dispatcher is not None:
+            self._dispatcher.stop()
+        for dev in self._devices:
+            dev.stop()
+        for dev in self._layer2:
+            dev.stop()
+        self._groupValueCache.stop()
+        self._unregisterMetrics()
+
     def mainLoop(self):
         self.start()
         try:
@@ -396,6 +867,5 @@ class ETS(threading.Thread):
         except KeyboardInterrupt:
             pass
         finally:
-            self._
             self.stop()
 
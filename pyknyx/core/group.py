@@ -54,10 +54,14 @@ Usage
 @license: GPL
 """
 
+import asyncio
+
 from pyknyx.common.exception import PyKNyXValueError
 from pyknyx.services.logger import logging; logger = logging.getLogger(__name__)
+from pyknyx.services.tracer import tracer; trace = tracer("group")
 from pyknyx.stack.layer7.a_groupDataListener import A_GroupDataListener
 from pyknyx.stack.groupAddress import GroupAddress
+from pyknyx.stack.priority import Priority
 
 
 class GroupValueError(PyKNyXValueError):
@@ -105,7 +109,8 @@ class Group(A_GroupDataListener):
         return "<Group('%s')>" % self._gad
 
     def groupValueWriteInd(self, src, priority, data):
-        logger.debug("Group.groupValueWriteInd(): src=%s, priority=%s, data=%s" % (src, priority, repr(data)))
+        if trace.enabled:
+            trace("Group.groupValueWriteInd(): src=%s, priority=%s, data=%r", src, priority, data)
         for listener in self._listeners:
             try:
                 listener.onWrite(src, data)
@@ -113,7 +118,8 @@ class Group(A_GroupDataListener):
                 logger.exception("Group.groupValueWriteInd()")
 
     def groupValueReadInd(self, src, priority):
-        logger.debug("Group.groupValueReadInd(): src=%s, priority=%s" % (src, priority))
+        if trace.enabled:
+            trace("Group.groupValueReadInd(): src=%s, priority=%s", src, priority)
         for listener in self._listeners:
             try:
                 listener.onRead(src)
@@ -121,7 +127,8 @@ class Group(A_GroupDataListener):
                 logger.exception("Group.groupValueReadInd()")
 
     def groupValueReadCon(self, src, priority, data):
-        logger.debug("Group.groupValueReadCon(): src=%s, priority=%s, data=%s" % (src, priority, repr(data)))
+        if trace.enabled:
+            trace("Group.groupValueReadCon(): src=%s, priority=%s, data=%r", src, priority, data)
         for listener in self._listeners:
             try:
                 listener.onResponse(src, data)
@@ -132,6 +139,10 @@ class Group(A_GroupDataListener):
     def gad(self):
         return self._gad
 
+    @property
+    def agds(self):
+        return self._agds
+
     @property
     def listeners(self):
         return self._listeners
@@ -144,9 +155,20 @@ class Group(A_GroupDataListener):
         @param listener: Listener
         @type listener: L{GroupListener<pyknyx.core.groupListener>}
 
+        The listeners set is replaced rather than modified, so that listeners can be added or removed while
+        telegrams are being delivered (possibly from another thread).
+
         @todo: check listener type
         """
-        self._listeners.add(listener)
+        self._listeners = self._listeners | set((listener,))
+
+    def removeListener(self, listener):
+        """ Remove a listener from this group
+
+        @param listener: Listener
+        @type listener: L{GroupListener<pyknyx.core.groupListener>}
+        """
+        self._listeners = self._listeners - set((listener,))
 
     def write(self, priority, data, size):
         """ Write data request on the GAD associated with this group
@@ -158,6 +180,28 @@ class Group(A_GroupDataListener):
         """
         self._agds.groupValueReadReq(self._gad, priority)
 
+    def readAsync(self, priority=Priority(), timeout=None):
+        """ Read the value of the GAD associated with this group, and wait for the response
+
+        Concurrent reads are coalesced into a single request (see
+        L{A_GroupDataService.readValue<pyknyx.stack.layer7.a_groupDataService>}).
+
+        @param timeout: time to wait for a response, in s (None: default timeout)
+        @type timeout: float
+
+        @return: future resolved with the source and data of the response; an asyncio future when called from a
+                 running event loop
+        @rtype: L{Future<concurrent.futures>} or L{Future<asyncio>}
+        """
+        future = self._agds.readValue(self._gad, priority, timeout)
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            return future
+
+        # Cancelling the awaitable must not cancel the read shared with other readers
+        return asyncio.shield(asyncio.wrap_future(future))
+
     def response(self, priority, data, size):
         """ Response data request on the GAD associated with this group
         """
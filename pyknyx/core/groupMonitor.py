@@ -54,6 +54,7 @@ Usage
 
 from pyknyx.common.exception import PyKNyXValueError
 from pyknyx.services.logger import logging; logger = logging.getLogger(__name__)
+from pyknyx.services.tracer import tracer; trace = tracer("group")
 from pyknyx.stack.layer7.a_groupDataListener import A_GroupDataListener
 
 
@@ -94,8 +95,8 @@ class GroupMonitor(A_GroupDataListener):
         return "<GroupMonitor()>" % self._gad
 
     def groupValueWriteInd(self, src, gad, priority, data):
-        logger.debug("GroupMonitor.groupValueWriteInd(): src=%s, gad=%s, priority=%s, data=%s" % \
-                       (src, gad, priority, repr(data)))
+        if trace.enabled:
+            trace("GroupMonitor.groupValueWriteInd(): src=%s, gad=%s, priority=%s, data=%r", src, gad, priority, data)
         for listener in self._listeners:
             try:
                 listener.onWrite(src, gad, priority, data)
@@ -103,7 +104,8 @@ class GroupMonitor(A_GroupDataListener):
                 logger.exception("GroupMonitor.groupValueWriteInd()")
 
     def groupValueReadInd(self, src, gad, priority):
-        logger.debug("GroupMonitor.groupValueReadInd(): src=%s, gad=%s, priority=%s" % (src, gad, priority))
+        if trace.enabled:
+            trace("GroupMonitor.groupValueReadInd(): src=%s, gad=%s, priority=%s", src, gad, priority)
         for listener in self._listeners:
             try:
                 listener.onRead(src, gad, priority)
@@ -111,8 +113,8 @@ class GroupMonitor(A_GroupDataListener):
                 logger.exception("GroupMonitor.groupValueReadInd()")
 
     def groupValueReadCon(self, src, gad, priority, data):
-        logger.debug("GroupMonitor.groupValueReadCon(): src=%s, gad=%s, priority=%s, data=%s" % \
-                       (src, gad, priority, repr(data)))
+        if trace.enabled:
+            trace("GroupMonitor.groupValueReadCon(): src=%s, gad=%s, priority=%s, data=%r", src, gad, priority, data)
         for listener in self._listeners:
             try:
                 listener.onResponse(src, gad, priority, data)
@@ -52,6 +52,7 @@ Usage
 
 from pyknyx.common.exception import PyKNyXValueError
 from pyknyx.services.logger import logging; logger = logging.getLogger(__name__)
+from pyknyx.services.tracer import tracer; trace = tracer("group")
 from pyknyx.core.groupListener import GroupListener
 from pyknyx.core.datapoint import DP, Datapoint
 from pyknyx.stack.flags import Flags
@@ -155,7 +156,8 @@ class GroupObject(GroupListener):
 
         @todo: transmit a more generic object, like SignalEvent? Or a dict?
         """
-        logger.debug("GroupObject._slotChanged(): dp=%s, oldValue=%s, newValue=%s" % (self._datapoint.name, repr(oldValue), repr(newValue)))
+        if trace.enabled:
+            trace("GroupObject._slotChanged(): dp=%s, oldValue=%r, newValue=%r", self._datapoint.name, oldValue, newValue)
 
         if self._group is not None and self._flags.communicate:
             if (oldValue != newValue and self._flags.transmit) or self._flags.stateless:
@@ -207,14 +209,16 @@ class GroupObject(GroupListener):
         return self._datapoint.name
 
     def onWrite(self, src, data):
-        logger.debug("GroupObject.onWrite(): src=%s, data=%s" % (src, repr(data)))
+        if trace.enabled:
+            trace("GroupObject.onWrite(): src=%s, data=%r", src, data)
 
         # Check if datapoint should be updated
         if self._flags.write:  # and data != self.datapoint.data:
             self.datapoint.frame = data
 
     def onRead(self, src):
-        logger.debug("GroupObject.onRead(): src=%s" % src)
+        if trace.enabled:
+            trace("GroupObject.onRead(): src=%s", src)
 
         # Check if data should be send over the bus
         if self._flags.communicate:
@@ -223,7 +227,8 @@ class GroupObject(GroupListener):
                 self._group.response(self._priority, frame, size)
 
     def onResponse(self, src, data):
-        logger.debug("GroupObject.onResponse(): src=%s, data=%s" % (src, repr(data)))
+        if trace.enabled:
+            trace("GroupObject.onResponse(): src=%s, data=%r", src, data)
 
         # Check if datapoint should be updated
         if self._flags.update:  # and data != self.datapoint.data:
@@ -0,0 +1,302 @@
+# -*- coding: utf-8 -*-
+
+""" Python KNX framework
+
+License
+=======
+
+ - B{PyKNyX} (U{https://github.com/knxd/pyknyx}) is Copyright:
+  - © 2016-2017 Matthias Urlichs
+  - PyKNyX is a fork of pKNyX
+   - © 2013-2015 Frédéric Mantegazza
+
+This program is free software; you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation; either version 2 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program; if not, write to the Free Software
+Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA  02111-1307  USA
+or see:
+
+ - U{http://www.gnu.org/licenses/gpl.html}
+
+Module purpose
+==============
+
+Initial state reading
+
+Implements
+==========
+
+ - B{InitReaderValueError}
+ - B{InitReader}
+
+Documentation
+=============
+
+At start, group objects with the 'init' flag read their initial value from the bus. Rather than letting each
+device read its own groups, the ETS collects the groups of all its devices, and hands them to an InitReader, which:
+
+ - reads each group address once, even if several devices are bound to it;
+ - paces the reads (max. number of reads per second, to keep the bus load under control) and bounds the number of
+   reads waiting for a response;
+ - matches the responses (a response triggered by another device counts too), and reads again the group addresses
+   which did not answer in time, a few times;
+ - resolves its L{ready} future once all group addresses answered or were given up.
+
+The responses themselves are delivered to the group objects as usual; the reader only follows them, through a
+response hook on the application layer of the groups (see
+L{A_GroupDataService.addResponseHook<pyknyx.stack.layer7.a_groupDataService>}).
+
+The reader does not run by itself: the engine calls L{step} when told to (see L{wakeup}), and after the returned
+delay.
+
+Usage
+=====
+
+>>> reader = InitReader(rate=20.)
+>>> for group in device.stack.initGroups():
+...     reader.add(group)
+>>> delay = reader.step()  # None once done
+>>> reader.ready.result()  # group addresses which never answered
+[]
+
+@author: Frédéric Mantegazza
+@copyright: (C) 2013-2015 Frédéric Mantegazza
+@license: GPL
+"""
+
+
+import collections
+import threading
+import time
+from concurrent.futures import Future
+
+from pyknyx.common.exception import PyKNyXValueError
+from pyknyx.services.logger import logging; logger = logging.getLogger(__name__)
+from pyknyx.stack.priority import Priority
+
+
+class InitReaderValueError(PyKNyXValueError):
+    """
+    """
+
+
+class InitReader(object):
+    """ InitReader class
+
+    Thread-safe.
+
+    @ivar _groups: group used to read each group address, by raw group address
+    @type _groups: dict of int: L{Group<pyknyx.core.group>}
+
+    @ivar _hooked: application layers followed, with their number of groups to read
+    @type _hooked: dict of L{A_GroupDataService<pyknyx.stack.layer7.a_groupDataService>}: int
+
+    @ivar _todo: raw group addresses waiting to be read
+    @type _todo: deque of int
+
+    @ivar _inFlight: deadline of the reads waiting for a response, by raw group address
+    @type _inFlight: dict of int: float
+
+    @ivar _attempts: number of reads sent, by raw group address
+    @type _attempts: dict of int: int
+
+    @ivar _failed: group addresses given up
+    @type _failed: list of L{GroupAddress<pyknyx.stack.groupAddress>}
+
+    @ivar _nextRead: time the next read may be sent
+    @type _nextRead: float
+
+    @ivar _ready: resolved once all group addresses answered or were given up
+    @type _ready: L{Future<concurrent.futures>}
+
+    @ivar wakeup: called when a response frees a read slot, so that the engine calls L{step} (None: no call)
+    @type wakeup: callable
+    """
+    # Max. number of reads per second
+    RATE = 10.
+
+    # Max. number of reads waiting for a response
+    IN_FLIGHT = 4
+
+    # Time to wait for a response, in s
+    TIMEOUT = 2.
+
+    # Number of reads sent again to a group address which did not answer
+    RETRIES = 2
+
+    def __init__(self, rate=RATE, inFlight=IN_FLIGHT, timeout=TIMEOUT, retries=RETRIES, clock=time.time):
+        """
+
+        @param rate: max. number of reads per second
+        @type rate: float
+
+        @param inFlight: max. number of reads waiting for a response
+        @type inFlight: int
+
+        @param timeout: time to wait for a response, in s
+        @type timeout: float
+
+        @param retries: number of reads sent again to a group address which did not answer
+        @type retries: int
+
+        raise InitReaderValueError:
+        """
+        super(InitReader, self).__init__()
+
+        if rate <= 0:
+            raise InitReaderValueError("invalid rate (%r)" % rate)
+        if inFlight < 1:
+            raise InitReaderValueError("invalid in flight reads number (%r)" % inFlight)
+        self._period = 1. / rate
+        self._maxInFlight = inFlight
+        self._timeout = timeout
+        self._retries = retries
+        self._clock = clock
+        self._lock = threading.Lock()
+
+        self._groups = {}
+        self._hooked = {}
+        self._todo = collections.deque()
+        self._inFlight = {}
+        self._attempts = {}
+        self._failed = []
+        self._nextRead = 0.
+        self._ready = Future()
+
+        self.wakeup = None
+
+    @property
+    def ready(self):
+        """ Resolved once all group addresses answered or were given up
+
+        Its result is the list of group addresses which never answered.
+        """
+        return self._ready
+
+    @property
+    def pending(self):
+        """ Number of group addresses not answered yet
+        """
+        return len(self._todo) + len(self._inFlight)
+
+    def add(self, group):
+        """ Add a group to read
+
+        @param group: group to read
+        @type group: L{Group<pyknyx.core.group>}
+
+        @return: False if its group address was already to be read
+        @rtype: bool
+        """
+        gad = group.gad.raw
+        with self._lock:
+            if gad in self._groups:
+                return False
+            self._groups[gad] = group
+            self._attempts[gad] = 0
+            agds = group.agds
+            if agds not in self._hooked:
+                self._hooked[agds] = 0
+                agds.addResponseHook(self.responseInd)
+            self._hooked[agds] += 1
+            self._todo.append(gad)
+            if self._ready.done():
+                self._ready = Future()
+        return True
+
+    def _forget(self, gad):
+        """ Stop following a group address (lock held)
+        """
+        agds = self._groups.pop(gad).agds
+        self._hooked[agds] -= 1
+        if not self._hooked[agds]:
+            del self._hooked[agds]
+            agds.removeResponseHook(self.responseInd)
+        del self._attempts[gad]
+
+    def responseInd(self, src, gad, priority, data):
+        """ A response was received on a group address (response hook)
+        """
+        gad = gad.raw
+        with self._lock:
+            if gad not in self._groups:
+                return
+            if gad in self._inFlight:
+                del self._inFlight[gad]
+            else:
+                self._todo.remove(gad)  # answered to someone else
+            self._forget(gad)
+        if self.wakeup is not None:
+            self.wakeup()
+
+    def step(self):
+        """ Give up or read again timed out group addresses, and send the reads allowed by the budget
+
+        @return: delay before the next call, in s (None: all group addresses answered or were given up)
+        @rtype: float
+        """
+        reads = []
+        with self._lock:
+            now = self._clock()
+
+            for gad, deadline in list(self._inFlight.items()):
+                if now >= deadline:
+                    del self._inFlight[gad]
+                    if self._attempts[gad] <= self._retries:
+                        self._todo.appendleft(gad)
+                    else:
+                        logger.warning("InitReader.step(): no response from %s" % self._groups[gad].gad)
+                        self._failed.append(self._groups[gad].gad)
+                        self._forget(gad)
+
+            while self._todo and len(self._inFlight) < self._maxInFlight and now >= self._nextRead:
+                gad = self._todo.popleft()
+                self._inFlight[gad] = now + self._timeout
+                self._attempts[gad] += 1
+                self._nextRead = now + self._period
+                reads.append(self._groups[gad])
+
+            if self._todo or self._inFlight:
+                deadlines = list(self._inFlight.values())
+                if self._todo and len(self._inFlight) < self._maxInFlight:
+                    deadlines.append(self._nextRead)
+                delay = max(min(deadlines) - now, 0.)
+            else:
+                delay = None
+                failed, self._failed = self._failed, []
+                ready = self._ready
+
+        for group in reads:
+            try:
+                group.read(priority=Priority())
+            except Exception:
+                logger.exception("InitReader.step()")
+
+        if delay is None and not ready.done():
+            logger.debug("InitReader.step(): done (%d group addresses did not answer)" % len(failed))
+            ready.set_result(failed)
+
+        return delay
+
+    def stop(self):
+        """ Give up all reads
+
+        The L{ready} future is cancelled, if not resolved yet.
+        """
+        with self._lock:
+            for gad in list(self._groups):
+                self._forget(gad)
+            self._todo.clear()
+            self._inFlight.clear()
+            self._failed = []
+            ready = self._ready
+        ready.cancel()
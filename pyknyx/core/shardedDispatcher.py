@@ -0,0 +1,265 @@
+# -*- coding: utf-8 -*-
+
+""" Python KNX framework
+
+License
+=======
+
+ - B{PyKNyX} (U{https://github.com/knxd/pyknyx}) is Copyright:
+  - © 2016-2017 Matthias Urlichs
+  - PyKNyX is a fork of pKNyX
+   - © 2013-2015 Frédéric Mantegazza
+
+This program is free software; you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation; either version 2 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program; if not, write to the Free Software
+Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA  02111-1307  USA
+or see:
+
+ - U{http://www.gnu.org/licenses/gpl.html}
+
+Module purpose
+==============
+
+Parallel frames dispatch
+
+Implements
+==========
+
+ - B{ShardedDispatcherValueError}
+ - B{DispatchShard}
+ - B{ShardedDispatcher}
+
+Documentation
+=============
+
+Spreads the dispatch of frames (routing, decoding and listeners/notifiers execution) over several worker threads,
+so that a slow functional block only delays the frames sent to the same group addresses.
+
+Frames are assigned to a shard by hash of their destination address: all frames sent to a given address are
+processed by the same worker, in order, while frames sent to unrelated addresses proceed in parallel. Each shard
+has its own priority queue.
+
+Note that a functional block bound to several group addresses may then be called from several threads.
+
+Each shard reports its queue depth, the number of frames processed, and the latency (from queueing to end of
+processing) of these frames.
+
+Usage
+=====
+
+>>> dispatcher = ShardedDispatcher(ets.processFrame, workers=4)
+>>> dispatcher.start()
+>>> dispatcher.put(transceiver, cEMI)
+>>> dispatcher.stats()[0]["depth"]
+0
+
+@author: Frédéric Mantegazza
+@copyright: (C) 2013-2015 Frédéric Mantegazza
+@license: GPL
+"""
+
+
+import threading
+import time
+
+from pyknyx.common.exception import PyKNyXValueError
+from pyknyx.services.logger import logging; logger = logging.getLogger(__name__)
+from pyknyx.stack.priorityQueue import PriorityQueue
+from pyknyx.stack.layer2.l_dataService import PRIORITY_DISTRIBUTION
+
+
+class ShardedDispatcherValueError(PyKNyXValueError):
+    """
+    """
+
+
+class DispatchShard(object):
+    """ DispatchShard class
+
+    @ivar _index: shard number
+    @type _index: int
+
+    @ivar _queue: frames waiting for dispatch, with their queueing time
+    @type _queue: L{PriorityQueue<pyknyx.stack.priorityQueue>}
+
+    @ivar _processed: number of frames processed
+    @type _processed: int
+
+    @ivar _latencySum: total latency of the processed frames, in s
+    @type _latencySum: float
+
+    @ivar _latencyMax: max. latency of the processed frames, in s
+    @type _latencyMax: float
+    """
+    # Max. number of frames taken from the queue at once
+    BATCH_SIZE = 16
+
+    def __init__(self, index, process, queueCapacity=None, queuePolicy=PriorityQueue.DROP_OLDEST, clock=time.time):
+        """
+
+        @param index: shard number
+        @type index: int
+
+        @param process: frame processing function (layer2, cEMI)
+        @type process: callable
+        """
+        super(DispatchShard, self).__init__()
+
+        self._index = index
+        self._process = process
+        self._clock = clock
+        self._queueCapacity = queueCapacity
+        self._queuePolicy = queuePolicy
+        self._queue = PriorityQueue(PRIORITY_DISTRIBUTION, queueCapacity, queuePolicy)
+
+        self._processed = 0
+        self._latencySum = 0.
+        self._latencyMax = 0.
+        self._thread = None
+
+    @property
+    def index(self):
+        return self._index
+
+    @property
+    def queue(self):
+        return self._queue
+
+    def put(self, l2, cEMI):
+        self._queue.add((l2, cEMI, self._clock()), cEMI.priority)
+
+    def stats(self):
+        """ Shard statistics
+
+        @return: queue depth, frames processed, dropped, average and max. latency (in s)
+        @rtype: dict
+        """
+        processed = self._processed
+        return dict(shard=self._index,
+                    depth=len(self._queue),
+                    dropped=self._queue.dropped,
+                    processed=processed,
+                    latency=self._latencySum / processed if processed else 0.,
+                    maxLatency=self._latencyMax)
+
+    def _run(self):
+        """
+        """
+        logger.trace("DispatchShard._run(): shard %d" % self._index)
+
+        clock = self._clock
+        while True:
+            msgs = self._queue.removeMany(DispatchShard.BATCH_SIZE)
+            if not msgs:
+                break
+            for l2, cEMI, queued in msgs:
+                try:
+                    self._process(l2, cEMI)
+                except Exception:
+                    logger.exception("DispatchShard._run(): shard %d" % self._index)
+                latency = clock() - queued
+                self._processed += 1
+                self._latencySum += latency
+                if latency > self._latencyMax:
+                    self._latencyMax = latency
+
+        logger.trace("DispatchShard._run(): shard %d ended" % self._index)
+
+    def start(self):
+        if self._queue.closed:
+            self._queue = PriorityQueue(PRIORITY_DISTRIBUTION, self._queueCapacity, self._queuePolicy)
+        thread = threading.Thread(target=self._run, name="ETS dispatch %d" % self._index)
+        thread.daemon = True
+        thread.start()
+        self._thread = thread
+
+    def stop(self):
+        self._queue.close()
+        if self._thread is not None and self._thread is not threading.current_thread():
+            self._thread.join(1)
+        self._thread = None
+
+
+class ShardedDispatcher(object):
+    """ ShardedDispatcher class
+
+    @ivar _shards: dispatch shards
+    @type _shards: list of L{DispatchShard}
+    """
+    def __init__(self, process, workers, queueCapacity=None, queuePolicy=PriorityQueue.DROP_OLDEST,
+                 clock=time.time):
+        """
+
+        @param process: frame processing function (layer2, cEMI)
+        @type process: callable
+
+        @param workers: number of worker threads
+        @type workers: int
+
+        @param queueCapacity: max. number of frames waiting for dispatch, per shard and priority (None: unbounded)
+        @type queueCapacity: int or list of int
+
+        @param queuePolicy: what to do with frames when a shard queue is full
+        @type queuePolicy: str, see L{PriorityQueue<pyknyx.stack.priorityQueue>}
+
+        raise ShardedDispatcherValueError:
+        """
+        super(ShardedDispatcher, self).__init__()
+
+        if workers < 1:
+            raise ShardedDispatcherValueError("invalid number of workers (%r)" % workers)
+        self._shards = [DispatchShard(index, process, queueCapacity, queuePolicy, clock) for index in range(workers)]
+
+    def __len__(self):
+        return len(self._shards)
+
+    @property
+    def shards(self):
+        return tuple(self._shards)
+
+    def shardOf(self, raw):
+        """ Return the shard of a destination address
+
+        @param raw: raw (group or individual) destination address
+        @type raw: int
+
+        @rtype: L{DispatchShard}
+        """
+        # Multiplicative hashing, so that related addresses (same middle group...) spread over all shards
+        return self._shards[(((raw * 0x9e3779b1) & 0xffffffff) >> 16) % len(self._shards)]
+
+    def put(self, l2, cEMI):
+        """ Queue a frame for dispatch
+
+        @param l2: layer2 the frame comes from
+        @type l2: L{L_DataServiceBase<pyknyx.stack.layer2.l_dataServiceBase>}
+
+        @param cEMI: frame
+        @type cEMI: L{CEMILData<pyknyx.stack.cemi.cemiLData>}
+        """
+        self.shardOf(cEMI.frame.da).put(l2, cEMI)
+
+    def stats(self):
+        """ Statistics of all shards
+
+        @rtype: list of dict, see L{DispatchShard.stats}
+        """
+        return [shard.stats() for shard in self._shards]
+
+    def start(self):
+        for shard in self._shards:
+            shard.start()
+
+    def stop(self):
+        for shard in self._shards:
+            shard.stop()
@@ -37,8 +37,6 @@ Implements
 ==========
 
  - B{GroupUtility} (todo)
- - B{SimpleQueue}
- - B{SimpleGroupObject}
  - B{SimpleGroupMonitorObject}
 
 Documentation
@@ -60,13 +58,16 @@ import sys
 import time
 import os.path
 import argparse
-import threading
+from concurrent.futures import TimeoutError
+
+from six.moves import queue
 
 from pyknyx.common.exception import PyKNyXValueError
-from pyknyx.services.logger import logging; logger = logging.getLogger(__name__)
+from pyknyx.services.logger import logging; logger = logging.getLogger("pyknyx.scripts.group")  # run as __main__
+from pyknyx.services.logger import setLevel
 from pyknyx.services.groupAddressTableMapper import GroupAddressTableMapper, GroupAddressTableMapperValueError
 from pyknyx.core.dptXlator.dptXlatorFactory import DPTXlatorFactory
-from pyknyx.core.groupListener import GroupListener
+from pyknyx.core.ets import ETS
 from pyknyx.core.groupMonitorListener import GroupMonitorListener
 from pyknyx.stack.stack import Stack
 from pyknyx.stack.groupAddress import GroupAddress, GroupAddressValueError
@@ -74,77 +75,6 @@ from pyknyx.stack.priority import Priority
 
 mapper = GroupAddressTableMapper()
 
-class SimpleQueue(list):
-    """ Simple condition locked queue
-
-    This queue is a list with additional condition locking features.
-
-    @ivar _condition: condition for locking feature
-    @type _condition: L{Condition<threading>}
-    """
-    def __init__(self):
-        """ Init the queue
-        """
-        super(SimpleQueue, self).__init__()
-
-        self._condition = threading.Condition()
-
-    def acquire(self, *args):
-        """ Acquire the condition
-        """
-        self._condition.acquire(*args)
-
-    def release(self):
-        """ Release the condition
-        """
-        self._condition.release()
-
-    def wait(self, timeout=None):
-        """ Wait far a condition notification
-        """
-        self._condition.wait(timeout)
-
-    def notify(self, n=1):
-        """ Notify thread waiting for the condition
-        """
-        self._condition.notify(n)
-
-    def notifyAll(self):
-        """ Notify all threads waiting for the condition
-        """
-        self._condition.notifyAll()
-
-
-class SimpleGroupObject(GroupListener):
-    """
-    """
-    def __init__(self):
-        """ Init the group listener
-        """
-        super(SimpleGroupObject, self).__init__()
-
-        self._queue = SimpleQueue()
-
-    def onWrite(self, src, data):
-        logger.debug("SimpleGroupObject.onWrite(): src=%s, data=%s" % (src, repr(data)))
-
-    def onRead(self, src):
-        logger.debug("SimpleGroupObject.onRead(): src=%s" % src)
-
-    def onResponse(self, src, data):
-        logger.debug("SimpleGroupObject.onResponse(): src=%s, data=%s" % (src, repr(data)))
-
-        self._queue.acquire()
-        try:
-            self._queue.insert(0, data)
-            self._queue.notify()
-        finally:
-            self._queue.release()
-
-    @property
-    def queue(self):
-        return self._queue
-
 
 class SimpleGroupMonitorObject(GroupMonitorListener):
     """
@@ -154,63 +84,63 @@ class SimpleGroupMonitorObject(GroupMonitorListener):
         """
         super(SimpleGroupMonitorObject, self).__init__()
 
-        self._queue = SimpleQueue()
-
-    def _enqueue(self, type_, src, gad, priority, data):
-        """
-        """
-        self._queue.acquire()
-        try:
-            self._queue.insert(0, (type_, src, gad, priority, data))
-            self._queue.notify()
-        finally:
-            self._queue.release()
+        self._queue = queue.Queue()
 
     def onWrite(self, src, gad, priority, data):
         logger.debug("SimpleGroupMonitorObject.onWrite(): src=%s, gad=%s, priority=%s, data=%s" % \
                        (src, gad, priority, repr(data)))
 
-        self._enqueue("GROUPVALUE_WRITE", src, gad, priority, data)
+        self._queue.put(("GROUPVALUE_WRITE", src, gad, priority, data))
 
     def onRead(self, src, gad, priority):
         logger.debug("SimpleGroupMonitorObject.onRead(): src=%s, gad=%s, priority=%s" % (src, gad, priority))
 
-        self._enqueue("GROUPVALUE_READ", src, gad, priority, None)
+        self._queue.put(("GROUPVALUE_READ", src, gad, priority, None))
 
     def onResponse(self, src, gad, priority, data):
         logger.debug("SimpleGroupMonitorObject.onResponse(): src=%s, gad=%s, priority=%s, data=%s" % \
                        (src, gad, priority, repr(data)))
 
-        self._enqueue("GROUPVALUE_RESP", src, gad, priority, data)
+        self._queue.put(("GROUPVALUE_RESP", src, gad, priority, data))
 
     @property
     def queue(self):
         return self._queue
 
 
-def write(gad, value, dptId="1.xxx", src="0.0.0",  priority="low", hopCount=6):
+def _stack(src):
+    """ Create a stack on its own ETS
     """
-    """
-    if not isinstance(priority, Priority):
-        priority = Priority(priority)
+    ets = ETS(src)
+    stack = Stack(ets, src)
+    ets.start()
 
-    stack = Stack(individualAddress=src)
+    return ets, stack
 
-    groupObject = SimpleGroupObject()
-    group = stack.agds.subscribe(gad, groupObject)
 
+def _encode(value, dptId):
     dptXlator = DPTXlatorFactory().create(dptId)
     type_ = type(dptXlator.dpt.limits[0])  # @todo: implement this in dptXlators
     value = type_(value)
-    data = dptXlator.dataToFrame(dptXlator.valueToData(value))
 
-    stack.start()
+    return dptXlator.dataToFrame(dptXlator.valueToData(value)), dptXlator.typeSize
+
+
+def write(gad, value, dptId="1.xxx", src="0.0.0",  priority="low", hopCount=6):
+    """
+    """
+    if not isinstance(priority, Priority):
+        priority = Priority(priority)
+
+    data, size = _encode(value, dptId)
+
+    ets, stack = _stack(src)
     try:
-        group.write(priority, data, dptXlator.typeSize)
+        stack.agds.groupValueWriteReq(GroupAddress(gad), priority, data, size)
         time.sleep(1)  # Find a way to wait until the stack sending queue is empty (stack.waitEmpty()?)
 
     finally:
-        stack.stop()
+        ets.stop()
 
 
 def read(gad, timeout=1, wait=True, dptId="1.xxx", src="0.0.0", priority="low", hopCount=6):
@@ -219,33 +149,23 @@ def read(gad, timeout=1, wait=True, dptId="1.xxx", src="0.0.0", priority="low",
     if not isinstance(priority, Priority):
         priority = Priority(priority)
 
-    stack = Stack(individualAddress=src)
-
-    groupObject = SimpleGroupObject()
-    group = stack.agds.subscribe(gad, groupObject)
-
-    stack.start()
+    ets, stack = _stack(src)
     try:
-        group.read(priority)
+        future = stack.agds.readValue(gad, priority, timeout)
 
         if wait:
-            groupObject.queue.acquire()
             try:
-                groupObject.queue.wait(timeout)  # Find a wait to know if timeout expired
-                try:
-                    data = groupObject.queue.pop()
-                except IndexError:
-                    logger.warning("No answer from %s" % gad)
-                    sys.exit(1)
-            finally:
-                groupObject.queue.release()
+                src, data = future.result()
+            except TimeoutError:
+                logger.warning("No answer from %s" % gad)
+                sys.exit(1)
 
             dptXlator = DPTXlatorFactory().create(dptId)
             value = dptXlator.dataToValue(dptXlator.frameToData(data))
             logger.info(repr(value))
 
     finally:
-        stack.stop()
+        ets.stop()
 
 
 def response(gad, value, dptId="1.xxx", src="0.0.0",  priority="low", hopCount=6):
@@ -254,23 +174,15 @@ def response(gad, value, dptId="1.xxx", src="0.0.0",  priority="low", hopCount=6
     if not isinstance(priority, Priority):
         priority = Priority(priority)
 
-    stack = Stack(individualAddress=src)
+    data, size = _encode(value, dptId)
 
-    groupObject = SimpleGroupObject()
-    group = stack.agds.subscribe(gad, groupObject)
-
-    dptXlator = DPTXlatorFactory().create(dptId)
-    type_ = type(dptXlator.dpt.limits[0])  # @todo: implement this in dptXlators
-    value = type_(value)
-    data = dptXlator.dataToFrame(dptXlator.valueToData(value))
-
-    stack.start()
+    ets, stack = _stack(src)
     try:
-        group.response(priority, data, dptXlator.typeSize)
+        stack.agds.groupValueReadRes(GroupAddress(gad), priority, data, size)
         time.sleep(1)  # Find a way to wait until the stack sending queue is empty (stack.waitEmpty()?)
 
     finally:
-        stack.stop()
+        ets.stop()
 
 
 def monitor(src="0.0.1"):
@@ -278,47 +190,40 @@ def monitor(src="0.0.1"):
     """
     logger.debug("monitor(): src=%s" % src)
 
-    stack = Stack(individualAddress=src)
+    ets, stack = _stack(src)
 
     groupMonitorObject = SimpleGroupMonitorObject()
-    group = stack.agds.subscribe("0/0/0", groupMonitorObject)
+    stack.agds.subscribe("0/0/0", groupMonitorObject)
 
-    stack.start()
     try:
         while True:
             try:
-                groupMonitorObject.queue.acquire()
                 try:
-                    groupMonitorObject.queue.wait(0.1)
-                    try:
-                        type_, src, gad, priority, data = groupMonitorObject.queue.pop()
-
-                        try:
-                            nickname = mapper.getNickname(str(gad))
-                            dptxlator = mapper.getDptXlator(str(gad))
-                        except GroupAddressTableMapperValueError:
-                            nickname = "???"
-                            dptxlator = None
+                    type_, src, gad, priority, data = groupMonitorObject.queue.get(timeout=0.1)
+                except queue.Empty:
+                    continue
 
-                        hexdata = ' '.join(["%02X" % (byte) for byte in data])
-                        info = "Got %-16s from %-8s to %-8s (%s) with priority %-6s data=[%s]" % (type_, src, gad, nickname, priority, hexdata)
+                try:
+                    nickname = mapper.getNickname(str(gad))
+                    dptxlator = mapper.getDptXlator(str(gad))
+                except GroupAddressTableMapperValueError:
+                    nickname = "???"
+                    dptxlator = None
 
-                        if dptxlator:
-                            value = dptxlator.dataToValue(dptxlator.frameToData(data))
-                            info += " (%s)" % (str(value))
+                hexdata = ' '.join(["%02X" % (byte) for byte in data or ()])
+                info = "Got %-16s from %-8s to %-8s (%s) with priority %-6s data=[%s]" % (type_, src, gad, nickname, priority, hexdata)
 
-                        logger.info(info)
+                if dptxlator and data is not None:
+                    value = dptxlator.dataToValue(dptxlator.frameToData(data))
+                    info += " (%s)" % (str(value))
 
-                    except IndexError:
-                        pass
-                finally:
-                    groupMonitorObject.queue.release()
+                logger.info(info)
 
             except KeyboardInterrupt:
                 break
 
     finally:
-        stack.stop()
+        ets.stop()
 
 
 def main():
@@ -390,13 +295,13 @@ def main():
     # Parse
     args = parser.parse_args()
 
-    logger.setLevel(args.loggerLevel)
+    setLevel(args.loggerLevel)
 
     # If XML map file name is given, try to load it
     if args.xmlMapFile:
         mapper.loadXML(args.xmlMapFile)
         for gad,tab in mapper.table.items():
-            print gad,tab
+            print(gad, tab)
     else:
         mapper.loadFrom(args.gadMapPath)
 
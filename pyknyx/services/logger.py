@@ -37,6 +37,22 @@ Implements
 
 - B{LoggerValueError}
 - B{LoggerObject}
+- B{RateLimitFilter}
+- B{AsyncHandler}
+- B{enableAsync}
+- B{disableAsync}
+
+Documentation
+=============
+
+By default, the 'pyknyx' logger writes to stdout and to a rotating file, synchronously, in the thread that logs;
+this is often the ETS dispatch thread. The asynchronous pipeline is opt-in (config.LOGGER_ASYNC, or enableAsync()):
+records are then put to a bounded queue, and written by a background thread. When the queue is full, records are
+dropped (and counted) rather than blocking the logging thread.
+
+The pipeline also limits the rate of messages per call site: a call site may log 'burst' messages per 'interval';
+the following ones are suppressed, and summarised once the interval is over ("suppressed 12431 similar
+messages"). A warning which fires on every frame thus can't throttle frame processing.
 
 @author: Frédéric Mantegazza
 @copyright: (C) 2013-2015 Frédéric Mantegazza
@@ -54,8 +70,12 @@ except ImportError:
     import StringIO
 import traceback
 import os.path
+import sys
+import threading
 import time
 
+from six.moves import queue
+
 from pyknyx.common import config
 from pyknyx.common.exception import PyKNyXValueError
 from pyknyx.common.singleton import Singleton
@@ -67,6 +87,26 @@ logging.EXCEPTION = logging.ERROR + 5
 logging.addLevelName(logging.TRACE, "TRACE")
 logging.addLevelName(logging.EXCEPTION, "EXCEPTION")
 
+def setLevel(level):
+    """ Set the level of the 'pyknyx' logger
+
+    The tracers are enabled if the level is TRACE/DEBUG, disabled otherwise (see L{sync<pyknyx.services.tracer>}).
+
+    @param level: level name ("trace", "debug", "info"...), case insensitive
+    @type level: str
+    """
+    try:
+        names = logging._levelNames
+    except AttributeError:
+        names = logging._nameToLevel
+    logging.getLogger('pyknyx').setLevel(names[level.upper()])
+
+    # Tracers follow the level (no tracer exists before the tracer module is loaded)
+    sync = getattr(sys.modules.get("pyknyx.services.tracer"), "sync", None)
+    if sync is not None:
+        sync()
+
+
 def _setup():
     # Logger
     _logger = logging.getLogger('pyknyx')
@@ -87,11 +127,7 @@ def _setup():
         fileHandler.setFormatter(fileFormatter)
         _logger.addHandler(fileHandler)
 
-    try:
-        names = logging._levelNames
-    except AttributeError:
-        names = logging._nameToLevel
-    _logger.setLevel(names[config.LOGGER_LEVEL])
+    setLevel(config.LOGGER_LEVEL)
 
     def _trace(self, msg, *args, **kwargs):
         """
@@ -112,3 +148,248 @@ def _setup():
     logging.Logger.exception = _exception
 
 _setup()
+
+
+class RateLimitFilter(logging.Filter):
+    """ Limit the number of messages logged per call site
+
+    A call site (logger, file and line) may log 'burst' messages per 'interval'. The following ones are
+    suppressed; their number is added to the first message logged from that call site after the interval, or
+    reported by summaries() if there is none.
+
+    @ivar _sites: call sites state: interval start, messages logged, first suppressed record, number suppressed
+    @type _sites: dict of tuple: list
+    """
+    def __init__(self, burst=10, interval=10., clock=time.time):
+        """
+
+        @param burst: max. number of messages logged per call site and interval
+        @type burst: int
+
+        @param interval: rate limiting interval, in s
+        @type interval: float
+        """
+        super(RateLimitFilter, self).__init__()
+
+        self._burst = burst
+        self._interval = interval
+        self._clock = clock
+        self._sites = {}
+        self._lock = threading.Lock()
+
+    @property
+    def interval(self):
+        return self._interval
+
+    def filter(self, record):
+        key = (record.name, record.pathname, record.lineno)
+        now = self._clock()
+        with self._lock:
+            site = self._sites.get(key)
+            if site is None or now - site[0] >= self._interval:
+                self._sites[key] = [now, 1, None, 0]
+                if site is not None and site[3]:
+                    record.msg = "%s (suppressed %d similar messages)" % (record.getMessage(), site[3])
+                    record.args = None
+                return True
+            if site[1] < self._burst:
+                site[1] += 1
+                return True
+            if site[2] is None:
+                site[2] = record
+            site[3] += 1
+            return False
+
+    def summaries(self):
+        """ Summarise the messages suppressed during elapsed intervals
+
+        @return: one record per call site, telling how many messages were suppressed
+        @rtype: list of L{LogRecord<logging>}
+        """
+        now = self._clock()
+        result = []
+        with self._lock:
+            for key, site in list(self._sites.items()):
+                if now - site[0] < self._interval:
+                    continue
+                del self._sites[key]
+                record = site[2]
+                if record is not None:
+                    record.msg = "suppressed %d similar messages: %s" % (site[3], record.getMessage())
+                    record.args = None
+                    record.exc_info = record.exc_text = None
+                    result.append(record)
+        return result
+
+
+class AsyncHandler(logging.Handler):
+    """ Queue records, and write them to other handlers from a background thread
+
+    @ivar _handlers: handlers records are written to
+    @type _handlers: list of L{Handler<logging>}
+
+    @ivar _queue: records waiting to be written
+    @type _queue: L{Queue<queue>}
+
+    @ivar _dropped: number of records dropped as the queue was full, not reported yet
+    @type _dropped: int
+    """
+    _STOP = object()
+
+    def __init__(self, handlers, capacity=10000, burst=10, interval=10.):
+        """
+
+        @param handlers: handlers records are written to
+        @type handlers: list of L{Handler<logging>}
+
+        @param capacity: max. number of records waiting to be written
+        @type capacity: int
+
+        @param burst: max. number of messages per call site and interval (None: no rate limiting)
+        @type burst: int
+
+        @param interval: rate limiting interval, in s
+        @type interval: float
+        """
+        super(AsyncHandler, self).__init__()
+
+        self._handlers = list(handlers)
+        self._queue = queue.Queue(capacity)
+        self._dropped = 0
+        self._interval = interval
+        if burst is None:
+            self._rateLimit = None
+        else:
+            self._rateLimit = RateLimitFilter(burst, interval)
+            self.addFilter(self._rateLimit)
+        self._thread = None
+
+    @property
+    def handlers(self):
+        return tuple(self._handlers)
+
+    @property
+    def rateLimit(self):
+        return self._rateLimit
+
+    def prepare(self, record):
+        """ Format the message in the logging thread, as its arguments may change before being written
+        """
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            if not record.exc_text:
+                record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+    def emit(self, record):
+        try:
+            self._queue.put_nowait(self.prepare(record))
+        except queue.Full:
+            self._dropped += 1
+        except Exception:
+            self.handleError(record)
+
+    def _write(self, record):
+        for handler in self._handlers:
+            if record.levelno >= handler.level:
+                handler.handle(record)
+
+    def _summarise(self):
+        if self._rateLimit is not None:
+            for record in self._rateLimit.summaries():
+                self._write(record)
+        dropped, self._dropped = self._dropped, 0
+        if dropped:
+            record = logging.LogRecord("pyknyx", logging.WARNING, __file__, 0,
+                                       "log queue full: dropped %d messages" % dropped, None, None)
+            self._write(record)
+
+    def _run(self):
+        lastSummary = time.time()
+        while True:
+            try:
+                record = self._queue.get(timeout=self._interval)
+            except queue.Empty:
+                record = None
+            if record is AsyncHandler._STOP:
+                break
+            if record is not None:
+                try:
+                    self._write(record)
+                except Exception:
+                    self.handleError(record)
+            if time.time() - lastSummary >= self._interval:
+                self._summarise()
+                lastSummary = time.time()
+
+        # Write what remains
+        while True:
+            try:
+                record = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if record is not AsyncHandler._STOP:
+                self._write(record)
+        self._summarise()
+        for handler in self._handlers:
+            handler.flush()
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name="Logger")
+        self._thread.daemon = True
+        self._thread.start()
+
+    def stop(self):
+        """ Write pending records, and stop the background thread
+        """
+        if self._thread is not None:
+            self._queue.put(AsyncHandler._STOP)
+            self._thread.join(5)
+            self._thread = None
+
+    def close(self):
+        self.stop()
+        super(AsyncHandler, self).close()
+
+
+def enableAsync(capacity=10000, burst=10, interval=10.):
+    """ Write the 'pyknyx' logger records from a background thread
+
+    The current handlers of the logger are moved behind an L{AsyncHandler}.
+
+    See L{AsyncHandler} for parameters.
+
+    @return: the asynchronous handler
+    @rtype: L{AsyncHandler}
+    """
+    _logger = logging.getLogger("pyknyx")
+    for handler in _logger.handlers:
+        if isinstance(handler, AsyncHandler):
+            return handler
+    handlers = list(_logger.handlers)
+    asyncHandler = AsyncHandler(handlers, capacity, burst, interval)
+    asyncHandler.start()
+    _logger.addHandler(asyncHandler)
+    for handler in handlers:
+        _logger.removeHandler(handler)
+    return asyncHandler
+
+
+def disableAsync():
+    """ Write the 'pyknyx' logger records synchronously again
+
+    Pending records are written first.
+    """
+    _logger = logging.getLogger("pyknyx")
+    for handler in list(_logger.handlers):
+        if isinstance(handler, AsyncHandler):
+            for target in handler.handlers:
+                _logger.addHandler(target)
+            _logger.removeHandler(handler)
+            handler.stop()
+
+
+if config.LOGGER_ASYNC:
+    enableAsync(config.LOGGER_QUEUE_SIZE, config.LOGGER_RATE_BURST, config.LOGGER_RATE_INTERVAL)
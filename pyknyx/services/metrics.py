@@ -0,0 +1,540 @@
+# -*- coding: utf-8 -*-
+
+""" Python KNX framework
+
+License
+=======
+
+ - B{PyKNyX} (U{https://github.com/knxd/pyknyx}) is Copyright:
+  - © 2016-2017 Matthias Urlichs
+  - PyKNyX is a fork of pKNyX
+   - © 2013-2015 Frédéric Mantegazza
+
+This program is free software; you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation; either version 2 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program; if not, write to the Free Software
+Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA  02111-1307  USA
+or see:
+
+ - U{http://www.gnu.org/licenses/gpl.html}
+
+Module purpose
+==============
+
+Runtime metrics
+
+Implements
+==========
+
+ - B{MetricsValueError}
+ - B{Counter}
+ - B{Gauge}
+ - B{Histogram}
+ - B{Metrics}
+ - B{MetricsServer}
+
+Documentation
+=============
+
+The Metrics registry holds counters, gauges and fixed-buckets histograms, identified by name and labels. The stack
+registers its metrics at creation time: frames received and sent per layer2, duplicate and unroutable frames in
+ETS, queue depths and drops, group telegrams and unknown group addresses in the application layer, notifier jobs,
+and the time from frame reception by ETS to the end of its delivery to a device.
+
+Metrics are disabled by default. Hot paths only update them when the registry is enabled, which costs a single
+attribute check otherwise:
+
+>>> if metrics.enabled:
+...     counter.inc()
+
+Metrics already maintained by some object (queue depth, dropped datagrams...) are registered with a function,
+called when the metrics are collected; they cost nothing at all on the hot path. As the function keeps its owner
+alive, the owner unregisters its metrics, by label, when stopped.
+
+Updates are not locked: a concurrent increment may very occasionally be lost, which is acceptable for monitoring.
+
+The metrics can be read through snapshot(), as Prometheus text exposition format through exposition(), or over
+HTTP with a MetricsServer, which serves both on localhost:
+
+ - /metrics: Prometheus text format
+ - /stats: JSON snapshot, as used by 'pyknyx-admin stats'
+
+The MetricsServer also lets local tools change the enabled tracers (see L{tracer<pyknyx.services.tracer>}):
+
+ - /trace: JSON state of the tracers; POST /trace?enable=layer3,layer4&disable=udp changes it, as used by
+   'pyknyx-admin trace'
+
+Usage
+=====
+
+>>> metrics = Metrics()
+>>> metrics.enabled = True
+>>> frames = metrics.counter("pyknyx_frames_total", "frames received", layer2="udp")
+>>> frames.inc()
+>>> metrics.snapshot()[0]["value"]
+1
+>>> server = MetricsServer(9464)
+>>> server.start()
+
+@author: Frédéric Mantegazza
+@copyright: (C) 2013-2015 Frédéric Mantegazza
+@license: GPL
+"""
+
+import bisect
+import json
+import threading
+
+import six
+from six.moves.BaseHTTPServer import BaseHTTPRequestHandler, HTTPServer
+from six.moves.urllib.parse import parse_qs
+
+from pyknyx.common.exception import PyKNyXValueError
+from pyknyx.common.singleton import Singleton
+from pyknyx.services.logger import logging; logger = logging.getLogger(__name__)
+from pyknyx.services import tracer
+
+# Default histogram buckets, in s
+LATENCY_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1., 2.5)
+
+
+class MetricsValueError(PyKNyXValueError):
+    """
+    """
+
+
+class Counter(object):
+    """ Monotonic counter
+
+    @ivar _value: current value
+    @type _value: int or float
+
+    @ivar _func: returns the value, if maintained elsewhere
+    @type _func: callable
+    """
+    kind = "counter"
+
+    __slots__ = ("name", "labels", "_value", "_func")
+
+    def __init__(self, name, labels, func=None):
+        """
+
+        @param name: metric name
+        @type name: str
+
+        @param labels: label names and values
+        @type labels: tuple of (str, str)
+
+        @param func: returns the value (None: value updated by inc())
+        @type func: callable
+        """
+        super(Counter, self).__init__()
+
+        self.name = name
+        self.labels = labels
+        self._value = 0
+        self._func = func
+
+    @property
+    def value(self):
+        if self._func is not None:
+            return self._func()
+        return self._value
+
+    def inc(self, n=1):
+        self._value += n
+
+    def reset(self):
+        self._value = 0
+
+
+class Gauge(Counter):
+    """ Value which can go up and down
+    """
+    kind = "gauge"
+
+    __slots__ = ()
+
+    def set(self, value):
+        self._value = value
+
+    def dec(self, n=1):
+        self._value -= n
+
+
+class Histogram(object):
+    """ Fixed-buckets histogram
+
+    @ivar _buckets: buckets upper bounds
+    @type _buckets: tuple of float
+
+    @ivar _counts: number of observations per bucket; the last one is for values above all bounds
+    @type _counts: list of int
+    """
+    kind = "histogram"
+
+    __slots__ = ("name", "labels", "_buckets", "_counts", "_sum", "_count")
+
+    def __init__(self, name, labels, buckets=LATENCY_BUCKETS):
+        """
+
+        @param buckets: buckets upper bounds, in increasing order
+        @type buckets: sequence of float
+
+        raise MetricsValueError:
+        """
+        super(Histogram, self).__init__()
+
+        buckets = tuple(buckets)
+        if not buckets or list(buckets) != sorted(set(buckets)):
+            raise MetricsValueError("invalid buckets (%r)" % (buckets,))
+        self.name = name
+        self.labels = labels
+        self._buckets = buckets
+        self._counts = (len(buckets) + 1) * [0]
+        self._sum = 0.
+        self._count = 0
+
+    @property
+    def buckets(self):
+        return self._buckets
+
+    @property
+    def value(self):
+        """ Cumulative counts per bucket, sum and count of the observations
+
+        @rtype: dict
+        """
+        cumulated = []
+        total = 0
+        for count in self._counts:
+            total += count
+            cumulated.append(total)
+        return dict(buckets=list(zip(self._buckets + (float("inf"),), cumulated)), sum=self._sum, count=self._count)
+
+    def observe(self, value):
+        self._counts[bisect.bisect_left(self._buckets, value)] += 1
+        self._sum += value
+        self._count += 1
+
+    def reset(self):
+        self._counts = len(self._counts) * [0]
+        self._sum = 0.
+        self._count = 0
+
+
+def _formatLabels(labels, extra=()):
+    labels = tuple(labels) + tuple(extra)
+    if not labels:
+        return ""
+    return "{%s}" % ",".join('%s="%s"' % (key, str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n"))
+                             for key, value in labels)
+
+
+def _formatValue(value):
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+@six.add_metaclass(Singleton)
+class Metrics(object):
+    """ Metrics registry
+
+    @ivar enabled: whether hot paths update the metrics
+    @type enabled: bool
+
+    @ivar _metrics: registered metrics, by name and labels
+    @type _metrics: dict of (str, tuple): L{Counter}, L{Gauge} or L{Histogram}
+
+    @ivar _families: kind and help of each metric name, in registration order
+    @type _families: dict of str: (str, str)
+    """
+    enabled = False
+
+    def __init__(self):
+        """ Init the Metrics object
+        """
+        super(Metrics, self).__init__()
+
+        self._metrics = {}
+        self._families = {}
+        self._order = []
+        self._lock = threading.Lock()
+
+    def _register(self, cls, name, help_, labels, *args):
+        labels = tuple(sorted(labels.items()))
+        with self._lock:
+            try:
+                kind, _ = self._families[name]
+            except KeyError:
+                self._families[name] = (cls.kind, help_)
+            else:
+                if kind != cls.kind:
+                    raise MetricsValueError("metric %r already registered as %s" % (name, kind))
+            try:
+                metric = self._metrics[(name, labels)]
+            except KeyError:
+                metric = self._metrics[(name, labels)] = cls(name, labels, *args)
+                self._order.append(metric)
+            else:
+                if cls is not Histogram:
+                    metric._func = args[0]  # registered again, by a new instance of its owner
+        return metric
+
+    def unregister(self, **labels):
+        """ Remove the metrics having all the given labels values
+
+        @param labels: labels values
+
+        @return: number of metrics removed
+        @rtype: int
+
+        raise MetricsValueError: no label given
+        """
+        if not labels:
+            raise MetricsValueError("no label given")
+        labels = set(labels.items())
+        with self._lock:
+            removed = [metric for metric in self._order if labels <= set(metric.labels)]
+            for metric in removed:
+                del self._metrics[(metric.name, metric.labels)]
+            self._order = [metric for metric in self._order if metric not in removed]
+            names = set(metric.name for metric in self._order)
+            for name in list(self._families):
+                if name not in names:
+                    del self._families[name]
+        return len(removed)
+
+    def counter(self, name, help_="", func=None, **labels):
+        """ Get or create a counter
+
+        @param name: metric name
+        @type name: str
+
+        @param help_: metric description
+        @type help_: str
+
+        @param func: returns the value, if maintained elsewhere (None: updated with inc())
+        @type func: callable
+
+        @param labels: labels values
+
+        @rtype: L{Counter}
+
+        raise MetricsValueError: the name is already used by another kind of metric
+        """
+        return self._register(Counter, name, help_, labels, func)
+
+    def gauge(self, name, help_="", func=None, **labels):
+        """ Get or create a gauge
+
+        See L{counter}.
+
+        @rtype: L{Gauge}
+        """
+        return self._register(Gauge, name, help_, labels, func)
+
+    def histogram(self, name, help_="", buckets=LATENCY_BUCKETS, **labels):
+        """ Get or create an histogram
+
+        See L{counter}.
+
+        @param buckets: buckets upper bounds, in increasing order
+        @type buckets: sequence of float
+
+        @rtype: L{Histogram}
+        """
+        return self._register(Histogram, name, help_, labels, buckets)
+
+    def queue(self, name, func, **labels):
+        """ Register the depth and dropped elements of a priority queue, per priority
+
+        @param name: queue name (label 'queue')
+        @type name: str
+
+        @param func: returns the queue (it may be replaced by its owner)
+        @type func: callable returning L{PriorityQueue<pyknyx.stack.priorityQueue>}
+        """
+        for level, priority in enumerate(("system", "normal", "urgent", "low")):
+            self.gauge("pyknyx_queue_depth", "elements waiting in queue",
+                       lambda level=level: func().depths[level], queue=name, priority=priority, **labels)
+            self.counter("pyknyx_queue_dropped_total", "elements discarded by full queue",
+                         lambda level=level: func().dropped[level], queue=name, priority=priority, **labels)
+
+    def reset(self):
+        """ Zero all counters, gauges and histograms not maintained elsewhere
+        """
+        with self._lock:
+            for metric in self._order:
+                metric.reset()
+
+    def _collect(self):
+        """ Iterate over metrics, grouped by name
+
+        Metrics which can't be read (their function raises an exception) are skipped.
+
+        @return: name, kind, help and list of (metric, value)
+        """
+        with self._lock:
+            families = list(self._families.items())
+            metrics = list(self._order)
+        for name, (kind, help_) in families:
+            values = []
+            for metric in metrics:
+                if metric.name != name:
+                    continue
+                try:
+                    values.append((metric, metric.value))
+                except Exception:
+                    logger.exception("Metrics._collect(): %s" % name)
+            yield name, kind, help_, values
+
+    def snapshot(self):
+        """ Current value of all metrics
+
+        Histogram values are dicts with the cumulative count per bucket upper bound, and the sum and count of the
+        observations.
+
+        @return: name, kind, labels and value of each metric
+        @rtype: list of dict
+        """
+        result = []
+        for name, kind, help_, values in self._collect():
+            for metric, value in values:
+                result.append(dict(name=name, kind=kind, labels=dict(metric.labels), value=value))
+        return result
+
+    def exposition(self):
+        """ Current value of all metrics, in Prometheus text exposition format
+
+        @rtype: str
+        """
+        lines = []
+        for name, kind, help_, values in self._collect():
+            if not values:
+                continue
+            lines.append("# HELP %s %s" % (name, help_))
+            lines.append("# TYPE %s %s" % (name, kind))
+            for metric, value in values:
+                if kind == "histogram":
+                    for bound, count in value["buckets"]:
+                        lines.append("%s_bucket%s %d" % (name, _formatLabels(metric.labels, (("le", _formatValue(bound)),)),
+                                                         count))
+                    lines.append("%s_sum%s %s" % (name, _formatLabels(metric.labels), _formatValue(value["sum"])))
+                    lines.append("%s_count%s %d" % (name, _formatLabels(metric.labels), value["count"]))
+                else:
+                    lines.append("%s%s %s" % (name, _formatLabels(metric.labels), _formatValue(value)))
+        lines.append("")
+        return "\n".join(lines)
+
+
+class _MetricsRequestHandler(BaseHTTPRequestHandler):
+    """ Serves /metrics, /stats and /trace
+    """
+    def _sendJSON(self, obj):
+        body = json.dumps(obj, default=str).encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_POST(self):
+        path, _, query = self.path.partition("?")
+        if path != "/trace":
+            self.send_error(404)
+            return
+        params = parse_qs(query)
+        try:
+            for names in params.get("enable", ()):
+                tracer.enable(*names.split(","))
+            for names in params.get("disable", ()):
+                tracer.disable(*names.split(","))
+        except tracer.TracerValueError as e:
+            self.send_error(400, str(e))
+            return
+        self._sendJSON(tracer.tracers())
+
+    def do_GET(self):
+        path = self.path.split("?", 1)[0]
+        if path == "/trace":
+            self._sendJSON(tracer.tracers())
+            return
+        if path == "/metrics":
+            body = self.server.metrics.exposition().encode("utf-8")
+            contentType = "text/plain; version=0.0.4; charset=utf-8"
+        elif path == "/stats":
+            body = json.dumps(self.server.metrics.snapshot(), default=str).encode("utf-8")
+            contentType = "application/json"
+        else:
+            self.send_error(404)
+            return
+        self.send_response(200)
+        self.send_header("Content-Type", contentType)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        logger.debug("MetricsServer: " + format % args)
+
+
+class MetricsServer(object):
+    """ HTTP endpoint for the metrics
+
+    @ivar _server: HTTP server
+    @type _server: L{HTTPServer<http.server>}
+
+    @ivar _thread: serving thread
+    @type _thread: L{Thread<threading>}
+    """
+    def __init__(self, port=9464, addr="127.0.0.1", metrics=None):
+        """
+
+        @param port: TCP port to listen to (0: any free port)
+        @type port: int
+
+        @param addr: address to listen to; the default only accepts local connections
+        @type addr: str
+
+        @param metrics: registry to serve (default: the L{Metrics} singleton)
+        @type metrics: L{Metrics}
+        """
+        super(MetricsServer, self).__init__()
+
+        self._server = HTTPServer((addr, port), _MetricsRequestHandler)
+        self._server.metrics = metrics if metrics is not None else Metrics()
+        self._thread = None
+
+    @property
+    def port(self):
+        return self._server.server_address[1]
+
+    def start(self):
+        logger.trace("MetricsServer.start()")
+
+        self._thread = threading.Thread(target=self._server.serve_forever, name="Metrics server")
+        self._thread.daemon = True
+        self._thread.start()
+
+    def stop(self):
+        logger.trace("MetricsServer.stop()")
+
+        if self._thread is not None:
+            self._server.shutdown()
+            self._thread.join(1)
+            self._thread = None
+        self._server.server_close()
+
+
+metrics = Metrics()
@@ -92,9 +92,14 @@ from pyknyx.common.utils import reprStr
 from pyknyx.common.utils import func_name, meth_name,meth_self,meth_func
 from pyknyx.common.singleton import Singleton
 from pyknyx.services.logger import logging; logger = logging.getLogger(__name__)
+from pyknyx.services.tracer import tracer; trace = tracer("notifier")
+from pyknyx.services.metrics import metrics
 
 scheduler = None
 
+_jobs = metrics.counter("pyknyx_notifier_jobs_total", "notifier jobs executed")
+_errors = metrics.counter("pyknyx_notifier_errors_total", "notifier jobs which raised an exception")
+
 
 class NotifierValueError(PyKNyXValueError):
     """
@@ -129,9 +134,13 @@ class Notifier(object):
 
         @todo: add a more explicite message for enduser?
         """
+        if metrics.enabled:
+            _jobs.inc()
         try:
             method(event)
         except:
+            if metrics.enabled:
+                _errors.inc()
             logger.exception("Notifier._execute()")
 
     def addDatapointJob(self, func, dp, condition="change"):
@@ -247,12 +256,14 @@ class Notifier(object):
         @param newValue: new value of the datapoint
         @type newValue: depends on datapoint type
         """
-        logger.debug("Notifier.datapointNotify(): obj=%s, dp=%s, oldValue=%s, newValue=%s" % (obj.name, dp, repr(oldValue), repr(newValue)))
+        if trace.enabled:
+            trace("Notifier.datapointNotify(): obj=%s, dp=%s, oldValue=%r, newValue=%r", obj.name, dp, oldValue, newValue)
 
         for method, condition in self._datapointJobs.get(obj,{}).get(dp._factory,()):
             if oldValue != newValue and condition == "change" or condition == "always":
                 try:
-                    logger.debug("Notifier.datapointNotify(): trigger method %s() of %s" % (meth_name(method), meth_self(method)))
+                    if trace.enabled:
+                        trace("Notifier.datapointNotify(): trigger method %s() of %s", meth_name(method), meth_self(method))
                     event = dict(name="datapoint", dp=dp, oldValue=oldValue, newValue=newValue, condition=condition)
 
                     self._execute(method, event)
@@ -71,6 +71,7 @@ Usage
 """
 
 import six
+import threading
 import traceback
 
 from apscheduler.schedulers.background import BackgroundScheduler
@@ -104,6 +105,7 @@ class Scheduler(object):
     TYPE_CRON = "cron"
 
     _apscheduler = None
+    _lock = threading.Lock()  # several ETS may start/stop the scheduler concurrently
 
     def __init__(self, autoStart=False, type_=BackgroundScheduler):
         """ Init the Scheduler object
@@ -238,21 +240,26 @@ class Scheduler(object):
         """
         self._apscheduler.print_jobs()
 
-    def start(self):
+    def start(self, type_=None):
         """ Start the scheduler
 
         Simple proxy to APScheduler.start() method.
+
+        @param type_: APScheduler class to use instead of the one given to the constructor
+                      (e.g. AsyncIOScheduler when running in an asyncio event loop)
+        @type type_: class
         """
         logger.trace("Scheduler.start()")
 
-        if self._apscheduler is None:
-            self._apscheduler = self._type()
-            self._apscheduler.add_listener(self._listener, mask=(EVENT_JOB_ERROR|EVENT_JOB_MISSED))
+        with self._lock:
+            if self._apscheduler is None:
+                self._apscheduler = (type_ or self._type)()
+                self._apscheduler.add_listener(self._listener, mask=(EVENT_JOB_ERROR|EVENT_JOB_MISSED))
 
-        if not self._apscheduler.running:
-            self._apscheduler.start()
+            if not self._apscheduler.running:
+                self._apscheduler.start()
 
-            logger.trace("Scheduler.start(): running")
+                logger.trace("Scheduler.start(): running")
 
     def stop(self):
         """ Shutdown the scheduler
@@ -261,10 +268,11 @@ class Scheduler(object):
         """
         logger.trace("Scheduler.stop()")
 
-        if self._apscheduler is not None and self._apscheduler.running:
-            self._apscheduler.shutdown()
+        with self._lock:
+            if self._apscheduler is not None and self._apscheduler.running:
+                self._apscheduler.shutdown()
 
-            logger.trace("Scheduler.stop(): stopped")
+                logger.trace("Scheduler.stop(): stopped")
 
-        self._apscheduler = None
+            self._apscheduler = None
 
@@ -0,0 +1,215 @@
+# -*- coding: utf-8 -*-
+
+""" Python KNX framework
+
+License
+=======
+
+ - B{PyKNyX} (U{https://github.com/knxd/pyknyx}) is Copyright:
+  - © 2016-2017 Matthias Urlichs
+  - PyKNyX is a fork of pKNyX
+   - © 2013-2015 Frédéric Mantegazza
+
+This program is free software; you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation; either version 2 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program; if not, write to the Free Software
+Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA  02111-1307  USA
+or see:
+
+ - U{http://www.gnu.org/licenses/gpl.html}
+
+Module purpose
+==============
+
+Hot path tracing
+
+Implements
+==========
+
+ - B{TracerValueError}
+ - B{Tracer}
+ - B{tracer}
+ - B{enable}
+ - B{disable}
+ - B{sync}
+ - B{tracers}
+
+Documentation
+=============
+
+The frame path (transceivers, ETS, the stack layers, groups and group objects, notifier) traces what it does. These
+trace points must cost (almost) nothing in production, so they are guarded by the enabled flag of the tracer of
+their subsystem, and their arguments are only formatted if the trace is actually emitted:
+
+>>> trace = tracer("layer7")
+>>> if trace.enabled:
+...     trace("A_GroupDataService.groupDataInd(): src=%s, aPDU=%r", src, aPDU)
+
+A disabled trace point thus costs a single attribute check.
+
+Each subsystem has its own tracer, which logs to the 'pyknyx.trace.<subsystem>' logger at TRACE level. Tracers can
+be enabled or disabled at runtime, by name or shell-style pattern; enabling a tracer also lowers the level of its
+logger, so its traces are emitted even if the 'pyknyx' logger level is higher. Tracers are initially enabled if the
+'pyknyx' logger level is TRACE/DEBUG when they are created, and follow that level when it is changed through
+L{setLevel<pyknyx.services.logger>} (see L{sync}).
+
+The enabled tracers of a running device can also be changed through its metrics endpoint (see
+L{MetricsServer<pyknyx.services.metrics>} and 'pyknyx-admin trace').
+
+Usage
+=====
+
+>>> enable("layer3", "layer4")
+>>> tracers()
+{'ets': False, 'layer3': True, 'layer4': True, ...}
+>>> disable("*")
+
+@author: Frédéric Mantegazza
+@copyright: (C) 2013-2015 Frédéric Mantegazza
+@license: GPL
+"""
+
+import fnmatch
+import threading
+
+from pyknyx.common.exception import PyKNyXValueError
+from pyknyx.services.logger import logging; logger = logging.getLogger(__name__)
+
+_tracers = {}
+_lock = threading.Lock()
+
+
+class TracerValueError(PyKNyXValueError):
+    """
+    """
+
+
+class Tracer(object):
+    """ Tracer of a subsystem
+
+    @ivar name: subsystem name
+    @type name: str
+
+    @ivar enabled: whether trace points of this subsystem are emitted; checked by the trace points themselves
+    @type enabled: bool
+
+    @ivar _logger: logger the traces are sent to
+    @type _logger: L{Logger<logging>}
+    """
+    __slots__ = ("name", "enabled", "_logger")
+
+    def __init__(self, name):
+        """
+
+        @param name: subsystem name
+        @type name: str
+        """
+        super(Tracer, self).__init__()
+
+        self.name = name
+        self._logger = logging.getLogger("pyknyx.trace.%s" % name)
+        self.enabled = logging.getLogger("pyknyx").isEnabledFor(logging.TRACE)
+
+    def __repr__(self):
+        return "<Tracer('%s', enabled=%s)>" % (self.name, self.enabled)
+
+    def __call__(self, msg, *args):
+        """ Emit a trace
+
+        The record carries the file and line of the trace point, not of this method.
+
+        @param msg: message, formatted with args only if the trace is emitted
+        @type msg: str
+        """
+        self._logger.log(logging.TRACE, msg, *args, stacklevel=2)
+
+    def enable(self):
+        self._logger.setLevel(logging.TRACE)
+        self.enabled = True
+
+    def disable(self):
+        self._logger.setLevel(logging.NOTSET)
+        self.enabled = False
+
+
+def tracer(name):
+    """ Get or create the tracer of a subsystem
+
+    @param name: subsystem name
+    @type name: str
+
+    @rtype: L{Tracer}
+    """
+    with _lock:
+        try:
+            return _tracers[name]
+        except KeyError:
+            trace = _tracers[name] = Tracer(name)
+            return trace
+
+
+def _select(patterns):
+    selected = [trace for name, trace in sorted(_tracers.items())
+                if any(fnmatch.fnmatchcase(name, pattern) for pattern in patterns)]
+    if not selected:
+        raise TracerValueError("no tracer matches %s" % ", ".join(patterns))
+    return selected
+
+
+def enable(*patterns):
+    """ Enable the tracers of some subsystems
+
+    @param patterns: subsystem names, or shell-style patterns
+    @type patterns: str
+
+    @return: enabled tracers
+    @rtype: list of L{Tracer}
+
+    raise TracerValueError: no tracer matches
+    """
+    selected = _select(patterns)
+    for trace in selected:
+        trace.enable()
+        logger.info("Tracing '%s' enabled" % trace.name)
+    return selected
+
+
+def disable(*patterns):
+    """ Disable the tracers of some subsystems
+
+    See L{enable}.
+    """
+    selected = _select(patterns)
+    for trace in selected:
+        trace.disable()
+        logger.info("Tracing '%s' disabled" % trace.name)
+    return selected
+
+
+def sync():
+    """ Enable or disable the tracers according to the 'pyknyx' logger level
+
+    Tracers explicitly enabled stay enabled.
+    """
+    level = logging.getLogger("pyknyx").isEnabledFor(logging.TRACE)
+    with _lock:
+        for trace in _tracers.values():
+            trace.enabled = level or trace._logger.level == logging.TRACE
+
+
+def tracers():
+    """ State of all tracers
+
+    @return: enabled flag, by subsystem name
+    @rtype: dict of str: bool
+    """
+    return dict((name, trace.enabled) for name, trace in _tracers.items())
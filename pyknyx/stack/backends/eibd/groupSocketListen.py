@@ -48,6 +48,12 @@ import sys
 
 from pyknyx.services.logger import logging; logger = logging.getLogger(__name__)
 from pyknyx.stack.backends.eibd.eibConnection import EIBConnection, EIBBuffer, EIBAddr
+from pyknyx.stack.groupAddress import GroupAddress
+from pyknyx.stack.priority import Priority
+from pyknyx.stack.cemi.cemiLData import CEMILData
+
+_PRIORITY = Priority.fromLevel(3)
+_HOP_COUNT = 6
 
 
 class EIBAddress(EIBAddr):
@@ -61,8 +67,12 @@ class EIBAddress(EIBAddr):
 class GroupSocketListen(object):
     """
     """
-    def __init__(self, url, callback):
+    def __init__(self, url, callback, capture=None):
         """
+
+        @param capture: also write the group telegrams to this capture (the group socket carries neither priority
+                        nor routing counter: they get the low priority and the default routing counter)
+        @type capture: L{BusCaptureWriter<pyknyx.stack.busCapture>}
         """
         super(GroupSocketListen, self).__init__()
 
@@ -75,6 +85,7 @@ class GroupSocketListen(object):
         logger.info("EIB socket successufully opened")
         self._url = url
         self._callback = callback
+        self._capture = capture
 
         self._src = EIBAddress()
         self._dest = EIBAddress()
@@ -97,6 +108,10 @@ class GroupSocketListen(object):
                 sys.exit(-1)
             if length < 2:
                 logger.error("GroupsSocketListen.run(): EIBConnection.EIBGetGroup_Src() returned invalid length (%d)" % length)
+            elif self._capture is not None:
+                cEMI = CEMILData.groupData(GroupAddress.fromRaw(self._dest.data), _PRIORITY, _HOP_COUNT,
+                                           bytearray(self._buffer.buffer[:length]), self._src.data)
+                self._capture.record(self._url, cEMI)
             #logger.debug("GroupsSocketListen.run(): src=%s, dest=%s, buf=%r" % (hex(self._src.data), hex(self._dest.data), self._buffer.buffer))
 
             if self._buffer.buffer[0] & 0x03 or self._buffer.buffer[1] & 0xc0 == 0xc0:
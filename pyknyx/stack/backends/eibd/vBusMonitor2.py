@@ -35,6 +35,7 @@ KNX Bus management
 Implements
 ==========
 
+ - B{tp1ToCEMI}
  - B{VBusMonitor2}
 
 @author: Frédéric Mantegazza
@@ -49,6 +50,28 @@ import subprocess
 
 from pyknyx.services.logger import logging; logger = logging.getLogger(__name__)
 from pyknyx.stack.backends.eibd.eibConnection import EIBConnection, EIBBuffer, EIBAddr
+from pyknyx.stack.cemi.cemiLData import CEMILData
+
+
+def tp1ToCEMI(frame):
+    """ Convert a TP1 standard L_Data frame, as returned by the bus monitor, to a cEMI L_Data.ind frame
+
+    @param frame: TP1 frame (control field, source, destination, NPCI, TPDU, checksum)
+    @type frame: bytearray
+
+    @return: raw cEMI frame (None if not a standard L_Data frame)
+    @rtype: bytearray
+    """
+    if len(frame) < 8 or frame[0] & 0xd3 != 0x90:
+        return None
+    length = frame[5] & 0x0f
+    if len(frame) < 8 + length:
+        return None
+    raw = bytearray((CEMILData.MC_LDATA_IND, 0, frame[0], frame[5] & 0xf0))
+    raw += frame[1:5]
+    raw.append(length)
+    raw += frame[6:7 + length]
+    return raw
 
 
 class EIBAddress(EIBAddr):
@@ -62,8 +85,11 @@ class EIBAddress(EIBAddr):
 class VBusMonitor2(object):
     """
     """
-    def __init__(self, url):
+    def __init__(self, url, capture=None):
         """
+
+        @param capture: also write the L_Data frames seen on the bus to this capture
+        @type capture: L{BusCaptureWriter<pyknyx.stack.busCapture>}
         """
         super(VBusMonitor2, self).__init__()
 
@@ -73,6 +99,8 @@ class VBusMonitor2(object):
             logger.critical("VBusMonitor2.__init__(): %s" % os.strerror(self._connection.errno))
             logger.critical("VBusMonitor2.__init__(): call to EIBConnection.EIBSocketURL() failed (err=%d)" % err)
             sys.exit(-1)
+        self._url = url
+        self._capture = capture
 
     def run(self):
         """
@@ -90,6 +118,10 @@ class VBusMonitor2(object):
                 logger.critical("VBusMonitor2.run(): call to EIBConnection.EIBGetBusmonitorPacket() failed")
                 sys.exit(-1)
             print(buffer_)
+            if self._capture is not None:
+                raw = tp1ToCEMI(bytearray(buffer_.buffer[:length]))
+                if raw is not None:
+                    self._capture.write(self._url, raw)
 
 
 class KNX(object):
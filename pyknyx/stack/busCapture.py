@@ -0,0 +1,435 @@
+# -*- coding: utf-8 -*-
+
+""" Python KNX framework
+
+License
+=======
+
+ - B{PyKNyX} (U{https://github.com/knxd/pyknyx}) is Copyright:
+  - © 2016-2017 Matthias Urlichs
+  - PyKNyX is a fork of pKNyX
+   - © 2013-2015 Frédéric Mantegazza
+
+This program is free software; you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation; either version 2 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program; if not, write to the Free Software
+Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA  02111-1307  USA
+or see:
+
+ - U{http://www.gnu.org/licenses/gpl.html}
+
+Module purpose
+==============
+
+Binary bus capture files
+
+Implements
+==========
+
+ - B{BusCaptureValueError}
+ - B{BusCaptureWriter}
+ - B{BusCaptureReader}
+
+Documentation
+=============
+
+Compact, append-only capture of the frames going through ETS (or read from eibd/knxd), used to reproduce incidents
+and to load-test offline (see L{ReplayTransceiver<pyknyx.stack.transceiver.replayTransceiver>}).
+
+File layout (little endian):
+
+ - file header: magic "PKXCAP", version, flags, creation time (double);
+ - blocks: block header (magic "PKXB", payload length, number of records, first and last timestamps), followed by
+   the records;
+ - index (written on close): one entry per block (offset, number of records, first and last timestamps), followed
+   by a footer (index offset, number of entries, magic "PKXI").
+
+Each record is a header (timestamp, record type, source id, data length) followed by the data. FRAME records hold
+a raw cEMI frame; SOURCE records give the name of a source id (usually the layer2 the frame came from). Source ids
+are declared again in each block, so that blocks can be read independently.
+
+Records are buffered, and written one block at a time. If the index is missing (capture not closed), it is rebuilt
+from the block headers; an incomplete last block is ignored.
+
+The reader maps the file in memory: frames are returned as views on the map, without copy.
+
+Usage
+=====
+
+>>> writer = BusCaptureWriter("bus.cap")
+>>> writer.write("knxd", cEMI.frame.raw)
+>>> writer.close()
+>>> reader = BusCaptureReader("bus.cap")
+>>> for timestamp, source, frame in reader:
+...     print(timestamp, source, CEMILData(frame, copy=False))
+
+@author: Frédéric Mantegazza
+@copyright: (C) 2013-2015 Frédéric Mantegazza
+@license: GPL
+"""
+
+
+import bisect
+import mmap
+import os
+import struct
+import threading
+import time
+
+from pyknyx.common.exception import PyKNyXValueError
+from pyknyx.services.logger import logging; logger = logging.getLogger(__name__)
+from pyknyx.stack.individualAddress import IndividualAddress
+
+_FILE_HEADER = struct.Struct("<6sBBd")  # magic, version, flags, creation time
+_BLOCK_HEADER = struct.Struct("<4sIIdd")  # magic, payload length, number of records, first/last timestamps
+_RECORD_HEADER = struct.Struct("<dBBH")  # timestamp, record type, source id, data length
+_INDEX_ENTRY = struct.Struct("<QIdd")  # block offset, number of records, first/last timestamps
+_FOOTER = struct.Struct("<QI4s")  # index offset, number of entries, magic
+
+FILE_MAGIC = b"PKXCAP"
+BLOCK_MAGIC = b"PKXB"
+INDEX_MAGIC = b"PKXI"
+VERSION = 1
+
+RECORD_FRAME = 0
+RECORD_SOURCE = 1
+
+
+class BusCaptureValueError(PyKNyXValueError):
+    """
+    """
+
+
+def sourceName(source):
+    """ Name of a capture source
+
+    @param source: layer2, or name
+    @type source: L{L_DataServiceBase<pyknyx.stack.layer2.l_dataServiceBase>} or str
+
+    @rtype: str
+    """
+    if isinstance(source, str):
+        return source
+    physAddr = getattr(source, "physAddr", None)
+    if isinstance(physAddr, IndividualAddress):
+        return "%s %s" % (type(source).__name__, physAddr)
+    return type(source).__name__
+
+
+class BusCaptureWriter(object):
+    """ BusCaptureWriter class
+
+    Thread-safe.
+
+    @ivar _file: capture file
+    @type _file: file
+
+    @ivar _block: records of the current block
+    @type _block: bytearray
+
+    @ivar _index: written blocks
+    @type _index: list of tuple (offset, number of records, first timestamp, last timestamp)
+
+    @ivar _sources: ids of the sources declared in the current block
+    @type _sources: dict of str -> int
+    """
+    BLOCK_SIZE = 65536
+
+    def __init__(self, path, append=False, blockSize=BLOCK_SIZE, clock=time.time):
+        """
+
+        @param path: capture file path
+        @type path: str
+
+        @param append: add to an existing capture (else, replace it)
+        @type append: bool
+
+        @param blockSize: size of the blocks, in bytes (also the max. amount of data lost on crash)
+        @type blockSize: int
+
+        @param clock: time source, in s
+        @type clock: callable
+
+        raise BusCaptureValueError:
+        """
+        super(BusCaptureWriter, self).__init__()
+
+        if blockSize < _RECORD_HEADER.size:
+            raise BusCaptureValueError("invalid block size (%r)" % blockSize)
+
+        self._blockSize = blockSize
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._block = bytearray()
+        self._count = 0
+        self._first = self._last = None
+        self._sources = {}
+        self._frames = 0
+
+        if append and os.path.exists(path) and os.path.getsize(path):
+            reader = BusCaptureReader(path)
+            try:
+                self._index = list(reader.blocks)
+                end = reader.dataEnd
+            finally:
+                reader.close()
+            self._file = open(path, "r+b")
+            self._file.truncate(end)  # drop the index, and any incomplete block
+            self._file.seek(end)
+        else:
+            self._index = []
+            self._file = open(path, "wb")
+            self._file.write(_FILE_HEADER.pack(FILE_MAGIC, VERSION, 0, clock()))
+
+    @property
+    def frames(self):
+        """ Number of frames written since opening
+        """
+        return self._frames
+
+    @property
+    def closed(self):
+        return self._file is None
+
+    def _flushBlock(self):
+        """ Write the current block
+
+        Must be called with the lock held.
+        """
+        if not self._count:
+            return
+        offset = self._file.tell()
+        self._file.write(_BLOCK_HEADER.pack(BLOCK_MAGIC, len(self._block), self._count, self._first, self._last))
+        self._file.write(self._block)
+        self._index.append((offset, self._count, self._first, self._last))
+        self._block = bytearray()
+        self._count = 0
+        self._first = self._last = None
+        self._sources = {}
+
+    def write(self, source, frame, timestamp=None):
+        """ Add a frame to the capture
+
+        @param source: layer2 the frame comes from, or any name
+        @type source: L{L_DataServiceBase<pyknyx.stack.layer2.l_dataServiceBase>} or str
+
+        @param frame: raw cEMI frame
+        @type frame: bytes, bytearray or memoryview
+
+        @param timestamp: reception time (None: now)
+        @type timestamp: float
+
+        raise BusCaptureValueError:
+        """
+        if timestamp is None:
+            timestamp = self._clock()
+        name = sourceName(source)
+        with self._lock:
+            if self._file is None:
+                raise BusCaptureValueError("capture closed")
+            block = self._block
+            sourceId = self._sources.get(name)
+            if sourceId is None:
+                if len(self._sources) > 0xff:
+                    self._flushBlock()
+                    block = self._block
+                sourceId = self._sources[name] = len(self._sources)
+                encoded = name.encode("utf-8")
+                block += _RECORD_HEADER.pack(timestamp, RECORD_SOURCE, sourceId, len(encoded))
+                block += encoded
+            block += _RECORD_HEADER.pack(timestamp, RECORD_FRAME, sourceId, len(frame))
+            block += frame
+            self._count += 1
+            if self._first is None:
+                self._first = timestamp
+            self._last = timestamp
+            self._frames += 1
+            if len(block) >= self._blockSize:
+                self._flushBlock()
+
+    def record(self, l2, cEMI):
+        """ Add a frame going through ETS (see L{ETSBase.recorder<pyknyx.core.ets>})
+
+        @param l2: layer2 the frame comes from
+        @type l2: L{L_DataServiceBase<pyknyx.stack.layer2.l_dataServiceBase>}
+
+        @param cEMI: frame
+        @type cEMI: L{CEMILData<pyknyx.stack.cemi.cemiLData>}
+        """
+        self.write(l2, cEMI.frame.raw)
+
+    def flush(self):
+        """ Write the current block, even if not full
+        """
+        with self._lock:
+            if self._file is not None:
+                self._flushBlock()
+                self._file.flush()
+
+    def close(self):
+        """ Write the current block and the index
+        """
+        with self._lock:
+            if self._file is None:
+                return
+            self._flushBlock()
+            indexOffset = self._file.tell()
+            for entry in self._index:
+                self._file.write(_INDEX_ENTRY.pack(*entry))
+            self._file.write(_FOOTER.pack(indexOffset, len(self._index), INDEX_MAGIC))
+            self._file.close()
+            self._file = None
+
+
+class BusCaptureReader(object):
+    """ BusCaptureReader class
+
+    @ivar _map: mapped capture file
+    @type _map: L{mmap<mmap>}
+
+    @ivar _blocks: index of the blocks
+    @type _blocks: list of tuple (offset, number of records, first timestamp, last timestamp)
+
+    @ivar _dataEnd: end of the last complete block
+    @type _dataEnd: int
+    """
+    def __init__(self, path):
+        """
+
+        @param path: capture file path
+        @type path: str
+
+        raise BusCaptureValueError:
+        """
+        super(BusCaptureReader, self).__init__()
+
+        with open(path, "rb") as file_:
+            size = os.fstat(file_.fileno()).st_size
+            if size < _FILE_HEADER.size:
+                raise BusCaptureValueError("not a capture file (%s)" % path)
+            self._map = mmap.mmap(file_.fileno(), 0, access=mmap.ACCESS_READ)
+        self._view = memoryview(self._map)
+
+        magic, version, flags, self._created = _FILE_HEADER.unpack_from(self._map)
+        if magic != FILE_MAGIC:
+            self.close()
+            raise BusCaptureValueError("not a capture file (%s)" % path)
+        if version != VERSION:
+            self.close()
+            raise BusCaptureValueError("unsupported capture version (%d)" % version)
+
+        self._blocks, self._dataEnd = self._readIndex(size)
+        self._starts = [entry[2] for entry in self._blocks]
+
+    def _readIndex(self, size):
+        """ Load the index, or rebuild it from the block headers
+
+        @return: index, end of the last complete block
+        @rtype: tuple
+        """
+        if size >= _FILE_HEADER.size + _FOOTER.size:
+            indexOffset, entries, magic = _FOOTER.unpack_from(self._map, size - _FOOTER.size)
+            if magic == INDEX_MAGIC and indexOffset + entries * _INDEX_ENTRY.size == size - _FOOTER.size:
+                blocks = [_INDEX_ENTRY.unpack_from(self._map, indexOffset + i * _INDEX_ENTRY.size)
+                          for i in range(entries)]
+                return blocks, indexOffset
+
+        logger.info("BusCaptureReader: no index, scanning blocks")
+        blocks = []
+        offset = _FILE_HEADER.size
+        while offset + _BLOCK_HEADER.size <= size:
+            magic, length, count, first, last = _BLOCK_HEADER.unpack_from(self._map, offset)
+            if magic != BLOCK_MAGIC or offset + _BLOCK_HEADER.size + length > size:
+                break
+            blocks.append((offset, count, first, last))
+            offset += _BLOCK_HEADER.size + length
+        if offset != size:
+            logger.warning("BusCaptureReader: %d trailing byte(s) ignored" % (size - offset))
+        return blocks, offset
+
+    @property
+    def created(self):
+        return self._created
+
+    @property
+    def blocks(self):
+        """ Index of the blocks: offset, number of records, first and last timestamps
+        """
+        return tuple(self._blocks)
+
+    @property
+    def dataEnd(self):
+        return self._dataEnd
+
+    def __len__(self):
+        """ Number of frames
+        """
+        return sum(entry[1] for entry in self._blocks)
+
+    def __iter__(self):
+        return self.frames()
+
+    def _blockFrames(self, offset):
+        """ Iterate over the frames of a block
+
+        @return: timestamp, source name, raw cEMI frame
+        @rtype: iterator of tuple (float, str, memoryview)
+        """
+        view = self._view
+        magic, length, count, first, last = _BLOCK_HEADER.unpack_from(view, offset)
+        offset += _BLOCK_HEADER.size
+        end = offset + length
+        sources = {}
+        while offset < end:
+            timestamp, type_, sourceId, length = _RECORD_HEADER.unpack_from(view, offset)
+            offset += _RECORD_HEADER.size
+            data = view[offset:offset + length]
+            offset += length
+            if type_ == RECORD_FRAME:
+                yield timestamp, sources.get(sourceId), data
+            elif type_ == RECORD_SOURCE:
+                sources[sourceId] = bytes(data).decode("utf-8")
+            else:
+                logger.warning("BusCaptureReader: unknown record type (%d)" % type_)
+
+    def frames(self, start=None):
+        """ Iterate over the frames
+
+        @param start: skip the frames captured before this time (None: from the beginning)
+        @type start: float
+
+        @return: timestamp, source name, raw cEMI frame (view on the mapped file)
+        @rtype: iterator of tuple (float, str, memoryview)
+        """
+        first = 0
+        if start is not None:
+            first = max(0, bisect.bisect_right(self._starts, start) - 1)
+        for offset, count, firstTime, lastTime in self._blocks[first:]:
+            if start is not None and lastTime < start:
+                continue
+            for frame in self._blockFrames(offset):
+                if start is None or frame[0] >= start:
+                    yield frame
+
+    def close(self):
+        """ Unmap the file
+
+        Frames still referenced keep the map alive until they are released.
+        """
+        if self._map is None:
+            return
+        self._view.release()
+        try:
+            self._map.close()
+        except BufferError:
+            logger.debug("BusCaptureReader.close(): frames still in use")
+        self._map = None
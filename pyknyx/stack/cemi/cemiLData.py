@@ -54,6 +54,8 @@ Usage
 """
 
 
+import struct
+
 from pyknyx.common.exception import PyKNyXValueError
 from pyknyx.services.logger import logging; logger = logging.getLogger(__name__)
 from pyknyx.stack.cemi.cemi import CEMI, CEMIValueError
@@ -62,13 +64,20 @@ from pyknyx.stack.individualAddress import IndividualAddress, IndividualAddressV
 from pyknyx.stack.groupAddress import GroupAddress, GroupAddressValueError
 from pyknyx.stack.priority import Priority
 
+_GROUP_FIXED = struct.Struct(">4B2HB")  # mc, addIL, ctrl1, ctrl2, sa, da, npdu length
+
 
 class CEMILData(CEMI):
     """ cEMI L_Data message
 
     @ivar _frame: cEMI L_Data raw frame
     @type _frame: L{CEMILDataFrame}
+
+    @ivar rxTime: time the frame was put to ETS, when metrics are enabled (see L{Metrics<pyknyx.services.metrics>})
+    @type rxTime: float
     """
+    rxTime = None
+
     MC_LDATA_REQ = 0x11  # message code for L-Data request
     MC_LDATA_CON = 0x2E  # message code for L-Data confirmation
     MC_LDATA_IND = 0x29  # message code for L-Data indication
@@ -100,19 +109,22 @@ class CEMILData(CEMI):
     EFF_STD_FRAME = 0
     EFF_LTE_FRAME_MASK = 0x08
 
-    def __init__(self, frame=None):
+    def __init__(self, frame=None, copy=True):
         """ Create a new cEMI L-Data message
 
         @param frame: raw frame
-        @type frame: str or bytearray
+        @type frame: str, bytearray, bytes or memoryview
+
+        @param copy: if False, use frame as is until the message is modified (see L{CEMILDataFrame})
+        @type copy: bool
         """
         super(CEMILData, self).__init__()
 
-        self._frame = CEMILDataFrame(frame)
+        self._frame = CEMILDataFrame(frame, copy=copy)
 
         if frame is not None:
             if self.messageCode not in CEMILData.MESSAGE_CODES:
-                raise CEMIValueError("invalid Message Code (%d)" % mc)
+                raise CEMIValueError("invalid Message Code (%d)" % self.messageCode)
             elif self._frame.addIL:
                 logger.warning("Additional Informations not supported and ignored")
             elif self.frameType == CEMILData.FT_EXT_FRAME:
@@ -120,6 +132,58 @@ class CEMILData(CEMI):
         else:
             self.frameType = CEMILData.FT_STD_FRAME
 
+    @staticmethod
+    def groupCtrl(priority, hopCount):
+        """ Compute the control fields of a group addressed L_Data.ind standard frame
+
+        @param priority: frame priority
+        @type priority: L{Priority} or int
+
+        @param hopCount: routing counter
+        @type hopCount: int
+
+        @return: ctrl1, ctrl2
+        @rtype: tuple of int
+        """
+        if isinstance(priority, Priority):
+            priority = priority.level
+        ctrl1 = CEMILData.FT_STD_FRAME << 7 | CEMILData.R_NO_REPEAT << 5 | CEMILData.SB_BROADCAST << 4 | \
+                (priority & 0x03) << 2
+        ctrl2 = CEMILData.AT_GROUP_ADDRESS << 7 | (hopCount & 0x07) << 4
+        return ctrl1, ctrl2
+
+    @classmethod
+    def groupData(cls, gad, priority, hopCount, tPDU, src=0):
+        """ Build a group addressed L_Data.ind message
+
+        Same result as setting messageCode, destinationAddress, priority, hopCount and npdu on a new message, but
+        the frame is packed at once.
+
+        @param gad: destination group address
+        @type gad: L{GroupAddress}
+
+        @param priority: frame priority
+        @type priority: L{Priority} or int
+
+        @param hopCount: routing counter
+        @type hopCount: int
+
+        @param tPDU: transport layer PDU
+        @type tPDU: bytearray
+
+        @param src: source address (usually set later, by the link layer)
+        @type src: L{IndividualAddress} or int
+
+        @rtype: L{CEMILData}
+        """
+        if isinstance(src, IndividualAddress):
+            src = src.raw
+        ctrl1, ctrl2 = CEMILData.groupCtrl(priority, hopCount)
+        raw = bytearray(_GROUP_FIXED.size + len(tPDU))
+        _GROUP_FIXED.pack_into(raw, 0, CEMILData.MC_LDATA_IND, 0, ctrl1, ctrl2, src, gad.raw, len(tPDU) - 1)
+        raw[_GROUP_FIXED.size:] = tPDU
+        return cls(raw, copy=False)
+
     def copy(self):
         return type(self)(self._frame.copy())
 
@@ -203,8 +267,7 @@ class CEMILData(CEMI):
 
     @property
     def priority(self):
-        pr = (self._frame.ctrl1 >> 2) & 0x03
-        return Priority(pr)
+        return Priority.fromLevel((self._frame.ctrl1 >> 2) & 0x03)
 
     @priority.setter
     def priority(self, pr):
@@ -268,7 +331,7 @@ class CEMILData(CEMI):
 
     @property
     def sourceAddress(self):
-        return IndividualAddress(self._frame.sa)
+        return IndividualAddress.fromRaw(self._frame.sa)
 
     @sourceAddress.setter
     def sourceAddress(self, sa):
@@ -279,10 +342,9 @@ class CEMILData(CEMI):
     @property
     def destinationAddress(self):
         if self.addressType == 0:
-            da = IndividualAddress(self._frame.da)
+            return IndividualAddress.fromRaw(self._frame.da)
         else:
-            da = GroupAddress(self._frame.da)
-        return da
+            return GroupAddress.fromRaw(self._frame.da)
 
     @destinationAddress.setter
     def destinationAddress(self, da):
@@ -52,6 +52,12 @@ Structure of a cEMI L_Data raw frame:
  - Destination address high/low (DAH, DAL): 2 bytes
  - NPDU: 1 to n bytes. First byte is NPDU length
 
+The fixed part of the frame is decoded once, when the frame is created; fields are then served from cached values.
+
+A frame may be built over a read-only buffer (bytes, memoryview), without copying it (copy=False). This is used
+on the receive path, where most frames are only read. A private, mutable copy is made on the first write (e.g.
+hop count decrement when routing).
+
 Usage
 =====
 
@@ -84,23 +90,53 @@ import struct
 from pyknyx.services.logger import logging; logger = logging.getLogger(__name__)
 from pyknyx.stack.cemi.cemi import CEMIValueError
 
+_PREFIX = struct.Struct(">2B")  # mc, addIL
+_FIXED = struct.Struct(">2B2H")  # ctrl1, ctrl2, sa, da
+
 
 class CEMILDataFrame(object):
     """ cEMI L_Data Raw Frame container
 
     @ivar _raw: raw frame
-    @type _raw: bytearray
+    @type _raw: bytearray, or read-only buffer until first written
+
+    @ivar _mutable: True if _raw is our own bytearray
+    @type _mutable: bool
+
+    @ivar _mc: message code
+    @type _mc: int
+
+    @ivar _addIL: additional info length
+    @type _addIL: int
+
+    @ivar _ctrl1: control field 1
+    @type _ctrl1: int
+
+    @ivar _ctrl2: control field 2
+    @type _ctrl2: int
+
+    @ivar _sa: source address
+    @type _sa: int
+
+    @ivar _da: destination address
+    @type _da: int
     """
+    __slots__ = ("_raw", "_mutable", "_mc", "_addIL", "_ctrl1", "_ctrl2", "_sa", "_da")
+
     BASIC_LENGTH = 9
 
-    def __init__(self, frame=None, addIL=0):
+    def __init__(self, frame=None, addIL=0, copy=True):
         """ Init frame
 
         @param frame: raw frame
-        @type frame: str or bytearray
+        @type frame: str, bytes, bytearray, memoryview or L{CEMILDataFrame}
 
         @param addIL: additional info length
         @type addIL: int
+
+        @param copy: if False, don't copy frame but use it as is: a bytearray is then modified in place, other
+                     buffers are copied on first write. The caller must not modify the buffer afterwards.
+        @type copy: bool
         """
         super(CEMILDataFrame, self).__init__()
 
@@ -111,35 +147,62 @@ class CEMILDataFrame(object):
                 frame = frame._raw
             if len(frame) < CEMILDataFrame.BASIC_LENGTH:
                 raise CEMIValueError("data too short (%d)" % len(frame))
-            self._raw = bytearray(frame)
+            if copy or isinstance(frame, str):
+                self._raw = bytearray(frame)
+                self._mutable = True
+            else:
+                self._raw = frame
+                self._mutable = isinstance(frame, bytearray)
+            self._decode()
         else:
             self._raw = bytearray(CEMILDataFrame.BASIC_LENGTH+addIL)
             self._raw[1] = addIL
+            self._mutable = True
+            self._mc = self._ctrl1 = self._ctrl2 = self._sa = self._da = 0
+            self._addIL = addIL
+
+    def _decode(self):
+        """ Decode the fixed part of the frame
+        """
+        self._mc, self._addIL = _PREFIX.unpack_from(self._raw)
+        if len(self._raw) < CEMILDataFrame.BASIC_LENGTH + self._addIL:
+            raise CEMIValueError("data too short for addIL (%d)" % self._addIL)
+        self._ctrl1, self._ctrl2, self._sa, self._da = _FIXED.unpack_from(self._raw, 2+self._addIL)
+
+    def _writable(self):
+        """ Return the raw frame, after making our own copy if needed
+        """
+        if not self._mutable:
+            self._raw = bytearray(self._raw)
+            self._mutable = True
+        return self._raw
 
     def __repr__(self):
-        return "<CEMILDataFrame(mc=%s, addIL=%d, ctrl1=%s, ctrl2=%s, src=%s, dest=%s)>" % (hex(self.mc), self.addIL, hex(self.ctrl1), hex(self.ctrl2), hex(self.sa), hex(self.da))
+        return "<CEMILDataFrame(mc=%s, addIL=%d, ctrl1=%s, ctrl2=%s, src=%s, dest=%s)>" % (hex(self._mc), self._addIL, hex(self._ctrl1), hex(self._ctrl2), hex(self._sa), hex(self._da))
 
     def __str__(self):
-        return str(self._raw)
+        return str(self._raw if self._mutable else bytearray(self._raw))
 
     def copy(self):
         return type(self)(self._raw)
 
     @property
     def raw(self):
+        """ Raw frame; may be a read-only buffer
+        """
         return self._raw
 
     @property
     def mc(self):
-        return self._raw[0]
+        return self._mc
 
     @mc.setter
     def mc(self, mc):
-        self._raw[0] = mc & 0xff
+        self._writable()[0] = self._mc = mc & 0xff
 
     @property
     def addIL(self):
-        return self._raw[1]
+        return self._addIL
 
     # Must be set at frame creation
     #@addIL.setter
@@ -148,98 +211,94 @@ class CEMILDataFrame(object):
 
     @property
     def addInfo(self):
-        if self.addIL:
-            return self._raw[2:2+self.addIL]
+        if self._addIL:
+            return bytearray(self._raw[2:2+self._addIL])
         else:
             return None
 
     @addInfo.setter
     def addInfo(self, addInfo):
-        if not self.addIL or self.addIL != len(addInfo):
-            raise CEMIValueError("incompatible addIL value (%d)" % self.addIL)
-        self._raw[2:2+self.addIL] = addInfo
+        if not self._addIL or self._addIL != len(addInfo):
+            raise CEMIValueError("incompatible addIL value (%d)" % self._addIL)
+        self._writable()[2:2+self._addIL] = addInfo
 
     @property
     def ctrl1(self):
-        return self._raw[2+self.addIL]
+        return self._ctrl1
 
     @ctrl1.setter
     def ctrl1(self, ctrl1):
-        self._raw[2+self.addIL] = ctrl1
+        self._writable()[2+self._addIL] = self._ctrl1 = ctrl1
 
     @property
     def ctrl2(self):
-        return self._raw[3+self.addIL]
+        return self._ctrl2
 
     @ctrl2.setter
     def ctrl2(self, ctrl2):
-        self._raw[3+self.addIL] = ctrl2
+        self._writable()[3+self._addIL] = self._ctrl2 = ctrl2
 
     @property
     def sah(self):
-        return self._raw[4+self.addIL]
+        return self._sa >> 8
 
     @sah.setter
     def sah(self, sah):
-        self._raw[4+self.addIL] = sah
+        self.sa = (sah & 0xff) << 8 | (self._sa & 0xff)
 
     @property
     def sal(self):
-        return self._raw[5+self.addIL]
+        return self._sa & 0xff
 
     @sal.setter
     def sal(self, sal):
-        self._raw[5+self.addIL] = sal
+        self.sa = (self._sa & 0xff00) | (sal & 0xff)
 
     @property
     def sa(self):
-        b = self._raw[4+self.addIL:6+self.addIL]
-        return struct.unpack(">H", b)[0]
+        return self._sa
 
     @sa.setter
     def sa(self, sa):
-        if isinstance(sa, int):
-            self.sah = (sa >> 8) & 0xff  # use struct.pack!!!
-            self.sal = sa & 0xff
-        else:
-            self._raw[4+self.addIL:6+self.addIL] = sa
+        if not isinstance(sa, int):
+            sa = struct.unpack(">H", sa)[0]
+        struct.pack_into(">H", self._writable(), 4+self._addIL, sa)
+        self._sa = sa
 
     @property
     def dah(self):
-        return self._raw[6+self.addIL]
+        return self._da >> 8
 
     @dah.setter
     def dah(self, dah):
-        self._raw[6+self.addIL] = dah
+        self.da = (dah & 0xff) << 8 | (self._da & 0xff)
 
     @property
     def dal(self):
-        return self._raw[7+self.addIL]
+        return self._da & 0xff
 
     @dal.setter
     def dal(self, dal):
-        self._raw[7+self.addIL] = dal
+        self.da = (self._da & 0xff00) | (dal & 0xff)
 
     @property
     def da(self):
-        b = self._raw[6+self.addIL:8+self.addIL]
-        return struct.unpack(">H", b)[0]
+        return self._da
 
     @da.setter
     def da(self, da):
-        if isinstance(da, int):
-            self.dah = (da >> 8) & 0xff  # use struct.pack!!!
-            self.dal = da & 0xff
-        else:
-            self._raw[6+self.addIL:8+self.addIL] = da
+        if not isinstance(da, int):
+            da = struct.unpack(">H", da)[0]
+        struct.pack_into(">H", self._writable(), 6+self._addIL, da)
+        self._da = da
 
     @property
     def npdu(self):
-        return self._raw[8+self.addIL:]
+        return bytearray(self._raw[8+self._addIL:])
 
     @npdu.setter
     def npdu(self, npdu):
-        self._raw[8+self.addIL:] = npdu
+        self._writable()[8+self._addIL:] = npdu
 
     #@property
     #def l(self):
@@ -248,4 +307,3 @@ class CEMILDataFrame(object):
     ##@l.setter
     ##def l(self, l):
         ##self._raw[8] = l
-
@@ -0,0 +1,226 @@
+# -*- coding: utf-8 -*-
+
+""" Python KNX framework
+
+License
+=======
+
+ - B{PyKNyX} (U{https://github.com/knxd/pyknyx}) is Copyright:
+  - © 2016-2017 Matthias Urlichs
+  - PyKNyX is a fork of pKNyX
+   - © 2013-2015 Frédéric Mantegazza
+
+This program is free software; you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation; either version 2 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program; if not, write to the Free Software
+Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA  02111-1307  USA
+or see:
+
+ - U{http://www.gnu.org/licenses/gpl.html}
+
+Module purpose
+==============
+
+Duplicate frames suppression
+
+Implements
+==========
+
+ - B{DuplicateFilterValueError}
+ - B{DuplicateFilter}
+
+Documentation
+=============
+
+The same telegram can reach ETS several times: repeated by the TP medium (repeat flag), through several routers or
+transceivers, or endlessly through a loop. Each copy would be decoded again by all listeners, and fire all
+notifiers again.
+
+The filter remembers the frames seen during a short time window, by content: source, destination, address type
+and NPDU. The repeat flag and the routing counter are not part of the key, as they are precisely what changes
+between copies. A frame matching a remembered one is a duplicate if:
+
+ - it is flagged as repeated;
+ - or it comes from another transport than the first copy;
+ - or its routing counter is lower than the first copy's one (it went through more routers).
+
+Otherwise, it is the same telegram legitimately sent again by the device (same transport, same routing counter, not
+repeated), which is not suppressed.
+
+Entries are kept in arrival order, so expired ones are evicted from the head in O(1); the number of entries is
+bounded too, the oldest being evicted first.
+
+Usage
+=====
+
+>>> duplicateFilter = DuplicateFilter(window=0.5)
+>>> duplicateFilter.isDuplicate(cEMI, transceiver)
+False
+>>> duplicateFilter.isDuplicate(cEMI, otherTransceiver)
+True
+>>> duplicateFilter.suppressed
+1
+
+@author: Frédéric Mantegazza
+@copyright: (C) 2013-2015 Frédéric Mantegazza
+@license: GPL
+"""
+
+
+import collections
+import threading
+import time
+
+from pyknyx.common.exception import PyKNyXValueError
+from pyknyx.services.logger import logging; logger = logging.getLogger(__name__)
+from pyknyx.stack.cemi.cemiLData import CEMILData
+
+
+class DuplicateFilterValueError(PyKNyXValueError):
+    """
+    """
+
+
+class DuplicateFilter(object):
+    """ DuplicateFilter class
+
+    @ivar _window: time during which a frame is remembered, in s
+    @type _window: float
+
+    @ivar _maxEntries: max. number of frames remembered
+    @type _maxEntries: int
+
+    @ivar _entries: remembered frames, oldest first
+    @type _entries: OrderedDict of key -> tuple of (time, transport, routing counter)
+
+    @ivar _passed: number of frames let through
+    @type _passed: int
+
+    @ivar _suppressed: number of duplicates suppressed
+    @type _suppressed: int
+
+    @ivar _evicted: number of entries evicted before the end of their time window
+    @type _evicted: int
+    """
+    WINDOW = 0.5
+    MAX_ENTRIES = 4096
+
+    def __init__(self, window=WINDOW, maxEntries=MAX_ENTRIES, clock=time.time):
+        """
+
+        @param window: time during which a frame is remembered, in s
+        @type window: float
+
+        @param maxEntries: max. number of frames remembered
+        @type maxEntries: int
+
+        @param clock: time source, in s
+        @type clock: callable
+
+        raise DuplicateFilterValueError:
+        """
+        super(DuplicateFilter, self).__init__()
+
+        if window <= 0:
+            raise DuplicateFilterValueError("invalid window (%r)" % window)
+        if maxEntries < 1:
+            raise DuplicateFilterValueError("invalid max. number of entries (%r)" % maxEntries)
+        self._window = window
+        self._maxEntries = maxEntries
+        self._clock = clock
+
+        self._lock = threading.Lock()
+        self._entries = collections.OrderedDict()
+
+        self._passed = 0
+        self._suppressed = 0
+        self._evicted = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    @property
+    def window(self):
+        return self._window
+
+    @property
+    def maxEntries(self):
+        return self._maxEntries
+
+    @property
+    def passed(self):
+        return self._passed
+
+    @property
+    def suppressed(self):
+        return self._suppressed
+
+    @property
+    def evicted(self):
+        return self._evicted
+
+    @staticmethod
+    def key(cEMI):
+        """ Key of a frame: address type, source, destination and NPDU
+
+        @rtype: bytes
+        """
+        frame = cEMI.frame
+        offset = 3 + frame.addIL
+        raw = frame.raw
+        return bytes((raw[offset] & 0x80,)) + bytes(raw[offset + 1:])
+
+    def isDuplicate(self, cEMI, transport=None):
+        """ Check a frame, and remember it if it is not a duplicate
+
+        @param cEMI: received frame
+        @type cEMI: L{CEMILData<pyknyx.stack.cemi.cemiLData>}
+
+        @param transport: transport the frame comes from
+        @type transport: L{L_DataServiceBase<pyknyx.stack.layer2.l_dataServiceBase>}
+
+        @return: True if the frame is a duplicate
+        @rtype: bool
+        """
+        key = DuplicateFilter.key(cEMI)
+        hopCount = cEMI.hopCount
+        repeated = cEMI.messageCode == CEMILData.MC_LDATA_IND and cEMI.repeat == CEMILData.R_REPEAT
+
+        with self._lock:
+            now = self._clock()
+            entries = self._entries
+            deadline = now - self._window
+            while entries:
+                oldest = next(iter(entries.values()))
+                if oldest[0] >= deadline:
+                    break
+                entries.popitem(last=False)
+
+            entry = entries.get(key)
+            if entry is not None:
+                if repeated or entry[1] is not transport or hopCount < entry[2]:
+                    self._suppressed += 1
+                    return True
+                del entries[key]
+
+            entries[key] = (now, transport, hopCount)
+            if len(entries) > self._maxEntries:
+                entries.popitem(last=False)
+                self._evicted += 1
+            self._passed += 1
+            return False
+
+    def clear(self):
+        """ Forget all frames
+        """
+        with self._lock:
+            self._entries.clear()
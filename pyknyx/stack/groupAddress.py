@@ -78,6 +78,8 @@ GroupAddressValueError: group address out of range
 GroupAddressValueError: outFormatLevel 4 must be 2 or 3
 >>> groupAddr.frame
 '\n\x03'
+>>> GroupAddress.fromRaw(2563) is GroupAddress.fromRaw(2563)
+True
 
 @author: Frédéric Mantegazza
 @copyright: (C) 2013-2015 Frédéric Mantegazza
@@ -101,6 +103,10 @@ class GroupAddress(KnxAddress):
     @ivar _outFormatLevel: output format level representation, in (2, 3).
     @type _outFormatLevel: int
     """
+    __slots__ = ("_outFormatLevel",)
+
+    _cache = {}  # shared instances, by raw address
+
     def __init__(self, address="0/0/0", outFormatLevel=3):
         """ Create a group address
 
@@ -148,6 +154,24 @@ class GroupAddress(KnxAddress):
 
         super(GroupAddress, self).__init__(address)
 
+    @classmethod
+    def fromRaw(cls, raw):
+        """ Return the shared instance for the given raw address
+
+        Shared instances use the default output format level, which can't be changed.
+
+        @param raw: knx raw address
+        @type raw: int
+
+        @rtype: L{GroupAddress}
+        """
+        try:
+            return GroupAddress._cache[raw]
+        except KeyError:
+            gad = GroupAddress(raw)
+            gad._frozen = True
+            return GroupAddress._cache.setdefault(raw, gad)
+
     def __repr__(self):
         return "<GroupAddress('%s')>" % self.address
 
@@ -156,10 +180,12 @@ class GroupAddress(KnxAddress):
 
     @property
     def address(self):
-        if self._outFormatLevel == 3:
-            return "%d/%d/%d" % (self.main, self.middle, self.sub)
-        else:
-            return "%d/%d" % (self.main, self.sub)
+        if self._address is None:
+            if self._outFormatLevel == 3:
+                self._address = "%d/%d/%d" % (self.main, self.middle, self.sub)
+            else:
+                self._address = "%d/%d" % (self.main, self.sub)
+        return self._address
 
     @property
     def main(self):
@@ -187,5 +213,8 @@ class GroupAddress(KnxAddress):
     def outFormatLevel(self, level):
         if level not in (2, 3):
             raise GroupAddressValueError("outFormatLevel must be 2 or 3", level)
+        if self._frozen:
+            raise GroupAddressValueError("can't change outFormatLevel of a shared address")
         self._outFormatLevel = level
+        self._address = None
 
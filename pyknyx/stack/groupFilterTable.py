@@ -0,0 +1,228 @@
+# -*- coding: utf-8 -*-
+
+""" Python KNX framework
+
+License
+=======
+
+ - B{PyKNyX} (U{https://github.com/knxd/pyknyx}) is Copyright:
+  - © 2016-2017 Matthias Urlichs
+  - PyKNyX is a fork of pKNyX
+   - © 2013-2015 Frédéric Mantegazza
+
+This program is free software; you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation; either version 2 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program; if not, write to the Free Software
+Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA  02111-1307  USA
+or see:
+
+ - U{http://www.gnu.org/licenses/gpl.html}
+
+Module purpose
+==============
+
+Group address filter table
+
+Implements
+==========
+
+ - B{GroupFilterTableValueError}
+ - B{GroupFilterTable}
+
+Documentation
+=============
+
+Set of group addresses, stored as a bitmap covering the whole group address space (65536 bits, 8 kB). Membership
+tests are a single index and mask, whatever the number of addresses in the table, which makes it suitable for
+filtering every frame forwarded to a client or a line.
+
+A table can also pass all group addresses (which is the default), for clients which don't filter.
+
+Usage
+=====
+
+>>> table = GroupFilterTable()
+>>> GroupAddress("1/2/3") in table
+True
+>>> table.add(GroupAddress("1/2/3"))
+>>> table.passAll
+False
+>>> GroupAddress("1/2/3") in table
+True
+>>> GroupAddress("1/2/4") in table
+False
+>>> table.contains(2563)
+True
+
+@author: Frédéric Mantegazza
+@copyright: (C) 2013-2015 Frédéric Mantegazza
+@license: GPL
+"""
+
+
+from pyknyx.common.exception import PyKNyXValueError
+from pyknyx.services.logger import logging; logger = logging.getLogger(__name__)
+from pyknyx.stack.groupAddress import GroupAddress
+
+
+class GroupFilterTableValueError(PyKNyXValueError):
+    """
+    """
+
+
+class GroupFilterTable(object):
+    """ GroupFilterTable class
+
+    @ivar _bitmap: one bit per group address
+    @type _bitmap: bytearray
+
+    @ivar _passAll: if True, all group addresses pass, whatever the bitmap content
+    @type _passAll: bool
+
+    @ivar _count: number of group addresses in the table
+    @type _count: int
+    """
+    SIZE = 0x10000 // 8
+
+    def __init__(self, gads=None):
+        """
+
+        @param gads: initial group addresses (None: pass all)
+        @type gads: iterable of L{GroupAddress} or raw int
+        """
+        super(GroupFilterTable, self).__init__()
+
+        self._bitmap = bytearray(GroupFilterTable.SIZE)
+        self._passAll = True
+        self._count = 0
+        if gads is not None:
+            self._passAll = False
+            for gad in gads:
+                self.add(gad)
+
+    def __repr__(self):
+        if self._passAll:
+            return "<GroupFilterTable(passAll)>"
+        return "<GroupFilterTable(%d addresses)>" % self._count
+
+    def __len__(self):
+        return self._count
+
+    def __contains__(self, gad):
+        if self._passAll:
+            return True
+        raw = gad.raw
+        return bool(self._bitmap[raw >> 3] & (1 << (raw & 0x07)))
+
+    def __iter__(self):
+        bitmap = self._bitmap
+        for index, byte in enumerate(bitmap):
+            if byte:
+                for bit in range(8):
+                    if byte & (1 << bit):
+                        yield GroupAddress.fromRaw(index << 3 | bit)
+
+    @staticmethod
+    def _raw(gad):
+        if isinstance(gad, GroupAddress):
+            return gad.raw
+        if not 0 <= gad <= 0xffff:
+            raise GroupFilterTableValueError("group address out of range (%r)" % gad)
+        return gad
+
+    @property
+    def passAll(self):
+        return self._passAll
+
+    @passAll.setter
+    def passAll(self, passAll):
+        self._passAll = bool(passAll)
+
+    def contains(self, raw):
+        """ Test a raw group address
+
+        @param raw: raw group address
+        @type raw: int
+        """
+        return self._passAll or bool(self._bitmap[raw >> 3] & (1 << (raw & 0x07)))
+
+    def add(self, gad):
+        """ Add a group address, and stop passing all addresses
+
+        @param gad: group address
+        @type gad: L{GroupAddress} or raw int
+
+        raise GroupFilterTableValueError:
+        """
+        raw = GroupFilterTable._raw(gad)
+        mask = 1 << (raw & 0x07)
+        if not self._bitmap[raw >> 3] & mask:
+            self._bitmap[raw >> 3] |= mask
+            self._count += 1
+        self._passAll = False
+
+    def update(self, gads):
+        """ Add several group addresses
+
+        @param gads: group addresses
+        @type gads: iterable of L{GroupAddress} or raw int
+
+        raise GroupFilterTableValueError:
+        """
+        for gad in gads:
+            self.add(gad)
+
+    @classmethod
+    def fromGadMap(cls, table):
+        """ Build a table holding the group addresses of a GAD map table
+
+        Only complete group addresses are used (main and middle groups entries are ignored).
+
+        @param table: GAD map table, as loaded by L{GroupAddressTableMapper<pyknyx.services.groupAddressTableMapper>}
+        from a module or an ETS project export
+        @type table: dict
+
+        @rtype: L{GroupFilterTable}
+        """
+        gads = []
+        for gad in table:
+            if "-" in gad:
+                continue
+            try:
+                gads.append(GroupAddress(gad))
+            except PyKNyXValueError:
+                logger.warning("GroupFilterTable.fromGadMap(): invalid group address (%r)" % gad)
+        return cls(gads)
+
+    def remove(self, gad):
+        """ Remove a group address
+
+        @param gad: group address
+        @type gad: L{GroupAddress} or raw int
+
+        raise GroupFilterTableValueError:
+        """
+        raw = GroupFilterTable._raw(gad)
+        mask = 1 << (raw & 0x07)
+        if self._bitmap[raw >> 3] & mask:
+            self._bitmap[raw >> 3] &= ~mask & 0xff
+            self._count -= 1
+
+    def clear(self, passAll=False):
+        """ Remove all group addresses
+
+        @param passAll: pass all group addresses from now on
+        @type passAll: bool
+        """
+        self._bitmap[:] = bytes(GroupFilterTable.SIZE)
+        self._count = 0
+        self._passAll = passAll
@@ -0,0 +1,359 @@
+# -*- coding: utf-8 -*-
+
+""" Python KNX framework
+
+License
+=======
+
+ - B{PyKNyX} (U{https://github.com/knxd/pyknyx}) is Copyright:
+  - © 2016-2017 Matthias Urlichs
+  - PyKNyX is a fork of pKNyX
+   - © 2013-2015 Frédéric Mantegazza
+
+This program is free software; you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation; either version 2 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program; if not, write to the Free Software
+Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA  02111-1307  USA
+or see:
+
+ - U{http://www.gnu.org/licenses/gpl.html}
+
+Module purpose
+==============
+
+Group values cache
+
+Implements
+==========
+
+ - B{GroupValueCacheValueError}
+ - B{GroupValueCache}
+
+Documentation
+=============
+
+Remembers the last value seen on each group address: raw data, source and time. The cache is fed with the values
+written, or sent in response to reads, on any group address: once per frame by the ETS, for the frames received
+from the bus (see L{ETSBase<pyknyx.core.ets>}), and by the application layer of the local devices, for the values
+they send (see L{A_GroupDataService<pyknyx.stack.layer7.a_groupDataService>}).
+
+Storage is indexed by raw group address, in preallocated arrays covering the whole 16 bits address space: updates
+and lookups are O(1) and allocate nothing.
+
+The cache can be saved to a snapshot file, and restored from it. When started with a path, it is restored at once,
+then saved periodically (if modified) and on stop. Devices initialise their datapoints from the restored values
+instead of reading them from the bus (see L{Stack<pyknyx.stack.stack>}).
+
+Snapshot layout (little endian): header (magic "PKXGVC", version, number of entries, creation time), followed by
+the entries (group address, source, time, data length, data).
+
+Usage
+=====
+
+>>> cache = GroupValueCache()
+>>> cache.update(GroupAddress("1/1/1").raw, IndividualAddress("1.1.1").raw, bytearray((1,)))
+>>> cache.get(GroupAddress("1/1/1").raw)
+(bytearray(b'\\x01'), <IndividualAddress('1.1.1')>, 1469000000.0)
+>>> cache.save("values.cache")
+
+@author: Frédéric Mantegazza
+@copyright: (C) 2013-2015 Frédéric Mantegazza
+@license: GPL
+"""
+
+
+import array
+import os
+import struct
+import threading
+import time
+
+from pyknyx.common.exception import PyKNyXValueError
+from pyknyx.services.logger import logging; logger = logging.getLogger(__name__)
+from pyknyx.stack.individualAddress import IndividualAddress
+
+_HEADER = struct.Struct("<6sBId")  # magic, version, number of entries, creation time
+_ENTRY = struct.Struct("<HHdB")  # group address, source, time, data length
+
+MAGIC = b"PKXGVC"
+VERSION = 1
+
+# Max. size of a group value (standard frame)
+MAX_DATA = 14
+
+_ADDRESSES = 0x10000
+
+
+class GroupValueCacheValueError(PyKNyXValueError):
+    """
+    """
+
+
+class GroupValueCache(object):
+    """ GroupValueCache class
+
+    Thread-safe.
+
+    @ivar _lengths: data length of each group address (0: never seen)
+    @type _lengths: bytearray
+
+    @ivar _data: data of each group address, MAX_DATA bytes per address
+    @type _data: bytearray
+
+    @ivar _sources: raw source address of each group address last value
+    @type _sources: L{array<array>} of int
+
+    @ivar _times: time of each group address last value
+    @type _times: L{array<array>} of float
+
+    @ivar maxAge: values older than this are not used to initialise datapoints, in s (None: any age)
+    @type maxAge: float
+
+    @ivar _dirty: set when modified since the last snapshot
+    @type _dirty: bool
+    """
+    # Snapshot period, in s
+    PERIOD = 300.
+
+    def __init__(self, maxAge=None, clock=time.time):
+        """
+
+        @param maxAge: values older than this are not used to initialise datapoints, in s (None: any age)
+        @type maxAge: float
+
+        @param clock: time source, in s
+        @type clock: callable
+        """
+        super(GroupValueCache, self).__init__()
+
+        self.maxAge = maxAge
+        self._clock = clock
+        self._lengths = bytearray(_ADDRESSES)
+        self._data = bytearray(_ADDRESSES * MAX_DATA)
+        self._sources = array.array("H", [0]) * _ADDRESSES
+        self._times = array.array("d", [0.]) * _ADDRESSES
+        self._count = 0
+        self._dirty = False
+        self._lock = threading.Lock()
+
+        self._path = None
+        self._period = None
+        self._stopped = threading.Event()
+        self._thread = None
+
+    def __len__(self):
+        return self._count
+
+    def __contains__(self, gad):
+        return bool(self._lengths[gad])
+
+    @property
+    def path(self):
+        """ Snapshot file path (None: not persistent)
+        """
+        return self._path
+
+    def update(self, gad, src, data, timestamp=None):
+        """ Remember the value of a group address
+
+        @param gad: raw group address
+        @type gad: int
+
+        @param src: raw source address
+        @type src: int
+
+        @param data: group value
+        @type data: bytearray
+
+        @param timestamp: time of the value (default: now)
+        @type timestamp: float
+        """
+        size = len(data)
+        if not 0 < size <= MAX_DATA:
+            logger.warning("GroupValueCache.update(): invalid data size (%d)" % size)
+            return
+        if timestamp is None:
+            timestamp = self._clock()
+        offset = gad * MAX_DATA
+        with self._lock:
+            if not self._lengths[gad]:
+                self._count += 1
+            self._lengths[gad] = size
+            self._data[offset:offset + size] = data
+            self._sources[gad] = src
+            self._times[gad] = timestamp
+            self._dirty = True
+
+    def get(self, gad, maxAge=None):
+        """ Last value of a group address
+
+        @param gad: raw group address
+        @type gad: int
+
+        @param maxAge: ignore values older than this, in s (None: any age)
+        @type maxAge: float
+
+        @return: data, source and time of the value; None if unknown (or too old)
+        @rtype: tuple of (bytearray, L{IndividualAddress}, float)
+        """
+        with self._lock:
+            size = self._lengths[gad]
+            if not size:
+                return None
+            timestamp = self._times[gad]
+            if maxAge is not None and self._clock() - timestamp > maxAge:
+                return None
+            offset = gad * MAX_DATA
+            return self._data[offset:offset + size], IndividualAddress.fromRaw(self._sources[gad]), timestamp
+
+    def forget(self, gad):
+        """ Forget the value of a group address
+        """
+        with self._lock:
+            if self._lengths[gad]:
+                self._lengths[gad] = 0
+                self._count -= 1
+                self._dirty = True
+
+    def clear(self):
+        with self._lock:
+            self._lengths[:] = bytearray(_ADDRESSES)
+            self._count = 0
+            self._dirty = True
+
+    def gads(self):
+        """ Raw group addresses with a known value
+
+        @rtype: list of int
+        """
+        with self._lock:
+            return [gad for gad in range(_ADDRESSES) if self._lengths[gad]]
+
+    def save(self, path):
+        """ Write a snapshot of the cache
+
+        The file is replaced atomically.
+
+        @param path: snapshot file path
+        @type path: str
+        """
+        with self._lock:
+            entries = bytearray()
+            count = 0
+            for gad in range(_ADDRESSES):
+                size = self._lengths[gad]
+                if size:
+                    offset = gad * MAX_DATA
+                    entries += _ENTRY.pack(gad, self._sources[gad], self._times[gad], size)
+                    entries += self._data[offset:offset + size]
+                    count += 1
+            self._dirty = False
+
+        tmpPath = "%s.tmp" % path
+        with open(tmpPath, "wb") as f:
+            f.write(_HEADER.pack(MAGIC, VERSION, count, self._clock()))
+            f.write(entries)
+            f.flush()
+            os.fsync(f.fileno())
+        os.rename(tmpPath, path)
+        logger.debug("GroupValueCache.save(): %d values saved to '%s'" % (count, path))
+
+    def load(self, path):
+        """ Restore the cache from a snapshot
+
+        Restored values replace the current ones.
+
+        @param path: snapshot file path
+        @type path: str
+
+        @return: number of values restored
+        @rtype: int
+
+        raise GroupValueCacheValueError: invalid snapshot
+        """
+        with open(path, "rb") as f:
+            raw = f.read()
+        if len(raw) < _HEADER.size:
+            raise GroupValueCacheValueError("truncated snapshot '%s'" % path)
+        magic, version, count, _ = _HEADER.unpack_from(raw, 0)
+        if magic != MAGIC or version != VERSION:
+            raise GroupValueCacheValueError("'%s' is not a group values snapshot" % path)
+
+        offset = _HEADER.size
+        entries = []
+        for i in range(count):
+            if offset + _ENTRY.size > len(raw):
+                raise GroupValueCacheValueError("truncated snapshot '%s'" % path)
+            gad, src, timestamp, size = _ENTRY.unpack_from(raw, offset)
+            offset += _ENTRY.size
+            if not 0 < size <= MAX_DATA or offset + size > len(raw):
+                raise GroupValueCacheValueError("invalid entry in snapshot '%s'" % path)
+            entries.append((gad, src, raw[offset:offset + size], timestamp))
+            offset += size
+
+        for gad, src, data, timestamp in entries:
+            self.update(gad, src, data, timestamp)
+        with self._lock:
+            self._dirty = False
+        logger.info("GroupValueCache.load(): %d values restored from '%s'" % (count, path))
+
+        return count
+
+    def _run(self):
+        while not self._stopped.wait(self._period):
+            if self._dirty:
+                try:
+                    self.save(self._path)
+                except Exception:
+                    logger.exception("GroupValueCache._run()")
+
+    def start(self, path, period=PERIOD):
+        """ Make the cache persistent
+
+        Restores the cache from the snapshot, if any, then saves it every period (if modified). A corrupted
+        snapshot is ignored.
+
+        @param path: snapshot file path
+        @type path: str
+
+        @param period: snapshot period, in s
+        @type period: float
+        """
+        logger.trace("GroupValueCache.start()")
+
+        self._path = path
+        self._period = period
+        if os.path.exists(path):
+            try:
+                self.load(path)
+            except (GroupValueCacheValueError, IOError, OSError):
+                logger.exception("GroupValueCache.start()")
+        self._stopped.clear()
+        self._thread = threading.Thread(target=self._run, name="Group values snapshot")
+        self._thread.daemon = True
+        self._thread.start()
+
+    def stop(self):
+        """ Stop the periodic snapshots, and save the cache
+        """
+        logger.trace("GroupValueCache.stop()")
+
+        if self._thread is None:
+            return
+        self._stopped.set()
+        if self._thread is not threading.current_thread():
+            self._thread.join(1)
+        self._thread = None
+        try:
+            self.save(self._path)
+        except Exception:
+            logger.exception("GroupValueCache.stop()")
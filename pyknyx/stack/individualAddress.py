@@ -65,6 +65,8 @@ IndividualAddressValueError: individual address out of range
 3
 >>> indAddr.frame
 '\x12\x03'
+>>> IndividualAddress.fromRaw(4611) is IndividualAddress.fromRaw(4611)
+True
 
 @author: Frédéric Mantegazza
 @copyright: (C) 2013-2015 Frédéric Mantegazza
@@ -85,6 +87,10 @@ class IndividualAddressValueError(KnxAddressValueError):
 class IndividualAddress(KnxAddress):
     """ Individual address hanlding class
     """
+    __slots__ = ()
+
+    _cache = {}  # shared instances, by raw address
+
     def __init__(self, address="0.0.0"):
         """ Create an individual address
 
@@ -121,6 +127,22 @@ class IndividualAddress(KnxAddress):
 
         super(IndividualAddress, self).__init__(address)
 
+    @classmethod
+    def fromRaw(cls, raw):
+        """ Return the shared instance for the given raw address
+
+        @param raw: knx raw address
+        @type raw: int
+
+        @rtype: L{IndividualAddress}
+        """
+        try:
+            return IndividualAddress._cache[raw]
+        except KeyError:
+            addr = IndividualAddress(raw)
+            addr._frozen = True
+            return IndividualAddress._cache.setdefault(raw, addr)
+
     def __repr__(self):
         return "<IndividualAddress('%s')>" % self.address
 
@@ -129,7 +151,9 @@ class IndividualAddress(KnxAddress):
 
     @property
     def address(self):
-        return "%d.%d.%d" % (self.area, self.line, self.device)
+        if self._address is None:
+            self._address = "%d.%d.%d" % (self.area, self.line, self.device)
+        return self._address
 
     @property
     def area(self):
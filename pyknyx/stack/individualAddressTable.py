@@ -0,0 +1,233 @@
+# -*- coding: utf-8 -*-
+
+""" Python KNX framework
+
+License
+=======
+
+ - B{PyKNyX} (U{https://github.com/knxd/pyknyx}) is Copyright:
+  - © 2016-2017 Matthias Urlichs
+  - PyKNyX is a fork of pKNyX
+   - © 2013-2015 Frédéric Mantegazza
+
+This program is free software; you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation; either version 2 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program; if not, write to the Free Software
+Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA  02111-1307  USA
+or see:
+
+ - U{http://www.gnu.org/licenses/gpl.html}
+
+Module purpose
+==============
+
+Learning individual address table
+
+Implements
+==========
+
+ - B{IndividualAddressTableValueError}
+ - B{IndividualAddressTable}
+
+Documentation
+=============
+
+Works like the address table of an Ethernet switch: records on which transport each individual address was last
+seen as a source, so that frames sent to this address can be forwarded to this transport only, instead of being
+flooded to all broadcast media. Entries not refreshed during the aging time are forgotten; the number of entries is
+bounded too, the least recently seen address being forgotten first.
+
+Usage
+=====
+
+>>> table = IndividualAddressTable(aging=300)
+>>> table.learn(IndividualAddress("1.1.1").raw, transceiver)
+>>> table.lookup(IndividualAddress("1.1.1").raw) is transceiver
+True
+>>> table.lookup(IndividualAddress("1.1.2").raw)
+>>> table.hits, table.misses
+(1, 1)
+
+@author: Frédéric Mantegazza
+@copyright: (C) 2013-2015 Frédéric Mantegazza
+@license: GPL
+"""
+
+
+import collections
+import threading
+import time
+
+from pyknyx.common.exception import PyKNyXValueError
+from pyknyx.services.logger import logging; logger = logging.getLogger(__name__)
+
+
+class IndividualAddressTableValueError(PyKNyXValueError):
+    """
+    """
+
+
+class IndividualAddressTable(object):
+    """ IndividualAddressTable class
+
+    @ivar _aging: time after which an address not seen again is forgotten, in s
+    @type _aging: float
+
+    @ivar _maxEntries: max. number of addresses
+    @type _maxEntries: int
+
+    @ivar _entries: transport and last time seen, by raw individual address, least recently seen first
+    @type _entries: OrderedDict of int -> tuple of (transport, float)
+
+    @ivar _hits: number of lookups which found a transport
+    @type _hits: int
+
+    @ivar _misses: number of lookups which didn't
+    @type _misses: int
+    """
+    AGING = 300.
+    MAX_ENTRIES = 0x10000
+
+    def __init__(self, aging=AGING, maxEntries=MAX_ENTRIES, clock=time.time):
+        """
+
+        @param aging: time after which an address not seen again is forgotten, in s
+        @type aging: float
+
+        @param maxEntries: max. number of addresses
+        @type maxEntries: int
+
+        @param clock: time source, in s
+        @type clock: callable
+
+        raise IndividualAddressTableValueError:
+        """
+        super(IndividualAddressTable, self).__init__()
+
+        if aging <= 0:
+            raise IndividualAddressTableValueError("invalid aging time (%r)" % aging)
+        if maxEntries < 1:
+            raise IndividualAddressTableValueError("invalid max. number of entries (%r)" % maxEntries)
+        self._aging = aging
+        self._maxEntries = maxEntries
+        self._clock = clock
+
+        self._lock = threading.Lock()
+        self._entries = collections.OrderedDict()
+
+        self._hits = 0
+        self._misses = 0
+        self._moves = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, raw):
+        return self.get(raw) is not None
+
+    @property
+    def aging(self):
+        return self._aging
+
+    @property
+    def hits(self):
+        return self._hits
+
+    @property
+    def misses(self):
+        return self._misses
+
+    @property
+    def moves(self):
+        """ Number of addresses seen on another transport than the learned one
+        """
+        return self._moves
+
+    def _expire(self, now):
+        """ Forget the addresses not seen during the aging time
+
+        Must be called with the lock held.
+        """
+        entries = self._entries
+        deadline = now - self._aging
+        while entries:
+            oldest = next(iter(entries.values()))
+            if oldest[1] >= deadline:
+                break
+            entries.popitem(last=False)
+
+    def learn(self, raw, transport):
+        """ Record that an address has been seen as source on a transport
+
+        @param raw: raw individual address
+        @type raw: int
+
+        @param transport: transport the frame comes from
+        @type transport: L{L_DataServiceBase<pyknyx.stack.layer2.l_dataServiceBase>}
+        """
+        with self._lock:
+            now = self._clock()
+            entries = self._entries
+            entry = entries.pop(raw, None)
+            if entry is not None and entry[0] is not transport:
+                self._moves += 1
+                logger.debug("IndividualAddressTable.learn(): address 0x%04x moved to %s" % (raw, transport))
+            entries[raw] = (transport, now)
+            if len(entries) > self._maxEntries:
+                entries.popitem(last=False)
+            self._expire(now)
+
+    def get(self, raw):
+        """ Return the transport an address was last seen on, without updating the statistics
+
+        @param raw: raw individual address
+        @type raw: int
+
+        @return: transport (None if unknown)
+        @rtype: L{L_DataServiceBase<pyknyx.stack.layer2.l_dataServiceBase>}
+        """
+        with self._lock:
+            self._expire(self._clock())
+            entry = self._entries.get(raw)
+            return entry[0] if entry is not None else None
+
+    def lookup(self, raw):
+        """ Return the transport an address was last seen on
+
+        @param raw: raw individual address
+        @type raw: int
+
+        @return: transport (None if unknown)
+        @rtype: L{L_DataServiceBase<pyknyx.stack.layer2.l_dataServiceBase>}
+        """
+        transport = self.get(raw)
+        if transport is None:
+            self._misses += 1
+        else:
+            self._hits += 1
+        return transport
+
+    def forget(self, transport):
+        """ Forget all the addresses seen on a transport
+
+        @param transport: transport
+        @type transport: L{L_DataServiceBase<pyknyx.stack.layer2.l_dataServiceBase>}
+        """
+        with self._lock:
+            for raw in [raw for raw, entry in self._entries.items() if entry[0] is transport]:
+                del self._entries[raw]
+
+    def clear(self):
+        """ Forget all addresses
+        """
+        with self._lock:
+            self._entries.clear()
@@ -56,6 +56,9 @@ KnxAddressValueError: address -0x1 not in range(0, 0xffff)
 >>> knxAddr.frame
 '\x00{'
 
+Addresses decoded from frames are shared, immutable instances (see fromRaw() in subclasses), so that the
+frame processing path doesn't allocate new objects nor re-format address strings.
+
 
 @author: Frédéric Mantegazza
 @copyright: (C) 2013-2015 Frédéric Mantegazza
@@ -81,8 +84,16 @@ class KnxAddress(object):
 
     @ivar _raw: knx raw address
     @type _raw: int
+
+    @ivar _address: cached string representation (built on first use)
+    @type _address: str
+
+    @ivar _frozen: True for shared instances, which must not be modified
+    @type _frozen: bool
     @todo: use buffer protocole (bytearray)?
     """
+    __slots__ = ("_raw", "_address", "_frozen")
+
     def __init__(self, raw=0x0000):
         """ Create a generic address
 
@@ -103,6 +114,8 @@ class KnxAddress(object):
         else:
             raise KnxAddressValueError("invalid address (%r)" % repr(raw))
         self._raw = raw
+        self._address = None
+        self._frozen = False
 
     def __repr__(self):
         return "<KnxAddress('%s')>" % hex(self._raw)
@@ -117,9 +130,7 @@ class KnxAddress(object):
         return self.raw < other.raw
 
     def __add__(self, incr):
-        obj = KnxAddress.__new__(type(self))
-        KnxAddress.__init__(obj, self._raw + incr)
-        return obj
+        return type(self)(self._raw + incr)
 
     def __hash__(self):
         return self._raw
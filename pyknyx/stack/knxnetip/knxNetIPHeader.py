@@ -80,6 +80,8 @@ import struct
 from pyknyx.common.exception import PyKNyXValueError
 from pyknyx.services.logger import logging; logger = logging.getLogger(__name__)
 
+_HEADER = struct.Struct(">2B2H")  # header size, version, service, total size
+
 
 class KNXnetIPHeaderValueError(PyKNyXValueError):
     """
@@ -115,6 +117,7 @@ class KNXnetIPHeader(object):
     TUNNELING_ACK = 0x0421
     ROUTING_IND = 0x0530
     ROUTING_LOST_MSG = 0x0531
+    ROUTING_BUSY = 0x0532
 
     SERVICE = (CONNECT_REQ, CONNECT_RES,
                CONNECTIONSTATE_REQ, CONNECTIONSTATE_RES,
@@ -123,7 +126,7 @@ class KNXnetIPHeader(object):
                SEARCH_REQ, SEARCH_RES,
                DEVICE_CONFIGURATION_REQ, DEVICE_CONFIGURATION_ACK,
                TUNNELING_REQ, TUNNELING_ACK,
-               ROUTING_IND, ROUTING_LOST_MSG
+               ROUTING_IND, ROUTING_LOST_MSG, ROUTING_BUSY
               )
 
     HEADER_SIZE = 0x06
@@ -134,8 +137,8 @@ class KNXnetIPHeader(object):
 
         Header can be loaded either from frame or from sratch
 
-        @param frame: byte array with contained KNXnet/IP frame
-        @type frame: sequence
+        @param frame: byte array with contained KNXnet/IP frame; not copied
+        @type frame: bytes, bytearray or memoryview
 
         @param service: service identifier
         @type service: int
@@ -151,23 +154,21 @@ class KNXnetIPHeader(object):
             raise KNXnetIPHeaderValueError("can't give both frame and service type")
 
         if frame is not None:
-            frame = bytearray(frame)
+            if isinstance(frame, str):
+                frame = bytearray(frame)
             if len(frame) < KNXnetIPHeader.HEADER_SIZE:
                     raise KNXnetIPHeaderValueError("frame too short for KNXnet/IP header (%d)" % len(frame))
 
-            headersize = frame[0] & 0xff
+            headersize, protocolVersion, self._service, self._totalSize = _HEADER.unpack_from(frame)
             if headersize != KNXnetIPHeader.HEADER_SIZE:
                 raise KNXnetIPHeaderValueError("wrong header size (%d)" % headersize)
 
-            protocolVersion = frame[1] & 0xff
             if protocolVersion != KNXnetIPHeader.KNXNETIP_VERSION:
                 raise KNXnetIPHeaderValueError("unsupported KNXnet/IP protocol (%d)" % protocolVersion)
 
-            self._service = (frame[2] & 0xff) << 8 | (frame[3] & 0xff)
             if self._service not in KNXnetIPHeader.SERVICE:
                 raise KNXnetIPHeaderValueError("unsupported service (%d)" % self._service)
 
-            self._totalSize = (frame[4] & 0xff) << 8 | (frame[5] & 0xff)
             if len(frame) != self._totalSize:
                 raise KNXnetIPHeaderValueError("wrong frame length (%d; should be %d)" % (len(frame), self._totalSize))
 
@@ -200,7 +201,7 @@ class KNXnetIPHeader(object):
 
     @property
     def frame(self):
-        s = struct.pack(">2B2H", KNXnetIPHeader.HEADER_SIZE, KNXnetIPHeader.KNXNETIP_VERSION, self._service, self._totalSize)
+        s = _HEADER.pack(KNXnetIPHeader.HEADER_SIZE, KNXnetIPHeader.KNXNETIP_VERSION, self._service, self._totalSize)
         return bytearray(s)
 
     @property
@@ -237,6 +238,8 @@ class KNXnetIPHeader(object):
             return "routing.ind"
         elif self._service == KNXnetIPHeader.ROUTING_LOST_MSG:
             return "routing-lost.msg"
+        elif self._service == KNXnetIPHeader.ROUTING_BUSY:
+            return "routing-busy.msg"
         else:
             return "unknown/unsupported service"
 
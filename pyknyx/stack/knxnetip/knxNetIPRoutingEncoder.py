@@ -0,0 +1,119 @@
+# -*- coding: utf-8 -*-
+
+""" Python KNX framework
+
+License
+=======
+
+ - B{PyKNyX} (U{https://github.com/knxd/pyknyx}) is Copyright:
+  - © 2016-2017 Matthias Urlichs
+  - PyKNyX is a fork of pKNyX
+   - © 2013-2015 Frédéric Mantegazza
+
+This program is free software; you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation; either version 2 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program; if not, write to the Free Software
+Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA  02111-1307  USA
+or see:
+
+ - U{http://www.gnu.org/licenses/gpl.html}
+
+Module purpose
+==============
+
+KNXnet/IP routing indication encoder
+
+Implements
+==========
+
+ - B{KNXnetIPRoutingEncoderValueError}
+ - B{KNXnetIPRoutingEncoder}
+
+Documentation
+=============
+
+Builds complete KNXnet/IP ROUTING_IND datagrams (header + cEMI frame) into a buffer allocated once, instead of
+creating a L{KNXnetIPHeader} and concatenating it with the cEMI frame for each telegram.
+
+The cEMI frame itself is packed at once by L{CEMILData.groupData<pyknyx.stack.cemi.cemiLData>}.
+
+The returned datagram is a view on the internal buffer, only valid until the next call: it must be sent (or
+copied) before encoding the next one. An encoder must not be shared between threads.
+
+Usage
+=====
+
+>>> encoder = KNXnetIPRoutingEncoder()
+>>> cEMI = CEMILData.groupData(GroupAddress("3/1/2"), Priority("low"), 5, tPDU, IndividualAddress("1.1.14"))
+>>> bytes(encoder.encodeCEMI(cEMI.frame.raw))
+b'\\x06\\x10\\x050\\x00\\x11)\\x00\\xbc\\xd0\\x11\\x0e\\x19\\x02\\x01\\x00\\x80'
+
+@author: Frédéric Mantegazza
+@copyright: (C) 2013-2015 Frédéric Mantegazza
+@license: GPL
+"""
+
+
+import struct
+
+from pyknyx.common.exception import PyKNyXValueError
+from pyknyx.services.logger import logging; logger = logging.getLogger(__name__)
+from pyknyx.stack.knxnetip.knxNetIPHeader import KNXnetIPHeader
+
+_HEADER = struct.Struct(">2B2H")  # header size, version, service, total size
+
+
+class KNXnetIPRoutingEncoderValueError(PyKNyXValueError):
+    """
+    """
+
+
+class KNXnetIPRoutingEncoder(object):
+    """ KNXnetIPRoutingEncoder class
+
+    @ivar _buffer: datagram buffer
+    @type _buffer: bytearray
+
+    @ivar _view: view on the buffer
+    @type _view: memoryview
+    """
+    # Max. cEMI frame size (254 bytes APDU, optional additional info)
+    MAX_CEMI_SIZE = 512
+
+    def __init__(self):
+        """
+        """
+        super(KNXnetIPRoutingEncoder, self).__init__()
+
+        self._buffer = bytearray(KNXnetIPHeader.HEADER_SIZE + KNXnetIPRoutingEncoder.MAX_CEMI_SIZE)
+        self._view = memoryview(self._buffer)
+
+    def encodeCEMI(self, raw):
+        """ Encode a routing indication carrying the given cEMI frame
+
+        @param raw: raw cEMI frame
+        @type raw: bytearray, bytes or memoryview
+
+        @return: datagram (valid until next call)
+        @rtype: memoryview
+
+        raise KNXnetIPRoutingEncoderValueError:
+        """
+        length = len(raw)
+        if length > KNXnetIPRoutingEncoder.MAX_CEMI_SIZE:
+            raise KNXnetIPRoutingEncoderValueError("cEMI frame too long (%d)" % length)
+        totalSize = KNXnetIPHeader.HEADER_SIZE + length
+        _HEADER.pack_into(self._buffer, 0, KNXnetIPHeader.HEADER_SIZE, KNXnetIPHeader.KNXNETIP_VERSION,
+                          KNXnetIPHeader.ROUTING_IND, totalSize)
+        self._buffer[KNXnetIPHeader.HEADER_SIZE:totalSize] = raw
+
+        return self._view[:totalSize]
@@ -0,0 +1,297 @@
+# -*- coding: utf-8 -*-
+
+""" Python KNX framework
+
+License
+=======
+
+ - B{PyKNyX} (U{https://github.com/knxd/pyknyx}) is Copyright:
+  - © 2016-2017 Matthias Urlichs
+  - PyKNyX is a fork of pKNyX
+   - © 2013-2015 Frédéric Mantegazza
+
+This program is free software; you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation; either version 2 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program; if not, write to the Free Software
+Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA  02111-1307  USA
+or see:
+
+ - U{http://www.gnu.org/licenses/gpl.html}
+
+Module purpose
+==============
+
+KNXnet/IP connection management and tunneling structures
+
+Implements
+==========
+
+ - B{KNXnetIPStructValueError}
+ - B{KNXnetIPStructures}
+
+Documentation
+=============
+
+Encoding/decoding of the KNXnet/IP core and tunneling services bodies:
+
+ - HPAI: Host Protocol Address Information (IP address and port of an endpoint)
+ - CRI/CRD: Connection Request Information / Response Data (tunnel connection type, individual address)
+ - connection header: channel id, sequence counter and status of tunneling requests/acks
+
+encode() builds the complete datagram (KNXnet/IP header + body); decode() splits a received datagram into header
+and body. Bodies are decoded from any buffer, without copy.
+
+HPAI 0.0.0.0:0 means "answer to the address the request came from" (NAT mode); it is used by default.
+
+Usage
+=====
+
+>>> datagram = KNXnetIPStructures.connectionStateRequest(7)
+>>> header, body = KNXnetIPStructures.decode(datagram)
+>>> header.service == KNXnetIPHeader.CONNECTIONSTATE_REQ
+True
+>>> KNXnetIPStructures.parseChannel(body)
+(7, 0)
+
+@author: Frédéric Mantegazza
+@copyright: (C) 2013-2015 Frédéric Mantegazza
+@license: GPL
+"""
+
+
+import socket
+import struct
+
+from pyknyx.common.exception import PyKNyXValueError
+from pyknyx.services.logger import logging; logger = logging.getLogger(__name__)
+from pyknyx.stack.knxnetip.knxNetIPHeader import KNXnetIPHeader
+
+_HPAI = struct.Struct(">2B4sH")  # structure length, protocol code, IP address, port
+_CRI = struct.Struct(">4B")  # structure length, connection type, KNX layer, reserved
+_CRD = struct.Struct(">2BH")  # structure length, connection type, individual address
+_CHANNEL = struct.Struct(">2B")  # channel id, status (or reserved)
+_CONNECTION_HEADER = struct.Struct(">4B")  # structure length, channel id, sequence counter, status
+
+
+class KNXnetIPStructValueError(PyKNyXValueError):
+    """
+    """
+
+
+class KNXnetIPStructures(object):
+    """ KNXnet/IP structures encoding/decoding
+
+    All methods are static.
+    """
+    # Host protocol codes
+    IPV4_UDP = 0x01
+    IPV4_TCP = 0x02
+
+    # Connection types
+    TUNNEL_CONNECTION = 0x04
+
+    # Tunneling layers
+    TUNNEL_LINKLAYER = 0x02
+
+    # Status/error codes
+    E_NO_ERROR = 0x00
+    E_HOST_PROTOCOL_TYPE = 0x01
+    E_VERSION_NOT_SUPPORTED = 0x02
+    E_SEQUENCE_NUMBER = 0x04
+    E_CONNECTION_ID = 0x21
+    E_CONNECTION_TYPE = 0x22
+    E_CONNECTION_OPTION = 0x23
+    E_NO_MORE_CONNECTIONS = 0x24
+    E_DATA_CONNECTION = 0x26
+    E_KNX_CONNECTION = 0x27
+    E_TUNNELING_LAYER = 0x29
+
+    HPAI_SIZE = _HPAI.size
+    CONNECTION_HEADER_SIZE = _CONNECTION_HEADER.size
+
+    @staticmethod
+    def encode(service, body):
+        """ Build a complete datagram
+
+        @param service: KNXnet/IP service identifier
+        @type service: int
+
+        @param body: service body
+        @type body: bytes or bytearray
+
+        @rtype: bytearray
+        """
+        header = KNXnetIPHeader(service=service, serviceLength=len(body))
+        frame = header.frame
+        frame += body
+        return frame
+
+    @staticmethod
+    def decode(datagram):
+        """ Split a received datagram
+
+        @return: header, body
+        @rtype: tuple of (L{KNXnetIPHeader}, memoryview)
+
+        raise KNXnetIPHeaderValueError:
+        """
+        header = KNXnetIPHeader(datagram)
+        return header, memoryview(datagram)[KNXnetIPHeader.HEADER_SIZE:]
+
+    @staticmethod
+    def packHPAI(addr="0.0.0.0", port=0):
+        """ Encode a HPAI (UDP)
+        """
+        return _HPAI.pack(_HPAI.size, KNXnetIPStructures.IPV4_UDP, socket.inet_aton(addr), port)
+
+    @staticmethod
+    def unpackHPAI(buf, offset=0):
+        """ Decode a HPAI
+
+        @return: IP address, port
+        @rtype: tuple of (str, int)
+
+        raise KNXnetIPStructValueError:
+        """
+        if len(buf) < offset + _HPAI.size:
+            raise KNXnetIPStructValueError("HPAI too short")
+        length, protocol, addr, port = _HPAI.unpack_from(buf, offset)
+        if length != _HPAI.size:
+            raise KNXnetIPStructValueError("invalid HPAI length (%d)" % length)
+        if protocol != KNXnetIPStructures.IPV4_UDP:
+            raise KNXnetIPStructValueError("unsupported host protocol (%d)" % protocol)
+        return socket.inet_ntoa(bytes(addr)), port
+
+    @staticmethod
+    def connectRequest(controlHPAI=None, dataHPAI=None):
+        """ Build a tunnel (link layer) CONNECT_REQ datagram
+        """
+        controlHPAI = controlHPAI or KNXnetIPStructures.packHPAI()
+        dataHPAI = dataHPAI or KNXnetIPStructures.packHPAI()
+        cri = _CRI.pack(_CRI.size, KNXnetIPStructures.TUNNEL_CONNECTION, KNXnetIPStructures.TUNNEL_LINKLAYER, 0)
+        return KNXnetIPStructures.encode(KNXnetIPHeader.CONNECT_REQ, controlHPAI + dataHPAI + cri)
+
+    @staticmethod
+    def parseConnectRequest(body):
+        """ Decode a CONNECT_REQ body
+
+        @return: control endpoint, data endpoint, connection type, KNX layer
+        @rtype: tuple
+
+        raise KNXnetIPStructValueError:
+        """
+        control = KNXnetIPStructures.unpackHPAI(body, 0)
+        data = KNXnetIPStructures.unpackHPAI(body, _HPAI.size)
+        offset = 2 * _HPAI.size
+        if len(body) < offset + 2:
+            raise KNXnetIPStructValueError("CRI too short")
+        connType = body[offset + 1]
+        layer = body[offset + 2] if len(body) > offset + 2 else None
+        return control, data, connType, layer
+
+    @staticmethod
+    def connectResponse(channelId, status, dataHPAI=None, address=0):
+        """ Build a CONNECT_RES datagram
+        """
+        body = _CHANNEL.pack(channelId, status)
+        if status == KNXnetIPStructures.E_NO_ERROR:
+            body += dataHPAI or KNXnetIPStructures.packHPAI()
+            body += _CRD.pack(_CRD.size, KNXnetIPStructures.TUNNEL_CONNECTION, address)
+        return KNXnetIPStructures.encode(KNXnetIPHeader.CONNECT_RES, body)
+
+    @staticmethod
+    def parseConnectResponse(body):
+        """ Decode a CONNECT_RES body
+
+        @return: channel id, status, data endpoint, individual address (raw)
+        @rtype: tuple
+
+        raise KNXnetIPStructValueError:
+        """
+        channelId, status = KNXnetIPStructures.parseChannel(body)
+        if status != KNXnetIPStructures.E_NO_ERROR:
+            return channelId, status, None, None
+        data = KNXnetIPStructures.unpackHPAI(body, _CHANNEL.size)
+        offset = _CHANNEL.size + _HPAI.size
+        if len(body) < offset + _CRD.size:
+            raise KNXnetIPStructValueError("CRD too short")
+        length, connType, address = _CRD.unpack_from(body, offset)
+        return channelId, status, data, address
+
+    @staticmethod
+    def parseChannel(body):
+        """ Decode the channel id and status which start most connection management bodies
+
+        @return: channel id, status
+        @rtype: tuple of int
+
+        raise KNXnetIPStructValueError:
+        """
+        if len(body) < _CHANNEL.size:
+            raise KNXnetIPStructValueError("body too short (%d)" % len(body))
+        return _CHANNEL.unpack_from(body)
+
+    @staticmethod
+    def connectionStateRequest(channelId, controlHPAI=None):
+        """ Build a CONNECTIONSTATE_REQ datagram
+        """
+        body = _CHANNEL.pack(channelId, 0) + (controlHPAI or KNXnetIPStructures.packHPAI())
+        return KNXnetIPStructures.encode(KNXnetIPHeader.CONNECTIONSTATE_REQ, body)
+
+    @staticmethod
+    def connectionStateResponse(channelId, status):
+        """ Build a CONNECTIONSTATE_RES datagram
+        """
+        return KNXnetIPStructures.encode(KNXnetIPHeader.CONNECTIONSTATE_RES, _CHANNEL.pack(channelId, status))
+
+    @staticmethod
+    def disconnectRequest(channelId, controlHPAI=None):
+        """ Build a DISCONNECT_REQ datagram
+        """
+        body = _CHANNEL.pack(channelId, 0) + (controlHPAI or KNXnetIPStructures.packHPAI())
+        return KNXnetIPStructures.encode(KNXnetIPHeader.DISCONNECT_REQ, body)
+
+    @staticmethod
+    def disconnectResponse(channelId, status):
+        """ Build a DISCONNECT_RES datagram
+        """
+        return KNXnetIPStructures.encode(KNXnetIPHeader.DISCONNECT_RES, _CHANNEL.pack(channelId, status))
+
+    @staticmethod
+    def tunnelingRequest(channelId, sequence, cEMIRaw):
+        """ Build a TUNNELING_REQ datagram
+        """
+        header = _CONNECTION_HEADER.pack(_CONNECTION_HEADER.size, channelId, sequence & 0xff, 0)
+        return KNXnetIPStructures.encode(KNXnetIPHeader.TUNNELING_REQ, header + cEMIRaw)
+
+    @staticmethod
+    def tunnelingAck(channelId, sequence, status=E_NO_ERROR):
+        """ Build a TUNNELING_ACK datagram
+        """
+        body = _CONNECTION_HEADER.pack(_CONNECTION_HEADER.size, channelId, sequence & 0xff, status)
+        return KNXnetIPStructures.encode(KNXnetIPHeader.TUNNELING_ACK, body)
+
+    @staticmethod
+    def parseConnectionHeader(body):
+        """ Decode the connection header of a TUNNELING_REQ/TUNNELING_ACK body
+
+        @return: channel id, sequence counter, status, header length (offset of the cEMI frame)
+        @rtype: tuple of int
+
+        raise KNXnetIPStructValueError:
+        """
+        if len(body) < _CONNECTION_HEADER.size:
+            raise KNXnetIPStructValueError("connection header too short (%d)" % len(body))
+        length, channelId, sequence, status = _CONNECTION_HEADER.unpack_from(body)
+        if length < _CONNECTION_HEADER.size or length > len(body):
+            raise KNXnetIPStructValueError("invalid connection header length (%d)" % length)
+        return channelId, sequence, status, length
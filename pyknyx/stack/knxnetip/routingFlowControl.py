@@ -0,0 +1,256 @@
+# -*- coding: utf-8 -*-
+
+""" Python KNX framework
+
+License
+=======
+
+ - B{PyKNyX} (U{https://github.com/knxd/pyknyx}) is Copyright:
+  - © 2016-2017 Matthias Urlichs
+  - PyKNyX is a fork of pKNyX
+   - © 2013-2015 Frédéric Mantegazza
+
+This program is free software; you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation; either version 2 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program; if not, write to the Free Software
+Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA  02111-1307  USA
+or see:
+
+ - U{http://www.gnu.org/licenses/gpl.html}
+
+Module purpose
+==============
+
+KNXnet/IP routing flow control
+
+Implements
+==========
+
+ - B{RoutingFlowControlValueError}
+ - B{RoutingFlowControl}
+
+Documentation
+=============
+
+KNXnet/IP routers bridging to a slow medium (TP1 runs at 9600 bauds) can't forward more than a few dozen
+telegrams per second. The routing protocol has two mechanisms to deal with this:
+
+ - ROUTING_LOST_MSG: a router tells how many telegrams it had to drop (informative only);
+ - ROUTING_BUSY: a router asks all routing devices to stop sending for a given time.
+
+On ROUTING_BUSY, sending is suspended for the requested wait time, plus a random time which grows with the number
+of ROUTING_BUSY recently received (so that all devices don't resume at once). This counter is then slowly
+decremented.
+
+Independently, transmission is paced to a max. telegram rate (the specification recommends 50 telegrams/s).
+
+The object is shared by the receiver (busy(), lostMessage()) and the transmitter (delay(), sent()), so it is
+thread-safe.
+
+Usage
+=====
+
+>>> flowControl = RoutingFlowControl(rate=50)
+>>> flowControl.delay()
+0
+>>> flowControl.sent()
+>>> round(flowControl.delay(), 2)
+0.02
+
+@author: Frédéric Mantegazza
+@copyright: (C) 2013-2015 Frédéric Mantegazza
+@license: GPL
+"""
+
+
+import random
+import struct
+import threading
+import time
+
+from pyknyx.common.exception import PyKNyXValueError
+from pyknyx.services.logger import logging; logger = logging.getLogger(__name__)
+
+_BUSY = struct.Struct(">2B2H")  # structure length, device state, wait time (ms), control field
+_LOST_MSG = struct.Struct(">2BH")  # structure length, device state, lost messages
+
+
+class RoutingFlowControlValueError(PyKNyXValueError):
+    """
+    """
+
+
+class RoutingFlowControl(object):
+    """ RoutingFlowControl class
+
+    @ivar _interval: min. time between 2 telegrams, in s (0: no pacing)
+    @type _interval: float
+
+    @ivar _nextSend: earliest time for the next telegram
+    @type _nextSend: float
+
+    @ivar _resume: end of the current busy period
+    @type _resume: float
+
+    @ivar _busyCounter: number of recent ROUTING_BUSY
+    @type _busyCounter: int
+
+    @ivar _lastBusy: reception time of the last ROUTING_BUSY
+    @type _lastBusy: float
+
+    @ivar _decrementTime: next time the busy counter will be decremented
+    @type _decrementTime: float
+
+    @ivar _busyCount: total number of ROUTING_BUSY received
+    @type _busyCount: int
+
+    @ivar _lostMessages: total number of telegrams lost by routers, as reported by ROUTING_LOST_MSG
+    @type _lostMessages: int
+
+    @ivar _lostMessageCount: total number of ROUTING_LOST_MSG received
+    @type _lostMessageCount: int
+    """
+    # Base of the random additional wait time, per recent ROUTING_BUSY, in s
+    RANDOM_WAIT = 0.05
+
+    # ROUTING_BUSY received within this time count only once, in s
+    BUSY_DEBOUNCE = 0.01
+
+    # After a busy period, the busy counter is decremented every DECREMENT_PERIOD, once counter * SLOW_DURATION
+    # has elapsed, in s
+    SLOW_DURATION = 0.1
+    DECREMENT_PERIOD = 0.005
+
+    def __init__(self, rate=50, clock=time.time, random_=random.random):
+        """
+
+        @param rate: max. number of telegrams per second (None or 0: unlimited)
+        @type rate: float
+
+        @param clock: time source, in s
+        @type clock: callable
+
+        @param random_: random generator, in [0, 1)
+        @type random_: callable
+
+        raise RoutingFlowControlValueError:
+        """
+        super(RoutingFlowControl, self).__init__()
+
+        if rate is not None and rate < 0:
+            raise RoutingFlowControlValueError("invalid rate (%r)" % rate)
+        self._interval = 1. / rate if rate else 0.
+        self._clock = clock
+        self._random = random_
+
+        self._lock = threading.Lock()
+        self._nextSend = 0.
+        self._resume = 0.
+        self._busyCounter = 0
+        self._lastBusy = None
+        self._decrementTime = 0.
+
+        self._busyCount = 0
+        self._lostMessages = 0
+        self._lostMessageCount = 0
+
+    @property
+    def rate(self):
+        return 1. / self._interval if self._interval else None
+
+    @property
+    def busyCount(self):
+        return self._busyCount
+
+    @property
+    def lostMessages(self):
+        return self._lostMessages
+
+    @property
+    def lostMessageCount(self):
+        return self._lostMessageCount
+
+    @property
+    def isBusy(self):
+        return self._clock() < self._resume
+
+    def _decrementBusyCounter(self, now):
+        """ Decrement the busy counter according to the time elapsed since the end of the busy period
+
+        Must be called with the lock held.
+        """
+        if self._busyCounter and now >= self._decrementTime:
+            decrement = int((now - self._decrementTime) / RoutingFlowControl.DECREMENT_PERIOD) + 1
+            self._busyCounter = max(0, self._busyCounter - decrement)
+            self._decrementTime += decrement * RoutingFlowControl.DECREMENT_PERIOD
+
+    def busy(self, body):
+        """ Handle a received ROUTING_BUSY
+
+        @param body: ROUTING_BUSY body (without KNXnet/IP header)
+        @type body: bytes, bytearray or memoryview
+
+        raise RoutingFlowControlValueError:
+        """
+        if len(body) < _BUSY.size:
+            raise RoutingFlowControlValueError("ROUTING_BUSY too short (%d)" % len(body))
+        length, deviceState, waitTime, control = _BUSY.unpack_from(body)
+        if control:
+            logger.debug("RoutingFlowControl.busy(): control field=0x%04x, ignored" % control)
+            return
+
+        with self._lock:
+            now = self._clock()
+            self._busyCount += 1
+            self._decrementBusyCounter(now)
+            if self._lastBusy is None or now - self._lastBusy >= RoutingFlowControl.BUSY_DEBOUNCE:
+                self._busyCounter += 1
+            self._lastBusy = now
+            resume = now + waitTime / 1000. + \
+                     self._random() * self._busyCounter * RoutingFlowControl.RANDOM_WAIT
+            self._resume = max(self._resume, resume)
+            self._decrementTime = self._resume + self._busyCounter * RoutingFlowControl.SLOW_DURATION
+        logger.info("RoutingFlowControl.busy(): wait time=%dms, busy counter=%d" % (waitTime, self._busyCounter))
+
+    def lostMessage(self, body):
+        """ Handle a received ROUTING_LOST_MSG
+
+        @param body: ROUTING_LOST_MSG body (without KNXnet/IP header)
+        @type body: bytes, bytearray or memoryview
+
+        raise RoutingFlowControlValueError:
+        """
+        if len(body) < _LOST_MSG.size:
+            raise RoutingFlowControlValueError("ROUTING_LOST_MSG too short (%d)" % len(body))
+        length, deviceState, lostMessages = _LOST_MSG.unpack_from(body)
+        with self._lock:
+            self._lostMessageCount += 1
+            self._lostMessages += lostMessages
+        logger.warning("RoutingFlowControl.lostMessage(): router lost %d telegram(s)" % lostMessages)
+
+    def delay(self):
+        """ Time to wait before sending the next telegram
+
+        @return: delay, in s (0 if the telegram can be sent now)
+        @rtype: float
+        """
+        with self._lock:
+            now = self._clock()
+            self._decrementBusyCounter(now)
+            return max(0, self._resume - now, self._nextSend - now)
+
+    def sent(self):
+        """ Record that a telegram has been sent
+        """
+        with self._lock:
+            now = self._clock()
+            self._nextSend = max(now, self._nextSend) + self._interval
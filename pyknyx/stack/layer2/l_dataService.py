@@ -54,6 +54,8 @@ import time
 
 from pyknyx.common.exception import PyKNyXValueError
 from pyknyx.services.logger import logging; logger = logging.getLogger(__name__)
+from pyknyx.services.tracer import tracer; trace = tracer("layer2")
+from pyknyx.services.metrics import metrics
 from pyknyx.stack.individualAddress import IndividualAddress
 from pyknyx.stack.priorityQueue import PriorityQueue
 from pyknyx.stack.layer3.n_groupDataListener import N_GroupDataListener
@@ -85,6 +87,12 @@ class L_DataService(L_DataServiceUnicast):
     """
 
     _ldl = None
+    groupIndexed = True
+
+    def registerMetrics(self):
+        super(L_DataService, self).registerMetrics()
+        self._latency = metrics.histogram("pyknyx_delivery_latency_seconds",
+                                          "time from frame reception by ETS to end of delivery to a device")
 
     def setListener(self, ldl):
         """
@@ -94,11 +102,21 @@ class L_DataService(L_DataServiceUnicast):
         """
         self._ldl = ldl
 
+    def subscribe(self, gad):
+        """
+        Ask ETS to forward frames sent to this group address.
+
+        @param gad: group address; null to get all group frames
+        @type gad: L{GroupAddress<pyknyx.stack.groupAddress>}
+        """
+        self._ets.subscribeGroup(self, gad)
+
     def dataReq(self, cEMI):
         """
         Transmit a frame, i.e. forward to ETS.
         """
-        logger.debug("L_DataService.dataReq(): cEMI=%s" % cEMI)
+        if trace.enabled:
+            trace("L_DataService.dataReq(): cEMI=%s", cEMI)
 
         # Add source address to cEMI
         if self.physAddr is NOT_REQUIRED:
@@ -124,6 +142,8 @@ class L_DataService(L_DataServiceUnicast):
                     logger.warning("L_GroupDataService.run(): not listener defined")
                 else:
                     self._ldl.dataInd(cEMI)
+                    if metrics.enabled and cEMI.rxTime is not None:
+                        self._latency.observe(time.time() - cEMI.rxTime)
                     return True
         return False
 
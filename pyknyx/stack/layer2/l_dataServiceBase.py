@@ -42,6 +42,12 @@ Implements
 Documentation
 =============
 
+Broadcast media have a group filter table, modelled on KNX line couplers filter tables: only group frames whose
+destination is in the table are forwarded to the medium. By default, the table passes all group addresses. It can be
+filled from the ETS project, from the group addresses subscribed by local devices (see
+L{ETSBase<pyknyx.core.ets>}), or learned from traffic: in learning mode, the destination of each group frame received
+from the medium is added to the table, as devices on that medium use this group address.
+
 Usage
 =====
 
@@ -51,13 +57,20 @@ Usage
 """
 
 
+import itertools
+
 from pyknyx.common.exception import PyKNyXValueError
 from pyknyx.services.logger import logging; logger = logging.getLogger(__name__)
+from pyknyx.services.metrics import metrics
 from pyknyx.stack.individualAddress import IndividualAddress
+from pyknyx.stack.groupFilterTable import GroupFilterTable
 
 class NOT_REQUIRED:
     pass
 
+# Numbers the layer2 without individual address in metrics
+_metricsIndexes = itertools.count(1)
+
 class L_DataServiceBase(object):
     """
     Base class for sending and receiving frames.
@@ -68,9 +81,28 @@ class L_DataServiceBase(object):
     @ivar _physAddr: set to this device's physical address. Leave at None if
     the transceiver addresses a broadcast medium with more than one device.
     Set to NOT_REQUIRED if the device never sends anything.
+
+    @ivar groupIndexed: if True, ETS only forwards group frames this layer2
+    subscribed to (see L{ETSBase.subscribeGroup<pyknyx.core.ets>}).
+    Otherwise, wantsGroupFrame() is asked for every group frame.
+
+    @ivar learnGroups: if True, ETS adds the destination of group frames
+    received from this layer2 to its group filter table.
+
+    @ivar rxFrames: number of frames received from this layer2 by ETS
+    @type rxFrames: L{Counter<pyknyx.services.metrics>}
+
+    @ivar txFrames: number of frames sent to this layer2 by ETS
+    @type txFrames: L{Counter<pyknyx.services.metrics>}
+
+    @ivar _metricsLabel: name of this layer2 in metrics
+    @type _metricsLabel: str
     """
     _physAddr = None
+    _metricsLabel = None
     hop = False # instead of isinstance()
+    groupIndexed = False
+    learnGroups = False
 
     def __init__(self, ets, individualAddress=None):
         """
@@ -88,12 +120,45 @@ class L_DataServiceBase(object):
             self._physAddr = individualAddress
 
         self._ets = ets
+        self.registerMetrics()
         ets.addLayer2(self)
 
     @property
     def ets(self):
         return self._ets
 
+    @property
+    def metricsLabel(self):
+        """ Name of this layer2 in metrics
+        """
+        if self._metricsLabel is None:
+            if isinstance(self._physAddr, IndividualAddress):
+                self._metricsLabel = "%s %s" % (type(self).__name__, self._physAddr)
+            else:
+                self._metricsLabel = "%s #%d" % (type(self).__name__, next(_metricsIndexes))
+        return self._metricsLabel
+
+    def registerMetrics(self):
+        """ Register the metrics of this layer2
+
+        Sub-classes with more metrics should extend this method. The transmission queue, if any, is registered
+        here.
+        """
+        label = self.metricsLabel
+        self.rxFrames = metrics.counter("pyknyx_layer2_rx_frames_total", "frames received from layer2", layer2=label)
+        self.txFrames = metrics.counter("pyknyx_layer2_tx_frames_total", "frames sent to layer2", layer2=label)
+        if isinstance(getattr(type(self), "queue", None), property):
+            metrics.queue(label, lambda: self.queue)
+
+    def unregisterMetrics(self):
+        """ Unregister the metrics of this layer2
+
+        Called on stop; the metrics registered with a function would keep this layer2 alive otherwise.
+        """
+        label = self.metricsLabel
+        metrics.unregister(layer2=label)
+        metrics.unregister(queue=label)
+
     @property
     def physAddr(self):
         return self._physAddr
@@ -114,7 +179,7 @@ class L_DataServiceBase(object):
         pass
 
     def stop(self):
-        pass
+        self.unregisterMetrics()
 
     def dataInd(self, cEMI):
         """
@@ -134,22 +199,50 @@ class L_DataServiceBase(object):
 class L_DataServiceBroadcast(L_DataServiceBase):
     """
     A data service which is attached to a broadcast medium.
+
+    @ivar _groupFilter: group addresses forwarded to the medium
+    @type _groupFilter: L{GroupFilterTable<pyknyx.stack.groupFilterTable>}
     """
     hop = True
 
     def __init__(self, *args, **kwargs):
+        self._groupFilter = GroupFilterTable()
+
         super(L_DataServiceBroadcast, self).__init__(*args, **kwargs)
 
         self._physAddrs = set()
         self._physAddrs.add(IndividualAddress((7,15,15))) ## programming
 
+    @property
+    def groupFilter(self):
+        return self._groupFilter
+
+    def filterGroups(self, gads=None, learn=False):
+        """ Set the group filter table content
+
+        @param gads: group addresses forwarded to the medium (None: all)
+        @type gads: iterable of L{GroupAddress<pyknyx.stack.groupAddress>} or raw int
+
+        @param learn: add the group addresses used by devices on the medium (learning mode)
+        @type learn: bool
+        """
+        self._groupFilter.clear(passAll=gads is None and not learn)
+        for gad in gads or ():
+            self._groupFilter.add(gad)
+        self.learnGroups = learn
+
+    def wantsGroupFrame(self, cEMI):
+        return self._groupFilter.contains(cEMI.frame.da)
+
     def wantsIndividualFrame(self, cEMI, force=False):
         if not force and cEMI.destinationAddress not in self._physAddrs:
             return False
         return True
 
     def addAddr(self, addr):
-        self._physAddrs.add(self)
+        if not isinstance(addr, IndividualAddress):
+            addr = IndividualAddress(addr)
+        self._physAddrs.add(addr)
 
 class L_DataServiceUnicast(L_DataServiceBase):
     """
@@ -51,6 +51,7 @@ Usage
 
 from pyknyx.common.exception import PyKNyXValueError
 from pyknyx.services.logger import logging; logger = logging.getLogger(__name__)
+from pyknyx.services.tracer import tracer; trace = tracer("layer3")
 from pyknyx.stack.groupAddress import GroupAddress
 from pyknyx.stack.individualAddress import IndividualAddress
 from pyknyx.stack.layer2.l_dataListener import L_DataListener
@@ -91,7 +92,8 @@ class N_GroupDataService(L_DataListener):
         lds.setListener(self)
 
     def dataInd(self, cEMI):
-        logger.debug("N_GroupDataService.dataInd(): cEMI=%s" % repr(cEMI))
+        if trace.enabled:
+            trace("N_GroupDataService.dataInd(): cEMI=%r", cEMI)
 
         if self._ngdl is None:
             logger.warning("N_GroupDataService.dataInd(): not listener defined")
@@ -125,25 +127,26 @@ class N_GroupDataService(L_DataListener):
         """
         self._ngdl = ngdl
 
+    def subscribe(self, gad):
+        """ Ask lower layer to deliver frames sent to this group address
+
+        @param gad: group address
+        @type gad: L{GroupAddress}
+        """
+        self._lds.subscribe(gad)
+
     def groupDataReq(self, gad, priority, nSDU):
         """
         """
-        logger.debug("N_GroupDataService.groupDataReq(): gad=%s, priority=%s, nSDU=%s" % \
-                       (gad, priority, repr(nSDU)))
+        if trace.enabled:
+            trace("N_GroupDataService.groupDataReq(): gad=%s, priority=%s, nSDU=%r", gad, priority, nSDU)
 
         if gad.isNull:
             raise N_GDSValueError("invalid Group Address")
 
-        cEMI = CEMILData()
-        cEMI.messageCode = CEMILData.MC_LDATA_IND  # ???!!!??? Does not work with MC_LDATA_REQ!!!
-        #cEMI.sourceAddress = src  # Added by Link Data Layer
-        cEMI.destinationAddress = gad
-        cEMI.priority = priority
-        cEMI.hopCount = self._hopCount
-        nPDU = bytearray(len(nSDU) + 1)
-        nPDU[0] = len(nSDU) - 1
-        nPDU[1:] = nSDU
-        cEMI.npdu = nPDU
+        # L_Data.ind: ???!!!??? Does not work with MC_LDATA_REQ!!!
+        # Source address is added by Link Data Layer
+        cEMI = CEMILData.groupData(gad, priority, self._hopCount, nSDU)
 
         return self._lds.dataReq(cEMI)
 
@@ -51,6 +51,7 @@ Usage
 
 from pyknyx.common.exception import PyKNyXValueError
 from pyknyx.services.logger import logging; logger = logging.getLogger(__name__)
+from pyknyx.services.tracer import tracer; trace = tracer("layer4")
 from pyknyx.stack.layer4.tpci import TPCI
 from pyknyx.stack.layer3.n_groupDataListener import N_GroupDataListener
 
@@ -118,8 +119,8 @@ class T_GroupDataService(N_GroupDataListener):
         #return packetType
 
     def groupDataInd(self, src, gad, priority, tPDU):
-        logger.debug("T_GroupDataService.groupDataInd(): src=%s, gad=%s, priority=%s, tPDU=%s" % \
-                       (src, gad, priority, repr(tPDU)))
+        if trace.enabled:
+            trace("T_GroupDataService.groupDataInd(): src=%s, gad=%s, priority=%s, tPDU=%r", src, gad, priority, tPDU)
 
         if self._tgdl is None:
             logger.warning("T_GroupDataService.groupDataInd(): not listener defined")
@@ -140,11 +141,19 @@ class T_GroupDataService(N_GroupDataListener):
         """
         self._tgdl = tgdl
 
+    def subscribe(self, gad):
+        """ Ask lower layer to deliver frames sent to this group address
+
+        @param gad: group address
+        @type gad: L{GroupAddress<pyknyx.stack.groupAddress>}
+        """
+        self._ngds.subscribe(gad)
+
     def groupDataReq(self, gad, priority, tSDU):
         """
         """
-        logger.debug("T_GroupDataService.groupDataReq(): gad=%s, priority=%s, tSDU=%s" % \
-                       (gad, priority, repr(tSDU)))
+        if trace.enabled:
+            trace("T_GroupDataService.groupDataReq(): gad=%s, priority=%s, tSDU=%r", gad, priority, tSDU)
 
         #self._setTPCI(tSDU, TPCI.UNNUMBERED_DATA, 0)
         tPDU = tSDU
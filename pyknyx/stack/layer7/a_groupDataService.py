@@ -49,11 +49,19 @@ Usage
 """
 
 
+import asyncio
+import threading
+from concurrent.futures import Future, TimeoutError
+
 from pyknyx.common.exception import PyKNyXValueError
 from pyknyx.services.logger import logging; logger = logging.getLogger(__name__)
+from pyknyx.services.tracer import tracer; trace = tracer("layer7")
+from pyknyx.services.metrics import metrics
 from pyknyx.core.group import Group
 from pyknyx.core.groupMonitor import GroupMonitor
 from pyknyx.stack.groupAddress import GroupAddress
+from pyknyx.stack.individualAddress import IndividualAddress
+from pyknyx.stack.priority import Priority
 from pyknyx.stack.layer7.apci import APCI
 from pyknyx.stack.layer7.apdu import APDU
 from pyknyx.stack.layer4.t_groupDataListener import T_GroupDataListener
@@ -63,6 +71,12 @@ class A_GDSValueError(PyKNyXValueError):
     """
     """
 
+_TELEGRAMS = "pyknyx_group_telegrams_total"
+_writeInd = metrics.counter(_TELEGRAMS, "group telegrams received by devices", service="write")
+_readInd = metrics.counter(_TELEGRAMS, service="read")
+_readCon = metrics.counter(_TELEGRAMS, service="response")
+_unknownGad = metrics.counter("pyknyx_group_unknown_gad_total", "group telegrams received for a GAD without group")
+
 
 class A_GroupDataService(T_GroupDataListener):
     """ A_GroupDataService class
@@ -70,43 +84,78 @@ class A_GroupDataService(T_GroupDataListener):
     @ivar _tgds: transport group data service object
     @type _tgds: L{T_GroupDataService<pyknyx.core.layer4.t_groupDataService>}
 
-    @ivar _groups: Groups managed
-    @type _groups: set of L{Group}
+    @ivar _groups: Groups managed, by raw group address (0 for the group monitor)
+    @type _groups: dict of int: L{Group}
+
+    @ivar _cache: group values cache, fed with the values sent (None: no cache)
+    @type _cache: L{GroupValueCache<pyknyx.stack.groupValueCache>}
+
+    @ivar _src: raw individual address recorded as source of the values sent
+    @type _src: int
+
+    @ivar _reads: reads waiting for a response, with their timeout timer, by raw group address
+    @type _reads: dict of int: (L{Future<concurrent.futures>}, timer)
+
+    @ivar _readGads: raw group addresses subscribed to get the responses to L{readValue}
+    @type _readGads: set of int
+
+    @ivar _responseHooks: called with (src, gad, priority, data) on each read response received
+    @type _responseHooks: tuple of callable
     """
-    def __init__(self, tgds):
+    # Time to wait for the response to a read, in s
+    READ_TIMEOUT = 2.
+
+    def __init__(self, tgds, cache=None, src=None):
         """
 
         @param tgds: Transport group data service object
         @type tgds: L{T_GroupDataService<pyknyx.core.layer4.t_groupDataService>}
 
+        @param cache: group values cache
+        @type cache: L{GroupValueCache<pyknyx.stack.groupValueCache>}
+
+        @param src: own individual address
+        @type src: L{IndividualAddress<pyknyx.stack.individualAddress>}
+
         raise A_GDSValueError:
         """
         super(A_GroupDataService, self).__init__()
 
         self._tgds = tgds
+        self._cache = cache
+        self._src = src.raw if isinstance(src, IndividualAddress) else 0
+        self._reads = {}
+        self._readsLock = threading.Lock()
+        self._readGads = set()
+        self._responseHooks = ()
 
         self._groups = {}
 
         tgds.setListener(self)
 
     def groupDataInd(self, src, gad, priority, aPDU):  # aPDU -> tSDU
-        logger.debug("A_GroupDataService.groupDataInd(): src=%s, gad=%s, priority=%s, aPDU=%s" % \
-                       (src, gad, priority, repr(aPDU)))
+        if trace.enabled:
+            trace("A_GroupDataService.groupDataInd(): src=%s, gad=%s, priority=%s, aPDU=%r", src, gad, priority, aPDU)
 
         length = len(aPDU) - 2
         if length >= 0:
             apci = aPDU[0] << 8 | aPDU[1]
 
             try:
-                group = self._groups[gad.address]
+                group = self._groups[gad.raw]
             except KeyError:
-                logger.debug("A_GroupDataService.groupDataInd(): no registered group for that GAD (%s)" % repr(gad))
+                if trace.enabled:
+                    trace("A_GroupDataService.groupDataInd(): no registered group for that GAD (%r)", gad)
                 group = None
+                if metrics.enabled:
+                    _unknownGad.inc()
 
-            groupMonitor = self._groups.get("0/0/0",None)
+            groupMonitor = self._groups.get(0)
 
             if (apci & APCI._4) == APCI.GROUPVALUE_WRITE:
                 data = APDU.getGroupValue(aPDU)
+                if metrics.enabled:
+                    _writeInd.inc()
                 if group is not None:
                     group.groupValueWriteInd(src, priority, data)
                 if groupMonitor is not None:
@@ -114,6 +163,8 @@ class A_GroupDataService(T_GroupDataListener):
 
             elif (apci & APCI._4) == APCI.GROUPVALUE_READ:
                 if length == 0:
+                    if metrics.enabled:
+                        _readInd.inc()
                     if group is not None:
                         group.groupValueReadInd(src, priority)
                     if groupMonitor is not None:
@@ -123,6 +174,12 @@ class A_GroupDataService(T_GroupDataListener):
 
             elif (apci & APCI._4) == APCI.GROUPVALUE_RES:
                 data = APDU.getGroupValue(aPDU)
+                if metrics.enabled:
+                    _readCon.inc()
+                if self._reads:
+                    self._readCon(gad.raw, src, data)
+                for hook in self._responseHooks:
+                    hook(src, gad, priority, data)
                 if group is not None:
                     group.groupValueReadCon(src, priority, data)
                 if groupMonitor is not None:
@@ -135,6 +192,29 @@ class A_GroupDataService(T_GroupDataListener):
     def groups(self):
         return self._groups
 
+    @property
+    def cache(self):
+        return self._cache
+
+    def addResponseHook(self, hook):
+        """ Follow the read responses received, on any subscribed group address
+
+        Hooks are called before the groups, from the thread delivering the telegrams. As for the group listeners,
+        the hooks tuple is replaced rather than modified.
+
+        @param hook: called with (src, gad, priority, data)
+        @type hook: callable
+        """
+        self._responseHooks += (hook,)
+
+    def removeResponseHook(self, hook):
+        """ Stop following the read responses
+
+        @param hook: hook given to L{addResponseHook}
+        @type hook: callable
+        """
+        self._responseHooks = tuple(hook_ for hook_ in self._responseHooks if hook_ != hook)
+
     def subscribe(self, gad, listener):
         """ Subscribe listener to specified group address
 
@@ -157,12 +237,13 @@ class A_GroupDataService(T_GroupDataListener):
             gad = GroupAddress(gad)
 
         try:
-            group = self._groups[gad.address]
+            group = self._groups[gad.raw]
         except KeyError:
             if gad.isNull:
-                group = self._groups[gad.address] = GroupMonitor(self)
+                group = self._groups[gad.raw] = GroupMonitor(self)
             else:
-                group = self._groups[gad.address] = Group(gad, self)
+                group = self._groups[gad.raw] = Group(gad, self)
+            self._tgds.subscribe(gad)
 
         group.addListener(listener)
 
@@ -171,27 +252,107 @@ class A_GroupDataService(T_GroupDataListener):
     def groupValueWriteReq(self, gad, priority, data, size):
         """
         """
-        logger.debug("A_GroupDataService.groupValueWriteReq(): gad=%s, priority=%s, data=%s, size=%d" % \
-                       (gad, priority, repr(data), size))
+        if trace.enabled:
+            trace("A_GroupDataService.groupValueWriteReq(): gad=%s, priority=%s, data=%r, size=%d", gad, priority, data, size)
 
         aPDU = APDU.makeGroupValue(APCI.GROUPVALUE_WRITE, data, size)
+        if self._cache is not None:
+            self._cache.update(gad.raw, self._src, APDU.getGroupValue(aPDU))
         return self._tgds.groupDataReq(gad, priority, aPDU)
 
     def groupValueReadReq(self, gad, priority):
         """
         """
-        logger.debug("A_GroupDataService.groupValueReadReq(): gad=%s, priority=%s" % \
-                       (gad, priority))
+        if trace.enabled:
+            trace("A_GroupDataService.groupValueReadReq(): gad=%s, priority=%s", gad, priority)
 
         aPDU = APDU.makeGroupValue(APCI.GROUPVALUE_READ)
         return self._tgds.groupDataReq(gad, priority, aPDU)
 
+    def readValue(self, gad, priority=Priority(), timeout=None):
+        """ Read the value of a group address
+
+        Sends a read request, and returns a future resolved by the first response (whoever triggered it). If a read
+        of the same group address is already waiting for a response, no request is sent: its future is returned, and
+        its timeout applies.
+
+        The group address is subscribed the first time it is read, if not yet, so that the responses are delivered.
+
+        @param gad: group address to read
+        @type gad: L{GroupAddress}
+
+        @param timeout: time to wait for a response, in s (None: L{READ_TIMEOUT})
+        @type timeout: float
+
+        @return: future resolved with the source and data of the response, or failing with
+                 L{TimeoutError<concurrent.futures>}
+        @rtype: L{Future<concurrent.futures>}
+        """
+        if not isinstance(gad, GroupAddress):
+            gad = GroupAddress(gad)
+        if timeout is None:
+            timeout = self.READ_TIMEOUT
+
+        with self._readsLock:
+            try:
+                return self._reads[gad.raw][0]
+            except KeyError:
+                pass
+            future = Future()
+            try:
+                timer = asyncio.get_running_loop().call_later(timeout, self._readTimeout, gad.raw, future)
+            except RuntimeError:
+                timer = threading.Timer(timeout, self._readTimeout, (gad.raw, future))
+                timer.daemon = True
+                timer.start()
+            self._reads[gad.raw] = (future, timer)
+            subscribe = gad.raw not in self._groups and gad.raw not in self._readGads
+            if subscribe:
+                self._readGads.add(gad.raw)
+
+        try:
+            if subscribe:
+                self._tgds.subscribe(gad)
+            self.groupValueReadReq(gad, priority)
+        except Exception as e:
+            self._readDone(gad.raw, future)
+            future.set_exception(e)
+
+        return future
+
+    def _readDone(self, gad, future=None):
+        """ Forget a read waiting for a response
+
+        @return: the read future (None if not waiting anymore)
+        """
+        with self._readsLock:
+            try:
+                read = self._reads[gad]
+            except KeyError:
+                return None
+            if future is not None and read[0] is not future:
+                return None
+            del self._reads[gad]
+        read[1].cancel()
+        return read[0]
+
+    def _readCon(self, gad, src, data):
+        future = self._readDone(gad)
+        if future is not None and future.set_running_or_notify_cancel():
+            future.set_result((src, data))
+
+    def _readTimeout(self, gad, future):
+        if self._readDone(gad, future) is not None and future.set_running_or_notify_cancel():
+            future.set_exception(TimeoutError("no response from %s" % GroupAddress(gad)))
+
     def groupValueReadRes(self, gad, priority, data, size):
         """
         """
-        logger.debug("A_GroupDataService.groupValueReadRes(): gad=%s, priority=%s, data=%s, size=%d" % \
-                       (gad, priority, repr(data), size))
+        if trace.enabled:
+            trace("A_GroupDataService.groupValueReadRes(): gad=%s, priority=%s, data=%r, size=%d", gad, priority, data, size)
 
         aPDU = APDU.makeGroupValue(APCI.GROUPVALUE_RES, data, size)
+        if self._cache is not None:
+            self._cache.update(gad.raw, self._src, APDU.getGroupValue(aPDU))
         return self._tgds.groupDataReq(gad, priority, aPDU)
 
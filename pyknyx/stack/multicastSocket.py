@@ -45,6 +45,11 @@ Documentation
 
 See U{http://www.tldp.org/HOWTO/Multicast-HOWTO.html}
 
+MulticastSocketReceive.receiveMany() drains all pending datagrams at once, into a ring of buffers allocated when
+the socket is created. It waits for data without timeout; wakeup() makes it return immediately, for shutdown.
+Datagrams dropped by the kernel because the socket receive buffer was full are counted (Linux only, through
+SO_RXQ_OVFL); the size of this buffer can be set with rcvBufSize.
+
 Usage
 =====
 
@@ -56,13 +61,19 @@ Usage
 """
 
 
+import select
 import socket
 import struct
+import sys
 import six
 
 from pyknyx.common.exception import PyKNyXValueError
 from pyknyx.services.logger import logging; logger = logging.getLogger(__name__)
 
+# Not exported by the socket module
+SO_RXQ_OVFL = getattr(socket, "SO_RXQ_OVFL", 40 if sys.platform.startswith("linux") else None)
+_CMSG_SPACE = socket.CMSG_SPACE(4) if hasattr(socket, "CMSG_SPACE") else 0
+
 
 class McastSockValueError(PyKNyXValueError):
     """
@@ -120,9 +131,40 @@ class MulticastSocketBase(socket.socket):
 
 class MulticastSocketReceive(MulticastSocketBase):
     """
+
+    @ivar _ring: receive buffers
+    @type _ring: list of memoryview
+
+    @ivar _ringIndex: next buffer to use
+    @type _ringIndex: int
+
+    @ivar _wakeupSocks: socket pair used to wake up receiveMany()
+    @type _wakeupSocks: tuple of socket
+
+    @ivar _dropped: number of datagrams dropped by the kernel (None if unknown)
+    @type _dropped: int
+
+    @ivar _truncated: number of datagrams too long for a receive buffer
+    @type _truncated: int
+
+    @ivar _awake: wakeup() has been called
+    @type _awake: bool
     """
-    def __init__(self, localAddr, localPort, mcastAddr, mcastPort, timeout=1, ttl=32, loop=1):
+    def __init__(self, localAddr, localPort, mcastAddr, mcastPort, timeout=1, ttl=32, loop=1,
+                 rcvBufSize=None, ringSize=64, bufSize=1024):
         """
+
+        @param timeout: timeout of receive(), in s (None: blocking)
+        @type timeout: float
+
+        @param rcvBufSize: size of the kernel socket receive buffer (None: system default)
+        @type rcvBufSize: int
+
+        @param ringSize: max. number of datagrams returned by receiveMany()
+        @type ringSize: int
+
+        @param bufSize: size of each receive buffer (max. datagram size)
+        @type bufSize: int
         """
 
         multicast = six.byte2int(socket.inet_aton(mcastAddr)) in range(224, 240)
@@ -138,6 +180,24 @@ class MulticastSocketReceive(MulticastSocketBase):
         self.setsockopt(socket.IPPROTO_IP, socket.IP_ADD_MEMBERSHIP, value)
         self.settimeout(timeout)
 
+        if rcvBufSize is not None:
+            self.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, rcvBufSize)
+
+        self._dropped = None
+        if SO_RXQ_OVFL is not None and hasattr(self, "recvmsg_into"):
+            try:
+                self.setsockopt(socket.SOL_SOCKET, SO_RXQ_OVFL, 1)
+                self._dropped = 0
+            except socket.error:
+                logger.debug("MulticastSocketReceive.__init__(): system doesn't support SO_RXQ_OVFL")
+        self._truncated = 0
+
+        self._ring = [memoryview(bytearray(bufSize)) for i in range(ringSize)]
+        self._ringIndex = 0
+        self._wakeupSocks = socket.socketpair()
+        self._wakeupSocks[0].setblocking(False)
+        self._awake = False
+
     def _bind(self):
         """
 
@@ -151,11 +211,101 @@ class MulticastSocketReceive(MulticastSocketBase):
 
         self.bind(("", self._localPort))
 
+    @property
+    def rcvBufSize(self):
+        """ Actual size of the kernel socket receive buffer
+        """
+        return self.getsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF)
+
+    @property
+    def dropped(self):
+        """ Number of datagrams dropped by the kernel since the socket was created; None if not available
+        """
+        return self._dropped
+
+    @property
+    def truncated(self):
+        """ Number of datagrams discarded because they did not fit in a receive buffer
+        """
+        return self._truncated
+
     def receive(self):
         """
         """
         return self.recvfrom(1024)
 
+    def _recvOne(self, buf):
+        """ Receive one datagram into buf, without blocking
+
+        @return: datagram length, source address
+        @rtype: tuple
+
+        @raise BlockingIOError: no datagram available
+        """
+        if self._dropped is None:
+            nbytes, addr = self.recvfrom_into(buf, len(buf), socket.MSG_DONTWAIT)
+            return nbytes, addr
+        nbytes, ancdata, flags, addr = self.recvmsg_into([buf], _CMSG_SPACE, socket.MSG_DONTWAIT)
+        for level, type_, data in ancdata:
+            if level == socket.SOL_SOCKET and type_ == SO_RXQ_OVFL and len(data) >= 4:
+                dropped = struct.unpack("=I", data[:4])[0]
+                if dropped != self._dropped:
+                    logger.warning("MulticastSocketReceive: kernel dropped %d datagram(s)", dropped - self._dropped)
+                    self._dropped = dropped
+        if flags & socket.MSG_TRUNC:
+            self._truncated += 1
+            return None, addr
+        return nbytes, addr
+
+    def receiveMany(self):
+        """ Wait for datagrams, and return all those available (up to the ring size)
+
+        The returned buffers are reused by the next call: they must be processed (or copied) before.
+        Waits without timeout; returns an empty list once wakeup() has been called.
+
+        @return: datagrams and source addresses
+        @rtype: list of (memoryview, (str, int))
+        """
+        if self._awake:
+            return []
+        readable = select.select([self, self._wakeupSocks[0]], [], [])[0]
+        if self._wakeupSocks[0] in readable:
+            self._awake = True
+            return []
+
+        result = []
+        ring = self._ring
+        index = self._ringIndex
+        while len(result) < len(ring):
+            buf = ring[index]
+            try:
+                nbytes, addr = self._recvOne(buf)
+            except (BlockingIOError, InterruptedError):
+                break
+            if nbytes is None:
+                continue
+            result.append((buf[:nbytes], addr))
+            index = (index + 1) % len(ring)
+        self._ringIndex = index
+
+        return result
+
+    def wakeup(self):
+        """ Make the pending (and later) receiveMany() calls return
+        """
+        try:
+            self._wakeupSocks[1].send(b"\0")
+        except socket.error:
+            pass
+
+    def close(self):
+        """
+        """
+        self.wakeup()
+        for sock in self._wakeupSocks:
+            sock.close()
+        super(MulticastSocketReceive, self).close()
+
 
 class MulticastSocketTransmit(MulticastSocketBase):
     """
@@ -58,6 +58,8 @@ PriorityValueError: priority level 15 not in (0x00, 0x01, 0x02, 0x03)
 1
 >>> p.strLevel
 'normal'
+>>> Priority.fromLevel(1) is Priority.fromLevel(1)
+True
 
 @author: Frédéric Mantegazza
 @copyright: (C) 2013-2015 Frédéric Mantegazza
@@ -76,7 +78,12 @@ class PriorityValueError(PyKNyXValueError):
 
 class Priority(object):
     """ Priority handling class
+
+    @ivar _level: priority level
+    @type _level: int
     """
+    __slots__ = ("_level",)
+
     CONV_TABLE = {'system': 0x00, 'normal': 0x01, 'urgent': 0x02, 'low': 0x03,
                   0x00: 'system', 0x01: 'normal', 0x02: 'urgent', 0x03: 'low'
                  }
@@ -107,6 +114,20 @@ class Priority(object):
 
         self._level = level
 
+    @classmethod
+    def fromLevel(cls, level):
+        """ Return the shared instance for the given level
+
+        @param level: level of the priority
+        @type level: int
+
+        @rtype: L{Priority}
+        """
+        try:
+            return Priority._instances[level]
+        except (IndexError, TypeError):
+            return Priority(level)
+
     def __repr__(self):
         return "<Priority('%s')>" % self.name
 
@@ -123,3 +144,5 @@ class Priority(object):
     def name(self):
         return Priority.CONV_TABLE[self._level]
 
+
+Priority._instances = tuple(Priority(level) for level in range(4))
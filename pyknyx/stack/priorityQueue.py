@@ -56,11 +56,22 @@ There are three priority steps. The priorityDistribution is {-1,3} and the follo
 First you get all objects with priority 0, then 3 of the objects with priority 1, then one with pr. 2, then the
 remaining 2 objects with pr. 1 and at last the remaining with pr. 2.
 
-The size of this array must be smaller by one than the number of priority steps.
+The size of this array is the number of priority steps; the distribution
+of the last one is normally 1.
 
-The array is used internally (it is not cloned)
+Each priority step is a deque, so adding and removing elements is O(1). The
+queue may be bounded: every priority step then holds at most 'capacity'
+elements, and the overflow policy decides what happens when it is full:
 
-A queue inherits threading.Condition object, so can block/notify calling threads
+ - DROP_OLDEST: the oldest element of that priority is discarded
+ - DROP_NEWEST: the element being added is discarded
+ - BLOCK: the caller waits until there is room (or the queue is closed)
+
+Discarded elements are counted per priority (see L{PriorityQueue.dropped}).
+As priorities have their own capacity, a burst of low priority frames never
+makes the queue drop system frames.
+
+close() makes every blocked or later remove() return None.
 
 Usage
 =====
@@ -68,13 +79,11 @@ Usage
 @author: Frédéric Mantegazza
 @copyright: (C) 2013-2015 Frédéric Mantegazza
 @license: GPL
-
-@todo: use Queue.PriorityQueue?
 """
 
 
-import copy
 import threading
+from collections import deque
 
 from pyknyx.common.exception import PyKNyXValueError
 from pyknyx.services.logger import logging; logger = logging.getLogger(__name__)
@@ -89,30 +98,104 @@ class PriorityQueue(object):
     """ PriorityQueue class
 
     @ivar _priorityDistribution: determines the handling of the different priorities
-    @type _priorityDistribution: list/tuple of int
+    @type _priorityDistribution: tuple of int
+
+    @ivar _queue: one deque per priority step
+    @type _queue: list of L{deque<collections>}
+
+    @ivar _capacity: max. number of elements per priority step (None: unbounded)
+    @type _capacity: list of int
+
+    @ivar _policy: overflow policy
+    @type _policy: str
+
+    @ivar _count: total number of queued elements
+    @type _count: int
+
+    @ivar _dropped: number of discarded elements, per priority step
+    @type _dropped: list of int
     """
-    def __init__(self, priorityDistribution):
+    DROP_OLDEST = "drop-oldest"
+    DROP_NEWEST = "drop-newest"
+    BLOCK = "block"
+
+    POLICIES = (DROP_OLDEST, DROP_NEWEST, BLOCK)
+
+    def __init__(self, priorityDistribution, capacity=None, policy=DROP_OLDEST):
         """ Create a new PriorityQueue
 
         @param priorityDistribution: determines the handling of the different priorities
         @type priorityDistribution: list/tuple of int
 
+        @param capacity: max. number of elements per priority step; either a single value used for all steps, or
+                         one value per step. None means unbounded.
+        @type capacity: int or list/tuple of int
+
+        @param policy: what to do when a priority step is full, in L{PriorityQueue.POLICIES}
+        @type policy: str
+
         raise PriorityQueueValueError:
         """
         super(PriorityQueue, self).__init__()
 
         if len(priorityDistribution) < 2:
             raise PriorityQueueValueError("there must be a least one priority step")
-        self._priorityDistribution = priorityDistribution
+        self._priorityDistribution = tuple(priorityDistribution)
+        levels = len(priorityDistribution)
+
+        if capacity is None or isinstance(capacity, int):
+            capacity = levels * [capacity]
+        else:
+            capacity = list(capacity)
+            if len(capacity) != levels:
+                raise PriorityQueueValueError("capacity must be given for each priority step (%d)" % levels)
+        for value in capacity:
+            if value is not None and value < 1:
+                raise PriorityQueueValueError("invalid capacity (%r)" % value)
+        self._capacity = capacity
+
+        if policy not in PriorityQueue.POLICIES:
+            raise PriorityQueueValueError("invalid policy (%r)" % policy)
+        self._policy = policy
+
+        self._queue = [deque() for i in range(levels)]
+        self._count = 0
+        self._dropped = levels * [0]
+        self._closed = False
+
+        self._lock = threading.Lock()
+        self._condition = threading.Condition(self._lock)
+        self._notFull = threading.Condition(self._lock)
 
-        self._queue = len(priorityDistribution) * [[]]
+        # number of items we may (still) read before getting to lower prios
+        self._n = list(self._priorityDistribution)
 
-        self._condition = threading.Condition()
+    def __len__(self):
+        return self._count
 
-        # queue priority we found the last element at
-        self._pos = 0
-        # number of items we may (still) read before getting to lower prios
-        self._n = priorityDistribution[:]
+    @property
+    def capacity(self):
+        return tuple(self._capacity)
+
+    @property
+    def policy(self):
+        return self._policy
+
+    @property
+    def depths(self):
+        """ Number of queued elements, per priority step
+        """
+        return tuple(len(q) for q in self._queue)
+
+    @property
+    def dropped(self):
+        """ Number of discarded elements, per priority step
+        """
+        return tuple(self._dropped)
+
+    @property
+    def closed(self):
+        return self._closed
 
     def add(self, obj, priority):
         """ Add an element to the queue
@@ -124,44 +207,129 @@ class PriorityQueue(object):
         @type obj: any
 
         @param priority: priority value of the object to add
-        @type priority: int
-        """
-        #logger.debug("PriorityQueue.add(): _queue=%s" % repr(self._queue))
+        @type priority: L{Priority<pyknyx.stack.priority>}
 
-        with self._condition:
-            self._queue[priority.level].append(obj)
+        @return: False if the element has been discarded
+        @rtype: bool
+        """
+        level = priority.level
+
+        with self._lock:
+            q = self._queue[level]
+            capacity = self._capacity[level]
+            if capacity is not None and len(q) >= capacity:
+                if self._policy == PriorityQueue.DROP_NEWEST:
+                    self._dropped[level] += 1
+                    return False
+                elif self._policy == PriorityQueue.DROP_OLDEST:
+                    q.popleft()
+                    self._count -= 1
+                    self._dropped[level] += 1
+                else:
+                    while len(q) >= capacity and not self._closed:
+                        self._notFull.wait()
+                    if self._closed:
+                        self._dropped[level] += 1
+                        return False
+            q.append(obj)
+            self._count += 1
             self._condition.notify()
 
+        return True
+
+    def _get(self):
+        """ Return the next element, according to the priority distribution
+
+        Must be called with the lock held.
+
+        @raise IndexError: the queue is empty
+        """
+        if not self._count:
+            raise IndexError("queue is empty")
+
+        for attempt in (0, 1):
+            for i, q in enumerate(self._queue):
+                # scan all queues. Return the first element with
+                # lowest-prio queue that's not exhausted its
+                # quorum.
+                if not q:
+                    continue
+                n = self._n[i]
+                if n == 0:
+                    continue
+                if n > 0:
+                    self._n[i] = n-1
+                obj = q.popleft() # takes absolute precendece
+                self._count -= 1
+                if self._policy == PriorityQueue.BLOCK and len(q) + 1 == self._capacity[i]:
+                    self._notFull.notify_all()
+                return obj
+
+            # all non-empty queues exhausted their quorum
+            self._n = list(self._priorityDistribution)
+
+        # only blocked priority steps (distribution 0) hold elements
+        raise IndexError("queue is blocked")
 
     def remove(self):
         """ Removes and returns the next element from this queue
 
-        @return: the next element from this queue (blocks if queue is empty)
+        @return: the next element from this queue (blocks if queue is empty), None if the queue has been closed
         """
-        #logger.debug("PriorityQueue.remove(): _queue=%s" % repr(self._queue))
-
-        with self._condition:
+        with self._lock:
             while True: # Loop until we transmit something.
-                seen = True
-                while seen: # Loop until the array of queues is empty.
-                    seen = False
-                    for i,q in enumerate(zip(self._queue,self._n)):
-                        # scan all queues. Return the first element with
-                        # lowest-prio queue that's not exhausted its
-                        # quorum.
-                        q,n = q
-                        if not q:
-                            continue
-                        seen = True
-                        if n == 0:
-                            continue
-                        if n >= 0:
-                            self._n[i] = n-1
-                        return q.pop(0) # takes absolute precendece
-
-                    if seen:
-                        self._n = self._priorityDistribution[:]
-
-                # no element found. Wait.
-                self._condition.wait()
+                if self._closed:
+                    return None
+                try:
+                    return self._get()
+                except IndexError:
+                    # no element found. Wait.
+                    self._condition.wait()
 
+    def removeNowait(self):
+        """ Removes and returns the next element from this queue, without blocking
+
+        @return: the next element from this queue
+
+        @raise IndexError: the queue is empty
+        """
+        with self._lock:
+            return self._get()
+
+    def removeMany(self, max_):
+        """ Removes and returns up to max_ elements from this queue
+
+        Blocks until at least one element is available. The elements are returned in the same order successive
+        remove() calls would have returned them.
+
+        @param max_: max. number of elements to return
+        @type max_: int
+
+        @return: the next elements from this queue; empty if the queue has been closed
+        @rtype: list
+        """
+        with self._lock:
+            while True:
+                if self._closed:
+                    return []
+                try:
+                    result = [self._get()]
+                    break
+                except IndexError:
+                    self._condition.wait()
+            while self._count and len(result) < max_:
+                try:
+                    result.append(self._get())
+                except IndexError:
+                    break
+        return result
+
+    def close(self):
+        """ Close the queue
+
+        Wakes up every thread blocked in add()/remove(); later calls to remove() return None.
+        """
+        with self._lock:
+            self._closed = True
+            self._condition.notify_all()
+            self._notFull.notify_all()
@@ -0,0 +1,252 @@
+# -*- coding: utf-8 -*-
+
+""" Python KNX framework
+
+License
+=======
+
+ - B{PyKNyX} (U{https://github.com/knxd/pyknyx}) is Copyright:
+  - © 2016-2017 Matthias Urlichs
+  - PyKNyX is a fork of pKNyX
+   - © 2013-2015 Frédéric Mantegazza
+
+This program is free software; you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation; either version 2 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program; if not, write to the Free Software
+Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA  02111-1307  USA
+or see:
+
+ - U{http://www.gnu.org/licenses/gpl.html}
+
+Module purpose
+==============
+
+Shared memory ring buffer
+
+Implements
+==========
+
+ - B{ShmRingValueError}
+ - B{ShmRing}
+
+Documentation
+=============
+
+Single producer, single consumer ring buffer of variable length records, in a shared memory block, used to pass
+frames between processes without pickling.
+
+The block starts with the write and read counters (bytes written/read since creation), followed by the data area.
+Each record is stored contiguously as a 2 bytes length followed by the data; when a record doesn't fit before the
+end of the data area, the remaining space is skipped (marked by a padding length if possible).
+
+The producer only updates the write counter, after the record; the consumer only updates the read counter, after
+reading the record. Each side must be used by a single thread.
+
+The ring doesn't provide any wake up mechanism: the producer usually notifies the consumer through a pipe.
+
+Usage
+=====
+
+>>> ring = ShmRing(size=4096)
+>>> ring.put(b"abc")
+True
+>>> ring.get()
+b'abc'
+>>> ring.get()
+>>> other = ShmRing(name=ring.name, create=False)  # in another process
+
+@author: Frédéric Mantegazza
+@copyright: (C) 2013-2015 Frédéric Mantegazza
+@license: GPL
+"""
+
+
+import struct
+from multiprocessing import shared_memory
+
+from pyknyx.common.exception import PyKNyXValueError
+from pyknyx.services.logger import logging; logger = logging.getLogger(__name__)
+
+_COUNTER = struct.Struct("=Q")
+_LENGTH = struct.Struct("=H")
+
+_WRITE_OFFSET = 0
+_READ_OFFSET = _COUNTER.size
+_DATA_OFFSET = 2 * _COUNTER.size
+
+_PADDING = 0xffff
+
+
+class ShmRingValueError(PyKNyXValueError):
+    """
+    """
+
+
+class ShmRing(object):
+    """ ShmRing class
+
+    @ivar _shm: shared memory block
+    @type _shm: L{SharedMemory<multiprocessing.shared_memory>}
+
+    @ivar _size: size of the data area
+    @type _size: int
+
+    @ivar _dropped: number of records which didn't fit (producer side)
+    @type _dropped: int
+    """
+    DEFAULT_SIZE = 1 << 20
+    MAX_RECORD_SIZE = _PADDING - 1
+
+    def __init__(self, size=DEFAULT_SIZE, name=None, create=True):
+        """
+
+        @param size: size of the data area, in bytes
+        @type size: int
+
+        @param name: name of the shared memory block (None: generate one; must be given to attach)
+        @type name: str
+
+        @param create: create the block (else, attach to an existing one)
+        @type create: bool
+
+        raise ShmRingValueError:
+        """
+        super(ShmRing, self).__init__()
+
+        if create:
+            if size < 16:
+                raise ShmRingValueError("ring too small (%d)" % size)
+            self._shm = shared_memory.SharedMemory(name=name, create=True, size=_DATA_OFFSET + size)
+            self._shm.buf[:_DATA_OFFSET] = bytes(_DATA_OFFSET)
+        else:
+            if name is None:
+                raise ShmRingValueError("name needed to attach to a ring")
+            self._shm = shared_memory.SharedMemory(name=name)
+        self._owner = create
+        self._buf = self._shm.buf
+        self._size = len(self._buf) - _DATA_OFFSET if not create else size
+        self._dropped = 0
+
+    def __len__(self):
+        """ Number of bytes used
+        """
+        return self._counter(_WRITE_OFFSET) - self._counter(_READ_OFFSET)
+
+    @property
+    def name(self):
+        return self._shm.name
+
+    @property
+    def size(self):
+        return self._size
+
+    @property
+    def dropped(self):
+        return self._dropped
+
+    def _counter(self, offset):
+        return _COUNTER.unpack_from(self._buf, offset)[0]
+
+    def put(self, data):
+        """ Append a record (producer side)
+
+        @param data: record
+        @type data: bytes, bytearray or memoryview
+
+        @return: False if the ring is full (the record is dropped)
+        @rtype: bool
+
+        raise ShmRingValueError:
+        """
+        length = len(data)
+        if length > ShmRing.MAX_RECORD_SIZE or length + _LENGTH.size > self._size:
+            raise ShmRingValueError("record too long (%d)" % length)
+        buf = self._buf
+        size = self._size
+        write = self._counter(_WRITE_OFFSET)
+        free = size - (write - self._counter(_READ_OFFSET))
+        needed = _LENGTH.size + length
+
+        pos = write % size
+        contiguous = size - pos
+        if contiguous < needed:
+            if free < contiguous + needed:
+                self._dropped += 1
+                return False
+            if contiguous >= _LENGTH.size:
+                _LENGTH.pack_into(buf, _DATA_OFFSET + pos, _PADDING)
+            write += contiguous
+            pos = 0
+        elif free < needed:
+            self._dropped += 1
+            return False
+
+        start = _DATA_OFFSET + pos
+        _LENGTH.pack_into(buf, start, length)
+        buf[start + _LENGTH.size:start + needed] = data
+        _COUNTER.pack_into(buf, _WRITE_OFFSET, write + needed)
+        return True
+
+    def get(self):
+        """ Remove the oldest record (consumer side)
+
+        @return: record (None if the ring is empty)
+        @rtype: bytes
+        """
+        buf = self._buf
+        size = self._size
+        write = self._counter(_WRITE_OFFSET)
+        read = self._counter(_READ_OFFSET)
+        while read != write:
+            pos = read % size
+            contiguous = size - pos
+            if contiguous < _LENGTH.size:
+                read += contiguous
+                continue
+            length = _LENGTH.unpack_from(buf, _DATA_OFFSET + pos)[0]
+            if length == _PADDING:
+                read += contiguous
+                continue
+            start = _DATA_OFFSET + pos + _LENGTH.size
+            data = bytes(buf[start:start + length])
+            _COUNTER.pack_into(buf, _READ_OFFSET, read + _LENGTH.size + length)
+            return data
+        _COUNTER.pack_into(buf, _READ_OFFSET, read)
+        return None
+
+    def getMany(self, max_):
+        """ Remove up to max_ records (consumer side)
+
+        @rtype: list of bytes
+        """
+        records = []
+        while len(records) < max_:
+            data = self.get()
+            if data is None:
+                break
+            records.append(data)
+        return records
+
+    def close(self):
+        """ Detach from the shared memory block; the creator also destroys it
+        """
+        if self._shm is None:
+            return
+        self._buf.release()
+        self._buf = None
+        self._shm.close()
+        if self._owner:
+            try:
+                self._shm.unlink()
+            except FileNotFoundError:
+                pass
+        self._shm = None
@@ -50,8 +50,6 @@ Usage
 """
 
 
-import time
-
 from pyknyx.common.exception import PyKNyXValueError
 from pyknyx.services.logger import logging; logger = logging.getLogger(__name__)
 from pyknyx.stack.individualAddress import IndividualAddress
@@ -82,6 +80,8 @@ class Stack(object):
     @ivar _lds: Transport layer Data Service object
     @type _lds: L{L_DataService}
 
+    @ivar _cache: group values cache of the ETS (None: no cache)
+    @type _cache: L{GroupValueCache<pyknyx.stack.groupValueCache>}
     """
     def __init__(self, ets, individualAddress=None):
         """
@@ -95,7 +95,8 @@ class Stack(object):
         self._lds = L_DataService(ets, individualAddress=individualAddress)
         self._ngds = N_GroupDataService(self._lds)
         self._tgds = T_GroupDataService(self._ngds)
-        self._agds = A_GroupDataService(self._tgds)
+        self._cache = getattr(ets, "groupValueCache", None)
+        self._agds = A_GroupDataService(self._tgds, self._cache, self._lds.physAddr)
 
     @property
     def agds(self):
@@ -107,26 +108,50 @@ class Stack(object):
 
     def start(self):
         """
-        Start the stack. All we need to do is to read initial state from the bus.
+        Start the stack.
+
+        The initial state is read from the bus by the ETS, for all its devices at once (see
+        L{InitReader<pyknyx.core.initReader>}); groups whose value is known from the group values cache are
+        initialised from it instead (see L{initFromCache}).
         """
         logger.trace("Stack.start()")
 
-        time.sleep(0.25)
+        logger.debug("Stack.start(): running")
 
-        # Iterate over Group to find those which need to send a initial read request
-        # (depending on GroupObject init flag)
-        logger.debug("Stack.start(): initiate a read request for Group having at least one GroupObject with 'init' flag on")
+    def initGroups(self):
+        """ Iterate over Group to find those which need to send a initial read request
+
+        This depends on the GroupObject init flag.
+        """
         for group in self._agds.groups.values():
             for listener in group.listeners:
                 try:
                     if listener.flags.init:
-                        group.read(priority=Priority())
-                        time.sleep(0.1)  # avoid bus saturation
+                        yield group
                         break
                 except AttributeError:
-                    logger.exception("Stack.start(): listener does not seem to be a GroupObject")
+                    logger.exception("Stack.initGroups(): listener does not seem to be a GroupObject")
 
-        logger.debug("Stack.start(): running")
+    def initFromCache(self, group):
+        """ Initialise a Group from the group values cache
+
+        The cached value is delivered to the group listeners as a read response.
+
+        @param group: group to initialise
+        @type group: L{Group<pyknyx.core.group>}
+
+        @return: True if the value was known (and recent enough)
+        @rtype: bool
+        """
+        if self._cache is None:
+            return False
+        value = self._cache.get(group.gad.raw, self._cache.maxAge)
+        if value is None:
+            return False
+        data, src, timestamp = value
+        logger.debug("Stack.initFromCache(): group=%s, data=%r (src=%s)" % (group, data, src))
+        group.groupValueReadCon(src, Priority(), data)
+        return True
 
     def stop(self):
         """
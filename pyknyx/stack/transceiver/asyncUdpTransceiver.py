@@ -0,0 +1,176 @@
+# -*- coding: utf-8 -*-
+
+""" Python KNX framework
+
+License
+=======
+
+ - B{PyKNyX} (U{https://github.com/knxd/pyknyx}) is Copyright:
+  - © 2016-2017 Matthias Urlichs
+  - PyKNyX is a fork of pKNyX
+   - © 2013-2015 Frédéric Mantegazza
+
+This program is free software; you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation; either version 2 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program; if not, write to the Free Software
+Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA  02111-1307  USA
+or see:
+
+ - U{http://www.gnu.org/licenses/gpl.html}
+
+Module purpose
+==============
+
+Runs a Layer2 driver for multicasting, on an asyncio event loop
+
+Implements
+==========
+
+ - B{AsyncUDPTransceiver}
+
+Documentation
+=============
+
+Same as L{UDPTransceiver<pyknyx.stack.transceiver.udpTransceiver>}, but the sockets are driven by asyncio datagram
+endpoints instead of a receiver and a transmitter thread. To be used with L{AsyncETS<pyknyx.core.asyncEts>}.
+
+Frames are sent right away, unless flow control (pacing, ROUTING_BUSY) requires to wait; they are then queued, and
+sent later from an event loop callback.
+
+Usage
+=====
+
+@author: Frédéric Mantegazza
+@copyright: (C) 2013-2015 Frédéric Mantegazza
+@license: GPL
+"""
+
+
+import asyncio
+
+from pyknyx.services.logger import logging; logger = logging.getLogger(__name__)
+from pyknyx.stack.transceiver.udpTransceiver import UDPTransceiver
+
+
+class _ReceiverProtocol(asyncio.DatagramProtocol):
+    """ Forward received datagrams to the transceiver
+    """
+    def __init__(self, transceiver):
+        super(_ReceiverProtocol, self).__init__()
+
+        self._transceiver = transceiver
+
+    def datagram_received(self, data, addr):
+        self._transceiver._datagramReceived(data, addr)
+
+    def error_received(self, exc):
+        logger.error("AsyncUDPTransceiver: %s", exc)
+
+
+class AsyncUDPTransceiver(UDPTransceiver):
+    """ AsyncUDPTransceiver class
+
+    @ivar _receiverTransport: asyncio transport of the receiver socket
+    @type _receiverTransport: L{DatagramTransport<asyncio>}
+
+    @ivar _transmitterTransport: asyncio transport of the transmitter socket
+    @type _transmitterTransport: L{DatagramTransport<asyncio>}
+
+    @ivar _flushHandle: pending call to _flush()
+    @type _flushHandle: L{TimerHandle<asyncio>}
+    """
+    def __init__(self, ets, mcastAddr="224.0.23.12", mcastPort=3671, **kwargs):
+        """
+
+        @param mcastAddr: multicast address to bind to
+        @type mcastAddr: str
+
+        @param mcastPort: multicast port to bind to
+        @type mcastPort: str
+
+        See L{UDPTransceiver<pyknyx.stack.transceiver.udpTransceiver>} for other parameters.
+        """
+        super(AsyncUDPTransceiver, self).__init__(ets, mcastAddr, mcastPort, **kwargs)
+        self._flushHandle = None
+
+        self._receiverTransport = None
+        self._transmitterTransport = None
+
+    def _datagramReceived(self, inFrame, addr):
+        fromAddr, fromPort = addr[:2]
+        try:
+            cEMI = self._decodeFrame(inFrame, fromAddr, fromPort)
+            if cEMI is not None:
+                self.dataReq(cEMI)
+        except Exception:
+            logger.exception("AsyncUDPTransceiver._datagramReceived()")
+
+    def dataInd(self, cEMI):
+        """ Transmit a frame
+
+        Called by ETS, from the event loop.
+        """
+        if self._transmitterTransport is None:
+            logger.warning("AsyncUDPTransceiver.dataInd(): not started")
+            return
+        self._queue.add(cEMI, cEMI.priority)
+        if self._flushHandle is None:
+            self._flush()
+
+    def _flush(self):
+        """ Send queued frames, as long as flow control allows it
+        """
+        self._flushHandle = None
+        while self._transmitterTransport is not None:
+            delay = self._flowControl.delay()
+            if delay > 0:
+                self._flushHandle = asyncio.get_event_loop().call_later(delay, self._flush)
+                return
+            try:
+                cEMI = self._queue.removeNowait()
+            except IndexError:
+                return
+            try:
+                self._transmitterTransport.sendto(self._encodeFrame(cEMI), (self._mcastAddr, self._mcastPort))
+                self._flowControl.sent()
+            except Exception:
+                logger.exception("AsyncUDPTransceiver._flush()")
+
+    async def start(self):
+        """
+        """
+        logger.trace("AsyncUDPTransceiver.start()")
+
+        loop = asyncio.get_event_loop()
+        self._running = True
+        self._receiverSock.setblocking(False)
+        self._transmitterSock.setblocking(False)
+        self._receiverTransport, _ = await loop.create_datagram_endpoint(lambda: _ReceiverProtocol(self),
+                                                                         sock=self._receiverSock)
+        self._transmitterTransport, _ = await loop.create_datagram_endpoint(asyncio.DatagramProtocol,
+                                                                            sock=self._transmitterSock)
+
+    async def stop(self):
+        """
+        """
+        logger.trace("AsyncUDPTransceiver.stop()")
+
+        self._running = False
+        if self._flushHandle is not None:
+            self._flushHandle.cancel()
+            self._flushHandle = None
+        for transport in (self._receiverTransport, self._transmitterTransport):
+            if transport is not None:
+                transport.close()
+        self._receiverTransport = self._transmitterTransport = None
+
+        self.unregisterMetrics()
@@ -0,0 +1,397 @@
+# -*- coding: utf-8 -*-
+
+""" Python KNX framework
+
+License
+=======
+
+ - B{PyKNyX} (U{https://github.com/knxd/pyknyx}) is Copyright:
+  - © 2016-2017 Matthias Urlichs
+  - PyKNyX is a fork of pKNyX
+   - © 2013-2015 Frédéric Mantegazza
+
+This program is free software; you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation; either version 2 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program; if not, write to the Free Software
+Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA  02111-1307  USA
+or see:
+
+ - U{http://www.gnu.org/licenses/gpl.html}
+
+Module purpose
+==============
+
+Runs a Layer2 driver through knxd (or eibd)
+
+Implements
+==========
+
+ - B{KnxdTransceiver}
+ - B{KnxdTransceiverValueError}
+
+Documentation
+=============
+
+Connects to knxd over its client protocol (Unix or TCP socket), and opens a group socket (EIB_OPEN_GROUPCON):
+group telegrams from the bus are received as EIB_GROUP_PACKET (source, destination, TPDU), and telegrams are sent
+the same way (destination, TPDU). The group socket carries neither priority nor routing counter; received frames
+get the low priority and the default routing counter. Individual addressed frames are not supported.
+
+Unlike L{EIBConnection<pyknyx.stack.backends.eibd.eibConnection>}, which reads one packet at a time with blocking
+calls, the socket is non-blocking: the receiver reads as much as available at once and splits the packets from
+its buffer, and the transmitter packs all the queued frames into a single write.
+
+The connection is re-opened after reconnectDelay when knxd closes it. Frames queued meanwhile are sent once
+reconnected (within the queue capacity).
+
+Usage
+=====
+
+>>> ets = ETS("1.2.0", transCls=KnxdTransceiver, transParams=dict(url="local:/run/knx"))
+
+@author: Frédéric Mantegazza
+@copyright: (C) 2013-2015 Frédéric Mantegazza
+@license: GPL
+"""
+
+
+import errno
+import select
+import socket
+import struct
+import threading
+
+from pyknyx.common.exception import PyKNyXValueError
+from pyknyx.services.logger import logging; logger = logging.getLogger(__name__)
+from pyknyx.services.tracer import tracer; trace = tracer("knxd")
+from pyknyx.stack.groupAddress import GroupAddress
+from pyknyx.stack.priority import Priority
+from pyknyx.stack.priorityQueue import PriorityQueue
+from pyknyx.stack.layer2.l_dataServiceBase import L_DataServiceBroadcast
+from pyknyx.stack.layer2.l_dataService import PRIORITY_DISTRIBUTION
+from pyknyx.stack.cemi.cemiLData import CEMILData, CEMIValueError
+
+EIB_OPEN_GROUPCON = 0x0026
+EIB_GROUP_PACKET = 0x0027
+
+_HEADER = struct.Struct(">2H")  # packet length (excluding this field), packet type
+_GROUP_IN = struct.Struct(">2H")  # source, destination
+_GROUP_OUT = struct.Struct(">3H")  # packet length, packet type, destination
+_OPEN_GROUPCON = struct.Struct(">3HB")  # packet length, packet type, reserved, write only
+
+_PRIORITY = Priority.fromLevel(3)
+_HOP_COUNT = 6
+
+
+class KnxdTransceiverValueError(PyKNyXValueError):
+    """
+    """
+
+
+class KnxdTransceiver(L_DataServiceBroadcast):
+    """ KnxdTransceiver class
+
+    @ivar _url: knxd URL ("local:<path>" or "ip:<host>[:<port>]")
+    @type _url: str
+
+    @ivar _sock: connection to knxd (None when disconnected)
+    @type _sock: L{socket<socket>}
+
+    @ivar _inBuffer: received data not yet split into packets
+    @type _inBuffer: bytearray
+
+    @ivar _queue: frames waiting for transmission
+    @type _queue: L{PriorityQueue<pyknyx.stack.priorityQueue>}
+
+    @ivar _connected: set when the group socket is open
+    @type _connected: L{Event<threading>}
+    """
+    DEFAULT_PORT = 6720
+
+    # Max. number of bytes read at once
+    RECV_SIZE = 65536
+
+    # Max. number of frames written at once
+    BATCH_SIZE = 64
+
+    def __init__(self, ets, url="ip:localhost", queueCapacity=None, queuePolicy=PriorityQueue.DROP_OLDEST,
+                 reconnectDelay=5.):
+        """
+
+        @param url: knxd URL ("local:<path>" or "ip:<host>[:<port>]")
+        @type url: str
+
+        @param queueCapacity: max. number of frames waiting for transmission, per priority (None: unbounded)
+        @type queueCapacity: int or list of int
+
+        @param queuePolicy: what to do with frames when the queue is full
+        @type queuePolicy: str, see L{PriorityQueue<pyknyx.stack.priorityQueue>}
+
+        @param reconnectDelay: time to wait before re-opening a lost connection, in s
+        @type reconnectDelay: float
+
+        raise KnxdTransceiverValueError:
+        """
+        self._family, self._address = KnxdTransceiver._parseUrl(url)
+        if reconnectDelay <= 0:
+            raise KnxdTransceiverValueError("invalid reconnect delay (%r)" % reconnectDelay)
+
+        super(KnxdTransceiver, self).__init__(ets)
+
+        self._url = url
+        self._reconnectDelay = reconnectDelay
+        self._sock = None
+        self._inBuffer = bytearray()
+        self._wakeupSocks = socket.socketpair()
+        self._queue = PriorityQueue(PRIORITY_DISTRIBUTION, queueCapacity, queuePolicy)
+        self._connected = threading.Event()
+        self._stopped = threading.Event()
+
+        self._running = False
+        self._threads = []
+
+    @staticmethod
+    def _parseUrl(url):
+        """ Split a knxd URL
+
+        @return: socket family, socket address
+        @rtype: tuple
+
+        raise KnxdTransceiverValueError:
+        """
+        if url.startswith("local:") and len(url) > 6:
+            return socket.AF_UNIX, url[6:]
+        elif url.startswith("ip:"):
+            parts = url[3:].split(':')
+            try:
+                if len(parts) == 1 and parts[0]:
+                    return socket.AF_INET, (parts[0], KnxdTransceiver.DEFAULT_PORT)
+                elif len(parts) == 2 and parts[0]:
+                    return socket.AF_INET, (parts[0], int(parts[1]))
+            except ValueError:
+                pass
+        raise KnxdTransceiverValueError("invalid knxd URL (%r)" % url)
+
+    @property
+    def url(self):
+        return self._url
+
+    @property
+    def queue(self):
+        """ Frames waiting for transmission
+        """
+        return self._queue
+
+    @property
+    def connected(self):
+        return self._connected.is_set()
+
+    def _open(self):
+        """ Connect to knxd, and request a group socket
+
+        The group socket is open once knxd answers (see L{_processPackets}).
+        """
+        sock = socket.socket(self._family, socket.SOCK_STREAM)
+        try:
+            sock.settimeout(self._reconnectDelay)
+            sock.connect(self._address)
+            sock.sendall(_OPEN_GROUPCON.pack(_OPEN_GROUPCON.size - 2, EIB_OPEN_GROUPCON, 0, 0))
+            sock.setblocking(False)
+        except socket.error:
+            sock.close()
+            raise
+        self._inBuffer = bytearray()
+        self._sock = sock
+
+    def _close(self):
+        self._connected.clear()
+        sock, self._sock = self._sock, None
+        if sock is not None:
+            sock.close()
+
+    def _processPackets(self):
+        """ Split the received data into packets, and process them
+        """
+        buf = self._inBuffer
+        end = len(buf)
+        offset = 0
+        while end - offset >= 2:
+            length = buf[offset] << 8 | buf[offset + 1]
+            start = offset + 2
+            if end - start < length:
+                break  # incomplete packet
+            offset = start + length
+            if length < 2:
+                logger.warning("KnxdTransceiver._processPackets(): invalid packet length (%d)" % length)
+                continue
+            type_ = buf[start] << 8 | buf[start + 1]
+
+            if type_ == EIB_GROUP_PACKET:
+                if length < 2 + _GROUP_IN.size + 1:
+                    logger.warning("KnxdTransceiver._processPackets(): group packet too short (%d)" % length)
+                    continue
+                src, dest = _GROUP_IN.unpack_from(buf, start + 2)
+                tPDU = buf[start + 2 + _GROUP_IN.size:offset]
+                cEMI = CEMILData.groupData(GroupAddress.fromRaw(dest), _PRIORITY, _HOP_COUNT, tPDU, src)
+                if trace.enabled:
+                    trace("KnxdTransceiver._processPackets(): frame=%r", cEMI)
+                self.dataReq(cEMI)
+
+            elif type_ == EIB_OPEN_GROUPCON:
+                logger.info("KnxdTransceiver: group socket open on %s" % self._url)
+                self._connected.set()
+
+            else:
+                logger.warning("KnxdTransceiver._processPackets(): unexpected packet type (0x%04x)" % type_)
+
+        if offset:
+            del buf[:offset]
+
+    def _receiverLoop(self):
+        """
+        """
+        logger.trace("KnxdTransceiver._receiverLoop()")
+
+        while self._running:
+            try:
+                if self._sock is None:
+                    try:
+                        self._open()
+                    except socket.error as e:
+                        logger.warning("KnxdTransceiver._receiverLoop(): can't connect to %s (%s)" % (self._url, e))
+                        self._stopped.wait(self._reconnectDelay)
+                        continue
+
+                readable = select.select([self._sock, self._wakeupSocks[0]], [], [])[0]
+                if self._wakeupSocks[0] in readable:
+                    break
+                try:
+                    data = self._sock.recv(KnxdTransceiver.RECV_SIZE)
+                except socket.error as e:
+                    if e.errno in (errno.EAGAIN, errno.EWOULDBLOCK, errno.EINTR):
+                        continue
+                    data = b""
+                if not data:
+                    logger.warning("KnxdTransceiver._receiverLoop(): connection to %s lost" % self._url)
+                    self._close()
+                    self._stopped.wait(self._reconnectDelay)
+                    continue
+                self._inBuffer += data
+                self._processPackets()
+
+            except Exception:
+                if self._running:
+                    logger.exception("KnxdTransceiver._receiverLoop()")
+
+        logger.trace("KnxdTransceiver._receiverLoop(): ended")
+
+    def wantsIndividualFrame(self, cEMI, force=False):
+        return False
+
+    def dataInd(self, cEMI):
+        self._queue.add(cEMI, cEMI.priority)
+
+    def _encode(self, cEMIs):
+        """ Pack frames into group packets
+
+        @rtype: bytearray
+        """
+        data = bytearray()
+        for cEMI in cEMIs:
+            tPDU = cEMI.npdu[1:]
+            data += _GROUP_OUT.pack(_GROUP_OUT.size - 2 + len(tPDU), EIB_GROUP_PACKET, cEMI.frame.da)
+            data += tPDU
+        return data
+
+    def _sendAll(self, data):
+        """ Write data to the non-blocking socket
+
+        raise socket.error:
+        """
+        view = memoryview(data)
+        while view:
+            sock = self._sock
+            if sock is None:
+                raise socket.error(errno.ENOTCONN, "not connected")
+            try:
+                sent = sock.send(view)
+            except socket.error as e:
+                if e.errno not in (errno.EAGAIN, errno.EWOULDBLOCK, errno.EINTR):
+                    raise
+                select.select([], [sock], [], 1.)
+                continue
+            view = view[sent:]
+
+    def _transmitterLoop(self):
+        """
+        """
+        logger.trace("KnxdTransceiver._transmitterLoop()")
+
+        while self._running:
+            try:
+                cEMIs = self._queue.removeMany(KnxdTransceiver.BATCH_SIZE)
+                if not cEMIs:
+                    return
+
+                cEMIs = [cEMI for cEMI in cEMIs if cEMI.addressType == CEMILData.AT_GROUP_ADDRESS]
+                if not cEMIs:
+                    continue
+                while self._running and not self._connected.wait(1.):
+                    pass
+                if not self._running:
+                    return
+
+                logger.debug("KnxdTransceiver._transmitterLoop(): %d frame(s)" % len(cEMIs))
+                try:
+                    self._sendAll(self._encode(cEMIs))
+                except socket.error:
+                    logger.exception("KnxdTransceiver._transmitterLoop(): frames lost")
+
+            except Exception:
+                logger.exception("KnxdTransceiver._transmitterLoop()")
+
+        logger.trace("KnxdTransceiver._transmitterLoop(): ended")
+
+    def start(self):
+        """
+        """
+        logger.trace("KnxdTransceiver.start()")
+
+        self._running = True
+        self._stopped.clear()
+
+        threads = [threading.Thread(target=self._receiverLoop, name="knxd receiver"),
+                   threading.Thread(target=self._transmitterLoop, name="knxd transmitter")]
+        for thread in threads:
+            thread.daemon = True
+            thread.start()
+        self._threads = threads
+
+    def stop(self):
+        """
+        """
+        logger.trace("KnxdTransceiver.stop()")
+
+        self._running = False
+        self._stopped.set()
+        self._connected.set()
+        self._queue.close()
+        self._wakeupSocks[1].send(b"\0")
+        for thread in self._threads:
+            if thread is not threading.current_thread():
+                thread.join(1)
+        self._threads = []
+        self._close()
+        for sock in self._wakeupSocks:
+            sock.close()
+
+        super(KnxdTransceiver, self).stop()
@@ -0,0 +1,387 @@
+# -*- coding: utf-8 -*-
+
+""" Python KNX framework
+
+License
+=======
+
+ - B{PyKNyX} (U{https://github.com/knxd/pyknyx}) is Copyright:
+  - © 2016-2017 Matthias Urlichs
+  - PyKNyX is a fork of pKNyX
+   - © 2013-2015 Frédéric Mantegazza
+
+This program is free software; you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation; either version 2 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program; if not, write to the Free Software
+Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA  02111-1307  USA
+or see:
+
+ - U{http://www.gnu.org/licenses/gpl.html}
+
+
+Module purpose
+==============
+
+In-memory bus
+
+Implements
+==========
+
+ - B{LoopbackBusValueError}
+ - B{LoopbackBus}
+ - B{LoopbackTransceiver}
+
+Documentation
+=============
+
+Connects several ETS running in the same process, without sockets, to test, simulate or benchmark the real stack
+code.
+
+Each ETS gets a L{LoopbackTransceiver} attached to a shared L{LoopbackBus}. A frame sent by a transceiver is
+delivered to all the other (started) transceivers of the bus, as a L_Data.ind; all receivers share the same
+immutable frame, copied only if modified.
+
+Without latency, frames are delivered synchronously, in the thread of the sender (ETS only queues them, so this
+is cheap). With a latency (and/or jitter), frames are queued and delivered by the bus thread when due; with
+jitter, frames may be reordered, as on a real network. Frames can also be randomly lost, per receiver; the random
+generator can be seeded to make runs reproducible.
+
+Usage
+=====
+
+>>> bus = LoopbackBus(latency=0.01, loss=0.05, seed=1)
+>>> ets1 = ETS("1.1.0", transCls=LoopbackTransceiver, transParams=dict(bus=bus))
+>>> ets2 = ETS("1.2.0", transCls=LoopbackTransceiver, transParams=dict(bus=bus))
+
+@author: Frédéric Mantegazza
+@copyright: (C) 2013-2015 Frédéric Mantegazza
+@license: GPL
+"""
+
+
+import heapq
+import itertools
+import random
+import threading
+import time
+
+from pyknyx.common.exception import PyKNyXValueError
+from pyknyx.services.logger import logging; logger = logging.getLogger(__name__)
+from pyknyx.stack.layer2.l_dataServiceBase import L_DataServiceBroadcast
+from pyknyx.stack.cemi.cemiLData import CEMILData
+
+
+class LoopbackBusValueError(PyKNyXValueError):
+    """
+    """
+
+
+class LoopbackBus(object):
+    """ LoopbackBus class
+
+    @ivar _receivers: started transceivers
+    @type _receivers: tuple of L{LoopbackTransceiver}
+
+    @ivar _latency: delivery delay, in s
+    @type _latency: float
+
+    @ivar _jitter: max. additional random delivery delay, in s
+    @type _jitter: float
+
+    @ivar _loss: probability for a frame to be lost, per receiver
+    @type _loss: float
+
+    @ivar _pending: frames waiting for delivery, as (due time, sequence, receiver, frame)
+    @type _pending: list (heap)
+
+    @ivar _sent: number of frames sent on the bus
+    @type _sent: int
+
+    @ivar _delivered: number of frames delivered (one per receiver)
+    @type _delivered: int
+
+    @ivar _lost: number of frames lost (one per receiver)
+    @type _lost: int
+    """
+    def __init__(self, latency=0., jitter=0., loss=0., seed=None, clock=time.time):
+        """
+
+        @param latency: delivery delay, in s (0: synchronous delivery)
+        @type latency: float
+
+        @param jitter: max. additional random delivery delay, in s
+        @type jitter: float
+
+        @param loss: probability for a frame to be lost, per receiver, in [0, 1]
+        @type loss: float
+
+        @param seed: random generator seed (None: not reproducible)
+        @type seed: int
+
+        @param clock: time source, in s
+        @type clock: callable
+
+        raise LoopbackBusValueError:
+        """
+        super(LoopbackBus, self).__init__()
+
+        if latency < 0 or jitter < 0:
+            raise LoopbackBusValueError("invalid latency/jitter (%r, %r)" % (latency, jitter))
+        if not 0 <= loss <= 1:
+            raise LoopbackBusValueError("invalid loss (%r)" % loss)
+        self._latency = latency
+        self._jitter = jitter
+        self._loss = loss
+        self._random = random.Random(seed).random
+        self._clock = clock
+
+        self._lock = threading.Condition()
+        self._receivers = ()
+        self._pending = []
+        self._sequence = itertools.count()
+        self._thread = None
+        self._delivering = False
+
+        self._sent = 0
+        self._delivered = 0
+        self._lost = 0
+
+    @property
+    def synchronous(self):
+        """ Frames are delivered in the thread of the sender
+        """
+        return not self._latency and not self._jitter
+
+    @property
+    def latency(self):
+        return self._latency
+
+    @property
+    def jitter(self):
+        return self._jitter
+
+    @property
+    def loss(self):
+        return self._loss
+
+    @property
+    def receivers(self):
+        return self._receivers
+
+    @property
+    def sent(self):
+        return self._sent
+
+    @property
+    def delivered(self):
+        return self._delivered
+
+    @property
+    def lost(self):
+        return self._lost
+
+    @property
+    def pending(self):
+        """ Number of frames waiting for delivery
+        """
+        return len(self._pending)
+
+    def attach(self, transceiver):
+        """ Start delivering frames to a transceiver
+
+        @param transceiver: transceiver to attach
+        @type transceiver: L{LoopbackTransceiver}
+        """
+        with self._lock:
+            if transceiver in self._receivers:
+                return
+            self._receivers += (transceiver,)
+            if not self.synchronous and self._thread is None:
+                self._thread = threading.Thread(target=self._deliveryLoop, name="Loopback bus")
+                self._thread.daemon = True
+                self._thread.start()
+
+    def detach(self, transceiver):
+        """ Stop delivering frames to a transceiver
+
+        Frames still pending for this transceiver are dropped. The bus thread ends with the last transceiver.
+
+        @param transceiver: transceiver to detach
+        @type transceiver: L{LoopbackTransceiver}
+        """
+        with self._lock:
+            self._receivers = tuple(receiver for receiver in self._receivers if receiver is not transceiver)
+            thread = self._thread
+            if self._receivers or thread is None:
+                return
+            self._thread = None
+            self._pending = []
+            self._delivering = False
+            self._lock.notify_all()
+        if thread is not threading.current_thread():
+            thread.join(1)
+
+    def transmit(self, sender, cEMI):
+        """ Send a frame to all the other transceivers
+
+        @param sender: transceiver sending the frame
+        @type sender: L{LoopbackTransceiver}
+
+        @param cEMI: frame to send
+        @type cEMI: L{CEMILData<pyknyx.stack.cemi.cemiLData>}
+        """
+        raw = bytearray(cEMI.frame.raw)
+        raw[0] = CEMILData.MC_LDATA_IND
+        raw = bytes(raw)
+
+        with self._lock:
+            self._sent += 1
+            receivers = []
+            for receiver in self._receivers:
+                if receiver is sender:
+                    continue
+                if self._loss and self._random() < self._loss:
+                    self._lost += 1
+                    continue
+                receivers.append(receiver)
+
+            if not self.synchronous:
+                now = self._clock()
+                for receiver in receivers:
+                    due = now + self._latency + self._random() * self._jitter
+                    heapq.heappush(self._pending, (due, next(self._sequence), receiver, raw))
+                self._lock.notify_all()
+                return
+
+            self._delivered += len(receivers)
+
+        for receiver in receivers:
+            receiver.receive(CEMILData(raw, copy=False))
+
+    def _deliveryLoop(self):
+        """
+        """
+        logger.trace("LoopbackBus._deliveryLoop()")
+
+        thread = threading.current_thread()
+        while True:
+            with self._lock:
+                while self._thread is thread:
+                    if self._pending:
+                        delay = self._pending[0][0] - self._clock()
+                        if delay <= 0:
+                            break
+                    else:
+                        delay = None
+                    self._lock.wait(delay)
+                else:
+                    break
+                due, sequence, receiver, raw = heapq.heappop(self._pending)
+                if receiver not in self._receivers:
+                    continue
+                self._delivered += 1
+                self._delivering = True
+            try:
+                receiver.receive(CEMILData(raw, copy=False))
+            except Exception:
+                logger.exception("LoopbackBus._deliveryLoop()")
+            with self._lock:
+                self._delivering = False
+                if not self._pending:
+                    self._lock.notify_all()
+
+        logger.trace("LoopbackBus._deliveryLoop(): ended")
+
+    def flush(self, timeout=None):
+        """ Wait until all pending frames are delivered
+
+        @param timeout: max. time to wait, in s (None: no limit)
+        @type timeout: float
+
+        @return: True if all frames have been delivered
+        @rtype: bool
+        """
+        with self._lock:
+            return self._lock.wait_for(lambda: not self._pending and not self._delivering, timeout)
+
+
+class LoopbackTransceiver(L_DataServiceBroadcast):
+    """ LoopbackTransceiver class
+
+    @ivar _bus: bus the transceiver is attached to
+    @type _bus: L{LoopbackBus}
+
+    @ivar _transmitted: number of frames sent on the bus
+    @type _transmitted: int
+
+    @ivar _received: number of frames received from the bus
+    @type _received: int
+    """
+    def __init__(self, ets, bus):
+        """
+
+        @param bus: bus to attach to
+        @type bus: L{LoopbackBus}
+
+        raise LoopbackBusValueError:
+        """
+        if not isinstance(bus, LoopbackBus):
+            raise LoopbackBusValueError("invalid bus (%r)" % bus)
+
+        super(LoopbackTransceiver, self).__init__(ets)
+
+        self._bus = bus
+        self._transmitted = 0
+        self._received = 0
+        self._running = False
+
+    @property
+    def bus(self):
+        return self._bus
+
+    @property
+    def transmitted(self):
+        return self._transmitted
+
+    @property
+    def received(self):
+        return self._received
+
+    def receive(self, cEMI):
+        """ Frame delivered by the bus
+        """
+        self._received += 1
+        self.dataReq(cEMI)
+
+    def dataInd(self, cEMI):
+        if not self._running:
+            return
+        self._transmitted += 1
+        self._bus.transmit(self, cEMI)
+
+    def start(self):
+        """
+        """
+        logger.trace("LoopbackTransceiver.start()")
+
+        self._running = True
+        self._bus.attach(self)
+
+    def stop(self):
+        """
+        """
+        logger.trace("LoopbackTransceiver.stop()")
+
+        self._running = False
+        self._bus.detach(self)
+
+        super(LoopbackTransceiver, self).stop()
@@ -0,0 +1,243 @@
+# -*- coding: utf-8 -*-
+
+""" Python KNX framework
+
+License
+=======
+
+ - B{PyKNyX} (U{https://github.com/knxd/pyknyx}) is Copyright:
+  - © 2016-2017 Matthias Urlichs
+  - PyKNyX is a fork of pKNyX
+   - © 2013-2015 Frédéric Mantegazza
+
+This program is free software; you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation; either version 2 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program; if not, write to the Free Software
+Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA  02111-1307  USA
+or see:
+
+ - U{http://www.gnu.org/licenses/gpl.html}
+
+Module purpose
+==============
+
+Replays a bus capture
+
+Implements
+==========
+
+ - B{ReplayTransceiverValueError}
+ - B{ReplayTransceiver}
+
+Documentation
+=============
+
+Injects the frames of a L{bus capture<pyknyx.stack.busCapture>} into ETS, as if they were received from a bus, to
+reproduce incidents or load-test devices offline.
+
+The capture is mapped in memory; frames are passed to ETS as views on the map, and only copied if modified.
+
+Frames are replayed with their original timing (speed 1), N times faster (speed N), or as fast as possible
+(speed 0). Frames can be restricted to some sources, e.g. to leave out the frames which were sent by the local
+devices at capture time. Frames sent to the transceiver are dropped.
+
+Usage
+=====
+
+>>> ets = ETS("1.2.0", transCls=ReplayTransceiver, transParams=dict(path="bus.cap", speed=10))
+>>> ets.start()
+>>> ets._tc.wait()
+
+@author: Frédéric Mantegazza
+@copyright: (C) 2013-2015 Frédéric Mantegazza
+@license: GPL
+"""
+
+
+import threading
+import time
+
+from pyknyx.common.exception import PyKNyXValueError
+from pyknyx.services.logger import logging; logger = logging.getLogger(__name__)
+from pyknyx.stack.busCapture import BusCaptureReader
+from pyknyx.stack.layer2.l_dataServiceBase import L_DataServiceBroadcast
+from pyknyx.stack.cemi.cemiLData import CEMILData, CEMIValueError
+
+
+class ReplayTransceiverValueError(PyKNyXValueError):
+    """
+    """
+
+
+class ReplayTransceiver(L_DataServiceBroadcast):
+    """ ReplayTransceiver class
+
+    @ivar _reader: capture
+    @type _reader: L{BusCaptureReader<pyknyx.stack.busCapture>}
+
+    @ivar _speed: replay speed (0: as fast as possible)
+    @type _speed: float
+
+    @ivar _sources: names of the replayed sources (None: all)
+    @type _sources: frozenset of str
+
+    @ivar _replayed: number of frames injected
+    @type _replayed: int
+
+    @ivar _done: set when the replay is over
+    @type _done: L{Event<threading>}
+    """
+    def __init__(self, ets, path, speed=1., sources=None, start=None, loop=False, clock=time.time):
+        """
+
+        @param path: capture file path
+        @type path: str
+
+        @param speed: replay speed factor (0: as fast as possible)
+        @type speed: float
+
+        @param sources: names of the replayed sources (None: all)
+        @type sources: iterable of str
+
+        @param start: skip the frames captured before this time (None: from the beginning)
+        @type start: float
+
+        @param loop: restart from the beginning at the end of the capture
+        @type loop: bool
+
+        @param clock: time source, in s
+        @type clock: callable
+
+        raise ReplayTransceiverValueError:
+        """
+        if speed is None or speed < 0:
+            raise ReplayTransceiverValueError("invalid speed (%r)" % speed)
+
+        super(ReplayTransceiver, self).__init__(ets)
+
+        self._reader = BusCaptureReader(path)
+        self._speed = speed
+        self._sources = None if sources is None else frozenset(sources)
+        self._start = start
+        self._loop = loop
+        self._clock = clock
+        self._replayed = 0
+        self._dropped = 0
+        self._done = threading.Event()
+        self._stopped = threading.Event()
+
+        self._running = False
+        self._threads = []
+
+    @property
+    def reader(self):
+        return self._reader
+
+    @property
+    def replayed(self):
+        return self._replayed
+
+    @property
+    def dropped(self):
+        """ Number of frames sent to the transceiver (not transmitted)
+        """
+        return self._dropped
+
+    @property
+    def done(self):
+        return self._done.is_set()
+
+    def wait(self, timeout=None):
+        """ Wait for the end of the replay
+
+        @return: True if over
+        @rtype: bool
+        """
+        return self._done.wait(timeout)
+
+    def _replay(self):
+        """ Replay the capture once
+
+        @return: number of frames injected (None if stopped)
+        @rtype: int
+        """
+        speed = self._speed
+        origin = None
+        count = 0
+        for timestamp, source, frame in self._reader.frames(self._start):
+            if not self._running:
+                return None
+            if self._sources is not None and source not in self._sources:
+                continue
+            if speed:
+                if origin is None:
+                    origin = timestamp, self._clock()
+                delay = (timestamp - origin[0]) / speed - (self._clock() - origin[1])
+                if delay > 0 and self._stopped.wait(delay):
+                    return None
+            try:
+                cEMI = CEMILData(frame, copy=False)
+            except CEMIValueError:
+                logger.exception("ReplayTransceiver._replay()")
+                continue
+            self.dataReq(cEMI)
+            self._replayed += 1
+            count += 1
+        return count
+
+    def _replayLoop(self):
+        """
+        """
+        logger.trace("ReplayTransceiver._replayLoop()")
+
+        try:
+            while self._replay() and self._loop:  # stop looping over an empty replay
+                pass
+        except Exception:
+            logger.exception("ReplayTransceiver._replayLoop()")
+        finally:
+            self._done.set()
+
+        logger.trace("ReplayTransceiver._replayLoop(): ended (%d frame(s))" % self._replayed)
+
+    def dataInd(self, cEMI):
+        self._dropped += 1
+
+    def start(self):
+        """
+        """
+        logger.trace("ReplayTransceiver.start()")
+
+        self._running = True
+        self._stopped.clear()
+        self._done.clear()
+
+        threads = [threading.Thread(target=self._replayLoop, name="replay")]
+        for thread in threads:
+            thread.daemon = True
+            thread.start()
+        self._threads = threads
+
+    def stop(self):
+        """
+        """
+        logger.trace("ReplayTransceiver.stop()")
+
+        self._running = False
+        self._stopped.set()
+        for thread in self._threads:
+            if thread is not threading.current_thread():
+                thread.join(1)
+        self._threads = []
+        self._reader.close()
+
+        super(ReplayTransceiver, self).stop()
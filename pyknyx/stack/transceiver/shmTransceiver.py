@@ -0,0 +1,319 @@
+# -*- coding: utf-8 -*-
+
+""" Python KNX framework
+
+License
+=======
+
+ - B{PyKNyX} (U{https://github.com/knxd/pyknyx}) is Copyright:
+  - © 2016-2017 Matthias Urlichs
+  - PyKNyX is a fork of pKNyX
+   - © 2013-2015 Frédéric Mantegazza
+
+This program is free software; you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation; either version 2 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program; if not, write to the Free Software
+Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA  02111-1307  USA
+or see:
+
+ - U{http://www.gnu.org/licenses/gpl.html}
+
+Module purpose
+==============
+
+Shared memory transceivers, between a front process and device worker processes
+
+Implements
+==========
+
+ - B{ShmTransceiverValueError}
+ - B{ShmTransceiver}
+ - B{ShmWorkerLink}
+
+Documentation
+=============
+
+A front process owns the real transceivers; devices are hosted by worker processes (see
+L{DeviceSupervisor<pyknyx.core.deviceSupervisor>}). Each worker is connected to the front process by 2
+L{ShmRing<pyknyx.stack.shmRing>}, one per direction, and a pair of sockets used as doorbells: the producer writes
+a byte after adding records, the consumer waits for it, then empties the ring.
+
+Records start with a type byte:
+
+ - FRAME: raw cEMI frame
+ - GROUPS: monitor flag byte, followed by the raw group addresses subscribed by the worker devices
+ - ADDRESSES: raw individual addresses of the worker devices
+
+On the worker side, L{ShmTransceiver} is the only transceiver of the worker ETS: it gets all group frames sent by
+the local devices, and individual frames to non-local addresses. On the front side, L{ShmWorkerLink} is a layer2 of
+the front ETS; it subscribes to the group addresses announced by the worker (so that workers only get the frames
+their devices use), and takes the individual frames sent to the worker devices.
+
+When the peer closes its doorbell socket, the reader ends; on the worker side, this means the worker must stop.
+
+Usage
+=====
+
+See L{DeviceSupervisor<pyknyx.core.deviceSupervisor>}.
+
+@author: Frédéric Mantegazza
+@copyright: (C) 2013-2015 Frédéric Mantegazza
+@license: GPL
+"""
+
+
+import select
+import struct
+import threading
+
+from pyknyx.common.exception import PyKNyXValueError
+from pyknyx.services.logger import logging; logger = logging.getLogger(__name__)
+from pyknyx.stack.groupAddress import GroupAddress
+from pyknyx.stack.layer2.l_dataServiceBase import L_DataServiceBase, NOT_REQUIRED
+from pyknyx.stack.cemi.cemiLData import CEMILData, CEMIValueError
+
+_FLAG = struct.Struct("=B")
+
+RECORD_FRAME = 0
+RECORD_GROUPS = 1
+RECORD_ADDRESSES = 2
+
+
+class ShmTransceiverValueError(PyKNyXValueError):
+    """
+    """
+
+
+class ShmTransceiver(L_DataServiceBase):
+    """ ShmTransceiver class (worker side)
+
+    @ivar _inRing: records from the peer
+    @type _inRing: L{ShmRing<pyknyx.stack.shmRing>}
+
+    @ivar _outRing: records to the peer
+    @type _outRing: L{ShmRing<pyknyx.stack.shmRing>}
+
+    @ivar _inBell: doorbell rung by the peer
+    @type _inBell: L{socket<socket>}
+
+    @ivar _outBell: doorbell rung for the peer
+    @type _outBell: L{socket<socket>}
+
+    @ivar _closed: set when the peer closed its doorbell
+    @type _closed: L{Event<threading>}
+    """
+    _physAddr = NOT_REQUIRED
+
+    # Period to check for stop, in s
+    CHECK_PERIOD = 0.5
+
+    # Max. number of records read at once
+    BATCH_SIZE = 64
+
+    def __init__(self, ets, inRing, outRing, inBell, outBell):
+        """
+
+        @param inRing: records from the peer
+        @type inRing: L{ShmRing<pyknyx.stack.shmRing>}
+
+        @param outRing: records to the peer
+        @type outRing: L{ShmRing<pyknyx.stack.shmRing>}
+
+        @param inBell: doorbell rung by the peer (non-blocking)
+        @type inBell: L{socket<socket>}
+
+        @param outBell: doorbell rung for the peer (non-blocking)
+        @type outBell: L{socket<socket>}
+
+        raise ShmTransceiverValueError:
+        """
+        if inRing is outRing:
+            raise ShmTransceiverValueError("same ring for both directions")
+
+        super(ShmTransceiver, self).__init__(ets)
+
+        self._inRing = inRing
+        self._outRing = outRing
+        self._inBell = inBell
+        self._outBell = outBell
+        self._outLock = threading.Lock()
+        self._closed = threading.Event()
+
+        self._running = False
+        self._threads = []
+
+    @property
+    def dropped(self):
+        """ Number of records lost because the peer ring was full
+        """
+        return self._outRing.dropped
+
+    @property
+    def closed(self):
+        return self._closed.is_set()
+
+    def wait(self, timeout=None):
+        """ Wait until the peer closes its doorbell
+
+        @return: True if closed
+        @rtype: bool
+        """
+        return self._closed.wait(timeout)
+
+    def _send(self, type_, payload):
+        """ Add a record to the peer ring, and ring its doorbell
+
+        @return: False if the ring was full
+        @rtype: bool
+        """
+        with self._outLock:
+            if not self._outRing.put(_FLAG.pack(type_) + payload):
+                logger.warning("ShmTransceiver._send(): peer ring full, record lost")
+                return False
+        try:
+            self._outBell.send(b"\0")
+        except BlockingIOError:
+            pass  # doorbell already full of wakeups
+        except OSError:
+            logger.debug("ShmTransceiver._send(): doorbell closed")
+        return True
+
+    def announce(self):
+        """ Tell the front process which frames the local devices want
+        """
+        ets = self._ets
+        monitor = any(layer2 is not self for layer2 in ets.groupMonitors)
+        gads = [gad.raw for gad in ets.subscribedGroups]
+        addrs = sorted(ets.localAddresses)
+        logger.debug("ShmTransceiver.announce(): %d group(s), %d address(es)" % (len(gads), len(addrs)))
+        self._send(RECORD_GROUPS, struct.pack("=B%dH" % len(gads), monitor, *gads))
+        self._send(RECORD_ADDRESSES, struct.pack("=%dH" % len(addrs), *addrs))
+
+    def _processRecord(self, record):
+        """ Process a record from the peer
+        """
+        type_ = record[0]
+        if type_ == RECORD_FRAME:
+            try:
+                cEMI = CEMILData(memoryview(record)[1:], copy=False)
+            except CEMIValueError:
+                logger.exception("ShmTransceiver._processRecord()")
+                return
+            self.dataReq(cEMI)
+        else:
+            logger.warning("ShmTransceiver._processRecord(): unexpected record type (%d)" % type_)
+
+    def _receiverLoop(self):
+        """
+        """
+        logger.trace("ShmTransceiver._receiverLoop()")
+
+        while self._running:
+            try:
+                if select.select([self._inBell], [], [], ShmTransceiver.CHECK_PERIOD)[0]:
+                    try:
+                        data = self._inBell.recv(4096)
+                    except BlockingIOError:
+                        data = b"\0"
+                    if not data:
+                        if self._running:
+                            logger.info("ShmTransceiver._receiverLoop(): peer closed")
+                        break
+                while True:
+                    records = self._inRing.getMany(ShmTransceiver.BATCH_SIZE)
+                    if not records:
+                        break
+                    for record in records:
+                        self._processRecord(record)
+            except Exception:
+                if self._running:
+                    logger.exception("ShmTransceiver._receiverLoop()")
+                    self._closed.wait(ShmTransceiver.CHECK_PERIOD)
+
+        self._closed.set()
+        logger.trace("ShmTransceiver._receiverLoop(): ended")
+
+    def wantsIndividualFrame(self, cEMI, force=False):
+        return force
+
+    def dataInd(self, cEMI):
+        self._send(RECORD_FRAME, cEMI.frame.raw)
+
+    def start(self):
+        """
+        """
+        logger.trace("ShmTransceiver.start()")
+
+        self._running = True
+        threads = [threading.Thread(target=self._receiverLoop, name="shm receiver")]
+        for thread in threads:
+            thread.daemon = True
+            thread.start()
+        self._threads = threads
+
+    def stop(self):
+        """
+        """
+        logger.trace("ShmTransceiver.stop()")
+
+        self._running = False
+        for thread in self._threads:
+            if thread is not threading.current_thread():
+                thread.join(ShmTransceiver.CHECK_PERIOD * 2)
+        self._threads = []
+
+        super(ShmTransceiver, self).stop()
+
+
+class ShmWorkerLink(ShmTransceiver):
+    """ ShmWorkerLink class (front side)
+
+    @ivar _addrs: raw individual addresses of the worker devices
+    @type _addrs: frozenset of int
+    """
+    groupIndexed = True
+
+    def __init__(self, *args, **kwargs):
+        """
+
+        See L{ShmTransceiver} for parameters.
+        """
+        super(ShmWorkerLink, self).__init__(*args, **kwargs)
+
+        self._addrs = frozenset()
+
+    @property
+    def addresses(self):
+        return self._addrs
+
+    def _processRecord(self, record):
+        """ Process a record from the worker
+        """
+        type_ = record[0]
+        if type_ == RECORD_GROUPS:
+            monitor = record[1]
+            gads = struct.unpack_from("=%dH" % ((len(record) - 2) // 2), record, 2)
+            logger.debug("ShmWorkerLink._processRecord(): worker subscribed %d group(s)" % len(gads))
+            if monitor:
+                self._ets.subscribeGroup(self, GroupAddress.fromRaw(0))
+            for raw in gads:
+                self._ets.subscribeGroup(self, GroupAddress.fromRaw(raw))
+        elif type_ == RECORD_ADDRESSES:
+            addrs = struct.unpack_from("=%dH" % ((len(record) - 1) // 2), record, 1)
+            for raw in addrs:
+                self._ets.addLocalAddress(raw)
+            self._addrs = self._addrs.union(addrs)
+        else:
+            super(ShmWorkerLink, self)._processRecord(record)
+
+    def wantsIndividualFrame(self, cEMI, force=False):
+        return cEMI.frame.da in self._addrs
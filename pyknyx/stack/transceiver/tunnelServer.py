@@ -0,0 +1,600 @@
+# -*- coding: utf-8 -*-
+
+""" Python KNX framework
+
+License
+=======
+
+ - B{PyKNyX} (U{https://github.com/knxd/pyknyx}) is Copyright:
+  - © 2016-2017 Matthias Urlichs
+  - PyKNyX is a fork of pKNyX
+   - © 2013-2015 Frédéric Mantegazza
+
+This program is free software; you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation; either version 2 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program; if not, write to the Free Software
+Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA  02111-1307  USA
+or see:
+
+ - U{http://www.gnu.org/licenses/gpl.html}
+
+Module purpose
+==============
+
+Runs a KNXnet/IP tunneling server as a Layer2
+
+Implements
+==========
+
+ - B{TunnelChannel}
+ - B{TunnelServer}
+ - B{TunnelServerValueError}
+
+Documentation
+=============
+
+Lets KNXnet/IP tunneling clients (visualisations, ETS tools...) attach to a running PyKNyX process, instead of
+each opening its own bus connection. The server is just another layer2: frames sent by clients are routed by
+L{ETS<pyknyx.core.ets>} like any other, and frames routed to the server are forwarded to the clients.
+
+Each client gets a channel, with its own individual address, bounded transmission queue and group filter table
+(all group addresses pass by default). Per the tunneling protocol, a channel has a single outstanding request: the
+next frame is sent as soon as the previous one is acknowledged. A request not acknowledged within ackTimeout is
+repeated once; if still not acknowledged, the channel is closed. Channels without any CONNECTIONSTATE_REQ during
+CHANNEL_TIMEOUT are closed too.
+
+A L_Data.req received from a client is confirmed to it (L_Data.con), sent as L_Data.ind to the other clients, and
+forwarded to ETS. A null source address is replaced by the channel individual address.
+
+The individual addresses given to the clients must be reserved; if not given, they are allocated from ETS, which
+then needs an address range.
+
+Usage
+=====
+
+>>> ets = ETS("1.2.0", addrRange=8)
+>>> server = TunnelServer(ets, maxChannels=4)
+>>> ets.start()
+
+@author: Frédéric Mantegazza
+@copyright: (C) 2013-2015 Frédéric Mantegazza
+@license: GPL
+"""
+
+
+import select
+import socket
+import threading
+import time
+
+from pyknyx.common.exception import PyKNyXValueError
+from pyknyx.services.logger import logging; logger = logging.getLogger(__name__)
+from pyknyx.stack.individualAddress import IndividualAddress
+from pyknyx.stack.groupAddress import GroupAddress
+from pyknyx.stack.groupFilterTable import GroupFilterTable
+from pyknyx.stack.priorityQueue import PriorityQueue
+from pyknyx.stack.layer2.l_dataServiceBase import L_DataServiceBroadcast
+from pyknyx.stack.layer2.l_dataService import PRIORITY_DISTRIBUTION
+from pyknyx.stack.knxnetip.knxNetIPHeader import KNXnetIPHeader, KNXnetIPHeaderValueError
+from pyknyx.stack.knxnetip.knxNetIPStructures import KNXnetIPStructures, KNXnetIPStructValueError
+from pyknyx.stack.cemi.cemiLData import CEMILData, CEMIValueError
+
+
+class TunnelServerValueError(PyKNyXValueError):
+    """
+    """
+
+
+class TunnelChannel(object):
+    """ TunnelChannel class
+
+    State of a client connection.
+
+    @ivar _channelId: communication channel id
+    @type _channelId: int
+
+    @ivar _address: individual address given to the client
+    @type _address: L{IndividualAddress}
+
+    @ivar _controlEndpoint: client control endpoint
+    @type _controlEndpoint: tuple of (str, int)
+
+    @ivar _dataEndpoint: client data endpoint
+    @type _dataEndpoint: tuple of (str, int)
+
+    @ivar _queue: raw cEMI frames waiting for transmission to the client
+    @type _queue: L{PriorityQueue<pyknyx.stack.priorityQueue>}
+
+    @ivar _groupFilter: group addresses forwarded to the client
+    @type _groupFilter: L{GroupFilterTable<pyknyx.stack.groupFilterTable>}
+
+    @ivar sendSequence: sequence counter of the next request sent
+    @type sendSequence: int
+
+    @ivar recvSequence: expected sequence counter of the next request received
+    @type recvSequence: int
+
+    @ivar pendingAck: sequence counter of the request waiting for an ack (None if none)
+    @type pendingAck: int
+
+    @ivar acked: the pending request has been acknowledged
+    @type acked: bool
+
+    @ivar lastSeen: last time the client showed it was alive
+    @type lastSeen: float
+    """
+    def __init__(self, channelId, address, controlEndpoint, dataEndpoint, queueCapacity, queuePolicy):
+        """
+        """
+        super(TunnelChannel, self).__init__()
+
+        self._channelId = channelId
+        self._address = address
+        self._controlEndpoint = controlEndpoint
+        self._dataEndpoint = dataEndpoint
+        self._queue = PriorityQueue(PRIORITY_DISTRIBUTION, queueCapacity, queuePolicy)
+        self._groupFilter = GroupFilterTable()
+
+        self.sendSequence = 0
+        self.recvSequence = 0
+        self.pendingAck = None
+        self.acked = False
+        self.lastSeen = time.time()
+        self.thread = None
+
+    def __repr__(self):
+        return "<TunnelChannel(id=%d, address=%s, data=%s:%d)>" % ((self._channelId, self._address) + self._dataEndpoint)
+
+    @property
+    def channelId(self):
+        return self._channelId
+
+    @property
+    def address(self):
+        return self._address
+
+    @property
+    def controlEndpoint(self):
+        return self._controlEndpoint
+
+    @property
+    def dataEndpoint(self):
+        return self._dataEndpoint
+
+    @property
+    def queue(self):
+        return self._queue
+
+    @property
+    def groupFilter(self):
+        return self._groupFilter
+
+
+class TunnelServer(L_DataServiceBroadcast):
+    """ TunnelServer class
+
+    @ivar _sock: UDP socket used for both control and data
+    @type _sock: L{socket<socket>}
+
+    @ivar _tunnelAddrs: individual addresses available for the clients
+    @type _tunnelAddrs: list of L{IndividualAddress}
+
+    @ivar _channels: open channels
+    @type _channels: dict of int -> L{TunnelChannel}
+
+    @ivar _lock: protects the channels
+    @type _lock: L{Condition<threading>}
+    """
+    CHANNEL_TIMEOUT = 120.
+    CHECK_PERIOD = 1.
+
+    def __init__(self, ets, localAddr="0.0.0.0", localPort=3671, tunnelAddrs=None, maxChannels=4,
+                 queueCapacity=100, queuePolicy=PriorityQueue.DROP_OLDEST, ackTimeout=1.):
+        """
+
+        @param localAddr: local address to listen on
+        @type localAddr: str
+
+        @param localPort: local port to listen on (0: any free port)
+        @type localPort: int
+
+        @param tunnelAddrs: individual addresses given to the clients (None: allocate maxChannels addresses from ETS)
+        @type tunnelAddrs: list of L{IndividualAddress} or str
+
+        @param maxChannels: max. number of clients, if tunnelAddrs is not given
+        @type maxChannels: int
+
+        @param queueCapacity: max. number of frames waiting for transmission, per client and priority
+        @type queueCapacity: int or list of int
+
+        @param queuePolicy: what to do with frames when a client queue is full
+        @type queuePolicy: str, see L{PriorityQueue<pyknyx.stack.priorityQueue>}
+
+        @param ackTimeout: time to wait for a TUNNELING_ACK, in s
+        @type ackTimeout: float
+
+        raise TunnelServerValueError:
+        """
+        if ackTimeout <= 0:
+            raise TunnelServerValueError("invalid ack timeout (%r)" % ackTimeout)
+        if tunnelAddrs is None:
+            if maxChannels < 1:
+                raise TunnelServerValueError("invalid max. number of channels (%r)" % maxChannels)
+            tunnelAddrs = [ets.allocAddress() for i in range(maxChannels)]
+        else:
+            tunnelAddrs = [addr if isinstance(addr, IndividualAddress) else IndividualAddress(addr)
+                           for addr in tunnelAddrs]
+            if not tunnelAddrs:
+                raise TunnelServerValueError("no tunnel address")
+
+        super(TunnelServer, self).__init__(ets)
+
+        self._tunnelAddrs = tunnelAddrs
+        self._queueCapacity = queueCapacity
+        self._queuePolicy = queuePolicy
+        self._ackTimeout = ackTimeout
+
+        self._sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM, socket.IPPROTO_UDP)
+        self._sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        self._sock.bind((localAddr, localPort))
+        self._wakeupSocks = socket.socketpair()
+
+        self._lock = threading.Condition()
+        self._channels = {}
+        self._nextChannelId = 1
+
+        self._running = False
+        self._receiver = None
+
+    @property
+    def localPort(self):
+        return self._sock.getsockname()[1]
+
+    @property
+    def tunnelAddrs(self):
+        return tuple(self._tunnelAddrs)
+
+    @property
+    def channels(self):
+        """ Open channels, by channel id
+        """
+        return dict(self._channels)
+
+    def _sendto(self, datagram, endpoint):
+        try:
+            self._sock.sendto(datagram, endpoint)
+        except socket.error:
+            logger.exception("TunnelServer._sendto()")
+
+    def _openChannel(self, controlEndpoint, dataEndpoint):
+        """ Open a new channel
+
+        Must be called with the lock held.
+
+        @return: new channel, or None if all addresses are used
+        """
+        used = set(channel.address for channel in self._channels.values())
+        for address in self._tunnelAddrs:
+            if address not in used:
+                break
+        else:
+            return None
+        channelId = self._nextChannelId
+        while channelId in self._channels:
+            channelId = channelId % 255 + 1
+        self._nextChannelId = channelId % 255 + 1
+
+        channel = TunnelChannel(channelId, address, controlEndpoint, dataEndpoint,
+                                self._queueCapacity, self._queuePolicy)
+        self._channels[channelId] = channel
+        channel.thread = threading.Thread(target=self._channelLoop, args=(channel,),
+                                          name="Tunnel server channel %d" % channelId)
+        channel.thread.daemon = True
+        channel.thread.start()
+        logger.info("TunnelServer: channel %d opened for %s:%d, address %s" % \
+                    ((channelId,) + dataEndpoint + (address,)))
+        return channel
+
+    def _closeChannel(self, channel, notify=True):
+        """ Close a channel
+
+        @param notify: send a DISCONNECT_REQ to the client
+        @type notify: bool
+        """
+        with self._lock:
+            if self._channels.get(channel.channelId) is not channel:
+                return
+            del self._channels[channel.channelId]
+            self._lock.notify_all()
+        channel.queue.close()
+        if notify:
+            self._sendto(KNXnetIPStructures.disconnectRequest(channel.channelId), channel.controlEndpoint)
+        logger.info("TunnelServer: channel %d closed" % channel.channelId)
+
+    def _endpoint(self, hpai, fromAddr):
+        """ Resolve a client endpoint (route back mode for 0.0.0.0:0)
+        """
+        addr, port = hpai
+        if addr == "0.0.0.0" or not port:
+            return fromAddr
+        return addr, port
+
+    def _connectReq(self, body, fromAddr):
+        try:
+            control, data, connType, layer = KNXnetIPStructures.parseConnectRequest(body)
+        except KNXnetIPStructValueError:
+            logger.exception("TunnelServer._connectReq()")
+            return
+        controlEndpoint = self._endpoint(control, fromAddr)
+        dataEndpoint = self._endpoint(data, fromAddr)
+
+        if connType != KNXnetIPStructures.TUNNEL_CONNECTION:
+            status = KNXnetIPStructures.E_CONNECTION_TYPE
+        elif layer != KNXnetIPStructures.TUNNEL_LINKLAYER:
+            status = KNXnetIPStructures.E_TUNNELING_LAYER
+        else:
+            with self._lock:
+                channel = self._openChannel(controlEndpoint, dataEndpoint)
+            if channel is None:
+                status = KNXnetIPStructures.E_NO_MORE_CONNECTIONS
+            else:
+                self._sendto(KNXnetIPStructures.connectResponse(channel.channelId, KNXnetIPStructures.E_NO_ERROR,
+                                                                address=channel.address.raw), controlEndpoint)
+                return
+        logger.warning("TunnelServer._connectReq(): connection refused (status=0x%02x)" % status)
+        self._sendto(KNXnetIPStructures.connectResponse(0, status), controlEndpoint)
+
+    def _channelReq(self, service, body, fromAddr):
+        """ Handle a CONNECTIONSTATE_REQ or DISCONNECT_REQ
+        """
+        channelId, status = KNXnetIPStructures.parseChannel(body)
+        control = KNXnetIPStructures.unpackHPAI(body, 2)
+        controlEndpoint = self._endpoint(control, fromAddr)
+        channel = self._channels.get(channelId)
+        status = KNXnetIPStructures.E_NO_ERROR if channel is not None else KNXnetIPStructures.E_CONNECTION_ID
+        if service == KNXnetIPHeader.CONNECTIONSTATE_REQ:
+            if channel is not None:
+                channel.lastSeen = time.time()
+            self._sendto(KNXnetIPStructures.connectionStateResponse(channelId, status), controlEndpoint)
+        else:
+            if channel is not None:
+                self._closeChannel(channel, notify=False)
+            self._sendto(KNXnetIPStructures.disconnectResponse(channelId, status), controlEndpoint)
+
+    def _tunnelingReq(self, body):
+        """ Acknowledge and forward a tunneling request from a client
+        """
+        channelId, sequence, status, length = KNXnetIPStructures.parseConnectionHeader(body)
+        with self._lock:
+            channel = self._channels.get(channelId)
+            if channel is None:
+                logger.debug("TunnelServer._tunnelingReq(): unknown channel (%d)" % channelId)
+                return
+            channel.lastSeen = time.time()
+            expected = channel.recvSequence
+            if sequence == expected:
+                channel.recvSequence = (expected + 1) & 0xff
+            elif sequence != (expected - 1) & 0xff:
+                logger.debug("TunnelServer._tunnelingReq(): out of sequence (%d, expected %d)" % (sequence, expected))
+                return
+
+        self._sendto(KNXnetIPStructures.tunnelingAck(channelId, sequence), channel.dataEndpoint)
+        if sequence != expected:
+            return  # repeated request, already forwarded
+
+        try:
+            cEMI = CEMILData(body[length:], copy=False)
+        except CEMIValueError:
+            logger.exception("TunnelServer._tunnelingReq()")
+            return
+        if cEMI.messageCode != CEMILData.MC_LDATA_REQ:
+            logger.debug("TunnelServer._tunnelingReq(): unsupported message code (0x%02x)" % cEMI.messageCode)
+            return
+
+        cEMI.messageCode = CEMILData.MC_LDATA_IND
+        if not cEMI.frame.sa:
+            cEMI.sourceAddress = channel.address
+
+        raw = bytearray(cEMI.frame.raw)
+        raw[0] = CEMILData.MC_LDATA_CON
+        channel.queue.add(raw, cEMI.priority)
+        self._forward(cEMI, exclude=channel)
+
+        self.dataReq(cEMI)
+
+    def _tunnelingAck(self, body):
+        channelId, sequence, status, length = KNXnetIPStructures.parseConnectionHeader(body)
+        with self._lock:
+            channel = self._channels.get(channelId)
+            if channel is None or sequence != channel.pendingAck:
+                return
+            channel.lastSeen = time.time()
+            if status == KNXnetIPStructures.E_NO_ERROR:
+                channel.acked = True
+                self._lock.notify_all()
+            else:
+                logger.warning("TunnelServer: TUNNELING_ACK error on channel %d (status=0x%02x)" % (channelId, status))
+
+    def _datagramReceived(self, datagram, fromAddr):
+        """ Dispatch a datagram received from a client
+        """
+        try:
+            header, body = KNXnetIPStructures.decode(datagram)
+        except KNXnetIPHeaderValueError:
+            logger.exception("TunnelServer._datagramReceived()")
+            return
+        service = header.service
+
+        try:
+            if service == KNXnetIPHeader.TUNNELING_REQ:
+                self._tunnelingReq(body)
+            elif service == KNXnetIPHeader.TUNNELING_ACK:
+                self._tunnelingAck(body)
+            elif service == KNXnetIPHeader.CONNECT_REQ:
+                self._connectReq(body, fromAddr)
+            elif service in (KNXnetIPHeader.CONNECTIONSTATE_REQ, KNXnetIPHeader.DISCONNECT_REQ):
+                self._channelReq(service, body, fromAddr)
+            elif service == KNXnetIPHeader.DISCONNECT_RES:
+                pass
+            else:
+                logger.debug("TunnelServer: unexpected service %s" % header.serviceName)
+        except KNXnetIPStructValueError:
+            logger.exception("TunnelServer._datagramReceived()")
+
+    def _checkChannels(self):
+        """ Close the channels of dead clients
+        """
+        deadline = time.time() - TunnelServer.CHANNEL_TIMEOUT
+        for channel in list(self._channels.values()):
+            if channel.lastSeen < deadline:
+                logger.warning("TunnelServer: channel %d timed out" % channel.channelId)
+                self._closeChannel(channel)
+
+    def _receiverLoop(self):
+        """
+        """
+        logger.trace("TunnelServer._receiverLoop()")
+
+        while self._running:
+            try:
+                readable = select.select([self._sock, self._wakeupSocks[0]], [], [], TunnelServer.CHECK_PERIOD)[0]
+                if self._wakeupSocks[0] in readable:
+                    break
+                if self._sock in readable:
+                    datagram, fromAddr = self._sock.recvfrom(1024)
+                    self._datagramReceived(datagram, fromAddr)
+                self._checkChannels()
+
+            except Exception:
+                if self._running:
+                    logger.exception("TunnelServer._receiverLoop()")
+
+        logger.trace("TunnelServer._receiverLoop(): ended")
+
+    def _sendFrame(self, channel, raw):
+        """ Send a frame to a client, and wait for its acknowledgement
+
+        @return: True if acknowledged
+        """
+        with self._lock:
+            if self._channels.get(channel.channelId) is not channel:
+                return False
+            sequence = channel.sendSequence
+            channel.pendingAck = sequence
+            channel.acked = False
+            self._sendto(KNXnetIPStructures.tunnelingRequest(channel.channelId, sequence, raw), channel.dataEndpoint)
+            self._lock.wait_for(lambda: channel.acked or self._channels.get(channel.channelId) is not channel,
+                                self._ackTimeout)
+            channel.pendingAck = None
+            if channel.acked:
+                channel.sendSequence = (sequence + 1) & 0xff
+                return True
+            return False
+
+    def _channelLoop(self, channel):
+        """ Transmit the frames queued for a client
+        """
+        logger.trace("TunnelServer._channelLoop(): channel %d" % channel.channelId)
+
+        while True:
+            try:
+                raw = channel.queue.remove()
+                if raw is None:
+                    break
+
+                for attempt in range(2):
+                    if self._sendFrame(channel, raw):
+                        break
+                else:
+                    if self._channels.get(channel.channelId) is channel:
+                        logger.warning("TunnelServer._channelLoop(): frame not acknowledged on channel %d" % \
+                                       channel.channelId)
+                        self._closeChannel(channel)
+                    break
+
+            except Exception:
+                logger.exception("TunnelServer._channelLoop()")
+
+        logger.trace("TunnelServer._channelLoop(): channel %d ended" % channel.channelId)
+
+    def _forward(self, cEMI, exclude=None):
+        """ Queue a frame for the clients which want it
+        """
+        destAddr = cEMI.destinationAddress
+        channels = [channel for channel in tuple(self._channels.values()) if channel is not exclude]
+        if isinstance(destAddr, GroupAddress):
+            raw = destAddr.raw
+            channels = [channel for channel in channels if channel.groupFilter.contains(raw)]
+        else:
+            matching = [channel for channel in channels if channel.address == destAddr]
+            if matching:
+                channels = matching
+        if not channels:
+            return
+
+        frame = bytearray(cEMI.frame.raw)
+        frame[0] = CEMILData.MC_LDATA_IND
+        priority = cEMI.priority
+        for channel in channels:
+            channel.queue.add(frame, priority)
+
+    def wantsGroupFrame(self, cEMI):
+        raw = cEMI.frame.da
+        if not self._groupFilter.contains(raw):
+            return False
+        for channel in tuple(self._channels.values()):
+            if channel.groupFilter.contains(raw):
+                return True
+        return False
+
+    def wantsIndividualFrame(self, cEMI, force=False):
+        if not self._channels:
+            return False
+        if force:
+            return True
+        destAddr = cEMI.destinationAddress
+        for channel in tuple(self._channels.values()):
+            if channel.address == destAddr:
+                return True
+        return False
+
+    def dataInd(self, cEMI):
+        self._forward(cEMI)
+
+    def start(self):
+        """
+        """
+        logger.trace("TunnelServer.start()")
+
+        self._running = True
+        receiver = threading.Thread(target=self._receiverLoop, name="Tunnel server receiver")
+        receiver.daemon = True
+        receiver.start()
+        self._receiver = receiver
+
+    def stop(self):
+        """
+        """
+        logger.trace("TunnelServer.stop()")
+
+        self._running = False
+        for channel in list(self._channels.values()):
+            self._closeChannel(channel)
+        self._wakeupSocks[1].send(b"\0")
+        if self._receiver is not None and self._receiver is not threading.current_thread():
+            self._receiver.join(1)
+        self._receiver = None
+        self._sock.close()
+        for sock in self._wakeupSocks:
+            sock.close()
+
+        super(TunnelServer, self).stop()
@@ -0,0 +1,517 @@
+# -*- coding: utf-8 -*-
+
+""" Python KNX framework
+
+License
+=======
+
+ - B{PyKNyX} (U{https://github.com/knxd/pyknyx}) is Copyright:
+  - © 2016-2017 Matthias Urlichs
+  - PyKNyX is a fork of pKNyX
+   - © 2013-2015 Frédéric Mantegazza
+
+This program is free software; you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation; either version 2 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program; if not, write to the Free Software
+Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA  02111-1307  USA
+or see:
+
+ - U{http://www.gnu.org/licenses/gpl.html}
+
+Module purpose
+==============
+
+Runs a Layer2 driver for KNXnet/IP tunneling
+
+Implements
+==========
+
+ - B{TunnelTransceiver}
+ - B{TunnelTransceiverValueError}
+
+Documentation
+=============
+
+Connects to a KNXnet/IP interface (or router) as a tunneling client, for sites where multicast routing is not
+available.
+
+Three threads are used:
+
+ - the receiver acknowledges and forwards incoming tunneling requests, and dispatches acks and responses;
+ - the transmitter sends queued frames as L_Data.req, one at a time: the next frame is sent as soon as the previous
+   one is acknowledged. A request not acknowledged within ackTimeout is repeated once; if still not acknowledged,
+   the connection is restarted;
+ - the connection thread opens the tunnel, checks it every heartbeatInterval (CONNECTIONSTATE_REQ) and reconnects
+   when needed.
+
+Usage
+=====
+
+>>> ets = ETS("1.2.0", transCls=TunnelTransceiver, transParams=dict(serverAddr="192.168.1.10"))
+
+@author: Frédéric Mantegazza
+@copyright: (C) 2013-2015 Frédéric Mantegazza
+@license: GPL
+"""
+
+
+import select
+import socket
+import threading
+
+from pyknyx.common.exception import PyKNyXValueError
+from pyknyx.services.logger import logging; logger = logging.getLogger(__name__)
+from pyknyx.services.tracer import tracer; trace = tracer("tunnel")
+from pyknyx.stack.individualAddress import IndividualAddress
+from pyknyx.stack.priorityQueue import PriorityQueue
+from pyknyx.stack.layer2.l_dataServiceBase import L_DataServiceBroadcast
+from pyknyx.stack.layer2.l_dataService import PRIORITY_DISTRIBUTION
+from pyknyx.stack.knxnetip.knxNetIPHeader import KNXnetIPHeader, KNXnetIPHeaderValueError
+from pyknyx.stack.knxnetip.knxNetIPStructures import KNXnetIPStructures, KNXnetIPStructValueError
+from pyknyx.stack.cemi.cemiLData import CEMILData, CEMIValueError
+
+
+class TunnelTransceiverValueError(PyKNyXValueError):
+    """
+    """
+
+
+class TunnelTransceiver(L_DataServiceBroadcast):
+    """ TunnelTransceiver class
+
+    @ivar _server: KNXnet/IP server control endpoint
+    @type _server: tuple of (str, int)
+
+    @ivar _sock: UDP socket used for both control and data
+    @type _sock: L{socket<socket>}
+
+    @ivar _queue: frames waiting for transmission
+    @type _queue: L{PriorityQueue<pyknyx.stack.priorityQueue>}
+
+    @ivar _channelId: communication channel id (None when disconnected)
+    @type _channelId: int
+
+    @ivar _sendSequence: sequence counter of the next request sent
+    @type _sendSequence: int
+
+    @ivar _recvSequence: expected sequence counter of the next request received
+    @type _recvSequence: int
+
+    @ivar _tunnelAddress: individual address assigned by the server
+    @type _tunnelAddress: L{IndividualAddress}
+
+    @ivar _lock: protects the connection state
+    @type _lock: L{Condition<threading>}
+
+    @ivar _responses: last connection management responses received, by service
+    @type _responses: dict
+    """
+    RECONNECT_DELAY = 5.
+    HEARTBEAT_TIMEOUT = 10.
+    HEARTBEAT_RETRIES = 3
+
+    def __init__(self, ets, serverAddr, serverPort=3671, localAddr="0.0.0.0",
+                 queueCapacity=None, queuePolicy=PriorityQueue.DROP_OLDEST,
+                 ackTimeout=1., heartbeatInterval=60., connectTimeout=10.):
+        """
+
+        @param serverAddr: KNXnet/IP interface address
+        @type serverAddr: str
+
+        @param serverPort: KNXnet/IP interface port
+        @type serverPort: int
+
+        @param localAddr: local address to bind to
+        @type localAddr: str
+
+        @param queueCapacity: max. number of frames waiting for transmission, per priority (None: unbounded)
+        @type queueCapacity: int or list of int
+
+        @param queuePolicy: what to do with frames when the queue is full
+        @type queuePolicy: str, see L{PriorityQueue<pyknyx.stack.priorityQueue>}
+
+        @param ackTimeout: time to wait for a TUNNELING_ACK, in s
+        @type ackTimeout: float
+
+        @param heartbeatInterval: time between connection state checks, in s
+        @type heartbeatInterval: float
+
+        @param connectTimeout: time to wait for a CONNECT_RES, in s
+        @type connectTimeout: float
+
+        raise TunnelTransceiverValueError:
+        """
+        if ackTimeout <= 0 or heartbeatInterval <= 0 or connectTimeout <= 0:
+            raise TunnelTransceiverValueError("timeouts must be > 0")
+
+        super(TunnelTransceiver, self).__init__(ets)
+
+        self._server = (serverAddr, serverPort)
+        self._ackTimeout = ackTimeout
+        self._heartbeatInterval = heartbeatInterval
+        self._connectTimeout = connectTimeout
+
+        self._sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM, socket.IPPROTO_UDP)
+        self._sock.bind((localAddr, 0))
+        self._wakeupSocks = socket.socketpair()
+        self._queue = PriorityQueue(PRIORITY_DISTRIBUTION, queueCapacity, queuePolicy)
+
+        self._lock = threading.Condition()
+        self._channelId = None
+        self._sendSequence = 0
+        self._recvSequence = 0
+        self._tunnelAddress = None
+        self._pendingAck = None
+        self._acked = False
+        self._responses = {}
+        self._connected = threading.Event()
+        self._reconnect = threading.Event()
+
+        self._retransmitCount = 0
+        self._reconnectCount = 0
+
+        self._running = False
+        self._threads = []
+
+    @property
+    def queue(self):
+        """ Frames waiting for transmission
+        """
+        return self._queue
+
+    @property
+    def localPort(self):
+        return self._sock.getsockname()[1]
+
+    @property
+    def connected(self):
+        return self._channelId is not None
+
+    @property
+    def channelId(self):
+        return self._channelId
+
+    @property
+    def tunnelAddress(self):
+        return self._tunnelAddress
+
+    @property
+    def retransmitCount(self):
+        return self._retransmitCount
+
+    @property
+    def reconnectCount(self):
+        return self._reconnectCount
+
+    def _sendto(self, datagram):
+        try:
+            self._sock.sendto(datagram, self._server)
+        except socket.error:
+            logger.exception("TunnelTransceiver._sendto()")
+
+    def _waitResponse(self, service, datagram, timeout):
+        """ Send a connection management request, and wait for its response
+
+        @return: response body, or None on timeout
+        """
+        with self._lock:
+            self._responses.pop(service, None)
+            self._sendto(datagram)
+            self._lock.wait_for(lambda: service in self._responses or not self._running, timeout)
+            return self._responses.pop(service, None)
+
+    def _connect(self):
+        """ Open the tunnel
+
+        @return: True if connected
+        """
+        body = self._waitResponse(KNXnetIPHeader.CONNECT_RES, KNXnetIPStructures.connectRequest(),
+                                  self._connectTimeout)
+        if body is None:
+            logger.warning("TunnelTransceiver._connect(): no response from %s:%d" % self._server)
+            return False
+        try:
+            channelId, status, data, address = KNXnetIPStructures.parseConnectResponse(body)
+        except KNXnetIPStructValueError:
+            logger.exception("TunnelTransceiver._connect()")
+            return False
+        if status != KNXnetIPStructures.E_NO_ERROR:
+            logger.warning("TunnelTransceiver._connect(): connection refused (status=0x%02x)" % status)
+            return False
+
+        with self._lock:
+            self._channelId = channelId
+            self._sendSequence = self._recvSequence = 0
+            self._tunnelAddress = IndividualAddress(address)
+            self._reconnect.clear()
+            self._connected.set()
+        logger.info("TunnelTransceiver._connect(): connected to %s:%d, channel %d, address %s" % \
+                    (self._server + (channelId, self._tunnelAddress)))
+        return True
+
+    def _disconnect(self, notify=True):
+        """ Close the tunnel
+
+        @param notify: send a DISCONNECT_REQ to the server
+        @type notify: bool
+        """
+        with self._lock:
+            channelId = self._channelId
+            if channelId is None:
+                return
+            self._channelId = None
+            self._connected.clear()
+            self._lock.notify_all()
+        if notify:
+            self._sendto(KNXnetIPStructures.disconnectRequest(channelId))
+        logger.info("TunnelTransceiver._disconnect(): channel %d closed" % channelId)
+
+    def _heartbeat(self):
+        """ Check the connection state
+
+        @return: True if the connection is alive
+        """
+        for i in range(TunnelTransceiver.HEARTBEAT_RETRIES):
+            channelId = self._channelId
+            if channelId is None or not self._running:
+                return False
+            body = self._waitResponse(KNXnetIPHeader.CONNECTIONSTATE_RES,
+                                      KNXnetIPStructures.connectionStateRequest(channelId),
+                                      TunnelTransceiver.HEARTBEAT_TIMEOUT)
+            if body is not None:
+                try:
+                    channelId_, status = KNXnetIPStructures.parseChannel(body)
+                except KNXnetIPStructValueError:
+                    logger.exception("TunnelTransceiver._heartbeat()")
+                    continue
+                return status == KNXnetIPStructures.E_NO_ERROR
+        return False
+
+    def _connectionLoop(self):
+        """
+        """
+        logger.trace("TunnelTransceiver._connectionLoop()")
+
+        while self._running:
+            try:
+                if self._channelId is None:
+                    if not self._connect():
+                        self._reconnect.wait(TunnelTransceiver.RECONNECT_DELAY)
+                        self._reconnect.clear()
+                    continue
+
+                if self._reconnect.wait(self._heartbeatInterval):
+                    if self._running:
+                        logger.warning("TunnelTransceiver._connectionLoop(): reconnecting")
+                        self._reconnectCount += 1
+                        self._disconnect()
+                    continue
+
+                if not self._heartbeat():
+                    logger.warning("TunnelTransceiver._connectionLoop(): connection lost, reconnecting")
+                    self._reconnectCount += 1
+                    self._disconnect()
+
+            except Exception:
+                logger.exception("TunnelTransceiver._connectionLoop()")
+
+        logger.trace("TunnelTransceiver._connectionLoop(): ended")
+
+    def _requestReconnect(self):
+        self._reconnect.set()
+
+    def _datagramReceived(self, datagram):
+        """ Dispatch a datagram received from the server
+        """
+        try:
+            header, body = KNXnetIPStructures.decode(datagram)
+        except KNXnetIPHeaderValueError:
+            logger.exception("TunnelTransceiver._datagramReceived()")
+            return
+        service = header.service
+
+        if service == KNXnetIPHeader.TUNNELING_REQ:
+            self._tunnelingReq(body)
+
+        elif service == KNXnetIPHeader.TUNNELING_ACK:
+            channelId, sequence, status, length = KNXnetIPStructures.parseConnectionHeader(body)
+            with self._lock:
+                if channelId == self._channelId and sequence == self._pendingAck:
+                    if status == KNXnetIPStructures.E_NO_ERROR:
+                        self._acked = True
+                        self._lock.notify_all()
+                    else:
+                        logger.warning("TunnelTransceiver: TUNNELING_ACK error (status=0x%02x)" % status)
+
+        elif service in (KNXnetIPHeader.CONNECT_RES, KNXnetIPHeader.CONNECTIONSTATE_RES):
+            with self._lock:
+                self._responses[service] = body
+                self._lock.notify_all()
+
+        elif service == KNXnetIPHeader.DISCONNECT_REQ:
+            channelId, status = KNXnetIPStructures.parseChannel(body)
+            self._sendto(KNXnetIPStructures.disconnectResponse(channelId, KNXnetIPStructures.E_NO_ERROR))
+            if channelId == self._channelId:
+                logger.warning("TunnelTransceiver: disconnected by server")
+                self._disconnect(notify=False)
+                self._requestReconnect()
+
+        elif service == KNXnetIPHeader.DISCONNECT_RES:
+            pass
+
+        else:
+            logger.debug("TunnelTransceiver: unexpected service %s" % header.serviceName)
+
+    def _tunnelingReq(self, body):
+        """ Acknowledge and forward an incoming tunneling request
+        """
+        channelId, sequence, status, length = KNXnetIPStructures.parseConnectionHeader(body)
+        with self._lock:
+            if channelId != self._channelId:
+                logger.debug("TunnelTransceiver._tunnelingReq(): wrong channel (%d)" % channelId)
+                return
+            expected = self._recvSequence
+            if sequence == expected:
+                self._recvSequence = (expected + 1) & 0xff
+            elif sequence != (expected - 1) & 0xff:
+                logger.debug("TunnelTransceiver._tunnelingReq(): out of sequence (%d, expected %d)" % (sequence, expected))
+                return
+
+        self._sendto(KNXnetIPStructures.tunnelingAck(channelId, sequence))
+        if sequence != expected:
+            return  # repeated request, already forwarded
+
+        try:
+            cEMI = CEMILData(body[length:], copy=False)
+        except CEMIValueError:
+            logger.exception("TunnelTransceiver._tunnelingReq()")
+            return
+        if cEMI.messageCode == CEMILData.MC_LDATA_IND:
+            self.dataReq(cEMI)
+        elif cEMI.messageCode == CEMILData.MC_LDATA_CON:
+            if cEMI.confirm == CEMILData.C_ERROR:
+                logger.warning("TunnelTransceiver: frame not confirmed: %s" % cEMI)
+
+    def _receiverLoop(self):
+        """
+        """
+        logger.trace("TunnelTransceiver._receiverLoop()")
+
+        while self._running:
+            try:
+                readable = select.select([self._sock, self._wakeupSocks[0]], [], [])[0]
+                if self._wakeupSocks[0] in readable:
+                    break
+                datagram, fromAddr = self._sock.recvfrom(1024)
+                self._datagramReceived(datagram)
+
+            except Exception:
+                if self._running:
+                    logger.exception("TunnelTransceiver._receiverLoop()")
+
+        logger.trace("TunnelTransceiver._receiverLoop(): ended")
+
+    def dataInd(self, cEMI):
+        self._queue.add(cEMI, cEMI.priority)
+
+    def _sendFrame(self, raw):
+        """ Send a frame, and wait for its acknowledgement
+
+        @return: True if acknowledged
+        """
+        with self._lock:
+            channelId = self._channelId
+            if channelId is None:
+                return False
+            sequence = self._sendSequence
+            self._pendingAck = sequence
+            self._acked = False
+            self._sendto(KNXnetIPStructures.tunnelingRequest(channelId, sequence, raw))
+            self._lock.wait_for(lambda: self._acked or self._channelId != channelId or not self._running,
+                                self._ackTimeout)
+            self._pendingAck = None
+            if self._acked and self._channelId == channelId:
+                self._sendSequence = (sequence + 1) & 0xff
+                return True
+            return False
+
+    def _transmitterLoop(self):
+        """
+        """
+        logger.trace("TunnelTransceiver._transmitterLoop()")
+
+        while self._running:
+            try:
+                cEMI = self._queue.remove()
+                if cEMI is None:
+                    return
+
+                if trace.enabled:
+                    trace("TunnelTransceiver._transmitterLoop(): frame=%r", cEMI)
+
+                raw = bytearray(cEMI.frame.raw)
+                raw[0] = CEMILData.MC_LDATA_REQ
+                for attempt in range(2):
+                    while self._running and not self._connected.wait(1.):
+                        pass
+                    if not self._running:
+                        return
+                    if self._sendFrame(raw):
+                        break
+                    if self._channelId is not None and not attempt:
+                        self._retransmitCount += 1
+                else:
+                    logger.warning("TunnelTransceiver._transmitterLoop(): frame not acknowledged, dropped")
+                    self._requestReconnect()
+
+            except Exception:
+                logger.exception("TunnelTransceiver._transmitterLoop()")
+
+        logger.trace("TunnelTransceiver._transmitterLoop(): ended")
+
+    def start(self):
+        """
+        """
+        logger.trace("TunnelTransceiver.start()")
+
+        self._running = True
+
+        threads = [threading.Thread(target=self._receiverLoop, name="Tunnel receiver"),
+                   threading.Thread(target=self._transmitterLoop, name="Tunnel transmitter"),
+                   threading.Thread(target=self._connectionLoop, name="Tunnel connection")]
+        for thread in threads:
+            thread.daemon = True
+            thread.start()
+        self._threads = threads
+
+    def stop(self):
+        """
+        """
+        logger.trace("TunnelTransceiver.stop()")
+
+        self._disconnect()
+        self._running = False
+        with self._lock:
+            self._lock.notify_all()
+        self._connected.set()
+        self._reconnect.set()
+        self._queue.close()
+        self._wakeupSocks[1].send(b"\0")
+        for thread in self._threads:
+            if thread is not threading.current_thread():
+                thread.join(1)
+        self._threads = []
+        self._sock.close()
+        for sock in self._wakeupSocks:
+            sock.close()
+
+        super(TunnelTransceiver, self).stop()
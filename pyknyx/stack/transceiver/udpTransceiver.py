@@ -45,6 +45,13 @@ The UDPTransceiver uses the local address as returned by socket.gethostbyname(so
 If the hostname is binded to the loopback interface (lo), then, all datas will only be sent/received on this interface.
 You may need to configure this in /etc/hosts.
 
+The receiver drains all pending datagrams at each wakeup (see L{MulticastSocketReceive<pyknyx.stack.multicastSocket>}).
+On bursts (scene activations...), the kernel receive buffer may still overflow; its size can be raised with
+rcvBufSize, and the number of datagrams lost is available as rxDropped.
+
+Outgoing telegrams are paced to telegramRate, and suspended when a router sends ROUTING_BUSY (see
+L{RoutingFlowControl<pyknyx.stack.knxnetip.routingFlowControl>}).
+
 Usage
 =====
 
@@ -62,12 +69,16 @@ import socket
 
 from pyknyx.common.exception import PyKNyXValueError
 from pyknyx.services.logger import logging; logger = logging.getLogger(__name__)
+from pyknyx.services.tracer import tracer; trace = tracer("udp")
+from pyknyx.services.metrics import metrics
 from pyknyx.stack.result import Result
 from pyknyx.stack.priority import Priority
 from pyknyx.stack.priorityQueue import PriorityQueue
 from pyknyx.stack.multicastSocket import MulticastSocketReceive, MulticastSocketTransmit
 from pyknyx.stack.layer2.l_dataServiceBase import L_DataServiceBroadcast
 from pyknyx.stack.knxnetip.knxNetIPHeader import KNXnetIPHeader, KNXnetIPHeaderValueError
+from pyknyx.stack.knxnetip.knxNetIPRoutingEncoder import KNXnetIPRoutingEncoder
+from pyknyx.stack.knxnetip.routingFlowControl import RoutingFlowControl, RoutingFlowControlValueError
 from pyknyx.stack.cemi.cemiLData import CEMILData, CEMIValueError
 from pyknyx.stack.layer2.l_dataService import PRIORITY_DISTRIBUTION
 
@@ -92,7 +103,8 @@ class UDPTransceiver(L_DataServiceBroadcast):
     @ivar _transmitter: multicast transmitter loop
     @type _transmitter: L{Thread<threading>}
     """
-    def __init__(self, ets, mcastAddr="224.0.23.12", mcastPort=3671):
+    def __init__(self, ets, mcastAddr="224.0.23.12", mcastPort=3671,
+                 queueCapacity=None, queuePolicy=PriorityQueue.DROP_OLDEST, rcvBufSize=None, telegramRate=50):
         """
 
         @param mcastAddr: multicast address to bind to
@@ -101,6 +113,18 @@ class UDPTransceiver(L_DataServiceBroadcast):
         @param mcastPort: multicast port to bind to
         @type mcastPort: str
 
+        @param queueCapacity: max. number of frames waiting for transmission, per priority (None: unbounded)
+        @type queueCapacity: int or list of int
+
+        @param queuePolicy: what to do with frames when the queue is full
+        @type queuePolicy: str, see L{PriorityQueue<pyknyx.stack.priorityQueue>}
+
+        @param rcvBufSize: size of the receiver socket kernel buffer (None: system default)
+        @type rcvBufSize: int
+
+        @param telegramRate: max. number of telegrams sent per second (None: unlimited)
+        @type telegramRate: float
+
         raise UDPTransceiverValueError:
         """
         super(UDPTransceiver, self).__init__(ets)
@@ -110,15 +134,15 @@ class UDPTransceiver(L_DataServiceBroadcast):
 
         localAddr = "0.0.0.0"; # socket.gethostbyname(socket.gethostname())
         self._transmitterSock = MulticastSocketTransmit(localAddr, 0, mcastAddr, mcastPort)
-        self._receiverSock = MulticastSocketReceive(localAddr, self._transmitterSock.localPort, mcastAddr, mcastPort)
-        self._queue = PriorityQueue(PRIORITY_DISTRIBUTION)
-
+        self._receiverSock = MulticastSocketReceive(localAddr, self._transmitterSock.localPort, mcastAddr, mcastPort,
+                                                    timeout=None, rcvBufSize=rcvBufSize)
+        self._queue = PriorityQueue(PRIORITY_DISTRIBUTION, queueCapacity, queuePolicy)
+        self._encoder = KNXnetIPRoutingEncoder()
+        self._flowControl = RoutingFlowControl(telegramRate)
+        self._stopped = threading.Event()
 
-        # Create transmitter and receiver threads
-        self._receiver = threading.Thread(target=self._receiverLoop, name="UDP receiver")
-        self._receiver.setDaemon(True)
-        self._transmitter = threading.Thread(target=self._transmitterLoop, name="UDP transmitter")
-        self._transmitter.setDaemon(True)
+        self._receiver = None
+        self._transmitter = None
 
     @property
     def mcastAddr(self):
@@ -128,14 +152,89 @@ class UDPTransceiver(L_DataServiceBroadcast):
     def mcastPort(self):
         return self._mcastPort
 
+    @property
+    def queue(self):
+        """ Frames waiting for transmission
+        """
+        return self._queue
+
+    @property
+    def flowControl(self):
+        return self._flowControl
+
+    @property
+    def rxDropped(self):
+        """ Number of received datagrams dropped by the kernel (None if unknown)
+        """
+        return self._receiverSock.dropped
+
     @property
     def localAddr(self):
         return self._receiverSock.localAddr
 
+    def registerMetrics(self):
+        super(UDPTransceiver, self).registerMetrics()
+        metrics.counter("pyknyx_udp_rx_dropped_total", "datagrams dropped by the kernel",
+                        lambda: self.rxDropped or 0, layer2=self.metricsLabel)
+
     @property
     def localPort(self):
         return self._receiverSock.localPort
 
+    def _decodeFrame(self, inFrame, fromAddr, fromPort):
+        """ Decode a received datagram
+
+        @return: the cEMI frame, or None if the datagram must be ignored
+        @rtype: L{CEMILData<pyknyx.stack.cemi.cemiLData>}
+        """
+        if trace.enabled:
+            trace("UDPTransceiver._decodeFrame(): inFrame=%r (%s, %d)", inFrame, fromAddr, fromPort)
+        if fromAddr == self._transmitterSock.localAddress and fromPort == self._transmitterSock.localPort:
+            return None # we got our own packet
+        try:
+            header = KNXnetIPHeader(inFrame)
+        except KNXnetIPHeaderValueError:
+            logger.exception("UDPTransceiver._decodeFrame()")
+            return None
+        if trace.enabled:
+            trace("UDPTransceiver._decodeFrame(): KNXnetIP header=%r", header)
+
+        service = header.service
+        if service != KNXnetIPHeader.ROUTING_IND:
+            body = memoryview(inFrame)[KNXnetIPHeader.HEADER_SIZE:]
+            try:
+                if service == KNXnetIPHeader.ROUTING_BUSY:
+                    self._flowControl.busy(body)
+                elif service == KNXnetIPHeader.ROUTING_LOST_MSG:
+                    self._flowControl.lostMessage(body)
+            except RoutingFlowControlValueError:
+                logger.exception("UDPTransceiver._decodeFrame()")
+            return None
+
+        # The datagram is immutable: the cEMI frame is a view on it, copied only if modified
+        frame = memoryview(inFrame)[KNXnetIPHeader.HEADER_SIZE:]
+        try:
+            cEMI = CEMILData(frame, copy=False)
+        except CEMIValueError:
+            logger.exception("UDPTransceiver._decodeFrame()")
+            return None
+        if trace.enabled:
+            trace("UDPTransceiver._decodeFrame(): cEMI=%s", cEMI)
+
+        return cEMI
+
+    def _encodeFrame(self, cEMI):
+        """ Build the datagram carrying a cEMI frame
+
+        @return: KNXnet/IP routing indication; only valid until the next call
+        @rtype: memoryview
+        """
+        frame = self._encoder.encodeCEMI(cEMI.frame.raw)
+        if trace.enabled:
+            trace("UDPTransceiver._encodeFrame(): frame= %r", frame)
+
+        return frame
+
     def _receiverLoop(self):
         """
         """
@@ -143,34 +242,15 @@ class UDPTransceiver(L_DataServiceBroadcast):
 
         while self._running:
             try:
-                inFrame, (fromAddr, fromPort) = self._receiverSock.receive()
-                logger.debug("UDPTransceiver._receiverLoop(): inFrame=%s (%s, %d)" % (repr(inFrame), fromAddr, fromPort))
-                if fromAddr == self._transmitterSock.localAddress and fromPort == self._transmitterSock.localPort:
-                    continue # we got our own packet
-                inFrame = bytearray(inFrame)
-                try:
-                    header = KNXnetIPHeader(inFrame)
-                except KNXnetIPHeaderValueError:
-                    logger.exception("UDPTransceiver._receiverLoop()")
-                    continue
-                logger.debug("UDPTransceiver._receiverLoop(): KNXnetIP header=%s" % repr(header))
-
-                frame = inFrame[KNXnetIPHeader.HEADER_SIZE:]
-                logger.debug("UDPTransceiver._receiverLoop(): frame=%s" % repr(frame))
-                try:
-                    cEMI = CEMILData(frame)
-                except CEMIValueError:
-                    logger.exception("UDPTransceiver._receiverLoop()")
-                    continue
-                logger.debug("UDPTransceiver._receiverLoop(): cEMI=%s" % cEMI)
-
-                self.dataReq(cEMI)
-
-            except socket.timeout:
-                pass
+                for inFrame, (fromAddr, fromPort) in self._receiverSock.receiveMany():
+                    # Receive buffers are reused: frames keep their own copy
+                    cEMI = self._decodeFrame(bytes(inFrame), fromAddr, fromPort)
+                    if cEMI is not None:
+                        self.dataReq(cEMI)
 
             except:
-                logger.exception("UDPTransceiver._receiverLoop()")
+                if self._running:
+                    logger.exception("UDPTransceiver._receiverLoop()")
 
         logger.trace("UDPTransceiver._receiverLoop(): ended")
 
@@ -188,15 +268,17 @@ class UDPTransceiver(L_DataServiceBroadcast):
                 if cEMI is None:
                     return
 
-                logger.debug("UDPTransceiver._transmitterLoop(): frame=%s" % repr(cEMI))
+                if trace.enabled:
+                    trace("UDPTransceiver._transmitterLoop(): frame=%r", cEMI)
 
-                cEMIFrame = cEMI.frame
-                cEMIRawFrame = cEMIFrame.raw
-                header = KNXnetIPHeader(service=KNXnetIPHeader.ROUTING_IND, serviceLength=len(cEMIRawFrame))
-                frame = header.frame + cEMIRawFrame
-                logger.debug("UDPTransceiver._transmitterLoop(): frame= %s" % repr(frame))
+                delay = self._flowControl.delay()
+                while delay > 0:
+                    if self._stopped.wait(delay):
+                        return
+                    delay = self._flowControl.delay()
 
-                self._transmitterSock.transmit(frame)
+                self._transmitterSock.transmit(self._encodeFrame(cEMI))
+                self._flowControl.sent()
 
             except Exception:
                 logger.exception("UDPTransceiver._transmitterLoop()")
@@ -209,6 +291,14 @@ class UDPTransceiver(L_DataServiceBroadcast):
         logger.trace("UDPTransceiver.start()")
 
         self._running = True
+        self._stopped.clear()
+
+        # Create transmitter and receiver threads
+        self._receiver = threading.Thread(target=self._receiverLoop, name="UDP receiver")
+        self._receiver.setDaemon(True)
+        self._transmitter = threading.Thread(target=self._transmitterLoop, name="UDP transmitter")
+        self._transmitter.setDaemon(True)
+
         self._receiver.start()
         self._transmitter.start()
 
@@ -218,7 +308,13 @@ class UDPTransceiver(L_DataServiceBroadcast):
         logger.trace("UDPTransceiver.stop()")
 
         self._running = False
-        self._queue.add(None,Priority('system'))
+        self._stopped.set()
+        self._queue.close()
+        self._receiverSock.wakeup()
+        if self._receiver is not None and self._receiver is not threading.current_thread():
+            self._receiver.join(1)
         self._transmitterSock.close()
         self._receiverSock.close()
 
+        super(UDPTransceiver, self).stop()
+
@@ -44,6 +44,13 @@ Documentation
 The main goal of this utility is to start/stop a device, and to create a fresh device from a template.
 Ths usage of this utility is not mandatory, but handles some annoying logger init suffs.
 
+It also runs the stack benchmarks (see L{benchmark<pyknyx.bench.benchmark>}); the JSON report can be saved as
+baseline, and compared to later runs. The command exits with status 1 if regressions are found.
+
+The stats command prints the metrics of a running device (see L{Metrics<pyknyx.services.metrics>}), read from its
+metrics endpoint. The trace command enables/disables the tracers of a running device (see
+L{tracer<pyknyx.services.tracer>}), through the same endpoint.
+
 Usage
 =====
 
@@ -58,6 +65,7 @@ Should be used from an executable script. See scripts/pyknyx-admin.py.
 import sys
 import os.path
 import argparse
+import json
 
 from pyknyx.common import config
 from pyknyx.common.exception import PyKNyXValueError
@@ -150,9 +158,95 @@ class AdminUtility(object):
         """
         """
         self._checkConfig(args)
-        runner = DeviceRunner(args.loggerLevel, args.devicePath, args.gadMapPath)
+        runner = DeviceRunner(args.loggerLevel, args.devicePath, args.gadMapPath, args.metricsPort, args.trace)
         runner.run(args.daemon)
 
+    def _bench(self, args):
+        """
+        """
+        from pyknyx.bench.benchmark import BenchmarkRunner, benchmarks, saveReport, loadReport, compare
+        from pyknyx.bench import stackBenchmarks
+
+        selected = benchmarks(*args.patterns)
+        if args.list:
+            for benchmark in selected:
+                print(benchmark.name)
+            return
+        if not selected:
+            print("No benchmark matches %s" % ", ".join(args.patterns))
+            sys.exit(1)
+
+        baseline = loadReport(args.baseline) if args.baseline else None
+        runner = BenchmarkRunner(args.minTime, args.repeat)
+        report = runner.run(selected)
+
+        if args.output:
+            saveReport(report, args.output)
+        else:
+            json.dump(report, sys.stdout, indent=2, sort_keys=True)
+            print()
+        if args.saveBaseline:
+            saveReport(report, args.saveBaseline)
+
+        if baseline is not None:
+            regressions = compare(report, baseline, args.tolerance)
+            for name, reference, best, ratio in regressions:
+                sys.stderr.write("%s: %.3fus -> %.3fus (x%.2f)\n" % (name, reference * 1e6, best * 1e6, ratio))
+            if regressions:
+                sys.exit(1)
+
+    def _stats(self, args):
+        """
+        """
+        from six.moves.urllib.request import urlopen
+
+        url = "http://%s:%d/%s" % (args.host, args.port, "metrics" if args.prometheus else "stats")
+        try:
+            response = urlopen(url, timeout=args.timeout)
+            body = response.read().decode("utf-8")
+        except (IOError, OSError) as e:
+            print("Can't read metrics from %s (%s)" % (url, e))
+            sys.exit(1)
+
+        if args.prometheus:
+            sys.stdout.write(body)
+            return
+
+        for metric in json.loads(body):
+            labels = ", ".join("%s=%s" % item for item in sorted(metric["labels"].items()))
+            name = "%s{%s}" % (metric["name"], labels) if labels else metric["name"]
+            value = metric["value"]
+            if metric["kind"] == "histogram":
+                count = value["count"]
+                mean = value["sum"] / count if count else 0.
+                value = "count=%d mean=%.6f" % (count, mean)
+            print("%-90s %s" % (name, value))
+
+    def _trace(self, args):
+        """
+        """
+        from six.moves.urllib.parse import urlencode
+        from six.moves.urllib.request import urlopen
+
+        url = "http://%s:%d/trace" % (args.host, args.port)
+        params = {}
+        if args.enable:
+            params["enable"] = ",".join(args.enable)
+        if args.disable:
+            params["disable"] = ",".join(args.disable)
+        try:
+            if params:
+                response = urlopen(url + "?" + urlencode(params), data=b"", timeout=args.timeout)
+            else:
+                response = urlopen(url, timeout=args.timeout)
+            tracers = json.loads(response.read().decode("utf-8"))
+        except (IOError, OSError) as e:
+            print("Can't change tracers through %s (%s)" % (url, e))
+            sys.exit(1)
+
+        for name, enabled in sorted(tracers.items()):
+            print("%-20s %s" % (name, "on" if enabled else "off"))
+
     def execute(self):
 
         # Main parser
@@ -198,8 +292,61 @@ class AdminUtility(object):
                                                 help="run device")
         runDeviceParser.add_argument("-d", "--daemon", action="store_true", default=False,
                                      help="run process as daemon")
+        runDeviceParser.add_argument("-s", "--metrics", type=int, dest="metricsPort", metavar="PORT",
+                                     help="enable metrics, and serve them on this local port")
+        runDeviceParser.add_argument("-t", "--trace", type=str, action="append", default=[], metavar="SUBSYSTEM",
+                                     help="enable tracing of this subsystem (shell-style pattern, can be repeated)")
         runDeviceParser.set_defaults(func=self._runDevice)
 
+        # Benchmarks parser
+        benchParser = subparsers.add_parser("bench",
+                                            help="run the stack benchmarks")
+        benchParser.add_argument("patterns", type=str, nargs="*", metavar="PATTERN",
+                                 help="benchmarks to run (shell-style patterns, default: all)")
+        benchParser.add_argument("-L", "--list", action="store_true", default=False,
+                                 help="list the benchmarks, don't run them")
+        benchParser.add_argument("-o", "--output", type=str, dest="output",
+                                 help="write the JSON report to this file (default: stdout)")
+        benchParser.add_argument("-b", "--baseline", type=str, dest="baseline",
+                                 help="compare to this report, exit with status 1 on regressions")
+        benchParser.add_argument("-s", "--save-baseline", type=str, dest="saveBaseline",
+                                 help="also save the report as baseline to this file")
+        benchParser.add_argument("-t", "--tolerance", type=float, default=0.2,
+                                 help="allowed slow-down before reporting a regression (default: 0.2)")
+        benchParser.add_argument("--min-time", type=float, dest="minTime", default=0.2,
+                                 help="min. duration of each timed run, in s (default: 0.2)")
+        benchParser.add_argument("--repeat", type=int, default=5,
+                                 help="number of timed runs (default: 5)")
+        benchParser.set_defaults(func=self._bench)
+
+        # Stats parser
+        statsParser = subparsers.add_parser("stats",
+                                            help="print the metrics of a running device")
+        statsParser.add_argument("-H", "--host", type=str, default="localhost",
+                                 help="host of the metrics endpoint (default: localhost)")
+        statsParser.add_argument("-P", "--port", type=int, default=9464,
+                                 help="port of the metrics endpoint (default: 9464)")
+        statsParser.add_argument("--prometheus", action="store_true", default=False,
+                                 help="print the raw Prometheus text format")
+        statsParser.add_argument("--timeout", type=float, default=5.,
+                                 help="connection timeout, in s (default: 5)")
+        statsParser.set_defaults(func=self._stats)
+
+        # Trace parser
+        traceParser = subparsers.add_parser("trace",
+                                            help="enable/disable tracing in a running device")
+        traceParser.add_argument("-e", "--enable", type=str, action="append", default=[], metavar="SUBSYSTEM",
+                                 help="enable tracing of this subsystem (shell-style pattern, can be repeated)")
+        traceParser.add_argument("-d", "--disable", type=str, action="append", default=[], metavar="SUBSYSTEM",
+                                 help="disable tracing of this subsystem (shell-style pattern, can be repeated)")
+        traceParser.add_argument("-H", "--host", type=str, default="localhost",
+                                 help="host of the metrics endpoint (default: localhost)")
+        traceParser.add_argument("-P", "--port", type=int, default=9464,
+                                 help="port of the metrics endpoint (default: 9464)")
+        traceParser.add_argument("--timeout", type=float, default=5.,
+                                 help="connection timeout, in s (default: 5)")
+        traceParser.set_defaults(func=self._trace)
+
         # Parse args
         args = mainParser.parse_args()
         args.func(args)
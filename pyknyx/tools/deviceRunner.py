@@ -64,7 +64,10 @@ import time
 from pyknyx.common import config
 from pyknyx.common.exception import PyKNyXValueError
 from pyknyx.services.logger import logging; logger = logging.getLogger(__name__)
+from pyknyx.services.logger import enableAsync, setLevel
 from pyknyx.services.scheduler import Scheduler
+from pyknyx.services.metrics import Metrics, MetricsServer
+from pyknyx.services import tracer
 from pyknyx.services.groupAddressTableMapper import GroupAddressTableMapper
 from pyknyx.core.ets import ETS
 from pyknyx.stack.individualAddress import IndividualAddress
@@ -79,7 +82,7 @@ class DeviceRunnerValueError(PyKNyXValueError):
 class DeviceRunner(object):
     """
     """
-    def __init__(self, loggerLevel, devicePath, gadMapPath):
+    def __init__(self, loggerLevel, devicePath, gadMapPath, metricsPort=None, trace=()):
         """
         """
         super(DeviceRunner, self).__init__()
@@ -94,8 +97,23 @@ class DeviceRunner(object):
             config.LOGGER_LEVEL = loggerLevel
 
         # DO NOT USE LOGGER BEFORE THIS POINT!
-        Logger("%s-%s" % (DEVICE_NAME, DEVICE_IND_ADDR))
+        setLevel(config.LOGGER_LEVEL)
         logger.info("Logger level is '%s'" % config.LOGGER_LEVEL)
+        if config.LOGGER_ASYNC:
+            enableAsync(config.LOGGER_QUEUE_SIZE, config.LOGGER_RATE_BURST, config.LOGGER_RATE_INTERVAL)
+
+        # Enable tracing
+        if trace:
+            tracer.enable(*trace)
+
+        # Enable metrics
+        if metricsPort is not None:
+            config.METRICS_PORT = metricsPort
+        if config.METRICS_PORT is not None:
+            Metrics().enabled = True
+            self._metricsServer = MetricsServer(config.METRICS_PORT)
+            self._metricsServer.start()
+            logger.info("Metrics served on port %d" % self._metricsServer.port)
 
         logger.info("Device path is '%s'" % devicePath)
         logger.info("Device name is '%s'" % DEVICE_NAME)
@@ -110,7 +128,10 @@ class DeviceRunner(object):
         mapper = GroupAddressTableMapper()
         mapper.loadFrom(gadMapPath)
 
-        self.ets = ETS(self._deviceIndAddr)
+        self.ets = ETS(self._deviceIndAddr, valueCachePath=config.VALUE_CACHE_PATH,
+                       valueCachePeriod=config.VALUE_CACHE_PERIOD, valueCacheMaxAge=config.VALUE_CACHE_MAX_AGE,
+                       initReadRate=config.INIT_READ_RATE, initReadInFlight=config.INIT_READ_IN_FLIGHT,
+                       initReadTimeout=config.INIT_READ_TIMEOUT, initReadRetries=config.INIT_READ_RETRIES)
 
     def _doubleFork(self):
         """ Double fork.
@@ -138,13 +159,11 @@ class DeviceRunner(object):
 
         # Create device from user 'device' module
         from device import DEVICE
-        self._device = DEVICE(self._deviceIndAddr)
-
-        self.ets.register(self._device)
+        self._device = DEVICE(self.ets, self._deviceIndAddr)
 
         if printGroat:
-            logger.info(ets.getGrOAT(self._device, "gad"))
-            logger.info(ets.getGrOAT(self._device, "go"))
+            logger.info(self.ets.getGrOAT(self._device, "gad"))
+            logger.info(self.ets.getGrOAT(self._device, "go"))
 
     def run(self, daemon=False):
         """
@@ -157,5 +176,5 @@ class DeviceRunner(object):
             logger.info("Run process as daemon...")
             self._doubleFork()
 
-        ets.mainLoop()
+        self.ets.mainLoop()
 
@@ -113,7 +113,8 @@ FB = \
 """# -*- coding: utf-8 -*-
 
 from pyknyx.api import FunctionalBlock
-from pyknyx.api import logger, schedule, notify
+from pyknyx.api import schedule, notify
+from pyknyx.services.logger import logging; logger = logging.getLogger(__name__)
 
 
 class ${deviceClass}FB(FunctionalBlock):
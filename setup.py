@@ -93,6 +93,7 @@ setup(name=config.APP_NAME,
       download_url="https://github.com/M-o-a-T/pyknyx",
 
       packages=["pyknyx",
+                "pyknyx.bench",
                 "pyknyx.common",
                 "pyknyx.core",
                 "pyknyx.core.dptXlator",
@@ -0,0 +1,99 @@
+# -*- coding: utf-8 -*-
+
+from pyknyx.bench.benchmark import *
+import os
+import shutil
+import tempfile
+import unittest
+
+# Mute logger
+from pyknyx.services.logger import logging
+logger = logging.getLogger(__name__)
+logging.getLogger("pyknyx").setLevel(logging.ERROR)
+
+
+class CountingBenchmark(Benchmark):
+    name = "test.counting"
+
+    def __init__(self):
+        super(CountingBenchmark, self).__init__()
+        self.calls = []
+
+    def setup(self):
+        self.calls.append("setup")
+        self.count = 0
+
+    def run(self, loops):
+        for i in range(loops):
+            self.count += 1
+
+    def teardown(self):
+        self.calls.append("teardown")
+
+
+class FakeClock(object):
+    """ Each call advances time by 1ms per operation counted since the previous call
+    """
+    def __init__(self, benchmark):
+        self.benchmark = benchmark
+        self.time = 0.
+        self.last = 0
+
+    def __call__(self):
+        self.time += (self.benchmark.count - self.last) * 0.001
+        self.last = self.benchmark.count
+        return self.time
+
+
+class BenchmarkTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.dir)
+
+    def test_constructor(self):
+        with self.assertRaises(BenchmarkValueError):
+            BenchmarkRunner(minTime=0)
+        with self.assertRaises(BenchmarkValueError):
+            BenchmarkRunner(repeat=0)
+
+    def test_register(self):
+        benchmark = CountingBenchmark()
+        benchmark.name = "test.register"
+        register(benchmark)
+        with self.assertRaises(BenchmarkValueError):
+            register(benchmark)
+        with self.assertRaises(BenchmarkValueError):
+            register(Benchmark())
+        self.assertIn(benchmark, benchmarks())
+        self.assertEqual(benchmarks("test.reg*"), [benchmark])
+        self.assertEqual(benchmarks("none.*"), [])
+
+    def test_run(self):
+        benchmark = CountingBenchmark()
+        runner = BenchmarkRunner(minTime=0.1, repeat=3, clock=FakeClock(benchmark))
+        report = runner.run([benchmark])
+        self.assertEqual(benchmark.calls, ["setup", "teardown"])
+        result = report["results"]["test.counting"]
+        self.assertGreaterEqual(result["loops"], 100)
+        self.assertAlmostEqual(result["best"], 0.001)
+        self.assertAlmostEqual(result["median"], 0.001)
+        self.assertAlmostEqual(result["opsPerSec"], 1000.)
+
+    def test_report(self):
+        path = os.path.join(self.dir, "report.json")
+        report = BenchmarkRunner(minTime=0.001, repeat=1).run([CountingBenchmark()])
+        saveReport(report, path)
+        self.assertEqual(loadReport(path)["results"].keys(), report["results"].keys())
+        with open(path, "w") as file_:
+            file_.write("{}")
+        with self.assertRaises(BenchmarkValueError):
+            loadReport(path)
+
+    def test_compare(self):
+        baseline = dict(results=dict(a=dict(best=1.), b=dict(best=1.), c=dict(best=1.)))
+        report = dict(results=dict(a=dict(best=1.1), b=dict(best=1.5), d=dict(best=1.)))
+        self.assertEqual(compare(report, baseline), [("b", 1., 1.5, 1.5)])
+        self.assertEqual(compare(report, baseline, tolerance=0.05), [("a", 1., 1.1, 1.1), ("b", 1., 1.5, 1.5)])
@@ -0,0 +1,40 @@
+# -*- coding: utf-8 -*-
+
+from pyknyx.bench.stackBenchmarks import *
+import unittest
+
+from pyknyx.bench.benchmark import BenchmarkRunner, benchmarks
+
+# Mute logger
+from pyknyx.services.logger import logging
+logger = logging.getLogger(__name__)
+logging.getLogger("pyknyx").setLevel(logging.ERROR)
+
+
+class StackBenchmarksTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.runner = BenchmarkRunner(minTime=0.001, repeat=1)
+
+    def tearDown(self):
+        pass
+
+    def test_registered(self):
+        names = [benchmark.name for benchmark in benchmarks()]
+        for name in ("cemi.parse", "cemi.encode", "dpt.1.encode", "dpt.9.decode", "ets.processFrame.10x10",
+                     "notifier.fanout.10", "ets.roundtrip"):
+            self.assertIn(name, names)
+
+    def test_run(self):
+        report = self.runner.run(benchmarks("cemi.*", "dpt.*", "ets.*", "notifier.*"))
+        for name, result in report["results"].items():
+            self.assertGreater(result["best"], 0, name)
+
+    def test_notifier(self):
+        benchmark = NotifierBenchmark(3)
+        benchmark.setup()
+        try:
+            benchmark.run(5)
+            self.assertEqual(benchmark._device.fb["fb_"].count, 15)
+        finally:
+            benchmark.teardown()
@@ -1,2 +1,9 @@
 # -*- coding: utf-8 -*-
 
+import os.path
+import sys
+
+# Make the shared test helpers importable (see helpers.py)
+_TESTS_DIR = os.path.dirname(os.path.abspath(__file__))
+if _TESTS_DIR not in sys.path:
+    sys.path.insert(0, _TESTS_DIR)
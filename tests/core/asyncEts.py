@@ -0,0 +1,125 @@
+# -*- coding: utf-8 -*-
+
+import os
+import asyncio
+
+from pyknyx.api import Device, FunctionalBlock, notify, DP, GO, FB, LNK
+from pyknyx.core.asyncEts import *
+from pyknyx.stack.cemi.cemiLData import CEMILData
+from pyknyx.stack.groupAddress import GroupAddress
+from pyknyx.stack.individualAddress import IndividualAddress
+import unittest
+
+# Mute logger
+from pyknyx.services.logger import logging
+logger = logging.getLogger(__name__)
+logging.getLogger("pyknyx").setLevel(logging.ERROR)
+
+
+class AsyncToggleFB(FunctionalBlock):
+    change = DP(dptId="1.001", default="Off", access="output")
+    GO_01 = GO(dp=change, flags="CT", priority="low")
+    DESC = "AsyncToggleFB"
+
+
+class AsyncActorFB(FunctionalBlock):
+    change = DP(dptId="1.001", default="Off", access="input")
+    GO_01 = GO(dp=change, flags="CW", priority="low")
+    DESC = "AsyncActorFB"
+
+
+class AsyncToggle(Device):
+    toggle_fb = FB(AsyncToggleFB, desc="binary input")
+    LNK_01 = LNK(toggle_fb.change, gad="1/1/1")
+
+
+class AsyncActor(Device):
+    actor_fb = FB(AsyncActorFB, desc="binary output")
+    LNK_01 = LNK(actor_fb.change, gad="1/1/1")
+
+
+class AsyncETSTestCase(unittest.TestCase):
+
+    def setUp(self):
+        pass
+
+    def tearDown(self):
+        pass
+
+    def test_constructor(self):
+        ets = AsyncETS("1.2.0", transCls=None)
+        self.assertEqual(ets.addr, IndividualAddress("1.2.0"))
+
+    def _run(self, ets, ets2):
+        async def main():
+            actor = AsyncActor(ets, "1.2.3")
+            toggle = AsyncToggle(ets2, "1.2.4")
+            await ets.start()
+            if ets2 is not ets:
+                await ets2.start()
+            try:
+                await asyncio.sleep(0.2)
+                toggle.fb["toggle_fb"].dp["change"].value = "On"
+                for i in range(50):
+                    await asyncio.sleep(0.02)
+                    if actor.fb["actor_fb"].dp["change"].value == "On":
+                        break
+                return actor.fb["actor_fb"].dp["change"].value
+            finally:
+                await ets.stop()
+                if ets2 is not ets:
+                    await ets2.stop()
+
+        return asyncio.run(main())
+
+    def test_constructor(self):
+        with self.assertRaises(ETSValueError):
+            AsyncETS("1.2.0", transCls=None, queuePolicy=PriorityQueue.BLOCK)
+        ets = AsyncETS("1.2.0", transCls=None, dedupWindow=0, initReadTimeout=0.5)
+        self.assertIsNone(ets.duplicateFilter)
+        self.assertIsNone(ets._tc)
+
+    def test_local(self):
+        ets = AsyncETS("1.2.0", transCls=None)
+        self.assertEqual(self._run(ets, ets), "On")
+
+    def test_multicast(self):
+        params = dict(mcastAddr="224.55.36.72", mcastPort=os.getpid() % 30000 + 20000)
+        ets = AsyncETS("1.2.0", transParams=params)
+        ets2 = AsyncETS("1.2.0", transParams=params)
+        self.assertEqual(self._run(ets, ets2), "On")
+
+    def test_waitReady(self):
+        ets = AsyncETS("1.2.0", transCls=None)
+
+        async def main():
+            AsyncActor(ets, "1.2.3")  # no group object to initialise
+            await ets.start()
+            try:
+                return await ets.waitReady(timeout=2)
+            finally:
+                await ets.stop()
+
+        self.assertEqual(asyncio.run(main()), [])
+
+    def test_putFrame_thread(self):
+        """ putFrame() from another thread wakes up the dispatcher """
+        ets = AsyncETS("1.2.0", transCls=None)
+        seen = []
+        ets.processFrame = lambda l2, cEMI: seen.append(cEMI)
+
+        async def main():
+            await ets.start()
+            try:
+                cEMI = CEMILData()
+                cEMI.destinationAddress = GroupAddress("1/1/1")
+                await asyncio.get_event_loop().run_in_executor(None, ets.putFrame, None, cEMI)
+                for i in range(50):
+                    if seen:
+                        break
+                    await asyncio.sleep(0.01)
+            finally:
+                await ets.stop()
+
+        asyncio.run(main())
+        self.assertEqual(len(seen), 1)
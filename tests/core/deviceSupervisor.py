@@ -0,0 +1,73 @@
+# -*- coding: utf-8 -*-
+
+from pyknyx.core.deviceSupervisor import *
+import unittest
+
+from pyknyx.api import Device, FunctionalBlock, DP, GO, FB, LNK
+from pyknyx.stack.groupAddress import GroupAddress
+from pyknyx.stack.layer7.apci import APCI
+from helpers import RecordingBus, makeFrame, waitFor
+
+# Mute logger
+from pyknyx.services.logger import logging
+logger = logging.getLogger(__name__)
+logging.getLogger("pyknyx").setLevel(logging.ERROR)
+
+
+class SupervisedActorFB(FunctionalBlock):
+    state = DP(dptId="1.001", default="Off", access="input")
+    GO_01 = GO(dp=state, flags="CRW", priority="low")
+    DESC = "SupervisedActorFB"
+
+
+class SupervisedActor(Device):
+    actor_fb = FB(SupervisedActorFB, desc="binary output")
+
+
+class DeviceSupervisorTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.ets = ETS("1.1.0", transCls=None)
+        self.bus = RecordingBus(self.ets)
+        self.supervisor = DeviceSupervisor(self.ets, workers=2, ringSize=65536)
+
+    def tearDown(self):
+        self.supervisor.stop()
+        self.ets.stop()
+
+    def test_constructor(self):
+        with self.assertRaises(DeviceSupervisorValueError):
+            DeviceSupervisor(self.ets, workers=0)
+
+    def test_addDevice(self):
+        self.assertEqual(self.supervisor.addDevice(SupervisedActor, "1.1.1"), 0)
+        self.assertEqual(self.supervisor.addDevice(SupervisedActor, "1.1.2"), 1)
+        self.assertEqual(self.supervisor.addDevice(SupervisedActor, "1.1.3"), 0)
+        self.assertEqual(self.supervisor.addDevice(SupervisedActor, "1.1.4", worker=0), 0)
+        with self.assertRaises(DeviceSupervisorValueError):
+            self.supervisor.addDevice(SupervisedActor, "1.1.5", worker=2)
+        with self.assertRaises(DeviceSupervisorValueError):
+            self.supervisor.addDevice(SupervisedActor, "0.0.0")
+
+    def test_run(self):
+        self.supervisor.addDevice(SupervisedActor, "1.1.1", links=(LNK("state", "1/1/1", fb="actor_fb"),))
+        self.supervisor.addDevice(SupervisedActor, "1.1.2", links=(LNK("state", "1/1/2", fb="actor_fb"),))
+        self.supervisor.start()
+        self.ets.start()
+        links = self.supervisor.links
+        self.assertTrue(waitFor(lambda: all(link.addresses for link in links), 5.))
+        self.assertEqual(links[0].addresses, frozenset((IndividualAddress("1.1.1").raw,)))
+        self.assertEqual(links[1].addresses, frozenset((IndividualAddress("1.1.2").raw,)))
+        self.assertEqual(sorted(self.ets.subscribedGroups), [GroupAddress("1/1/1"), GroupAddress("1/1/2")])
+
+        # Write to the device of the first worker, then read its state back
+        self.bus.dataReq(makeFrame("1/1/1", 1))
+        self.bus.dataReq(makeFrame("1/1/1", 0, apci=APCI.GROUPVALUE_READ))
+        self.assertTrue(waitFor(lambda: self.bus.sent, 5.))
+        response = self.bus.sent[0]
+        self.assertEqual(response.sourceAddress, IndividualAddress("1.1.1"))
+        self.assertEqual(response.destinationAddress, GroupAddress("1/1/1"))
+        self.assertEqual(response.npdu[-1], APCI.GROUPVALUE_RES | 1)
+
+        self.supervisor.stop()
+        self.assertEqual(self.supervisor.processes, ())
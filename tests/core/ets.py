@@ -1,7 +1,12 @@
 # -*- coding: utf-8 -*-
 
 from pyknyx.core.ets import *
+from pyknyx.core.groupListener import GroupListener
+from pyknyx.stack.stack import Stack
+from pyknyx.stack.cemi.cemiLData import CEMILData
+import time
 import unittest
+from helpers import RecordingBus, makeFrame
 
 # Mute logger
 from pyknyx.services.logger import logging
@@ -9,14 +14,147 @@ logger = logging.getLogger(__name__)
 logging.getLogger("pyknyx").setLevel(logging.ERROR)
 
 
+class RecordingListener(GroupListener):
+
+    def __init__(self):
+        super(RecordingListener, self).__init__()
+        self.written = []
+
+    def onWrite(self, src, data):
+        self.written.append(data)
+
+
 class ETSTestCase(unittest.TestCase):
 
     def setUp(self):
-        pass
+        self.ets = ETS("1.2.0", addrRange=10, transCls=None)
 
     def tearDown(self):
         pass
 
     def test_constructor(self):
-        pass
+        self.assertEqual(self.ets.addr, IndividualAddress("1.2.0"))
+
+    def test_subscriptionIndex(self):
+        sender = Stack(self.ets, "1.2.1")
+        stack1 = Stack(self.ets, "1.2.2")
+        stack2 = Stack(self.ets, "1.2.3")
+        listener1 = RecordingListener()
+        listener2 = RecordingListener()
+        stack1.agds.subscribe("1/1/1", listener1)
+        stack2.agds.subscribe("1/1/2", listener2)
+
+        # Only the subscribed stack is a routing target for the GAD
+        self.assertEqual(self.ets._groupSubscribers[GroupAddress("1/1/1").raw], (stack1._lds,))
+        self.assertEqual(self.ets._groupSubscribers[GroupAddress("1/1/2").raw], (stack2._lds,))
+        self.assertEqual(self.ets._groupAll, ())
+
+        self.ets.processFrame(sender._lds, makeFrame("1/1/1", 1, "1.2.1"))
+        self.assertEqual(listener1.written, [bytearray(b"\x01")])
+        self.assertEqual(listener2.written, [])
+
+        self.ets.processFrame(sender._lds, makeFrame("1/1/3", 1, "1.2.1"))
+        self.assertEqual(len(listener1.written), 1)
+        self.assertEqual(listener2.written, [])
+
+    def test_subscriptionMonitor(self):
+        stack = Stack(self.ets, "1.2.1")
+        stack.agds.subscribe("1/1/1", RecordingListener())
+        stack.agds.subscribe("0/0/0", RecordingListener())
+        self.assertEqual(self.ets._groupAll, (stack._lds,))
+        self.assertEqual(self.ets._groupSubscribers[GroupAddress("1/1/1").raw], ())
+
+    def test_hopCount(self):
+        bus1 = RecordingBus(self.ets)
+        bus2 = RecordingBus(self.ets)
+        data = bytes(makeFrame("1/1/1", 1, "1.2.1").frame.raw)
+        cEMI = CEMILData(memoryview(data), copy=False)
+
+        self.ets.processFrame(bus1, cEMI)
+        self.assertEqual(len(bus2.sent), 1)
+        self.assertEqual(bus2.sent[0].hopCount, 5)
+        self.assertEqual(cEMI.hopCount, 6)
+        self.assertIs(cEMI.frame.raw.obj, data)  # received frame not copied
+
+    def test_duplicates(self):
+        bus1 = RecordingBus(self.ets)
+        bus2 = RecordingBus(self.ets)
+        bus3 = RecordingBus(self.ets)
+
+        self.ets.processFrame(bus1, makeFrame("1/1/1", 1, "1.2.1"))
+        self.ets.processFrame(bus2, makeFrame("1/1/1", 1, "1.2.1"))  # same telegram through another path
+        repeated = makeFrame("1/1/1", 1, "1.2.1")
+        repeated.repeat = CEMILData.R_REPEAT
+        self.ets.processFrame(bus1, repeated)
+        self.assertEqual(len(bus3.sent), 1)
+        self.assertEqual(self.ets.duplicateFilter.suppressed, 2)
+
+        self.ets.processFrame(bus1, makeFrame("1/1/1", 1, "1.2.1"))  # sent again
+        self.assertEqual(len(bus3.sent), 2)
+
+        ets = ETS("1.2.0", addrRange=10, transCls=None, dedupWindow=None)
+        self.assertIsNone(ets.duplicateFilter)
+
+    def test_groupFilter(self):
+        bus1 = RecordingBus(self.ets)
+        bus2 = RecordingBus(self.ets)
+        stack = Stack(self.ets, "1.2.1")
+        stack.agds.subscribe("1/1/1", RecordingListener())
+        self.assertEqual(self.ets.subscribedGroups, [GroupAddress("1/1/1")])
+
+        bus2.filterGroups(self.ets.subscribedGroups)
+        self.ets.processFrame(bus1, makeFrame("1/1/1", 1, "1.2.5"))
+        self.ets.processFrame(bus1, makeFrame("1/1/2", 1, "1.2.5"))
+        self.assertEqual([cEMI.destinationAddress for cEMI in bus2.sent], [GroupAddress("1/1/1")])
+
+        # Learning
+        bus1.filterGroups(learn=True)
+        self.ets.processFrame(bus2, makeFrame("1/1/3", 1, "1.2.6"))
+        self.assertEqual(bus1.sent, [])
+        self.ets.processFrame(bus1, makeFrame("1/1/3", 0, "1.2.5"))
+        self.ets.processFrame(bus2, makeFrame("1/1/3", 1, "1.2.6"))
+        self.assertEqual(len(bus1.sent), 1)
+        self.assertEqual(list(bus1.groupFilter), [GroupAddress("1/1/3")])
+
+    def test_addressTable(self):
+        bus1 = RecordingBus(self.ets)
+        bus2 = RecordingBus(self.ets)
+        bus3 = RecordingBus(self.ets)
+
+        def individualFrame(src, dest):
+            cEMI = makeFrame("1/1/1", 1, src)
+            cEMI.destinationAddress = IndividualAddress(dest)
+            return cEMI
+
+        # Unknown destination: flooded
+        self.ets.processFrame(bus1, individualFrame("1.1.5", "1.1.6"))
+        self.assertEqual((len(bus2.sent), len(bus3.sent)), (1, 1))
+        self.assertIs(self.ets.addressTable.get(IndividualAddress("1.1.5").raw), bus1)
+
+        # Learned destination
+        self.ets.processFrame(bus2, individualFrame("1.1.6", "1.1.5"))
+        self.assertEqual((len(bus1.sent), len(bus3.sent)), (1, 1))
+        self.assertEqual(bus1.sent[0].hopCount, 5)
+        self.ets.processFrame(bus3, individualFrame("1.1.7", "1.1.6"))
+        self.assertEqual((len(bus1.sent), len(bus2.sent)), (1, 2))
+
+        # Destination on the source medium
+        self.ets.processFrame(bus2, individualFrame("1.1.8", "1.1.6"))
+        self.assertEqual((len(bus1.sent), len(bus3.sent)), (1, 1))
+        self.assertEqual(self.ets.addressTable.hits, 3)
 
+    def test_workers(self):
+        ets = ETS("1.2.0", addrRange=10, transCls=None, workers=2)
+        bus1 = RecordingBus(ets)
+        bus2 = RecordingBus(ets)
+        ets.start()
+        try:
+            for value in range(10):
+                bus1.dataReq(makeFrame("1/1/%d" % (value % 3), value % 2, "1.2.5"))
+            deadline = time.time() + 2
+            while len(bus2.sent) < 10 and time.time() < deadline:
+                time.sleep(0.01)
+            self.assertEqual(len(bus2.sent), 10)
+            self.assertEqual(sum(stats["processed"] for stats in ets.dispatcher.stats()), 10)
+        finally:
+            ets.stop()
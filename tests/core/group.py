@@ -1,6 +1,12 @@
 # -*- coding: utf-8 -*-
 
 from pyknyx.core.group import *
+from pyknyx.core.groupListener import GroupListener
+from pyknyx.stack.individualAddress import IndividualAddress
+from pyknyx.stack.layer7.a_groupDataService import A_GroupDataService
+from pyknyx.stack.layer7.apci import APCI
+from pyknyx.stack.layer7.apdu import APDU
+import asyncio
 import unittest
 
 # Mute logger
@@ -9,6 +15,27 @@ logger = logging.getLogger(__name__)
 logging.getLogger("pyknyx").setLevel(logging.ERROR)
 
 
+class NullListener(GroupListener):
+
+    def onResponse(self, src, data):
+        pass
+
+
+class RecordingTGDS(object):
+
+    def __init__(self):
+        self.sent = []
+
+    def setListener(self, listener):
+        pass
+
+    def subscribe(self, gad):
+        pass
+
+    def groupDataReq(self, gad, priority, aPDU):
+        self.sent.append((gad, aPDU))
+
+
 class GroupTestCase(unittest.TestCase):
 
     def setUp(self):
@@ -24,3 +51,24 @@ class GroupTestCase(unittest.TestCase):
     def test_constructor(self):
         pass
 
+    def test_readAsync(self):
+        tgds = RecordingTGDS()
+        agds = A_GroupDataService(tgds)
+        group = agds.subscribe("1/1/1", NullListener())
+        aPDU = APDU.makeGroupValue(APCI.GROUPVALUE_RES, bytearray(b"\x01"))
+
+        # Threads
+        future = group.readAsync()
+        agds.groupDataInd(IndividualAddress("1.1.1"), GroupAddress("1/1/1"), Priority(), aPDU)
+        self.assertEqual(future.result(0), (IndividualAddress("1.1.1"), bytearray(b"\x01")))
+
+        # asyncio
+        async def main():
+            reads = [group.readAsync(timeout=1), group.readAsync(timeout=1)]
+            reads[0].cancel()  # does not cancel the other reader
+            asyncio.get_running_loop().call_soon(agds.groupDataInd, IndividualAddress("1.1.2"),
+                                                 GroupAddress("1/1/1"), Priority(), aPDU)
+            return await reads[1]
+
+        self.assertEqual(asyncio.run(main()), (IndividualAddress("1.1.2"), bytearray(b"\x01")))
+        self.assertEqual(len(tgds.sent), 2)
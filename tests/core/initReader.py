@@ -0,0 +1,177 @@
+# -*- coding: utf-8 -*-
+
+from pyknyx.core.initReader import *
+from pyknyx.api import Device, FunctionalBlock, DP, GO, FB, LNK
+from pyknyx.core.ets import ETS
+from pyknyx.core.group import Group
+from pyknyx.stack.groupAddress import GroupAddress
+from pyknyx.stack.individualAddress import IndividualAddress
+from pyknyx.stack.layer7.apci import APCI
+import unittest
+from helpers import FakeClock, RecordingBus
+
+# Mute logger
+from pyknyx.services.logger import logging
+logger = logging.getLogger(__name__)
+logging.getLogger("pyknyx").setLevel(logging.ERROR)
+
+
+class RecordingAGDS(object):
+
+    def __init__(self):
+        self.reads = []
+        self.hooks = ()
+
+    def groupValueReadReq(self, gad, priority):
+        self.reads.append(gad)
+
+    def addResponseHook(self, hook):
+        self.hooks += (hook,)
+
+    def removeResponseHook(self, hook):
+        self.hooks = tuple(hook_ for hook_ in self.hooks if hook_ != hook)
+
+    def response(self, gad):
+        for hook in self.hooks:
+            hook(IndividualAddress("1.1.1"), GroupAddress(gad), None, bytearray(b"\x01"))
+
+
+class InitFB(FunctionalBlock):
+    state = DP(dptId="1.001", default="Off", access="input")
+    GO_01 = GO(dp=state, flags="CWUI", priority="low")
+    DESC = "InitFB"
+
+
+class InitDevice(Device):
+    init_fb = FB(InitFB, desc="state")
+    LNK_01 = LNK(init_fb.state, gad="1/1/1")
+
+
+class InitReaderTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.clock = FakeClock()
+        self.agds = RecordingAGDS()
+        self.reader = InitReader(rate=10., inFlight=2, timeout=1., retries=1, clock=self.clock)
+
+    def tearDown(self):
+        pass
+
+    def _group(self, gad):
+        return Group(GroupAddress(gad), self.agds)
+
+    def test_constructor(self):
+        with self.assertRaises(InitReaderValueError):
+            InitReader(rate=0)
+        with self.assertRaises(InitReaderValueError):
+            InitReader(inFlight=0)
+
+    def test_dedup(self):
+        group = self._group("1/1/1")
+        self.assertTrue(self.reader.add(group))
+        self.assertFalse(self.reader.add(self._group("1/1/1")))
+        self.assertEqual(self.reader.pending, 1)
+        self.assertEqual(len(self.agds.hooks), 1)
+        self.assertEqual(group.listeners, set())
+        self.reader.step()
+        self.assertEqual(self.agds.reads, [GroupAddress("1/1/1")])
+
+    def test_pacing(self):
+        groups = [self._group("1/1/%d" % i) for i in range(1, 5)]
+        for group in groups:
+            self.reader.add(group)
+        self.assertAlmostEqual(self.reader.step(), 0.1)
+        self.assertEqual(len(self.agds.reads), 1)
+        self.assertAlmostEqual(self.reader.step(), 0.1)  # too early
+        self.assertEqual(len(self.agds.reads), 1)
+
+        self.clock.now += 0.1
+        self.assertAlmostEqual(self.reader.step(), 0.9)  # max. in flight: wait for the first deadline
+        self.assertEqual(len(self.agds.reads), 2)
+        self.clock.now += 0.5
+        self.reader.step()
+        self.assertEqual(len(self.agds.reads), 2)
+
+        woken = []
+        self.reader.wakeup = lambda: woken.append(True)
+        self.agds.response("1/1/1")
+        self.assertEqual(woken, [True])
+        self.agds.response("1/1/1")
+        self.assertEqual(woken, [True])
+        self.reader.step()
+        self.assertEqual(self.agds.reads, [group.gad for group in groups[:3]])
+
+    def test_retries(self):
+        group = self._group("1/1/1")
+        self.reader.add(group)
+        self.reader.step()
+        self.clock.now += 1.
+        self.reader.step()
+        self.assertEqual(self.agds.reads, [GroupAddress("1/1/1")] * 2)
+        self.assertFalse(self.reader.ready.done())
+        self.clock.now += 1.
+        self.assertIsNone(self.reader.step())
+        self.assertEqual(self.reader.ready.result(0), [GroupAddress("1/1/1")])
+        self.assertEqual(self.agds.hooks, ())
+
+    def test_ready(self):
+        self.assertIsNone(self.reader.step())
+        self.assertEqual(self.reader.ready.result(0), [])
+
+        groups = [self._group("1/1/1"), self._group("1/1/2")]
+        for group in groups:
+            self.reader.add(group)
+        self.assertFalse(self.reader.ready.done())
+        self.reader.step()
+
+        # Answered to someone else before being read
+        self.agds.response("1/1/2")
+        self.agds.response("1/1/1")
+        self.assertIsNone(self.reader.step())
+        self.assertEqual(self.reader.ready.result(0), [])
+        self.assertEqual(self.agds.reads, [GroupAddress("1/1/1")])
+
+    def test_stop(self):
+        self.reader.add(self._group("1/1/1"))
+        self.reader.stop()
+        self.assertTrue(self.reader.ready.cancelled())
+        self.assertEqual(self.reader.pending, 0)
+        self.assertEqual(self.agds.hooks, ())
+
+
+class ETSInitReaderTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.ets = ETS("1.2.0", addrRange=10, transCls=None, initReadTimeout=0.1, initReadRetries=1)
+
+    def tearDown(self):
+        self.ets.stop()
+
+    def test_shared(self):
+        bus = RecordingBus(self.ets)
+        InitDevice(self.ets, self.ets.allocAddress())
+        InitDevice(self.ets, self.ets.allocAddress())
+        self.ets.start()
+        self.assertEqual(self.ets.ready.result(5), [GroupAddress("1/1/1")])
+        self.assertEqual([cEMI.destinationAddress for cEMI in bus.sent], [GroupAddress("1/1/1")] * 2)
+        self.assertTrue(all((cEMI.npdu[1] << 8 | cEMI.npdu[2]) & APCI._4 == APCI.GROUPVALUE_READ for cEMI in bus.sent))
+
+    def test_grOAT(self):
+        devices = [InitDevice(self.ets, self.ets.allocAddress()) for i in range(2)]
+        for device in devices:
+            for group in device.stack.initGroups():
+                self.ets.initReader.add(group)
+        self.assertEqual(self.ets.initReader.pending, 1)
+
+        # Group objects only, while reads are pending
+        self.assertIn("state", self.ets.getGrOAT())
+        self.assertIn("1/1/1", self.ets.getGrOAT(by="go"))
+
+        # Response from another device
+        devices[0].stack.agds.groupDataInd(IndividualAddress("1.1.1"), GroupAddress("1/1/1"), None, bytearray(b"\x00\x41"))
+        self.assertEqual(self.ets.initReader.pending, 0)
+        self.assertEqual(devices[0].fb["init_fb"].dp["state"].value, "On")
+
+
+if __name__ == '__main__':
+    unittest.main()
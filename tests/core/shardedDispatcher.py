@@ -0,0 +1,87 @@
+# -*- coding: utf-8 -*-
+
+from pyknyx.core.shardedDispatcher import *
+import threading
+import unittest
+
+from pyknyx.stack.groupAddress import GroupAddress
+from helpers import makeFrame, waitFor
+
+# Mute logger
+from pyknyx.services.logger import logging
+logger = logging.getLogger(__name__)
+logging.getLogger("pyknyx").setLevel(logging.ERROR)
+
+
+class ShardedDispatcherTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.processed = []
+        self.lock = threading.Lock()
+        self.dispatcher = ShardedDispatcher(self.process, workers=4)
+        self.dispatcher.start()
+
+    def tearDown(self):
+        self.dispatcher.stop()
+
+    def process(self, l2, cEMI):
+        with self.lock:
+            self.processed.append((cEMI.destinationAddress, cEMI.npdu[-1] & 0x3f))
+
+    def test_constructor(self):
+        with self.assertRaises(ShardedDispatcherValueError):
+            ShardedDispatcher(self.process, workers=0)
+        self.assertEqual(len(self.dispatcher), 4)
+
+    def test_shardOf(self):
+        shards = set(self.dispatcher.shardOf(GroupAddress("1/1/%d" % sub).raw) for sub in range(16))
+        self.assertEqual(len(shards), 4)
+        self.assertIs(self.dispatcher.shardOf(0x0901), self.dispatcher.shardOf(0x0901))
+
+    def test_ordering(self):
+        gads = ["1/1/%d" % sub for sub in range(8)]
+        for value in range(20):
+            for gad in gads:
+                self.dispatcher.put(None, makeFrame(gad, value))
+        self.assertTrue(waitFor(lambda: len(self.processed) == 160))
+        for gad in gads:
+            values = [value for gad_, value in self.processed if gad_ == GroupAddress(gad)]
+            self.assertEqual(values, list(range(20)))
+
+    def test_parallel(self):
+        slow = GroupAddress("1/1/1")
+        fast = next(GroupAddress("1/1/%d" % sub) for sub in range(2, 255)
+                    if self.dispatcher.shardOf(GroupAddress("1/1/%d" % sub).raw) is not self.dispatcher.shardOf(slow.raw))
+        release = threading.Event()
+
+        def process(l2, cEMI):
+            if cEMI.destinationAddress == slow:
+                release.wait(2)
+            self.process(l2, cEMI)
+
+        dispatcher = ShardedDispatcher(process, workers=4)
+        dispatcher.start()
+        try:
+            dispatcher.put(None, makeFrame(slow.address, 1))
+            dispatcher.put(None, makeFrame(slow.address, 2))
+            dispatcher.put(None, makeFrame(fast.address, 3))
+            self.assertTrue(waitFor(lambda: len(self.processed) == 1))
+            self.assertEqual(self.processed[0], (fast, 3))
+            self.assertEqual(dispatcher.shardOf(slow.raw).stats()["processed"], 0)
+            release.set()
+            self.assertTrue(waitFor(lambda: len(self.processed) == 3))
+            self.assertEqual(self.processed[1:], [(slow, 1), (slow, 2)])
+        finally:
+            dispatcher.stop()
+
+    def test_stats(self):
+        for value in range(10):
+            self.dispatcher.put(None, makeFrame("1/1/1", value))
+        self.assertTrue(waitFor(lambda: len(self.processed) == 10))
+        stats = self.dispatcher.shardOf(GroupAddress("1/1/1").raw).stats()
+        self.assertTrue(waitFor(lambda: stats["processed"] == 10 or
+                                self.dispatcher.shardOf(GroupAddress("1/1/1").raw).stats()["processed"] == 10))
+        stats = self.dispatcher.shardOf(GroupAddress("1/1/1").raw).stats()
+        self.assertEqual(stats["depth"], 0)
+        self.assertGreaterEqual(stats["maxLatency"], stats["latency"])
+        self.assertEqual(sum(stats["processed"] for stats in self.dispatcher.stats()), 10)
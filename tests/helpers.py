@@ -0,0 +1,63 @@
+# -*- coding: utf-8 -*-
+
+""" Helpers shared by the tests
+"""
+
+import time
+
+from pyknyx.stack.cemi.cemiLData import CEMILData
+from pyknyx.stack.groupAddress import GroupAddress
+from pyknyx.stack.individualAddress import IndividualAddress
+from pyknyx.stack.priority import Priority
+from pyknyx.stack.layer2.l_dataServiceBase import L_DataServiceBroadcast
+from pyknyx.stack.layer7.apci import APCI
+from pyknyx.stack.layer7.apdu import APDU
+
+
+class FakeClock(object):
+    """ Time source, moved by hand
+    """
+    def __init__(self):
+        self.now = 1000.
+
+    def __call__(self):
+        return self.now
+
+
+class RecordingBus(L_DataServiceBroadcast):
+    """ Broadcast layer2 recording the frames ETS sends to it
+    """
+    def __init__(self, ets):
+        super(RecordingBus, self).__init__(ets)
+        self.sent = []
+
+    def dataInd(self, cEMI):
+        self.sent.append(cEMI)
+
+
+def makeFrame(gad="1/1/1", value=1, src="1.2.3", apci=APCI.GROUPVALUE_WRITE, hopCount=6):
+    """ Build a group frame, as received from the bus
+
+    @param value: small value, sent in the APCI byte, or data
+    @type value: int or bytearray
+
+    @param src: source address (None: no source)
+    @type src: str
+    """
+    if isinstance(value, int):
+        tPDU = bytearray((apci >> 8, apci & 0xff | value & 0x3f))
+    else:
+        tPDU = APDU.makeGroupValue(apci, value, len(value))
+    return CEMILData.groupData(GroupAddress(gad), Priority("low"), hopCount, tPDU,
+                               IndividualAddress(src) if src is not None else 0)
+
+
+def waitFor(predicate, timeout=2.):
+    """ Wait until predicate() is true, or timeout (in s)
+
+    @return: last predicate() result
+    """
+    deadline = time.time() + timeout
+    while not predicate() and time.time() < deadline:
+        time.sleep(0.01)
+    return predicate()
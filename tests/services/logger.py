@@ -0,0 +1,128 @@
+# -*- coding: utf-8 -*-
+
+from pyknyx.services.logger import *
+import threading
+import time
+import unittest
+from helpers import FakeClock
+
+# Mute logger
+from pyknyx.services.logger import logging
+logger = logging.getLogger(__name__)
+logging.getLogger("pyknyx").setLevel(logging.ERROR)
+
+
+class RecordingHandler(logging.Handler):
+
+    def __init__(self, delay=0.):
+        super(RecordingHandler, self).__init__()
+        self.delay = delay
+        self.messages = []
+        self.threads = set()
+
+    def emit(self, record):
+        time.sleep(self.delay)
+        self.threads.add(threading.current_thread().name)
+        self.messages.append(record.getMessage())
+
+
+def makeRecord(msg, args=None, lineno=10):
+    return logging.LogRecord("pyknyx.test", logging.WARNING, "test.py", lineno, msg, args, None)
+
+
+class RateLimitFilterTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.clock = FakeClock()
+        self.filter = RateLimitFilter(burst=2, interval=10., clock=self.clock)
+
+    def tearDown(self):
+        pass
+
+    def test_filter(self):
+        passed = [self.filter.filter(makeRecord("frame %d", (i,))) for i in range(5)]
+        self.assertEqual(passed, [True, True, False, False, False])
+
+        # Other call site
+        self.assertTrue(self.filter.filter(makeRecord("other", lineno=20)))
+
+        # Next interval: the first message tells how many were suppressed
+        self.clock.now += 10.
+        record = makeRecord("frame %d", (5,))
+        self.assertTrue(self.filter.filter(record))
+        self.assertEqual(record.getMessage(), "frame 5 (suppressed 3 similar messages)")
+
+    def test_summaries(self):
+        for i in range(4):
+            self.filter.filter(makeRecord("frame %d", (i,)))
+        self.assertEqual(self.filter.summaries(), [])
+        self.clock.now += 10.
+        summaries = self.filter.summaries()
+        self.assertEqual([record.getMessage() for record in summaries], ["suppressed 2 similar messages: frame 2"])
+        self.assertEqual(self.filter.summaries(), [])
+
+
+class AsyncHandlerTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.target = RecordingHandler()
+        self.logger = logging.getLogger("pyknyx.test.async")
+        self.logger.propagate = False
+        self.logger.setLevel(logging.INFO)
+
+    def tearDown(self):
+        for handler in list(self.logger.handlers):
+            self.logger.removeHandler(handler)
+            handler.close()
+
+    def test_emit(self):
+        handler = AsyncHandler([self.target], burst=None)
+        handler.start()
+        self.logger.addHandler(handler)
+        data = bytearray(b"\x01")
+        self.logger.info("data=%r", data)
+        data[0] = 2  # formatted when logged, not when written
+        handler.stop()
+        self.assertEqual(self.target.messages, ["data=bytearray(b'\\x01')"])
+        self.assertEqual(self.target.threads, set(["Logger"]))
+
+    def test_rateLimit(self):
+        handler = AsyncHandler([self.target], burst=3, interval=60.)
+        handler.start()
+        self.logger.addHandler(handler)
+        for i in range(1000):
+            self.logger.warning("no registered group for that GAD (%d)", i)
+        handler.rateLimit._interval = 0.  # end of interval
+        handler.stop()
+        self.assertEqual(self.target.messages[:3], ["no registered group for that GAD (%d)" % i for i in range(3)])
+        self.assertEqual(self.target.messages[3:],
+                         ["suppressed 997 similar messages: no registered group for that GAD (3)"])
+
+    def test_full(self):
+        self.target.delay = 0.01
+        handler = AsyncHandler([self.target], capacity=2, burst=None)
+        handler.start()
+        self.logger.addHandler(handler)
+        start = time.time()
+        for i in range(50):
+            self.logger.info("message %d", i)
+        self.assertLess(time.time() - start, 0.25)  # never blocks
+        handler.stop()
+        self.assertLess(len(self.target.messages), 50)
+        self.assertTrue(self.target.messages[-1].startswith("log queue full: dropped"))
+
+    def test_enableAsync(self):
+        pyknyxLogger = logging.getLogger("pyknyx")
+        handlers = list(pyknyxLogger.handlers)
+        handler = enableAsync()
+        try:
+            self.assertIs(enableAsync(), handler)
+            self.assertEqual(pyknyxLogger.handlers, [handler])
+            self.assertEqual(list(handler.handlers), handlers)
+        finally:
+            disableAsync()
+        self.assertEqual(pyknyxLogger.handlers, handlers)
+
+
+if __name__ == '__main__':
+    unittest.main()
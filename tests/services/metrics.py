@@ -0,0 +1,190 @@
+# -*- coding: utf-8 -*-
+
+from pyknyx.services.metrics import *
+import gc
+import json
+import unittest
+import weakref
+
+from six.moves.urllib.request import urlopen
+
+from pyknyx.core.ets import ETS
+from pyknyx.core.groupListener import GroupListener
+from pyknyx.stack.stack import Stack
+from pyknyx.stack.groupAddress import GroupAddress
+from pyknyx.stack.priority import Priority
+from pyknyx.stack.priorityQueue import PriorityQueue
+from pyknyx.stack.layer2.l_dataService import PRIORITY_DISTRIBUTION
+from helpers import RecordingBus, makeFrame
+
+# Mute logger
+from pyknyx.services.logger import logging
+logger = logging.getLogger(__name__)
+logging.getLogger("pyknyx").setLevel(logging.ERROR)
+
+
+class RecordingListener(GroupListener):
+
+    def __init__(self):
+        super(RecordingListener, self).__init__()
+        self.written = []
+
+    def onWrite(self, src, data):
+        self.written.append(data)
+
+
+def find(snapshot, name, **labels):
+    for metric in snapshot:
+        if metric["name"] == name and all(metric["labels"].get(key) == value for key, value in labels.items()):
+            return metric["value"]
+    raise KeyError(name)
+
+
+class MetricsTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.metrics = Metrics()
+        self.metrics.enabled = True
+        self.metrics.reset()
+
+    def tearDown(self):
+        self.metrics.enabled = False
+
+    def test_constructor(self):
+        self.assertIs(Metrics(), metrics)
+
+    def test_counter(self):
+        counter = self.metrics.counter("test_counter_total", "test counter", layer2="a")
+        self.assertIs(self.metrics.counter("test_counter_total", layer2="a"), counter)
+        self.assertIsNot(self.metrics.counter("test_counter_total", layer2="b"), counter)
+        counter.inc()
+        counter.inc(2)
+        self.assertEqual(counter.value, 3)
+        self.metrics.reset()
+        self.assertEqual(counter.value, 0)
+        with self.assertRaises(MetricsValueError):
+            self.metrics.gauge("test_counter_total")
+
+    def test_gauge(self):
+        values = [12]
+        gauge = self.metrics.gauge("test_gauge", "test gauge", lambda: values[0])
+        self.assertEqual(gauge.value, 12)
+        values[0] = 3
+        self.assertEqual(find(self.metrics.snapshot(), "test_gauge"), 3)
+
+        # Registered again by a new owner
+        self.metrics.gauge("test_gauge", "test gauge", lambda: 7)
+        self.assertEqual(gauge.value, 7)
+
+    def test_unregister(self):
+        self.metrics.queue("test unregister", lambda: None)
+        self.metrics.counter("test_unregister_total", "test unregister", layer2="unregistered a")
+        self.metrics.counter("test_unregister_total", "test unregister", layer2="unregistered b")
+        with self.assertRaises(MetricsValueError):
+            self.metrics.unregister()
+        self.assertEqual(self.metrics.unregister(queue="test unregister"), 8)
+        self.assertEqual(self.metrics.unregister(queue="test unregister"), 0)
+        self.assertEqual(self.metrics.unregister(layer2="unregistered a"), 1)
+        self.assertIn("test_unregister_total", self.metrics.exposition())
+        self.metrics.unregister(layer2="unregistered b")
+        self.assertNotIn("test_unregister_total", self.metrics.exposition())
+
+    def test_histogram(self):
+        with self.assertRaises(MetricsValueError):
+            Histogram("test", (), (0.2, 0.1))
+        histogram = self.metrics.histogram("test_latency_seconds", "test histogram", buckets=(0.1, 0.2))
+        for value in (0.05, 0.1, 0.15, 1.):
+            histogram.observe(value)
+        value = histogram.value
+        self.assertEqual(value["buckets"], [(0.1, 2), (0.2, 3), (float("inf"), 4)])
+        self.assertEqual(value["count"], 4)
+        self.assertAlmostEqual(value["sum"], 1.3)
+
+    def test_queue(self):
+        queue = PriorityQueue(PRIORITY_DISTRIBUTION, 1, PriorityQueue.DROP_NEWEST)
+        self.metrics.queue("test queue", lambda: queue)
+        queue.add(1, Priority("urgent"))
+        queue.add(2, Priority("urgent"))
+        snapshot = self.metrics.snapshot()
+        self.assertEqual(find(snapshot, "pyknyx_queue_depth", queue="test queue", priority="urgent"), 1)
+        self.assertEqual(find(snapshot, "pyknyx_queue_depth", queue="test queue", priority="low"), 0)
+        self.assertEqual(find(snapshot, "pyknyx_queue_dropped_total", queue="test queue", priority="urgent"), 1)
+
+    def test_exposition(self):
+        self.metrics.counter("test_exposition_total", "test exposition", layer2='a "b"').inc(5)
+        self.metrics.histogram("test_exposition_seconds", "test exposition", buckets=(0.5,)).observe(0.25)
+        text = self.metrics.exposition()
+        self.assertIn("# TYPE test_exposition_total counter\n", text)
+        self.assertIn('test_exposition_total{layer2="a \\"b\\""} 5\n', text)
+        self.assertIn('test_exposition_seconds_bucket{le="0.5"} 1\n', text)
+        self.assertIn('test_exposition_seconds_bucket{le="+Inf"} 1\n', text)
+        self.assertIn("test_exposition_seconds_count 1\n", text)
+
+    def test_server(self):
+        self.metrics.counter("test_server_total", "test server").inc()
+        server = MetricsServer(0)
+        server.start()
+        try:
+            url = "http://127.0.0.1:%d" % server.port
+            text = urlopen(url + "/metrics", timeout=2).read().decode("utf-8")
+            self.assertIn("test_server_total 1\n", text)
+            snapshot = json.loads(urlopen(url + "/stats", timeout=2).read().decode("utf-8"))
+            self.assertEqual(find(snapshot, "test_server_total"), 1)
+        finally:
+            server.stop()
+
+    def test_stack(self):
+        ets = ETS("1.5.0", addrRange=10, transCls=None)
+        bus = RecordingBus(ets)
+        stack = Stack(ets, "1.5.1")
+        listener = RecordingListener()
+        stack.agds.subscribe(GroupAddress("1/2/3"), listener)
+
+        for gad in ("1/2/3", "1/2/3", "1/2/4"):
+            ets.putFrame(bus, makeFrame(gad, 1))
+        while len(ets.queue):
+            ets.processFrame(*ets.queue.removeNowait())
+        self.assertEqual(len(listener.written), 2)
+
+        snapshot = self.metrics.snapshot()
+        self.assertEqual(find(snapshot, "pyknyx_layer2_rx_frames_total", layer2=bus.metricsLabel), 3)
+        self.assertEqual(find(snapshot, "pyknyx_layer2_tx_frames_total", layer2="L_DataService 1.5.1"), 2)
+        self.assertEqual(find(snapshot, "pyknyx_ets_unroutable_frames_total", ets="ETS 1.5.0"), 1)
+        self.assertEqual(find(snapshot, "pyknyx_group_telegrams_total", service="write"), 2)
+        self.assertEqual(find(snapshot, "pyknyx_delivery_latency_seconds")["count"], 2)
+
+    def test_stop(self):
+        ets = ETS("1.7.0", addrRange=10, transCls=None)
+        bus = RecordingBus(ets)
+        stack = Stack(ets, "1.7.5")
+        self.assertEqual(bus.metricsLabel, "RecordingBus 1.7.1")
+        snapshot = self.metrics.snapshot()
+        self.assertEqual(find(snapshot, "pyknyx_layer2_rx_frames_total", layer2=bus.metricsLabel), 0)
+        self.assertEqual(find(snapshot, "pyknyx_queue_depth", queue="ETS 1.7.0", priority="low"), 0)
+
+        ets.stop()
+        snapshot = self.metrics.snapshot()
+        for labels in (dict(layer2=bus.metricsLabel), dict(layer2="L_DataService 1.7.5"), dict(ets="ETS 1.7.0"),
+                       dict(queue="ETS 1.7.0")):
+            self.assertFalse([metric for metric in snapshot
+                              if all(metric["labels"].get(key) == value for key, value in labels.items())])
+
+        # Metrics functions do not keep the engine and its layer2 alive anymore
+        refs = [weakref.ref(obj) for obj in (ets, bus, stack)]
+        del ets, bus, stack
+        gc.collect()
+        self.assertEqual([ref() for ref in refs], [None] * 3)
+
+    def test_disabled(self):
+        self.metrics.enabled = False
+        ets = ETS("1.6.0", addrRange=10, transCls=None)
+        bus = RecordingBus(ets)
+        cEMI = makeFrame("1/2/3", 1)
+        ets.putFrame(bus, cEMI)
+        ets.processFrame(*ets.queue.removeNowait())
+        self.assertIsNone(cEMI.rxTime)
+        self.assertEqual(bus.rxFrames.value, 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
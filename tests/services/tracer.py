@@ -0,0 +1,138 @@
+# -*- coding: utf-8 -*-
+
+from pyknyx.services.tracer import *
+import json
+import unittest
+
+from six.moves.urllib.request import urlopen
+
+from pyknyx.services.logger import RateLimitFilter, setLevel
+from pyknyx.services.metrics import MetricsServer
+import pyknyx.core.ets
+import pyknyx.stack.stack
+
+# Mute logger
+from pyknyx.services.logger import logging
+logger = logging.getLogger(__name__)
+logging.getLogger("pyknyx").setLevel(logging.ERROR)
+
+
+class Formatted(object):
+    """ Counts how many times it is formatted
+    """
+    def __init__(self):
+        self.count = 0
+
+    def __repr__(self):
+        self.count += 1
+        return "<Formatted>"
+
+
+class RecordingHandler(logging.Handler):
+
+    def __init__(self):
+        super(RecordingHandler, self).__init__()
+        self.messages = []
+        self.records = []
+
+    def emit(self, record):
+        self.messages.append(record.getMessage())
+        self.records.append(record)
+
+
+class TracerTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.trace = tracer("test")
+        self.handler = RecordingHandler()
+        logging.getLogger("pyknyx.trace.test").addHandler(self.handler)
+
+    def tearDown(self):
+        logging.getLogger("pyknyx.trace.test").removeHandler(self.handler)
+        disable("test*")
+
+    def test_constructor(self):
+        self.assertIs(tracer("test"), self.trace)
+        self.assertFalse(self.trace.enabled)
+        self.assertIn("ets", tracers())
+        self.assertIn("layer7", tracers())
+
+    def test_enable(self):
+        other = tracer("test2")
+        self.assertEqual(enable("test?"), [other])
+        self.assertFalse(self.trace.enabled)
+        self.assertTrue(tracers()["test2"])
+        enable("test*")
+        self.assertTrue(self.trace.enabled)
+        disable("test")
+        self.assertFalse(self.trace.enabled)
+        self.assertTrue(other.enabled)
+        with self.assertRaises(TracerValueError):
+            enable("nothing*")
+
+    def test_lazy(self):
+        arg = Formatted()
+        if self.trace.enabled:
+            self.trace("arg=%r", arg)
+        self.assertEqual(arg.count, 0)
+        self.assertEqual(self.handler.messages, [])
+
+        # Emitted even if the pyknyx logger level is higher
+        enable("test")
+        if self.trace.enabled:
+            self.trace("arg=%r", arg)
+        self.assertTrue(arg.count)
+        self.assertEqual(self.handler.messages, ["arg=<Formatted>"])
+
+    def test_callSite(self):
+        self.handler.addFilter(RateLimitFilter(burst=3))
+        enable("test")
+        for i in range(3):
+            if self.trace.enabled:
+                self.trace("A%d", i)
+        for i in range(3):
+            if self.trace.enabled:
+                self.trace("B%d", i)
+        self.assertEqual(self.handler.messages, ["A0", "A1", "A2", "B0", "B1", "B2"])
+        self.assertEqual(set(record.pathname for record in self.handler.records), set((__file__,)))
+        linenos = [record.lineno for record in self.handler.records]
+        self.assertEqual(len(set(linenos[:3])), 1)
+        self.assertEqual(len(set(linenos[3:])), 1)
+        self.assertNotEqual(linenos[0], linenos[3])
+
+    def test_sync(self):
+        other = tracer("test2")
+        enable("test2")
+        try:
+            setLevel("debug")
+            self.assertTrue(self.trace.enabled)
+            self.assertTrue(tracers()["udp"])
+            if self.trace.enabled:
+                self.trace("arg=%d", 1)
+            self.assertEqual(self.handler.messages, ["arg=1"])
+        finally:
+            setLevel("error")
+        self.assertFalse(self.trace.enabled)
+        self.assertFalse(tracers()["udp"])
+
+        # Explicitly enabled tracers stay enabled
+        self.assertTrue(other.enabled)
+
+    def test_server(self):
+        server = MetricsServer(0)
+        server.start()
+        try:
+            url = "http://127.0.0.1:%d/trace" % server.port
+            state = json.loads(urlopen(url + "?enable=test", data=b"", timeout=2).read().decode("utf-8"))
+            self.assertTrue(state["test"])
+            self.assertTrue(self.trace.enabled)
+            state = json.loads(urlopen(url + "?disable=test", data=b"", timeout=2).read().decode("utf-8"))
+            self.assertFalse(state["test"])
+            state = json.loads(urlopen(url, timeout=2).read().decode("utf-8"))
+            self.assertFalse(state["test"])
+        finally:
+            server.stop()
+
+
+if __name__ == '__main__':
+    unittest.main()
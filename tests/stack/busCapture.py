@@ -0,0 +1,86 @@
+# -*- coding: utf-8 -*-
+
+from pyknyx.stack.busCapture import *
+import os
+import shutil
+import tempfile
+import unittest
+
+from pyknyx.stack.cemi.cemiLData import CEMILData
+from pyknyx.stack.groupAddress import GroupAddress
+from helpers import makeFrame
+
+# Mute logger
+from pyknyx.services.logger import logging
+logger = logging.getLogger(__name__)
+logging.getLogger("pyknyx").setLevel(logging.ERROR)
+
+
+class BusCaptureTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.path = os.path.join(self.dir, "bus.cap")
+
+    def tearDown(self):
+        shutil.rmtree(self.dir)
+
+    def _write(self, count, append=False, close=True, start=0.):
+        writer = BusCaptureWriter(self.path, append=append, blockSize=64)
+        for i in range(count):
+            writer.write("bus" if i % 2 else "device", makeFrame("1/1/%d" % i, i % 2).frame.raw, start + i)
+        if close:
+            writer.close()
+        else:
+            writer.flush()
+        return writer
+
+    def test_constructor(self):
+        with self.assertRaises(BusCaptureValueError):
+            BusCaptureWriter(self.path, blockSize=0)
+        with open(self.path, "wb") as file_:
+            file_.write(b"not a capture file")
+        with self.assertRaises(BusCaptureValueError):
+            BusCaptureReader(self.path)
+
+    def test_sourceName(self):
+        self.assertEqual(sourceName("knxd"), "knxd")
+        self.assertEqual(sourceName(object()), "object")
+
+    def test_writeRead(self):
+        self._write(10)
+        reader = BusCaptureReader(self.path)
+        self.assertEqual(len(reader), 10)
+        self.assertGreater(len(reader.blocks), 1)
+        frames = list(reader)
+        self.assertEqual([timestamp for timestamp, source, frame in frames], list(range(10)))
+        self.assertEqual([source for timestamp, source, frame in frames], ["device", "bus"] * 5)
+        cEMI = CEMILData(frames[3][2], copy=False)
+        self.assertEqual(cEMI.destinationAddress, GroupAddress("1/1/3"))
+        self.assertEqual(cEMI.npdu, makeFrame("1/1/3", 1).npdu)
+        del frames, cEMI
+        reader.close()
+
+    def test_start(self):
+        self._write(20)
+        reader = BusCaptureReader(self.path)
+        self.assertEqual([timestamp for timestamp, source, frame in reader.frames(start=12.5)], list(range(13, 20)))
+        self.assertEqual(len(list(reader.frames(start=100))), 0)
+        reader.close()
+
+    def test_noIndex(self):
+        writer = self._write(10, close=False)
+        with open(self.path, "ab") as file_:
+            file_.write(b"PKXB\x00")  # incomplete block
+        reader = BusCaptureReader(self.path)
+        self.assertEqual(len(reader), 10)
+        self.assertEqual(len(list(reader)), 10)
+        reader.close()
+        writer.close()
+
+    def test_append(self):
+        self._write(5)
+        self._write(5, append=True, start=5.)
+        reader = BusCaptureReader(self.path)
+        self.assertEqual([timestamp for timestamp, source, frame in reader], list(range(10)))
+        reader.close()
@@ -29,3 +29,10 @@ class CEMILDataTestCase(unittest.TestCase):
             import pdb;pdb.set_trace()
             CEMILData(b")\x03\xff\xff\xff\xbc\xd0\x11\x04\x10\x04\x03\x00\x80\x19,")  # ext frame
 
+
+    def test_groupData(self):
+        cEMI = CEMILData.groupData(GroupAddress("3/1/2"), Priority("low"), 5, bytearray(b"\x00\x80"), IndividualAddress("1.1.14"))
+        self.assertEqual(cEMI.frame.raw, self.frame2.frame.raw)
+        self.assertEqual(cEMI.hopCount, 5)
+        cEMI.sourceAddress = IndividualAddress("1.1.15")
+        self.assertEqual(cEMI.sourceAddress, IndividualAddress("1.1.15"))
@@ -121,3 +121,28 @@ class CEMILDataFrameTestCase(unittest.TestCase):
         self.assertEqual(self.frame1.npdu, b'\xff\xff')
         self.assertEqual(self.frame2.npdu, b'\x01\x00\x80')
         self.assertEqual(self.frame3.npdu, b'\x03\x00\x80\x19,')
+
+    def test_view(self):
+        data = b"\x00\x00)\x00\xbc\xd0\x11\x0e\x19\x02\x01\x00\x80"
+        view = memoryview(data)[2:]
+        frame = CEMILDataFrame(view, copy=False)
+        self.assertIs(frame.raw, view)
+        self.assertEqual(frame.sa, 4366)
+        self.assertEqual(frame.da, 6402)
+        self.assertEqual(frame.npdu, b'\x01\x00\x80')
+        copy = frame.copy()
+        self.assertIsInstance(copy.raw, bytearray)
+
+        frame.ctrl2 = 0xc0  # copy on write
+        self.assertIsInstance(frame.raw, bytearray)
+        self.assertEqual(frame.raw, b")\x00\xbc\xc0\x11\x0e\x19\x02\x01\x00\x80")
+        self.assertEqual(data, b"\x00\x00)\x00\xbc\xd0\x11\x0e\x19\x02\x01\x00\x80")
+        self.assertEqual(copy.ctrl2, 0xd0)
+
+    def test_cache(self):
+        self.frame5.sa = 0x1234
+        self.assertEqual(self.frame5.sah, 0x12)
+        self.assertEqual(self.frame5.raw[7:9], b"\x12\x34")
+        self.frame5.dal = 0x56
+        self.assertEqual(self.frame5.da, 0x1056)
+        self.assertEqual(CEMILDataFrame(self.frame5.raw).da, 0x1056)
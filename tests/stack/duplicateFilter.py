@@ -0,0 +1,71 @@
+# -*- coding: utf-8 -*-
+
+from pyknyx.stack.duplicateFilter import *
+import unittest
+
+from helpers import FakeClock, makeFrame
+
+# Mute logger
+from pyknyx.services.logger import logging
+logger = logging.getLogger(__name__)
+logging.getLogger("pyknyx").setLevel(logging.ERROR)
+
+
+class DuplicateFilterTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.clock = FakeClock()
+        self.filter = DuplicateFilter(window=0.5, maxEntries=3, clock=self.clock)
+        self.tc1 = object()
+        self.tc2 = object()
+
+    def tearDown(self):
+        pass
+
+    def test_constructor(self):
+        with self.assertRaises(DuplicateFilterValueError):
+            DuplicateFilter(window=0)
+        with self.assertRaises(DuplicateFilterValueError):
+            DuplicateFilter(maxEntries=0)
+
+    def test_key(self):
+        cEMI = makeFrame()
+        repeated = makeFrame(hopCount=5)
+        repeated.repeat = CEMILData.R_REPEAT
+        self.assertEqual(DuplicateFilter.key(cEMI), DuplicateFilter.key(repeated))
+        self.assertNotEqual(DuplicateFilter.key(cEMI), DuplicateFilter.key(makeFrame(value=0)))
+        self.assertNotEqual(DuplicateFilter.key(cEMI), DuplicateFilter.key(makeFrame(src="1.2.4")))
+        self.assertNotEqual(DuplicateFilter.key(cEMI), DuplicateFilter.key(makeFrame(gad="1/1/2")))
+
+    def test_isDuplicate(self):
+        self.assertFalse(self.filter.isDuplicate(makeFrame(), self.tc1))
+
+        repeated = makeFrame()
+        repeated.repeat = CEMILData.R_REPEAT
+        self.assertTrue(self.filter.isDuplicate(repeated, self.tc1))
+        self.assertTrue(self.filter.isDuplicate(makeFrame(), self.tc2))
+        self.assertTrue(self.filter.isDuplicate(makeFrame(hopCount=5), self.tc1))
+        self.assertEqual(self.filter.suppressed, 3)
+
+        # Same telegram sent again
+        self.assertFalse(self.filter.isDuplicate(makeFrame(), self.tc1))
+        self.assertFalse(self.filter.isDuplicate(makeFrame(value=0), self.tc2))
+        self.assertEqual(self.filter.passed, 3)
+
+    def test_window(self):
+        self.assertFalse(self.filter.isDuplicate(makeFrame(), self.tc1))
+        self.clock.now += 0.4
+        self.assertTrue(self.filter.isDuplicate(makeFrame(), self.tc2))
+        self.clock.now += 0.2
+        self.assertFalse(self.filter.isDuplicate(makeFrame(), self.tc2))
+        self.assertEqual(len(self.filter), 1)
+
+    def test_maxEntries(self):
+        for value in range(4):
+            self.assertFalse(self.filter.isDuplicate(makeFrame(value=value), self.tc1))
+        self.assertEqual(len(self.filter), 3)
+        self.assertEqual(self.filter.evicted, 1)
+        self.assertFalse(self.filter.isDuplicate(makeFrame(value=0), self.tc2))
+        self.assertTrue(self.filter.isDuplicate(makeFrame(value=3), self.tc2))
+        self.filter.clear()
+        self.assertEqual(len(self.filter), 0)
@@ -143,3 +143,14 @@ class GroupAddressTestCase(unittest.TestCase):
         with self.assertRaises(GroupAddressValueError):
             self.ad1.outFormatLevel = 4
 
+
+    def test_fromRaw(self):
+        gad = GroupAddress.fromRaw(2563)
+        self.assertIs(gad, GroupAddress.fromRaw(2563))
+        self.assertEqual(gad, self.ad1)
+        self.assertEqual(gad.address, "1/2/3")
+        with self.assertRaises(GroupAddressValueError):
+            gad.outFormatLevel = 2
+        self.ad1.outFormatLevel = 2
+        self.assertEqual(self.ad1.address, "1/515")
+        self.assertEqual(gad.address, "1/2/3")
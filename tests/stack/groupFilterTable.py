@@ -0,0 +1,60 @@
+# -*- coding: utf-8 -*-
+
+from pyknyx.stack.groupFilterTable import *
+import unittest
+
+# Mute logger
+from pyknyx.services.logger import logging
+logger = logging.getLogger(__name__)
+logging.getLogger("pyknyx").setLevel(logging.ERROR)
+
+
+class GroupFilterTableTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.table = GroupFilterTable()
+
+    def tearDown(self):
+        pass
+
+    def test_constructor(self):
+        self.assertTrue(self.table.passAll)
+        self.assertIn(GroupAddress("31/7/255"), self.table)
+        table = GroupFilterTable((GroupAddress("1/2/3"), 0x0a04))
+        self.assertFalse(table.passAll)
+        self.assertEqual(len(table), 2)
+        self.assertEqual(list(table), [GroupAddress("1/2/3"), GroupAddress("1/2/4")])
+        self.assertFalse(GroupFilterTable(()).contains(0))
+
+    def test_add_remove(self):
+        self.table.add(GroupAddress("1/2/3"))
+        self.table.add(GroupAddress("1/2/3"))
+        self.table.add(0xffff)
+        self.assertFalse(self.table.passAll)
+        self.assertEqual(len(self.table), 2)
+        self.assertIn(GroupAddress("1/2/3"), self.table)
+        self.assertNotIn(GroupAddress("1/2/2"), self.table)
+        self.assertTrue(self.table.contains(0xffff))
+        self.table.remove(GroupAddress("1/2/3"))
+        self.table.remove(GroupAddress("1/2/3"))
+        self.assertEqual(len(self.table), 1)
+        self.assertNotIn(GroupAddress("1/2/3"), self.table)
+        with self.assertRaises(GroupFilterTableValueError):
+            self.table.add(0x10000)
+
+    def test_clear(self):
+        self.table.add(GroupAddress("1/2/3"))
+        self.table.clear()
+        self.assertEqual(len(self.table), 0)
+        self.assertNotIn(GroupAddress("1/2/3"), self.table)
+        self.table.clear(passAll=True)
+        self.assertIn(GroupAddress("1/2/3"), self.table)
+
+    def test_fromGadMap(self):
+        table = GroupFilterTable.fromGadMap({"1/-/-": dict(name="light"),
+                                             "1/1/-": dict(name="light_cmd"),
+                                             "1/1/1": dict(name="light_cmd_test"),
+                                             "1/1/2": dict(name="light_cmd_test2")})
+        self.assertEqual(list(table), [GroupAddress("1/1/1"), GroupAddress("1/1/2")])
+        self.table.update((1, 2))
+        self.assertEqual(len(self.table), 2)
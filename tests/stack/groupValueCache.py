@@ -0,0 +1,166 @@
+# -*- coding: utf-8 -*-
+
+from pyknyx.stack.groupValueCache import *
+from pyknyx.core.ets import ETS
+from pyknyx.core.groupListener import GroupListener
+from pyknyx.stack.groupAddress import GroupAddress
+from pyknyx.stack.stack import Stack
+from pyknyx.stack.priority import Priority
+from pyknyx.stack.layer7.apci import APCI
+import os.path
+import shutil
+import tempfile
+import unittest
+from helpers import FakeClock, makeFrame
+
+# Mute logger
+from pyknyx.services.logger import logging
+logger = logging.getLogger(__name__)
+logging.getLogger("pyknyx").setLevel(logging.ERROR)
+
+
+class RecordingListener(GroupListener):
+
+    def __init__(self):
+        super(RecordingListener, self).__init__()
+        self.written = []
+        self.responses = []
+
+    def onWrite(self, src, data):
+        self.written.append((src, data))
+
+    def onResponse(self, src, data):
+        self.responses.append((src, data))
+
+
+class GroupValueCacheTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.clock = FakeClock()
+        self.cache = GroupValueCache(clock=self.clock)
+        self.dir = tempfile.mkdtemp()
+        self.path = os.path.join(self.dir, "values.cache")
+
+    def tearDown(self):
+        self.cache.stop()
+        shutil.rmtree(self.dir)
+
+    def test_update(self):
+        gad = GroupAddress("1/1/1").raw
+        self.assertIsNone(self.cache.get(gad))
+        self.cache.update(gad, IndividualAddress("1.1.1").raw, bytearray(b"\x0c\x1a"))
+        self.assertIn(gad, self.cache)
+        self.assertEqual(len(self.cache), 1)
+        self.assertEqual(self.cache.get(gad), (bytearray(b"\x0c\x1a"), IndividualAddress("1.1.1"), 1000.))
+
+        # Shorter value
+        self.cache.update(gad, IndividualAddress("1.1.2").raw, bytearray(b"\x01"), 1001.)
+        self.assertEqual(self.cache.get(gad), (bytearray(b"\x01"), IndividualAddress("1.1.2"), 1001.))
+        self.assertEqual(len(self.cache), 1)
+
+        # Invalid sizes are ignored
+        self.cache.update(gad, 0, bytearray(15))
+        self.assertEqual(self.cache.get(gad)[0], bytearray(b"\x01"))
+
+        self.cache.forget(gad)
+        self.assertIsNone(self.cache.get(gad))
+        self.assertEqual(len(self.cache), 0)
+
+    def test_maxAge(self):
+        self.cache.update(1, 2, bytearray(b"\x01"))
+        self.clock.now += 60.
+        self.assertIsNotNone(self.cache.get(1, 60.))
+        self.clock.now += 1.
+        self.assertIsNone(self.cache.get(1, 60.))
+        self.assertIsNotNone(self.cache.get(1))
+
+    def test_saveLoad(self):
+        self.cache.update(GroupAddress("1/1/1").raw, IndividualAddress("1.1.1").raw, bytearray(b"\x01"), 10.)
+        self.cache.update(GroupAddress("31/7/255").raw, IndividualAddress("15.15.255").raw, bytearray(range(14)), 20.)
+        self.cache.save(self.path)
+        self.assertFalse(os.path.exists(self.path + ".tmp"))
+
+        cache = GroupValueCache()
+        self.assertEqual(cache.load(self.path), 2)
+        self.assertEqual(cache.gads(), [GroupAddress("1/1/1").raw, GroupAddress("31/7/255").raw])
+        self.assertEqual(cache.get(GroupAddress("31/7/255").raw),
+                         (bytearray(range(14)), IndividualAddress("15.15.255"), 20.))
+
+        with open(self.path, "r+b") as f:
+            f.truncate(40)
+        with self.assertRaises(GroupValueCacheValueError):
+            cache.load(self.path)
+        with open(self.path, "wb") as f:
+            f.write(b"garbage garbage garbage")
+        with self.assertRaises(GroupValueCacheValueError):
+            cache.load(self.path)
+
+    def test_startStop(self):
+        self.cache.update(1, 2, bytearray(b"\x01"))
+        self.cache.start(self.path, 3600.)
+        self.assertFalse(os.path.exists(self.path))
+        self.cache.stop()  # final snapshot
+        cache = GroupValueCache()
+        cache.start(self.path)
+        try:
+            self.assertEqual(cache.get(1)[0], bytearray(b"\x01"))
+        finally:
+            cache.stop()
+
+
+class GroupValueCacheStackTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.ets = ETS("1.2.0", addrRange=10, transCls=None)
+
+    def tearDown(self):
+        pass
+
+    def test_feed(self):
+        sender = Stack(self.ets, "1.2.1")
+        stack = Stack(self.ets, "1.2.2")
+        other = Stack(self.ets, "1.2.3")
+        stack.agds.subscribe("1/1/1", RecordingListener())
+        stack.agds.subscribe("1/1/2", RecordingListener())
+        other.agds.subscribe("1/1/1", RecordingListener())
+        cache = self.ets.groupValueCache
+        updates = []
+        update = cache.update
+        def recordingUpdate(gad, src, data, timestamp=None):
+            updates.append(gad)
+            update(gad, src, data, timestamp)
+        cache.update = recordingUpdate
+
+        # Frames from the bus, once per frame, even if several devices (or none) are bound to the group address
+        self.ets.processFrame(sender._lds, makeFrame("1/1/1", bytearray(b"\x0c\x1a"), "1.3.1"))
+        self.assertEqual(cache.get(GroupAddress("1/1/1").raw)[:2], (bytearray(b"\x0c\x1a"), IndividualAddress("1.3.1")))
+        self.assertEqual(updates, [GroupAddress("1/1/1").raw])
+        self.ets.processFrame(sender._lds, makeFrame("1/1/2", bytearray(b"\x02"), "1.3.1", apci=APCI.GROUPVALUE_RES))
+        self.assertEqual(cache.get(GroupAddress("1/1/2").raw)[0], bytearray(b"\x02"))
+        self.ets.processFrame(sender._lds, makeFrame("2/2/2", bytearray(b"\x03"), "1.3.1"))
+        self.assertEqual(cache.get(GroupAddress("2/2/2").raw)[0], bytearray(b"\x03"))
+        self.ets.processFrame(sender._lds, makeFrame("2/2/3", 0, "1.3.1", apci=APCI.GROUPVALUE_READ))
+        self.assertNotIn(GroupAddress("2/2/3").raw, cache)
+
+        # Values sent by the local devices, when sent
+        del updates[:]
+        stack.agds.groupValueWriteReq(GroupAddress("1/1/3"), Priority(), bytearray(b"\x01"), 0)
+        self.assertEqual(cache.get(GroupAddress("1/1/3").raw)[:2], (bytearray(b"\x01"), IndividualAddress("1.2.2")))
+        self.ets.processFrame(sender._lds, makeFrame("1/1/1", bytearray(b"\x01"), "1.2.1"))
+        self.assertEqual(updates, [GroupAddress("1/1/3").raw])
+
+    def test_initFromCache(self):
+        self.ets.groupValueCache.update(GroupAddress("1/1/1").raw, IndividualAddress("1.2.5").raw, bytearray(b"\x01"))
+        stack = Stack(self.ets, "1.2.1")
+        listener = RecordingListener()
+        group = stack.agds.subscribe("1/1/1", listener)
+        self.assertTrue(stack.initFromCache(group))
+        self.assertEqual(listener.responses, [(IndividualAddress("1.2.5"), bytearray(b"\x01"))])
+
+        self.assertFalse(stack.initFromCache(stack.agds.subscribe("1/1/2", listener)))
+        self.ets.groupValueCache.maxAge = -1.
+        self.assertFalse(stack.initFromCache(group))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -83,3 +83,10 @@ class IndividualAddressTestCase(unittest.TestCase):
         self.assertEqual(self.ad1.device, 3)
         self.assertEqual(self.ad2.device, 3)
 
+
+    def test_fromRaw(self):
+        addr = IndividualAddress.fromRaw(4611)
+        self.assertIs(addr, IndividualAddress.fromRaw(4611))
+        self.assertEqual(addr, self.ad1)
+        self.assertEqual(addr.address, "1.2.3")
+        self.assertEqual((addr + 1).address, "1.2.4")
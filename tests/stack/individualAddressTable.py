@@ -0,0 +1,59 @@
+# -*- coding: utf-8 -*-
+
+from pyknyx.stack.individualAddressTable import *
+import unittest
+from helpers import FakeClock
+
+# Mute logger
+from pyknyx.services.logger import logging
+logger = logging.getLogger(__name__)
+logging.getLogger("pyknyx").setLevel(logging.ERROR)
+
+
+class IndividualAddressTableTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.clock = FakeClock()
+        self.table = IndividualAddressTable(aging=10, maxEntries=3, clock=self.clock)
+        self.tc1 = object()
+        self.tc2 = object()
+
+    def tearDown(self):
+        pass
+
+    def test_constructor(self):
+        with self.assertRaises(IndividualAddressTableValueError):
+            IndividualAddressTable(aging=0)
+        with self.assertRaises(IndividualAddressTableValueError):
+            IndividualAddressTable(maxEntries=0)
+
+    def test_lookup(self):
+        self.table.learn(0x1101, self.tc1)
+        self.assertIs(self.table.lookup(0x1101), self.tc1)
+        self.assertIsNone(self.table.lookup(0x1102))
+        self.assertEqual((self.table.hits, self.table.misses), (1, 1))
+
+        self.table.learn(0x1101, self.tc2)
+        self.assertIs(self.table.lookup(0x1101), self.tc2)
+        self.assertEqual(self.table.moves, 1)
+        self.assertIn(0x1101, self.table)
+
+        self.table.forget(self.tc2)
+        self.assertNotIn(0x1101, self.table)
+
+    def test_aging(self):
+        self.table.learn(0x1101, self.tc1)
+        self.clock.now += 6
+        self.table.learn(0x1102, self.tc1)
+        self.clock.now += 6
+        self.assertIsNone(self.table.lookup(0x1101))
+        self.assertIs(self.table.lookup(0x1102), self.tc1)
+        self.assertEqual(len(self.table), 1)
+
+    def test_maxEntries(self):
+        for raw in range(0x1101, 0x1105):
+            self.table.learn(raw, self.tc1)
+        self.assertEqual(len(self.table), 3)
+        self.assertNotIn(0x1101, self.table)
+        self.table.clear()
+        self.assertEqual(len(self.table), 0)
@@ -46,3 +46,13 @@ class KNXnetIPHeaderTestCase(unittest.TestCase):
     def test_serviceName(self):
         self.assertEqual(self._header1.serviceName, "routing.ind")
         self.assertEqual(self._header2.serviceName, "routing.ind")
+
+    def test_view(self):
+        header = KNXnetIPHeader(frame=memoryview(b"\x06\x10\x05\x30\x00\x11\x29\x00\xbc\xd0\x11\x0e\x19\x02\x01\x00\x80"))
+        self.assertEqual(header.service, KNXnetIPHeader.ROUTING_IND)
+        self.assertEqual(header.totalSize, 17)
+
+    def test_routingBusy(self):
+        header = KNXnetIPHeader(frame=b"\x06\x10\x05\x32\x00\x0c\x06\x00\x00\x64\x00\x00")
+        self.assertEqual(header.service, KNXnetIPHeader.ROUTING_BUSY)
+        self.assertEqual(header.serviceName, "routing-busy.msg")
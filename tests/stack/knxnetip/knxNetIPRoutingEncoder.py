@@ -0,0 +1,45 @@
+# -*- coding: utf-8 -*-
+
+from pyknyx.stack.knxnetip.knxNetIPRoutingEncoder import *
+import unittest
+
+from pyknyx.stack.groupAddress import GroupAddress
+from pyknyx.stack.individualAddress import IndividualAddress
+from pyknyx.stack.priority import Priority
+from pyknyx.stack.layer7.apci import APCI
+from pyknyx.stack.layer7.apdu import APDU
+from pyknyx.stack.cemi.cemiLData import CEMILData
+
+# Mute logger
+from pyknyx.services.logger import logging
+logger = logging.getLogger(__name__)
+logging.getLogger("pyknyx").setLevel(logging.ERROR)
+
+
+class KNXnetIPRoutingEncoderTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.encoder = KNXnetIPRoutingEncoder()
+
+    def tearDown(self):
+        pass
+
+    def test_encodeCEMI(self):
+        raw = bytearray(b"\x29\x00\xbc\xd0\x11\x0e\x19\x02\x01\x00\x80")
+        frame = self.encoder.encodeCEMI(raw)
+        self.assertEqual(bytes(frame), b"\x06\x10\x05\x30\x00\x11" + raw)
+        header = KNXnetIPHeader(frame)
+        self.assertEqual(header.service, KNXnetIPHeader.ROUTING_IND)
+        with self.assertRaises(KNXnetIPRoutingEncoderValueError):
+            self.encoder.encodeCEMI(bytearray(1000))
+
+    def test_groupData(self):
+        tPDU = APDU.makeGroupValue(APCI.GROUPVALUE_WRITE, b"\x00")
+        cEMI = CEMILData.groupData(GroupAddress("3/1/2"), Priority("low"), 5, tPDU, IndividualAddress("1.1.14"))
+        frame = self.encoder.encodeCEMI(cEMI.frame.raw)
+        self.assertEqual(bytes(frame), b"\x06\x10\x05\x30\x00\x11\x29\x00\xbc\xd0\x11\x0e\x19\x02\x01\x00\x80")
+        self.assertEqual(KNXnetIPHeader(frame).totalSize, len(frame))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,61 @@
+# -*- coding: utf-8 -*-
+
+from pyknyx.stack.knxnetip.knxNetIPStructures import *
+import unittest
+
+# Mute logger
+from pyknyx.services.logger import logging
+logger = logging.getLogger(__name__)
+logging.getLogger("pyknyx").setLevel(logging.ERROR)
+
+
+class KNXnetIPStructuresTestCase(unittest.TestCase):
+
+    def setUp(self):
+        pass
+
+    def tearDown(self):
+        pass
+
+    def test_HPAI(self):
+        hpai = KNXnetIPStructures.packHPAI("192.168.1.10", 3671)
+        self.assertEqual(hpai, b"\x08\x01\xc0\xa8\x01\x0a\x0e\x57")
+        self.assertEqual(KNXnetIPStructures.unpackHPAI(hpai), ("192.168.1.10", 3671))
+        with self.assertRaises(KNXnetIPStructValueError):
+            KNXnetIPStructures.unpackHPAI(hpai[:6])
+        with self.assertRaises(KNXnetIPStructValueError):
+            KNXnetIPStructures.unpackHPAI(b"\x08\x02" + hpai[2:])
+
+    def test_connect(self):
+        header, body = KNXnetIPStructures.decode(KNXnetIPStructures.connectRequest())
+        self.assertEqual(header.service, KNXnetIPHeader.CONNECT_REQ)
+        control, data, connType, layer = KNXnetIPStructures.parseConnectRequest(body)
+        self.assertEqual(control, ("0.0.0.0", 0))
+        self.assertEqual(connType, KNXnetIPStructures.TUNNEL_CONNECTION)
+        self.assertEqual(layer, KNXnetIPStructures.TUNNEL_LINKLAYER)
+
+        header, body = KNXnetIPStructures.decode(KNXnetIPStructures.connectResponse(3, KNXnetIPStructures.E_NO_ERROR,
+                                                                                     address=0x11fa))
+        self.assertEqual(header.service, KNXnetIPHeader.CONNECT_RES)
+        self.assertEqual(KNXnetIPStructures.parseConnectResponse(body), (3, 0, ("0.0.0.0", 0), 0x11fa))
+
+        header, body = KNXnetIPStructures.decode(
+            KNXnetIPStructures.connectResponse(0, KNXnetIPStructures.E_NO_MORE_CONNECTIONS))
+        self.assertEqual(KNXnetIPStructures.parseConnectResponse(body),
+                         (0, KNXnetIPStructures.E_NO_MORE_CONNECTIONS, None, None))
+
+    def test_tunneling(self):
+        raw = b"\x11\x00\xbc\xe0\x12\x03\x09\x01\x01\x00\x81"
+        datagram = KNXnetIPStructures.tunnelingRequest(7, 0x101, raw)
+        header, body = KNXnetIPStructures.decode(datagram)
+        self.assertEqual(header.service, KNXnetIPHeader.TUNNELING_REQ)
+        self.assertEqual(header.totalSize, len(datagram))
+        channelId, sequence, status, length = KNXnetIPStructures.parseConnectionHeader(body)
+        self.assertEqual((channelId, sequence, status), (7, 1, 0))
+        self.assertEqual(bytes(body[length:]), raw)
+
+        header, body = KNXnetIPStructures.decode(KNXnetIPStructures.tunnelingAck(7, 1))
+        self.assertEqual(header.service, KNXnetIPHeader.TUNNELING_ACK)
+        self.assertEqual(KNXnetIPStructures.parseConnectionHeader(body), (7, 1, 0, 4))
+        with self.assertRaises(KNXnetIPStructValueError):
+            KNXnetIPStructures.parseConnectionHeader(b"\x08\x07\x01\x00")
@@ -0,0 +1,71 @@
+# -*- coding: utf-8 -*-
+
+from pyknyx.stack.knxnetip.routingFlowControl import *
+import unittest
+from helpers import FakeClock
+
+# Mute logger
+from pyknyx.services.logger import logging
+logger = logging.getLogger(__name__)
+logging.getLogger("pyknyx").setLevel(logging.ERROR)
+
+
+class RoutingFlowControlTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.clock = FakeClock()
+        self.flowControl = RoutingFlowControl(rate=50, clock=self.clock, random_=lambda: 0.5)
+
+    def tearDown(self):
+        pass
+
+    def test_constructor(self):
+        self.assertEqual(self.flowControl.rate, 50)
+        self.assertEqual(RoutingFlowControl(rate=None).rate, None)
+        with self.assertRaises(RoutingFlowControlValueError):
+            RoutingFlowControl(rate=-1)
+
+    def test_pacing(self):
+        self.assertEqual(self.flowControl.delay(), 0)
+        self.flowControl.sent()
+        self.assertAlmostEqual(self.flowControl.delay(), 0.02)
+        self.clock.now += 0.02
+        self.assertEqual(self.flowControl.delay(), 0)
+        self.clock.now += 10
+        self.flowControl.sent()
+        self.assertAlmostEqual(self.flowControl.delay(), 0.02)
+
+        unpaced = RoutingFlowControl(rate=None, clock=self.clock)
+        unpaced.sent()
+        self.assertEqual(unpaced.delay(), 0)
+
+    def test_busy(self):
+        self.flowControl.busy(b"\x06\x00\x00\x64\x00\x00")  # 100ms
+        self.assertTrue(self.flowControl.isBusy)
+        self.assertAlmostEqual(self.flowControl.delay(), 0.1 + 0.5 * 1 * RoutingFlowControl.RANDOM_WAIT)
+        self.assertEqual(self.flowControl.busyCount, 1)
+
+        # 2nd busy: longer random wait
+        self.clock.now += 0.05
+        self.flowControl.busy(b"\x06\x00\x00\x64\x00\x00")
+        self.assertAlmostEqual(self.flowControl.delay(), 0.1 + 0.5 * 2 * RoutingFlowControl.RANDOM_WAIT)
+
+        # busy counter decreases slowly
+        self.clock.now += 10
+        self.assertEqual(self.flowControl.delay(), 0)
+        self.assertFalse(self.flowControl.isBusy)
+        self.assertEqual(self.flowControl._busyCounter, 0)
+
+    def test_busyControl(self):
+        self.flowControl.busy(b"\x06\x00\x00\x64\x00\x01")  # not for us
+        self.assertEqual(self.flowControl.delay(), 0)
+        with self.assertRaises(RoutingFlowControlValueError):
+            self.flowControl.busy(b"\x06\x00")
+
+    def test_lostMessage(self):
+        self.flowControl.lostMessage(b"\x04\x00\x00\x05")
+        self.flowControl.lostMessage(b"\x04\x00\x00\x02")
+        self.assertEqual(self.flowControl.lostMessages, 7)
+        self.assertEqual(self.flowControl.lostMessageCount, 2)
+        with self.assertRaises(RoutingFlowControlValueError):
+            self.flowControl.lostMessage(b"\x04")
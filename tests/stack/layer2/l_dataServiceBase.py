@@ -3,20 +3,51 @@
 from pyknyx.stack.layer2.l_dataServiceBase import *
 import unittest
 
+from pyknyx.core.ets import ETS
+from pyknyx.stack.groupAddress import GroupAddress
+from helpers import makeFrame
+
 # Mute logger
 from pyknyx.services.logger import logging
 logger = logging.getLogger(__name__)
 logging.getLogger("pyknyx").setLevel(logging.ERROR)
 
 
+class Broadcast(L_DataServiceBroadcast):
+
+    def dataInd(self, cEMI):
+        pass
+
+
 class TransceiverTestCase(unittest.TestCase):
 
     def setUp(self):
-        pass
+        self.ets = ETS("1.2.0", addrRange=10, transCls=None)
+        self.l2 = Broadcast(self.ets)
 
     def tearDown(self):
         pass
 
     def test_constructor(self):
-        pass
-
+        self.assertTrue(self.l2.groupFilter.passAll)
+        self.assertFalse(self.l2.learnGroups)
+
+    def test_filterGroups(self):
+        self.assertTrue(self.l2.wantsGroupFrame(makeFrame("1/1/1")))
+        self.l2.filterGroups((GroupAddress("1/1/1"),))
+        self.assertTrue(self.l2.wantsGroupFrame(makeFrame("1/1/1")))
+        self.assertFalse(self.l2.wantsGroupFrame(makeFrame("1/1/2")))
+        self.l2.filterGroups(learn=True)
+        self.assertTrue(self.l2.learnGroups)
+        self.assertFalse(self.l2.wantsGroupFrame(makeFrame("1/1/1")))
+        self.l2.filterGroups()
+        self.assertFalse(self.l2.learnGroups)
+        self.assertTrue(self.l2.wantsGroupFrame(makeFrame("1/1/2")))
+
+    def test_addAddr(self):
+        cEMI = makeFrame("1/1/1")
+        cEMI.destinationAddress = IndividualAddress("1.1.5")
+        self.assertFalse(self.l2.wantsIndividualFrame(cEMI))
+        self.assertTrue(self.l2.wantsIndividualFrame(cEMI, force=True))
+        self.l2.addAddr("1.1.5")
+        self.assertTrue(self.l2.wantsIndividualFrame(cEMI))
@@ -1,6 +1,10 @@
 # -*- coding: utf-8 -*-
 
 from pyknyx.stack.layer7.a_groupDataService import *
+from pyknyx.core.ets import ETS
+from pyknyx.core.groupListener import GroupListener
+from pyknyx.stack.individualAddress import IndividualAddress
+from pyknyx.stack.stack import Stack
 import unittest
 
 # Mute logger
@@ -9,10 +13,38 @@ logger = logging.getLogger(__name__)
 logging.getLogger("pyknyx").setLevel(logging.ERROR)
 
 
+class RecordingTGDS(object):
+
+    def __init__(self):
+        self.sent = []
+        self.subscribed = []
+
+    def setListener(self, listener):
+        pass
+
+    def subscribe(self, gad):
+        self.subscribed.append(gad)
+
+    def groupDataReq(self, gad, priority, aPDU):
+        self.sent.append((gad, aPDU))
+
+
+class RespondingListener(GroupListener):
+
+    def __init__(self, data):
+        super(RespondingListener, self).__init__()
+        self.group = None
+        self.data = data
+
+    def onRead(self, src):
+        self.group.response(Priority(), self.data, len(self.data))
+
+
 class A_GDSTestCase(unittest.TestCase):
 
     def setUp(self):
-        pass
+        self.tgds = RecordingTGDS()
+        self.agds = A_GroupDataService(self.tgds)
 
     def tearDown(self):
         pass
@@ -20,3 +52,55 @@ class A_GDSTestCase(unittest.TestCase):
     def test_constructor(self):
         pass
 
+    def test_readValue(self):
+        future = self.agds.readValue("1/1/1")
+        self.assertIs(self.agds.readValue(GroupAddress("1/1/1")), future)  # coalesced
+        self.assertEqual(len(self.tgds.sent), 1)
+        self.assertEqual(self.tgds.sent[0][1], APDU.makeGroupValue(APCI.GROUPVALUE_READ))
+
+        aPDU = APDU.makeGroupValue(APCI.GROUPVALUE_RES, bytearray(b"\x0c\x1a"), 2)
+        self.agds.groupDataInd(IndividualAddress("1.1.1"), GroupAddress("1/1/1"), Priority(), aPDU)
+        self.assertEqual(future.result(0), (IndividualAddress("1.1.1"), bytearray(b"\x0c\x1a")))
+
+        # Next read sends a new request
+        self.assertIsNot(self.agds.readValue("1/1/1"), future)
+        self.assertEqual(len(self.tgds.sent), 2)
+        self.assertEqual(self.tgds.subscribed, [GroupAddress("1/1/1")])
+
+        # Group addresses already subscribed
+        self.agds.subscribe("1/1/2", GroupListener())
+        self.agds.readValue("1/1/2")
+        self.assertEqual(self.tgds.subscribed, [GroupAddress("1/1/1"), GroupAddress("1/1/2")])
+
+    def test_readValueTimeout(self):
+        future = self.agds.readValue("1/1/1", timeout=0.05)
+        with self.assertRaises(TimeoutError):
+            future.result(2)
+        self.assertIsNot(self.agds.readValue("1/1/1"), future)
+        self.assertEqual(len(self.tgds.sent), 2)
+
+
+
+class A_GDSETSTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.ets = ETS("1.2.0", addrRange=10, transCls=None)
+
+    def tearDown(self):
+        self.ets.stop()
+
+    def test_readValue(self):
+        responder = Stack(self.ets, "1.2.1")
+        listener = RespondingListener(bytearray(b"\x0c\x1a"))
+        listener.group = responder.agds.subscribe("1/1/1", listener)
+        reader = Stack(self.ets, "1.2.2")
+        self.ets.start()
+
+        # The reading stack is not bound to the group address: the response is routed to it once subscribed
+        future = reader.agds.readValue("1/1/1", timeout=2.)
+        self.assertEqual(future.result(5), (IndividualAddress("1.2.1"), bytearray(b"\x0c\x1a")))
+        self.assertEqual(reader.agds.readValue("1/1/1").result(5)[1], bytearray(b"\x0c\x1a"))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,6 +1,9 @@
 # -*- coding: utf-8 -*-
 
 from pyknyx.stack.multicastSocket import *
+import os
+import threading
+import time
 import unittest
 
 # Mute logger
@@ -8,15 +11,45 @@ from pyknyx.services.logger import logging
 logger = logging.getLogger(__name__)
 logging.getLogger("pyknyx").setLevel(logging.ERROR)
 
+MCAST_ADDR = "224.55.36.73"
+MCAST_PORT = os.getpid() % 30000 + 20001
+
 
 class MulticastSocketTestCase(unittest.TestCase):
 
     def setUp(self):
-        pass
+        self.transmitter = MulticastSocketTransmit("0.0.0.0", 0, MCAST_ADDR, MCAST_PORT)
+        self.receiver = MulticastSocketReceive("0.0.0.0", MCAST_PORT, MCAST_ADDR, MCAST_PORT, timeout=None,
+                                               rcvBufSize=65536, ringSize=4)
 
     def tearDown(self):
-        pass
+        self.transmitter.close()
+        self.receiver.close()
 
     def test_constructor(self):
-        pass
-
+        with self.assertRaises(McastSockValueError):
+            MulticastSocketReceive("0.0.0.0", MCAST_PORT, "10.0.0.1", MCAST_PORT)
+        self.assertGreaterEqual(self.receiver.rcvBufSize, 65536)
+
+    def test_receiveMany(self):
+        for i in range(6):
+            self.transmitter.transmit(bytearray((i,)) * (i + 1))
+        time.sleep(0.1)
+
+        frames = self.receiver.receiveMany()
+        self.assertEqual([bytes(frame) for frame, addr in frames], [b"\x00", b"\x01\x01", b"\x02\x02\x02", b"\x03" * 4])
+        self.assertEqual(frames[0][1][1], self.transmitter.localPort)
+        frames = self.receiver.receiveMany()
+        self.assertEqual([bytes(frame) for frame, addr in frames], [b"\x04" * 5, b"\x05" * 6])
+        if self.receiver.dropped is not None:
+            self.assertEqual(self.receiver.dropped, 0)
+
+    def test_wakeup(self):
+        result = []
+        thread = threading.Thread(target=lambda: result.append(self.receiver.receiveMany()))
+        thread.start()
+        time.sleep(0.1)
+        self.receiver.wakeup()
+        thread.join(2)
+        self.assertEqual(result, [[]])
+        self.assertEqual(self.receiver.receiveMany(), [])
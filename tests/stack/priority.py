@@ -47,3 +47,10 @@ class PriorityTestCase(unittest.TestCase):
         self.assertEqual(self.priority6.name, 'normal')
         self.assertEqual(self.priority7.name, 'urgent')
         self.assertEqual(self.priority8.name, 'low')
+
+    def test_fromLevel(self):
+        self.assertIs(Priority.fromLevel(3), Priority.fromLevel(3))
+        self.assertEqual(Priority.fromLevel(3).name, 'low')
+        self.assertEqual(Priority.fromLevel('normal').level, 0x01)
+        with self.assertRaises(PriorityValueError):
+            Priority.fromLevel(4)
@@ -1,22 +1,111 @@
 # -*- coding: utf-8 -*-
 
 from pyknyx.stack.priorityQueue import *
+import threading
+import time
 import unittest
 
+from pyknyx.stack.priority import Priority
+
 # Mute logger
 from pyknyx.services.logger import logging
 logger = logging.getLogger(__name__)
 logging.getLogger("pyknyx").setLevel(logging.ERROR)
 
 
+def fill(queue, items):
+    for obj, level in items:
+        queue.add(obj, Priority(level))
+
+
 class PriorityQueueTestCase(unittest.TestCase):
 
     def setUp(self):
-        pass
+        self.queue = PriorityQueue((-1, 3, 1, 1))
 
     def tearDown(self):
         pass
 
     def test_constructor(self):
-        pass
+        self.assertEqual(len(self.queue), 0)
+        self.assertEqual(self.queue.capacity, (None, None, None, None))
+        self.assertEqual(self.queue.policy, PriorityQueue.DROP_OLDEST)
+        with self.assertRaises(PriorityQueueValueError):
+            PriorityQueue((1,))
+        with self.assertRaises(PriorityQueueValueError):
+            PriorityQueue((-1, 1), capacity=(1, 2, 3))
+        with self.assertRaises(PriorityQueueValueError):
+            PriorityQueue((-1, 1), capacity=0)
+        with self.assertRaises(PriorityQueueValueError):
+            PriorityQueue((-1, 1), policy="dummy")
+
+    def test_distribution(self):
+        fill(self.queue, [("n%d" % i, 'normal') for i in range(5)] +
+                         [("l%d" % i, 'low') for i in range(2)] +
+                         [("s%d" % i, 'system') for i in range(3)])
+        self.assertEqual(self.queue.depths, (3, 5, 0, 2))
+        result = [self.queue.removeNowait() for i in range(10)]
+        self.assertEqual(result, ["s0", "s1", "s2", "n0", "n1", "n2", "l0", "n3", "n4", "l1"])
+        self.assertEqual(len(self.queue), 0)
+        with self.assertRaises(IndexError):
+            self.queue.removeNowait()
+
+    def test_steps(self):
+        """ Priority steps must not share their storage
+        """
+        self.queue.add("a", Priority('normal'))
+        self.assertEqual(self.queue.depths, (0, 1, 0, 0))
+
+    def test_removeMany(self):
+        fill(self.queue, [("n%d" % i, 'normal') for i in range(4)] + [("s", 'system')])
+        self.assertEqual(self.queue.removeMany(3), ["s", "n0", "n1"])
+        self.assertEqual(self.queue.removeMany(10), ["n2", "n3"])
+
+    def test_dropOldest(self):
+        queue = PriorityQueue((-1, 3, 1, 1), capacity=2)
+        self.assertTrue(queue.add("a", Priority('low')))
+        self.assertTrue(queue.add("b", Priority('low')))
+        self.assertTrue(queue.add("c", Priority('low')))
+        self.assertTrue(queue.add("s", Priority('system')))
+        self.assertEqual(queue.dropped, (0, 0, 0, 1))
+        self.assertEqual(queue.removeMany(10), ["s", "b", "c"])
+
+    def test_dropNewest(self):
+        queue = PriorityQueue((-1, 3, 1, 1), capacity=(1, 1, 1, 2), policy=PriorityQueue.DROP_NEWEST)
+        self.assertTrue(queue.add("a", Priority('low')))
+        self.assertTrue(queue.add("b", Priority('low')))
+        self.assertFalse(queue.add("c", Priority('low')))
+        self.assertEqual(queue.dropped, (0, 0, 0, 1))
+        self.assertEqual(queue.removeMany(10), ["a", "b"])
+
+    def test_block(self):
+        queue = PriorityQueue((-1, 3, 1, 1), capacity=1, policy=PriorityQueue.BLOCK)
+        queue.add("a", Priority('low'))
+        added = []
+        thread = threading.Thread(target=lambda: added.append(queue.add("b", Priority('low'))))
+        thread.start()
+        time.sleep(0.1)
+        self.assertEqual(added, [])
+        self.assertEqual(queue.remove(), "a")
+        thread.join(2)
+        self.assertEqual(added, [True])
+        self.assertEqual(queue.remove(), "b")
+
+    def test_close(self):
+        result = []
+        thread = threading.Thread(target=lambda: result.append(self.queue.remove()))
+        thread.start()
+        time.sleep(0.1)
+        self.queue.close()
+        thread.join(2)
+        self.assertEqual(result, [None])
+        self.assertTrue(self.queue.closed)
+        self.assertEqual(self.queue.removeMany(10), [])
 
+    def test_blockedStep(self):
+        queue = PriorityQueue((-1, 0, 1, 1))
+        queue.add("n", Priority('normal'))
+        with self.assertRaises(IndexError):
+            queue.removeNowait()
+        queue.add("l", Priority('low'))
+        self.assertEqual(queue.removeNowait(), "l")
@@ -0,0 +1,57 @@
+# -*- coding: utf-8 -*-
+
+from pyknyx.stack.shmRing import *
+import unittest
+
+# Mute logger
+from pyknyx.services.logger import logging
+logger = logging.getLogger(__name__)
+logging.getLogger("pyknyx").setLevel(logging.ERROR)
+
+
+class ShmRingTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.ring = ShmRing(size=32)
+        self.other = ShmRing(name=self.ring.name, create=False)
+
+    def tearDown(self):
+        self.other.close()
+        self.ring.close()
+
+    def test_constructor(self):
+        with self.assertRaises(ShmRingValueError):
+            ShmRing(size=8)
+        with self.assertRaises(ShmRingValueError):
+            ShmRing(create=False)
+        self.assertEqual(self.other.size, self.ring.size)
+
+    def test_putGet(self):
+        self.assertIsNone(self.other.get())
+        self.assertTrue(self.ring.put(b"abc"))
+        self.assertTrue(self.ring.put(bytearray(b"defg")))
+        self.assertEqual(len(self.ring), 11)
+        self.assertEqual(self.other.get(), b"abc")
+        self.assertEqual(self.other.getMany(10), [b"defg"])
+        self.assertEqual(len(self.ring), 0)
+        with self.assertRaises(ShmRingValueError):
+            self.ring.put(bytes(31))
+
+    def test_full(self):
+        self.assertTrue(self.ring.put(bytes(20)))
+        self.assertFalse(self.ring.put(bytes(10)))
+        self.assertEqual(self.ring.dropped, 1)
+        self.assertTrue(self.ring.put(bytes(8)))
+        self.assertEqual(self.other.getMany(10), [bytes(20), bytes(8)])
+
+    def test_wrap(self):
+        for i in range(50):
+            data = bytes((i,)) * (i % 9 + 1)
+            self.assertTrue(self.ring.put(data))
+            if i % 2:
+                self.assertTrue(self.ring.put(data[::-1]))
+                self.assertEqual(self.other.get(), data)
+                self.assertEqual(self.other.get(), data[::-1])
+            else:
+                self.assertEqual(self.other.get(), data)
+        self.assertIsNone(self.other.get())
@@ -0,0 +1,140 @@
+# -*- coding: utf-8 -*-
+
+from pyknyx.stack.transceiver.knxdTransceiver import *
+import socket
+import struct
+import threading
+import time
+import unittest
+
+from pyknyx.core.ets import ETS
+from pyknyx.stack.individualAddress import IndividualAddress
+from helpers import RecordingBus, waitFor
+
+# Mute logger
+from pyknyx.services.logger import logging
+logger = logging.getLogger(__name__)
+logging.getLogger("pyknyx").setLevel(logging.ERROR)
+
+
+class FakeKnxd(object):
+    """ Minimal knxd, serving a single group socket client at a time
+    """
+    def __init__(self):
+        self.sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        self.sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        self.sock.bind(("127.0.0.1", 0))
+        self.sock.listen(1)
+        self.sock.settimeout(0.1)
+        self.port = self.sock.getsockname()[1]
+        self.client = None
+        self.opened = threading.Event()
+        self.packets = []
+        self.connections = 0
+        self.running = True
+        self.thread = threading.Thread(target=self.run)
+        self.thread.daemon = True
+        self.thread.start()
+
+    def run(self):
+        while self.running:
+            try:
+                client, addr = self.sock.accept()
+            except socket.timeout:
+                continue
+            except socket.error:
+                return
+            self.connections += 1
+            self.client = client
+            client.settimeout(0.1)
+            buf = bytearray()
+            while self.running:
+                try:
+                    data = client.recv(4096)
+                except socket.timeout:
+                    continue
+                except socket.error:
+                    break
+                if not data:
+                    break
+                buf += data
+                while len(buf) >= 2 and len(buf) >= 2 + (buf[0] << 8 | buf[1]):
+                    length = buf[0] << 8 | buf[1]
+                    packet = bytes(buf[2:2 + length])
+                    del buf[:2 + length]
+                    if packet[:2] == b"\x00\x26":
+                        client.sendall(b"\x00\x02\x00\x26")
+                        self.opened.set()
+                    else:
+                        self.packets.append(packet)
+            client.close()
+            self.client = None
+            self.opened.clear()
+
+    def send(self, data):
+        self.client.sendall(data)
+
+    def disconnect(self):
+        self.client.shutdown(socket.SHUT_RDWR)
+
+    def stop(self):
+        self.running = False
+        self.thread.join(1)
+        self.sock.close()
+
+
+def groupPacket(src, dest, tPDU):
+    return struct.pack(">4H", 6 + len(tPDU), EIB_GROUP_PACKET, src, dest) + tPDU
+
+
+class KnxdTransceiverTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.knxd = FakeKnxd()
+        self.ets = ETS("1.2.0", addrRange=10, transCls=KnxdTransceiver,
+                       transParams=dict(url="ip:127.0.0.1:%d" % self.knxd.port, reconnectDelay=0.1))
+        self.knxdTc = self.ets._tc
+        self.bus = RecordingBus(self.ets)
+        self.ets.start()
+
+    def tearDown(self):
+        self.ets.stop()
+        self.knxd.stop()
+
+    def test_constructor(self):
+        for url in ("", "local:", "ip:", "ip:host:port", "tcp:host"):
+            with self.assertRaises(KnxdTransceiverValueError):
+                KnxdTransceiver(self.ets, url=url)
+        with self.assertRaises(KnxdTransceiverValueError):
+            KnxdTransceiver(self.ets, reconnectDelay=0)
+        self.assertEqual(KnxdTransceiver._parseUrl("ip:knxd"), (socket.AF_INET, ("knxd", 6720)))
+        self.assertEqual(KnxdTransceiver._parseUrl("local:/run/knx"), (socket.AF_UNIX, "/run/knx"))
+
+    def test_receive(self):
+        self.assertTrue(self.knxd.opened.wait(2))
+        self.assertTrue(waitFor(lambda: self.knxdTc.connected))
+        packets = b"".join(groupPacket(0x1203, 0x0901, bytes((0x00, 0x80 | i))) for i in range(10))
+        packets += groupPacket(0x1203, 0x0902, b"\x00\x80\x12\x34")
+        self.knxd.send(packets[:7])  # split packet
+        time.sleep(0.05)
+        self.knxd.send(packets[7:])
+        self.assertTrue(waitFor(lambda: len(self.bus.sent) == 11))
+        cEMI = self.bus.sent[1]
+        self.assertEqual(cEMI.sourceAddress, IndividualAddress("1.2.3"))
+        self.assertEqual(cEMI.destinationAddress, GroupAddress("1/1/1"))
+        self.assertEqual(cEMI.npdu, bytearray(b"\x01\x00\x81"))
+        self.assertEqual(self.bus.sent[10].npdu, bytearray(b"\x03\x00\x80\x12\x34"))
+
+    def test_transmit(self):
+        self.assertTrue(waitFor(lambda: self.knxdTc.connected))
+        for i in range(3):
+            self.bus.dataReq(CEMILData.groupData(GroupAddress("1/1/1"), Priority("low"), 6, bytearray((0x00, 0x80 | i))))
+        self.assertTrue(waitFor(lambda: len(self.knxd.packets) == 3))
+        self.assertEqual(self.knxd.packets[2], b"\x00\x27\x09\x01\x00\x82")
+
+    def test_reconnect(self):
+        self.assertTrue(waitFor(lambda: self.knxdTc.connected))
+        self.knxd.disconnect()
+        self.assertTrue(waitFor(lambda: self.knxd.connections == 2 and self.knxdTc.connected))
+        self.bus.dataReq(CEMILData.groupData(GroupAddress("1/1/1"), Priority("low"), 6, bytearray((0x00, 0x81))))
+        self.assertTrue(waitFor(lambda: len(self.knxd.packets) == 1))
@@ -0,0 +1,122 @@
+# -*- coding: utf-8 -*-
+
+from pyknyx.stack.transceiver.loopbackTransceiver import *
+import time
+import unittest
+
+from pyknyx.core.ets import ETS
+from pyknyx.stack.groupAddress import GroupAddress
+from helpers import RecordingBus, makeFrame, waitFor
+
+# Mute logger
+from pyknyx.services.logger import logging
+logger = logging.getLogger(__name__)
+logging.getLogger("pyknyx").setLevel(logging.ERROR)
+
+
+class LoopbackBusTestCase(unittest.TestCase):
+
+    def setUp(self):
+        pass
+
+    def tearDown(self):
+        pass
+
+    def test_constructor(self):
+        with self.assertRaises(LoopbackBusValueError):
+            LoopbackBus(latency=-1)
+        with self.assertRaises(LoopbackBusValueError):
+            LoopbackBus(loss=1.5)
+        self.assertTrue(LoopbackBus().synchronous)
+        self.assertFalse(LoopbackBus(jitter=0.01).synchronous)
+
+
+class LoopbackTransceiverTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.etss = []
+        self.buses = []
+
+    def tearDown(self):
+        for ets in self.etss:
+            ets.stop()
+
+    def makeETS(self, bus, count=3):
+        """ Build ETS attached to the bus, each with a recording layer2
+        """
+        for i in range(count):
+            ets = ETS("1.%d.0" % (i + 1), addrRange=10, transCls=LoopbackTransceiver, transParams=dict(bus=bus))
+            self.buses.append(RecordingBus(ets))
+            self.etss.append(ets)
+        for ets in self.etss:
+            ets.start()
+
+    def test_constructor(self):
+        with self.assertRaises(LoopbackBusValueError):
+            LoopbackTransceiver(None, bus=None)
+
+    def test_synchronous(self):
+        bus = LoopbackBus()
+        self.makeETS(bus)
+        self.assertTrue(waitFor(lambda: len(bus.receivers) == 3))
+        self.etss[0]._tc.dataInd(makeFrame("1/1/1", 1))
+        self.assertEqual(bus.sent, 1)
+        self.assertEqual(bus.delivered, 2)
+        self.assertTrue(waitFor(lambda: len(self.buses[1].sent) == 1 and len(self.buses[2].sent) == 1))
+        self.assertEqual(self.buses[0].sent, [])
+        cEMI = self.buses[1].sent[0]
+        self.assertEqual(cEMI.messageCode, CEMILData.MC_LDATA_IND)
+        self.assertEqual(cEMI.destinationAddress, GroupAddress("1/1/1"))
+        self.assertEqual(self.etss[1]._tc.received, 1)
+        self.assertEqual(self.etss[0]._tc.transmitted, 1)
+
+    def test_forward(self):
+        bus = LoopbackBus()
+        self.makeETS(bus, count=2)
+        self.assertTrue(waitFor(lambda: len(bus.receivers) == 2))
+        self.etss[0].putFrame(self.buses[0], makeFrame("1/1/1", 2))
+        self.assertTrue(waitFor(lambda: len(self.buses[1].sent) == 1))
+        self.assertEqual(self.buses[1].sent[0].hopCount, 4)  # routed twice
+
+    def test_latency(self):
+        bus = LoopbackBus(latency=0.1)
+        self.makeETS(bus, count=2)
+        self.assertTrue(waitFor(lambda: len(bus.receivers) == 2))
+        start = time.time()
+        self.etss[0]._tc.dataInd(makeFrame("1/1/1", 1))
+        self.assertEqual(bus.pending, 1)
+        self.assertTrue(bus.flush(2))
+        self.assertGreaterEqual(time.time() - start, 0.1)
+        self.assertEqual(bus.delivered, 1)
+        self.assertTrue(waitFor(lambda: len(self.buses[1].sent) == 1))
+
+    def test_jitter(self):
+        bus = LoopbackBus(jitter=0.02, seed=1)
+        self.makeETS(bus, count=2)
+        self.assertTrue(waitFor(lambda: len(bus.receivers) == 2))
+        for i in range(20):
+            self.etss[0]._tc.dataInd(makeFrame("1/1/1", i))
+        self.assertTrue(bus.flush(2))
+        self.assertTrue(waitFor(lambda: len(self.buses[1].sent) == 20))
+        self.assertEqual(sorted(cEMI.npdu[-1] & 0x3f for cEMI in self.buses[1].sent), list(range(20)))
+
+    def test_loss(self):
+        bus = LoopbackBus(loss=0.5, seed=1)
+        self.makeETS(bus, count=2)
+        self.assertTrue(waitFor(lambda: len(bus.receivers) == 2))
+        for i in range(100):
+            self.etss[0]._tc.dataInd(makeFrame("1/1/1", i))
+        self.assertEqual(bus.sent, 100)
+        self.assertEqual(bus.lost + bus.delivered, 100)
+        self.assertTrue(20 < bus.lost < 80)
+
+    def test_detach(self):
+        bus = LoopbackBus(latency=0.05)
+        self.makeETS(bus, count=2)
+        self.assertTrue(waitFor(lambda: len(bus.receivers) == 2))
+        self.etss[1].stop()
+        self.assertEqual(len(bus.receivers), 1)
+        self.etss[0]._tc.dataInd(makeFrame("1/1/1", 1))
+        self.assertEqual(bus.pending, 0)
+        self.etss[0].stop()
+        self.assertEqual(bus.receivers, ())
@@ -0,0 +1,84 @@
+# -*- coding: utf-8 -*-
+
+from pyknyx.stack.transceiver.replayTransceiver import *
+import os
+import shutil
+import tempfile
+import time
+import unittest
+
+from pyknyx.core.ets import ETS
+from pyknyx.stack.busCapture import BusCaptureWriter
+from pyknyx.stack.groupAddress import GroupAddress
+from helpers import RecordingBus, makeFrame, waitFor
+
+# Mute logger
+from pyknyx.services.logger import logging
+logger = logging.getLogger(__name__)
+logging.getLogger("pyknyx").setLevel(logging.ERROR)
+
+
+class ReplayTransceiverTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.path = os.path.join(self.dir, "bus.cap")
+
+        # Record frames going through ETS
+        ets = ETS("1.2.0", addrRange=10, transCls=None)
+        bus = RecordingBus(ets)
+        other = RecordingBus(ets)
+        writer = BusCaptureWriter(self.path)
+        ets.recorder = writer
+        ets.start()
+        try:
+            for i in range(5):
+                bus.dataReq(makeFrame("1/1/%d" % i, 1))
+            self.assertTrue(waitFor(lambda: len(other.sent) == 5))
+            self.assertEqual(writer.frames, 5)
+        finally:
+            ets.stop()
+            writer.close()
+
+    def tearDown(self):
+        shutil.rmtree(self.dir)
+
+    def _replay(self, **kwargs):
+        ets = ETS("1.2.0", addrRange=10, transCls=ReplayTransceiver, transParams=dict(path=self.path, **kwargs))
+        bus = RecordingBus(ets)
+        marker = RecordingBus(ets)
+        ets.start()
+        try:
+            self.assertTrue(ets._tc.wait(2.))
+
+            # Frames are dispatched in order: once the marker is received, all replayed frames are
+            marker.dataReq(makeFrame("2/2/2", 0))
+            self.assertTrue(waitFor(lambda: bus.sent and bus.sent[-1].destinationAddress == GroupAddress("2/2/2")))
+        finally:
+            ets.stop()
+        return ets._tc, bus.sent[:-1]
+
+    def test_constructor(self):
+        with self.assertRaises(ReplayTransceiverValueError):
+            ETS("1.2.0", addrRange=10, transCls=ReplayTransceiver, transParams=dict(path=self.path, speed=-1))
+
+    def test_replay(self):
+        transceiver, sent = self._replay(speed=0)
+        self.assertEqual(transceiver.replayed, 5)
+        self.assertEqual([cEMI.destinationAddress for cEMI in sent], [GroupAddress("1/1/%d" % i) for i in range(5)])
+        self.assertEqual(sent[0].npdu, makeFrame("1/1/0", 1).npdu)
+
+    def test_sources(self):
+        transceiver, sent = self._replay(speed=0, sources=("knxd",))
+        self.assertEqual(transceiver.replayed, 0)
+        self.assertEqual(sent, [])
+
+    def test_speed(self):
+        writer = BusCaptureWriter(self.path)
+        writer.write("bus", makeFrame("1/1/1", 1).frame.raw, 100.)
+        writer.write("bus", makeFrame("1/1/2", 1).frame.raw, 101.)
+        writer.close()
+        start = time.time()
+        transceiver, sent = self._replay(speed=5)
+        self.assertEqual(transceiver.replayed, 2)
+        self.assertGreaterEqual(time.time() - start, 0.2)
@@ -0,0 +1,97 @@
+# -*- coding: utf-8 -*-
+
+from pyknyx.stack.transceiver.shmTransceiver import *
+import socket
+import unittest
+
+from pyknyx.core.ets import ETS
+from pyknyx.core.groupListener import GroupListener
+from pyknyx.stack.stack import Stack
+from pyknyx.stack.groupAddress import GroupAddress
+from pyknyx.stack.individualAddress import IndividualAddress
+from pyknyx.stack.priority import Priority
+from pyknyx.stack.shmRing import ShmRing
+from helpers import RecordingBus, makeFrame, waitFor
+
+# Mute logger
+from pyknyx.services.logger import logging
+logger = logging.getLogger(__name__)
+logging.getLogger("pyknyx").setLevel(logging.ERROR)
+
+
+class RecordingListener(GroupListener):
+
+    def __init__(self):
+        super(RecordingListener, self).__init__()
+        self.written = []
+
+    def onWrite(self, src, data):
+        self.written.append(data)
+
+
+class ShmTransceiverTestCase(unittest.TestCase):
+    """ Front and worker ETS in the same process
+    """
+
+    def setUp(self):
+        self.down = ShmRing(4096)
+        self.up = ShmRing(4096)
+        self.downBells = socket.socketpair()
+        self.upBells = socket.socketpair()
+        for sock in self.downBells + self.upBells:
+            sock.setblocking(False)
+
+        self.front = ETS("1.1.0", transCls=None)
+        self.bus = RecordingBus(self.front)
+        self.link = ShmWorkerLink(self.front, self.up, self.down, self.upBells[0], self.downBells[1])
+
+        self.worker = ETS("1.1.0", addrRange=0, transCls=None, dedupWindow=None, addrAging=None)
+        self.transceiver = ShmTransceiver(self.worker, self.down, self.up, self.downBells[0], self.upBells[1])
+        self.stack = Stack(self.worker, "1.1.5")
+        self.listener = RecordingListener()
+        self.stack.agds.subscribe("1/1/1", self.listener)
+
+    def tearDown(self):
+        self.worker.stop()
+        self.front.stop()
+        for sock in self.downBells + self.upBells:
+            sock.close()
+        self.down.close()
+        self.up.close()
+
+    def test_constructor(self):
+        with self.assertRaises(ShmTransceiverValueError):
+            ShmTransceiver(self.worker, self.down, self.down, self.downBells[0], self.upBells[1])
+
+    def test_announce(self):
+        self.transceiver.announce()
+        self.front.start()
+        self.assertTrue(waitFor(lambda: self.link.addresses))
+        self.assertEqual(self.link.addresses, frozenset((IndividualAddress("1.1.5").raw,)))
+        self.assertIn(IndividualAddress("1.1.5").raw, self.front.localAddresses)
+        self.assertEqual(self.front.subscribedGroups, [GroupAddress("1/1/1")])
+        self.assertNotIn(self.link, self.front.groupMonitors)
+
+    def test_frames(self):
+        self.transceiver.announce()
+        self.front.start()
+        self.worker.start()
+        self.assertTrue(waitFor(lambda: self.link.addresses))
+
+        # Down: only subscribed group addresses reach the worker
+        self.bus.dataReq(makeFrame("1/1/2", 0))
+        self.bus.dataReq(makeFrame("1/1/1", 1))
+        self.assertTrue(waitFor(lambda: self.listener.written))
+        self.assertEqual(self.listener.written, [bytearray(b"\x01")])
+
+        # Up: frames sent by the worker devices reach the bus
+        self.stack.agds.groupValueWriteReq(GroupAddress("1/1/3"), Priority("low"), bytearray(b"\x01"), 0)
+        self.assertTrue(waitFor(lambda: self.bus.sent))
+        self.assertEqual(self.bus.sent[0].destinationAddress, GroupAddress("1/1/3"))
+        self.assertEqual(self.bus.sent[0].sourceAddress, IndividualAddress("1.1.5"))
+
+    def test_peerClosed(self):
+        self.worker.start()
+        self.downBells[1].close()
+        self.assertTrue(self.transceiver.wait(2.))
+        self.assertTrue(self.transceiver.closed)
@@ -0,0 +1,166 @@
+# -*- coding: utf-8 -*-
+
+from pyknyx.stack.transceiver.tunnelServer import *
+import socket
+import unittest
+
+from pyknyx.core.ets import ETS
+from pyknyx.stack.transceiver.tunnelTransceiver import TunnelTransceiver
+from helpers import RecordingBus, makeFrame, waitFor
+
+# Mute logger
+from pyknyx.services.logger import logging
+logger = logging.getLogger(__name__)
+logging.getLogger("pyknyx").setLevel(logging.ERROR)
+
+
+class RawClient(object):
+    """ Minimal KNXnet/IP tunneling client
+    """
+    def __init__(self, port):
+        self.sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self.sock.bind(("127.0.0.1", 0))
+        self.sock.settimeout(1.)
+        self.server = ("127.0.0.1", port)
+        self.channelId = None
+        self.sequence = 0
+
+    def request(self, datagram):
+        self.sock.sendto(datagram, self.server)
+
+    def receive(self, service=None):
+        """ Wait for a datagram (of the given service)
+        """
+        while True:
+            datagram, addr = self.sock.recvfrom(1024)
+            header, body = KNXnetIPStructures.decode(datagram)
+            if service is None or header.service == service:
+                return header, bytes(body)
+
+    def connect(self):
+        self.request(KNXnetIPStructures.connectRequest())
+        header, body = self.receive(KNXnetIPHeader.CONNECT_RES)
+        channelId, status, data, address = KNXnetIPStructures.parseConnectResponse(body)
+        if status == KNXnetIPStructures.E_NO_ERROR:
+            self.channelId = channelId
+        return status, address
+
+    def send(self, cEMI):
+        raw = bytearray(cEMI.frame.raw)
+        raw[0] = CEMILData.MC_LDATA_REQ
+        self.request(KNXnetIPStructures.tunnelingRequest(self.channelId, self.sequence, raw))
+        self.sequence = (self.sequence + 1) & 0xff
+
+    def receiveFrame(self, ack=True):
+        """ Wait for a tunneling request, acknowledge it and return its cEMI frame
+        """
+        header, body = self.receive(KNXnetIPHeader.TUNNELING_REQ)
+        channelId, sequence, status, length = KNXnetIPStructures.parseConnectionHeader(body)
+        if ack:
+            self.request(KNXnetIPStructures.tunnelingAck(channelId, sequence))
+        return sequence, CEMILData(body[length:])
+
+    def close(self):
+        self.sock.close()
+
+
+class TunnelServerTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.ets = ETS("1.2.0", addrRange=10, transCls=None)
+        self.server = TunnelServer(self.ets, localAddr="127.0.0.1", localPort=0,
+                                   tunnelAddrs=("1.2.101", "1.2.102"), ackTimeout=0.2)
+        self.bus = RecordingBus(self.ets)
+        self.ets.start()
+        self.clients = [RawClient(self.server.localPort) for i in range(3)]
+
+    def tearDown(self):
+        self.ets.stop()
+        for client in self.clients:
+            client.close()
+
+    def test_constructor(self):
+        with self.assertRaises(TunnelServerValueError):
+            TunnelServer(self.ets, localPort=0, tunnelAddrs=())
+        with self.assertRaises(TunnelServerValueError):
+            TunnelServer(self.ets, localPort=0, ackTimeout=0)
+        self.assertEqual(self.server.tunnelAddrs, (IndividualAddress("1.2.101"), IndividualAddress("1.2.102")))
+
+    def test_connect(self):
+        client1, client2, client3 = self.clients
+        self.assertEqual(client1.connect(), (KNXnetIPStructures.E_NO_ERROR, IndividualAddress("1.2.101").raw))
+        self.assertEqual(client2.connect(), (KNXnetIPStructures.E_NO_ERROR, IndividualAddress("1.2.102").raw))
+        self.assertEqual(client3.connect()[0], KNXnetIPStructures.E_NO_MORE_CONNECTIONS)
+        self.assertEqual(len(self.server.channels), 2)
+
+        client1.request(KNXnetIPStructures.connectionStateRequest(client1.channelId))
+        header, body = client1.receive(KNXnetIPHeader.CONNECTIONSTATE_RES)
+        self.assertEqual(KNXnetIPStructures.parseChannel(body), (client1.channelId, KNXnetIPStructures.E_NO_ERROR))
+        client1.request(KNXnetIPStructures.connectionStateRequest(99))
+        header, body = client1.receive(KNXnetIPHeader.CONNECTIONSTATE_RES)
+        self.assertEqual(KNXnetIPStructures.parseChannel(body), (99, KNXnetIPStructures.E_CONNECTION_ID))
+
+        client1.request(KNXnetIPStructures.disconnectRequest(client1.channelId))
+        header, body = client1.receive(KNXnetIPHeader.DISCONNECT_RES)
+        self.assertEqual(list(self.server.channels), [client2.channelId])
+        self.assertEqual(client3.connect(), (KNXnetIPStructures.E_NO_ERROR, IndividualAddress("1.2.101").raw))
+
+    def test_fromClient(self):
+        client1, client2 = self.clients[:2]
+        client1.connect()
+        client2.connect()
+        client1.send(makeFrame("1/1/1", 1, src="0.0.0"))
+        header, body = client1.receive(KNXnetIPHeader.TUNNELING_ACK)
+        self.assertEqual(KNXnetIPStructures.parseConnectionHeader(body), (client1.channelId, 0, 0, 4))
+
+        sequence, cEMI = client1.receiveFrame()
+        self.assertEqual(cEMI.messageCode, CEMILData.MC_LDATA_CON)
+        self.assertEqual(cEMI.sourceAddress, IndividualAddress("1.2.101"))
+
+        sequence, cEMI = client2.receiveFrame()
+        self.assertEqual(cEMI.messageCode, CEMILData.MC_LDATA_IND)
+        self.assertEqual(cEMI.sourceAddress, IndividualAddress("1.2.101"))
+
+        self.assertTrue(waitFor(lambda: len(self.bus.sent) == 1))
+        self.assertEqual(self.bus.sent[0].sourceAddress, IndividualAddress("1.2.101"))
+        self.assertEqual(self.bus.sent[0].destinationAddress, GroupAddress("1/1/1"))
+        self.assertEqual(self.bus.sent[0].hopCount, 5)
+
+    def test_toClient(self):
+        client1, client2 = self.clients[:2]
+        client1.connect()
+        client2.connect()
+        self.server.channels[client2.channelId].groupFilter.add(GroupAddress("1/1/2"))
+        self.bus.dataReq(makeFrame("1/1/1", 1))
+        self.bus.dataReq(makeFrame("1/1/2", 0))
+        for expected in (0, 1):
+            sequence, cEMI = client1.receiveFrame()
+            self.assertEqual(sequence, expected)
+            self.assertEqual(cEMI.messageCode, CEMILData.MC_LDATA_IND)
+        self.assertEqual(cEMI.destinationAddress, GroupAddress("1/1/2"))
+        sequence, cEMI = client2.receiveFrame()
+        self.assertEqual((sequence, cEMI.destinationAddress), (0, GroupAddress("1/1/2")))
+
+    def test_ackTimeout(self):
+        client1 = self.clients[0]
+        client1.connect()
+        self.bus.dataReq(makeFrame("1/1/1", 1))
+        self.assertEqual(client1.receiveFrame(ack=False)[0], 0)
+        self.assertEqual(client1.receiveFrame(ack=False)[0], 0)  # repeated
+        client1.receive(KNXnetIPHeader.DISCONNECT_REQ)
+        self.assertEqual(self.server.channels, {})
+
+    def test_tunnelTransceiver(self):
+        ets = ETS("1.3.0", addrRange=10, transCls=TunnelTransceiver,
+                  transParams=dict(serverAddr="127.0.0.1", serverPort=self.server.localPort, ackTimeout=0.2))
+        bus = RecordingBus(ets)
+        ets.start()
+        try:
+            self.assertTrue(waitFor(lambda: ets._tc.connected))
+            bus.dataReq(makeFrame("1/1/1", 1))
+            self.assertTrue(waitFor(lambda: len(self.bus.sent) == 1))
+            self.bus.dataReq(makeFrame("1/1/2", 1))
+            self.assertTrue(waitFor(lambda: len(bus.sent) == 1))
+            self.assertEqual(bus.sent[0].destinationAddress, GroupAddress("1/1/2"))
+        finally:
+            ets.stop()
@@ -0,0 +1,145 @@
+# -*- coding: utf-8 -*-
+
+from pyknyx.stack.transceiver.tunnelTransceiver import *
+import socket
+import threading
+import time
+import unittest
+
+from pyknyx.core.ets import ETS
+from helpers import RecordingBus, makeFrame, waitFor
+
+# Mute logger
+from pyknyx.services.logger import logging
+logger = logging.getLogger(__name__)
+logging.getLogger("pyknyx").setLevel(logging.ERROR)
+
+
+class FakeTunnelServer(object):
+    """ Minimal KNXnet/IP tunneling server
+
+    Acknowledges and records tunneling requests, answers connection management requests.
+    """
+    CHANNEL_ID = 7
+    ADDRESS = IndividualAddress("1.1.250")
+
+    def __init__(self):
+        self.sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self.sock.bind(("127.0.0.1", 0))
+        self.sock.settimeout(0.1)
+        self.port = self.sock.getsockname()[1]
+        self.client = None
+        self.channelId = FakeTunnelServer.CHANNEL_ID
+        self.received = []
+        self.services = []
+        self.dropAcks = 0  # number of requests not to acknowledge
+        self.sendSequence = 0
+        self.running = True
+        self.thread = threading.Thread(target=self.run)
+        self.thread.daemon = True
+        self.thread.start()
+
+    def run(self):
+        while self.running:
+            try:
+                datagram, addr = self.sock.recvfrom(1024)
+            except socket.timeout:
+                continue
+            except socket.error:
+                return
+            header, body = KNXnetIPStructures.decode(datagram)
+            self.services.append(header.service)
+            if header.service == KNXnetIPHeader.CONNECT_REQ:
+                self.client = addr
+                self.sendSequence = 0
+                self.sock.sendto(KNXnetIPStructures.connectResponse(self.channelId, KNXnetIPStructures.E_NO_ERROR,
+                                                                    address=FakeTunnelServer.ADDRESS.raw), addr)
+            elif header.service == KNXnetIPHeader.CONNECTIONSTATE_REQ:
+                channelId, status = KNXnetIPStructures.parseChannel(body)
+                status = KNXnetIPStructures.E_NO_ERROR if channelId == self.channelId else KNXnetIPStructures.E_CONNECTION_ID
+                self.sock.sendto(KNXnetIPStructures.connectionStateResponse(channelId, status), addr)
+            elif header.service == KNXnetIPHeader.DISCONNECT_REQ:
+                channelId, status = KNXnetIPStructures.parseChannel(body)
+                self.sock.sendto(KNXnetIPStructures.disconnectResponse(channelId, KNXnetIPStructures.E_NO_ERROR), addr)
+            elif header.service == KNXnetIPHeader.TUNNELING_REQ:
+                channelId, sequence, status, length = KNXnetIPStructures.parseConnectionHeader(body)
+                if self.dropAcks:
+                    self.dropAcks -= 1
+                    continue
+                self.sock.sendto(KNXnetIPStructures.tunnelingAck(channelId, sequence), addr)
+                self.received.append((sequence, bytes(body[length:])))
+
+    def send(self, cEMI, sequence=None):
+        if sequence is None:
+            sequence = self.sendSequence
+            self.sendSequence = (sequence + 1) & 0xff
+        self.sock.sendto(KNXnetIPStructures.tunnelingRequest(self.channelId, sequence, cEMI.frame.raw), self.client)
+
+    def stop(self):
+        self.running = False
+        self.thread.join(1)
+        self.sock.close()
+
+
+class TunnelTransceiverTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.server = FakeTunnelServer()
+        self.ets = ETS("1.2.0", addrRange=10, transCls=TunnelTransceiver,
+                       transParams=dict(serverAddr="127.0.0.1", serverPort=self.server.port, ackTimeout=0.2))
+        self.tunnel = self.ets._tc
+        self.bus = RecordingBus(self.ets)
+        self.ets.start()
+
+    def tearDown(self):
+        self.ets.stop()
+        self.server.stop()
+
+    def test_constructor(self):
+        with self.assertRaises(TunnelTransceiverValueError):
+            TunnelTransceiver(self.ets, "127.0.0.1", ackTimeout=0)
+
+    def test_connect(self):
+        self.assertTrue(waitFor(lambda: self.tunnel.connected))
+        self.assertEqual(self.tunnel.channelId, FakeTunnelServer.CHANNEL_ID)
+        self.assertEqual(self.tunnel.tunnelAddress, FakeTunnelServer.ADDRESS)
+
+    def test_transmit(self):
+        self.assertTrue(waitFor(lambda: self.tunnel.connected))
+        for i in range(3):
+            self.tunnel.dataInd(makeFrame("1/1/1", i))
+        self.assertTrue(waitFor(lambda: len(self.server.received) == 3))
+        self.assertEqual([sequence for sequence, raw in self.server.received], [0, 1, 2])
+        raw = self.server.received[2][1]
+        self.assertEqual(raw[0], CEMILData.MC_LDATA_REQ)
+        self.assertEqual(raw[-1], 0x82)
+
+    def test_retransmit(self):
+        self.assertTrue(waitFor(lambda: self.tunnel.connected))
+        self.server.dropAcks = 1
+        self.tunnel.dataInd(makeFrame("1/1/1", 1))
+        self.assertTrue(waitFor(lambda: len(self.server.received) == 1))
+        self.assertEqual(self.tunnel.retransmitCount, 1)
+        self.assertEqual(self.server.received[0][0], 0)
+
+    def test_reconnect(self):
+        self.assertTrue(waitFor(lambda: self.tunnel.connected))
+        self.server.dropAcks = 2
+        self.tunnel.dataInd(makeFrame("1/1/1", 1))
+        self.assertTrue(waitFor(lambda: self.tunnel.reconnectCount == 1))
+        self.assertIn(KNXnetIPHeader.DISCONNECT_REQ, self.server.services)
+        self.assertTrue(waitFor(lambda: self.tunnel.connected))
+        self.tunnel.dataInd(makeFrame("1/1/1", 2))
+        self.assertTrue(waitFor(lambda: len(self.server.received) == 1))
+        self.assertEqual(self.server.received[0][0], 0)  # new connection, new sequence
+
+    def test_receive(self):
+        self.assertTrue(waitFor(lambda: self.tunnel.connected))
+        cEMI = makeFrame("1/1/1", 1)
+        self.server.send(cEMI)
+        self.server.send(cEMI, sequence=0)  # repeated
+        self.server.send(makeFrame("1/1/1", 0))
+        self.assertTrue(waitFor(lambda: len(self.bus.sent) == 2))
+        time.sleep(0.1)
+        self.assertEqual(len(self.bus.sent), 2)
+        self.assertEqual(self.bus.sent[0].npdu, cEMI.npdu)
@@ -1,6 +1,12 @@
 # -*- coding: utf-8 -*-
 
 from pyknyx.tools.deviceRunner import *
+from pyknyx.tools.adminUtility import AdminUtility
+import argparse
+import os
+import shutil
+import sys
+import tempfile
 import unittest
 
 # Mute logger
@@ -10,13 +16,51 @@ logging.getLogger("pyknyx").setLevel(logging.ERROR)
 
 
 class DeviceRunnerTestCase(unittest.TestCase):
+    MODULES = ("settings", "device", "smokeFB")
 
     def setUp(self):
-        pass
+        self.cwd = os.getcwd()
+        self.dir = tempfile.mkdtemp()
+        os.chdir(self.dir)
+        AdminUtility()._createDevice(argparse.Namespace(name="smoke", className=None))
+        self.devicePath = os.path.join(self.dir, "smoke", "smoke")
+        self.runner = None
+
+        # Other modules may go by the names of the device modules (tests...)
+        self.modules = dict((name, sys.modules.pop(name)) for name in self.MODULES if name in sys.modules)
 
     def tearDown(self):
-        pass
+        if self.runner is not None:
+            self.runner.ets.stop()
+        os.chdir(self.cwd)
+        shutil.rmtree(self.dir)
+        if self.devicePath in sys.path:
+            sys.path.remove(self.devicePath)
+        for name in self.MODULES:
+            sys.modules.pop(name, None)
+        sys.modules.update(self.modules)
+        logging.getLogger("pyknyx").setLevel(logging.ERROR)
 
     def test_constructor(self):
-        pass
+        self.runner = DeviceRunner("error", self.devicePath, os.path.join(self.dir, "nomap"))
+        self.assertEqual(self.runner.ets.addr, IndividualAddress("1.1.1"))
+        self.assertEqual(logging.getLogger("pyknyx").level, logging.ERROR)
+
+    def test_metrics(self):
+        self.runner = DeviceRunner("error", self.devicePath, os.path.join(self.dir, "nomap"), metricsPort=0)
+        try:
+            self.assertTrue(Metrics().enabled)
+            self.assertTrue(self.runner._metricsServer.port)
+        finally:
+            self.runner._metricsServer.stop()
+            Metrics().enabled = False
+            config.METRICS_PORT = None
+
+    def test_check(self):
+        self.runner = DeviceRunner("error", self.devicePath, os.path.join(self.dir, "nomap"))
+        self.runner.check(printGroat=True)
+        self.assertEqual(self.runner.ets.subscribedGroups, [GroupAddress("1/1/1")])
+
 
+if __name__ == '__main__':
+    unittest.main()